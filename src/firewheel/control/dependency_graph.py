@@ -1,4 +1,5 @@
 import json
+import heapq
 
 import networkx as nx
 from networkx.readwrite import json_graph
@@ -73,17 +74,76 @@ class DependencyGraph:
     Entities are represented using an arbitrary identifier which is returned to
     the caller when they are created. Constraints are represented using strings
     (names).
+
+    The canonical order is cached between calls. Inserting an entity discards
+    the cached order, but associating two entities only does so if the new
+    relationship contradicts the cached order. A lexicographical topological
+    sort is unchanged by adding an edge that its output already satisfies, so
+    the cached order remains valid in that case.
+
+    The set of unsatisfied constraints (those with an in-degree of zero) and
+    whether the graph contains a cycle are also maintained incrementally as
+    entities are inserted and associated, rather than being recomputed from
+    the entire graph. As a result, the graph should only be modified using the
+    methods of this class.
+
+    Two backends are available for computing the canonical order. The
+    ``"networkx"`` backend uses networkx's ``lexicographical_topological_sort``
+    with :py:class:`TopologicalCompare` keys. The ``"compact"`` backend
+    additionally interns every node as an integer, stores the adjacency as
+    lists of integers, and precomputes a tuple sort key for each node so that
+    the heap-based sort only compares tuples. Both backends produce exactly the
+    same ordering. The networkx graph is maintained by both backends, as it is
+    used for exporting the graph and reporting cycles.
     """
 
-    def __init__(self):
+    def __init__(self, backend="networkx"):
         """
         Initialize the dependency graph by creating a new networkx DiGraph.
+
+        Args:
+            backend (str): The backend used to order the graph, either
+                ``"networkx"`` or ``"compact"``. Defaults to ``"networkx"``.
+
+        Raises:
+            ValueError: If the backend is not known.
         """
+        if backend not in ("networkx", "compact"):
+            raise ValueError(f"Unknown dependency graph backend '{backend}'.")
+        self.backend = backend
         self.dg = nx.DiGraph()
 
         self.entity_type = "entity"
         self.constraint_type = "constraint"
 
+        # The cached entity ordering and the position of each entity within it.
+        # These are None when the cache is invalid.
+        self._entity_order = None
+        self._entity_positions = None
+
+        # Constraints which no entity provides, mapped to None. A dictionary is
+        # used to preserve the order in which the constraints were added.
+        self._unsatisfied_constraints = {}
+        # Whether a cycle has been introduced into the graph. Edges are never
+        # removed, so once a cycle exists it remains.
+        self._cyclic = False
+
+        # The compact backend's representation of the graph. Each node is
+        # assigned an index in the order it was added to ``self.dg``, which
+        # matches the tie-breaking order used by networkx.
+        self._node_index = {}
+        self._node_ids = []
+        self._node_keys = []
+        self._node_is_entity = []
+        self._successors = []
+
+    def _invalidate_order(self):
+        """
+        Discard the cached canonical ordering of the graph.
+        """
+        self._entity_order = None
+        self._entity_positions = None
+
     def insert_entity(self, depends, provides, grouping):
         """
         Add an entity to the graph with associated constraints.
@@ -96,16 +156,32 @@ class DependencyGraph:
         Returns:
             int: Identifier for the created entity.
         """
+        self._invalidate_order()
         entity_id = self.dg.number_of_nodes() + 1
         self.dg.add_node(entity_id, type=self.entity_type, grouping=grouping)
+        self._set_compact_node(entity_id, True, grouping)
         for dependency in depends:
-            self.dg.add_edge(dependency, entity_id)
+            if dependency not in self.dg:
+                self._unsatisfied_constraints[dependency] = None
+            self._add_edge(dependency, entity_id)
             self.dg.nodes[dependency]["type"] = self.constraint_type
             self.dg.nodes[dependency]["grouping"] = grouping
+            self._set_compact_node(dependency, False, grouping)
         for provide in provides:
-            self.dg.add_edge(entity_id, provide)
+            self._unsatisfied_constraints.pop(provide, None)
+            self._add_edge(entity_id, provide)
             self.dg.nodes[provide]["type"] = self.constraint_type
             self.dg.nodes[provide]["grouping"] = grouping
+            self._set_compact_node(provide, False, grouping)
+
+        # A new entity can only complete a cycle if one of the constraints it
+        # provides leads back to one of the constraints it depends on.
+        if (
+            not self._cyclic
+            and any(self.dg.in_degree(dependency) for dependency in depends)
+            and any(self.dg.out_degree(provide) for provide in provides)
+        ):
+            self._cyclic = self._is_reachable(provides, entity_id)
 
         return entity_id
 
@@ -130,7 +206,136 @@ class DependencyGraph:
                 raise InvalidNodeError(f"Identifier {dest!s} is not an entity.")
         except KeyError as exp:
             raise InvalidNodeError(f"Identifier {dest!s} does not exist.") from exp
+        if self.dg.has_edge(source, dest):
+            return
+        self._add_edge(source, dest)
+
+        # The cached ordering only needs to be recomputed if the new
+        # relationship is not already satisfied by it. An edge which agrees
+        # with a topological ordering cannot introduce a cycle.
+        if (
+            self._entity_positions is not None
+            and self._entity_positions[source] < self._entity_positions[dest]
+        ):
+            return
+        self._invalidate_order()
+        if not self._cyclic:
+            self._cyclic = self._is_reachable([dest], source)
+
+    def _intern(self, node):
+        """
+        Get the index of a node in the compact backend, adding it if necessary.
+
+        Args:
+            node (str|int): The node ID.
+
+        Returns:
+            int: The index of the node.
+        """
+        try:
+            return self._node_index[node]
+        except KeyError:
+            index = len(self._node_ids)
+            self._node_index[node] = index
+            self._node_ids.append(node)
+            self._node_keys.append(None)
+            self._node_is_entity.append(False)
+            self._successors.append([])
+            return index
+
+    def _set_compact_node(self, node, is_entity, grouping):
+        """
+        Record the type and sort key of a node for the compact backend.
+
+        The key ``(grouping, str(node), index)`` orders nodes in the same way
+        as :py:class:`TopologicalCompare`, with ties broken by the order in which
+        the nodes were added, as networkx does.
+
+        Args:
+            node (str|int): The node ID.
+            is_entity (bool): Whether the node is an entity.
+            grouping (int): The grouping of the node.
+        """
+        if self.backend != "compact":
+            return
+        index = self._intern(node)
+        self._node_is_entity[index] = is_entity
+        self._node_keys[index] = (grouping, str(node), index)
+
+    def _add_edge(self, source, dest):
+        """
+        Add an edge to the graph, if it does not already exist.
+
+        Args:
+            source (str|int): The source node ID.
+            dest (str|int): The destination node ID.
+        """
+        if self.dg.has_edge(source, dest):
+            return
         self.dg.add_edge(source, dest)
+        if self.backend == "compact":
+            self._successors[self._intern(source)].append(self._intern(dest))
+
+    def _compact_topological_sort(self):
+        """
+        Compute the lexicographical topological order of the entities using the
+        compact backend.
+
+        Returns:
+            list: Entity IDs in canonical, dependency-satisfying order.
+
+        Raises:
+            NetworkXUnfeasible: If the graph contains a cycle.
+        """
+        successors = self._successors
+        node_keys = self._node_keys
+        in_degree = [0] * len(successors)
+        for children in successors:
+            for child in children:
+                in_degree[child] += 1
+
+        heap = [
+            node_keys[index] for index, degree in enumerate(in_degree) if not degree
+        ]
+        heapq.heapify(heap)
+        entity_ordering = []
+        visited = 0
+        while heap:
+            index = heapq.heappop(heap)[2]
+            visited += 1
+            if self._node_is_entity[index]:
+                entity_ordering.append(self._node_ids[index])
+            for child in successors[index]:
+                in_degree[child] -= 1
+                if not in_degree[child]:
+                    heapq.heappush(heap, node_keys[child])
+
+        if visited != len(successors):
+            raise nx.NetworkXUnfeasible("Graph contains a cycle.")
+        return entity_ordering
+
+    def _is_reachable(self, sources, target):
+        """
+        Determine if a node can be reached from any of the given nodes.
+
+        Args:
+            sources (list): The nodes from which to start searching.
+            target (str|int): The node to search for.
+
+        Returns:
+            bool: True if `target` is reachable from any node in `sources`.
+        """
+        visited = set(sources)
+        stack = list(visited)
+        while stack:
+            node = stack.pop()
+            if node == target:
+                return True
+            for successor in self.dg.successors(node):
+                if successor not in visited:
+                    visited.add(successor)
+                    stack.append(successor)
+        return False
 
     def get_in_degree_zero_constraints(self):
         """
@@ -139,16 +344,23 @@ class DependencyGraph:
         Returns:
             list: Constraint IDs for constraint vertices with in-degree zero.
         """
-        zero_deg_list = []
+        return [
+            (node_id, self.dg.nodes[node_id]["grouping"])
+            for node_id in self._unsatisfied_constraints
+        ]
+
+    def is_unsatisfied_constraint(self, constraint):
+        """
+        Determine if a constraint is depended on but not provided by any entity
+        (i.e. it has an in-degree of zero).
 
-        for node_id, in_degree in self.dg.in_degree:
-            if (
-                in_degree == 0
-                and self.dg.nodes[node_id]["type"] == self.constraint_type
-            ):
-                zero_deg_list.append((node_id, self.dg.nodes[node_id]["grouping"]))
+        Args:
+            constraint (str): The name of the constraint.
 
-        return zero_deg_list
+        Returns:
+            bool: True if the constraint is unsatisfied.
+        """
+        return constraint in self._unsatisfied_constraints
 
     def topological_compare(self, node):
         """
@@ -183,30 +395,78 @@ class DependencyGraph:
             HasACycle: Occurs if there are cycles.
             UnsatisfiableDependenciesError: Occurs if the graph changes during iteration.
         """
-        entity_ordering = []
+        return list(self._get_entity_order())
+
+    def get_entity_position(self, entity_id):
+        """
+        Get the position of an entity in the canonical order returned by
+        :py:meth:`get_ordered_entity_list`. This does not require recomputing
+        the order unless the graph has changed.
+
+        Args:
+            entity_id (int): Identifier of the entity.
+
+        Returns:
+            int: The position of the entity relative to the other entities.
+
+        Raises:
+            InvalidNodeError: If the entity does not exist.
+        """
+        self._get_entity_order()
+        try:
+            return self._entity_positions[entity_id]
+        except KeyError as exp:
+            raise InvalidNodeError(f"Identifier {entity_id!s} does not exist.") from exp
+
+    def _get_entity_order(self):
+        """
+        Get the cached canonical entity order, computing it if necessary.
+
+        Returns:
+            list: Entity IDs in canonical, dependency-satisfying order.
+
+        Raises:
+            HasACycle: Occurs if there are cycles.
+            UnsatisfiableDependenciesError: Occurs if the graph changes during iteration.
+        """
+        if self._entity_order is not None:
+            return self._entity_order
+
         # Raises UnsatisfiableDependenciesError if there are cycles.
         # Lambda allows ordering of mixed ints and strings by making everything a string.
         try:
-            for node_id in nx.algorithms.lexicographical_topological_sort(
-                self.dg, self.topological_compare
-            ):
-                if self.dg.nodes[node_id]["type"] == self.entity_type:
-                    entity_ordering.append(node_id)
+            if self.backend == "compact":
+                entity_ordering = self._compact_topological_sort()
+            else:
+                entity_ordering = [
+                    node_id
+                    for node_id in nx.algorithms.lexicographical_topological_sort(
+                        self.dg, self.topological_compare
+                    )
+                    if self.dg.nodes[node_id]["type"] == self.entity_type
+                ]
         except nx.NetworkXUnfeasible as exp:
             if self.has_cycles():
                 raise nx.HasACycle from exp
             raise UnsatisfiableDependenciesError from exp
 
+        self._entity_order = entity_ordering
+        self._entity_positions = {
+            node_id: position for position, node_id in enumerate(entity_ordering)
+        }
         return entity_ordering
 
     def has_cycles(self):
         """
         Determine if cycles exist in the graph.
 
+        This is tracked as edges are added, so it does not require searching
+        the entire graph.
+
         Returns:
             bool: True if cycles exist.
         """
-        return not nx.is_directed_acyclic_graph(self.dg)
+        return self._cyclic
 
     def get_graph_json(self):
         """
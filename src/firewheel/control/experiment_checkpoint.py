@@ -0,0 +1,234 @@
+"""
+Checkpoints of the experiment graph taken while building an experiment.
+
+Building the experiment graph runs the plugin of every model component in
+order. For large experiments, the first plugins (e.g. topology generation and
+IP address assignment) can take minutes to run and rarely change between
+iterations. This module stores the :py:class:`ExperimentGraph
+<firewheel.control.experiment_graph.ExperimentGraph>` after each model
+component so that a later run with the same leading model components can load
+the graph and only run the remaining plugins.
+
+Checkpoints are only valid if the plugins have no side effects other than
+modifying the experiment graph, which is why checkpointing is opt-in.
+
+Attributes:
+    MAX_CHECKPOINTS (int): The default maximum number of checkpoints which are
+        kept. The least recently used checkpoints are discarded first.
+    CHECKPOINT_SUFFIX (str): The file extension of a checkpoint.
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+from pathlib import Path
+
+from firewheel.config import config
+from firewheel.control import experiment_graph_serializer
+from firewheel.lib.log import Log
+from firewheel.lib.hash_cache import get_hash_cache
+
+MAX_CHECKPOINTS = 64
+CHECKPOINT_SUFFIX = ".fwg"
+
+
+class ExperimentCheckpointStore:
+    """
+    A directory of serialized experiment graphs (see
+    :py:mod:`firewheel.control.experiment_graph_serializer`), keyed by the model
+    components which produced them.
+
+    The key for the graph produced by the *n*-th model component is a hash
+    that chains together, for each of the first *n* model components, its
+    name, its plugin arguments, and a hash of its source (see
+    :py:meth:`get_source_hash`). Changing any model component therefore
+    invalidates the checkpoints for it and every model component after it,
+    while the checkpoints before it remain usable.
+    """
+
+    def __init__(
+        self,
+        db_basepath=config["system"]["default_output_dir"],
+        dirname="checkpoints",
+        max_checkpoints=MAX_CHECKPOINTS,
+        hash_cache=None,
+    ):
+        """
+        Initialize the checkpoint store.
+
+        Args:
+            db_basepath (str): The base path where the checkpoint directory is
+                created. Defaults to FIREWHEEL's default output directory.
+            dirname (str): The name of the checkpoint directory. Defaults to
+                "checkpoints".
+            max_checkpoints (int): The maximum number of checkpoints to keep.
+            hash_cache (firewheel.lib.hash_cache.HashCache): The cache used to
+                avoid rehashing unchanged model component files. Defaults to the
+                shared cache (see :py:func:`firewheel.lib.hash_cache.get_hash_cache`).
+        """
+        self.log = Log(name="ExperimentCheckpointStore").log
+        self.checkpoint_dir = Path(db_basepath) / dirname
+        self.max_checkpoints = max_checkpoints
+        self.hash_cache = hash_cache if hash_cache is not None else get_hash_cache()
+
+    def get_source_hash(self, model_component):
+        """
+        Hash the source of a model component. This includes every file within
+        the model component's directory (e.g. its ``MANIFEST``, Python files,
+        and any data files which its plugin reads), apart from Python's
+        ``__pycache__`` directories. The hashes of unchanged files are reused
+        from the hash cache, so large files (e.g. images) are only read once.
+
+        Args:
+            model_component (ModelComponent): The model component to hash.
+
+        Returns:
+            str: A hex digest of the model component's source.
+        """
+        mc_path = Path(model_component.path)
+        sources = sorted(
+            path
+            for path in mc_path.rglob("*")
+            if "__pycache__" not in path.relative_to(mc_path).parts and path.is_file()
+        )
+        hasher = hashlib.sha256()
+        for source in sources:
+            hasher.update(str(source.relative_to(mc_path)).encode("utf8"))
+            hasher.update(self.hash_cache.hash_file(str(source)).encode("utf8"))
+        return hasher.hexdigest()
+
+    def get_keys(self, model_components):
+        """
+        Get the checkpoint key for each prefix of an ordered list of model
+        components.
+
+        Args:
+            model_components (list): The ordered list of model components.
+
+        Returns:
+            list: The checkpoint key for the graph produced after each model
+            component.
+        """
+        keys = []
+        key = ""
+        for model_component in model_components:
+            prefix = {
+                "previous": key,
+                "name": model_component.name,
+                "arguments": model_component.arguments,
+                "source": self.get_source_hash(model_component),
+            }
+            serialized = json.dumps(prefix, sort_keys=True, default=str)
+            key = hashlib.sha256(serialized.encode("utf8")).hexdigest()
+            keys.append(key)
+        self.hash_cache.flush()
+        return keys
+
+    def _get_path(self, key):
+        """
+        Get the path of the checkpoint with the given key.
+
+        Args:
+            key (str): The checkpoint key.
+
+        Returns:
+            pathlib.Path: The path of the checkpoint file.
+        """
+        return self.checkpoint_dir / f"{key}{CHECKPOINT_SUFFIX}"
+
+    def find_latest(self, keys):
+        """
+        Find the longest prefix of model components which has a checkpoint.
+
+        Args:
+            keys (list): The checkpoint keys, as returned by :py:meth:`get_keys`.
+
+        Returns:
+            int: The number of model components whose results are captured by
+            the checkpoint, or ``0`` if there is no checkpoint.
+        """
+        for count in range(len(keys), 0, -1):
+            if self._get_path(keys[count - 1]).exists():
+                return count
+        return 0
+
+    def load(self, key):
+        """
+        Load a checkpointed experiment graph.
+
+        Any model component objects used by the graph's decorators must already
+        be imported.
+
+        Note:
+            Loading a serialized graph can execute arbitrary code. The
+            checkpoints are only ever written by this class to a directory
+            controlled by the FIREWHEEL user.
+
+        Args:
+            key (str): The checkpoint key.
+
+        Returns:
+            ExperimentGraph: The experiment graph, or :py:data:`None` if the
+            checkpoint could not be loaded.
+        """
+        path = self._get_path(key)
+        try:
+            with path.open("rb") as checkpoint:
+                graph = experiment_graph_serializer.load(checkpoint)  # nosec
+            # Mark the checkpoint as recently used.
+            os.utime(path)
+        except Exception as exp:  # noqa: BLE001
+            self.log.warning("Unable to load checkpoint %s: %s", path, exp)
+            path.unlink(missing_ok=True)
+            return None
+        return graph
+
+    def save(self, key, graph):
+        """
+        Atomically store a checkpoint of an experiment graph. Failing to store
+        the checkpoint is not fatal.
+
+        Args:
+            key (str): The checkpoint key.
+            graph (ExperimentGraph): The experiment graph to store. Nothing is
+                stored if no plugin has created the graph yet.
+        """
+        if graph is None:
+            return
+        path = self._get_path(key)
+        tmp_path = None
+        try:
+            self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "wb", dir=self.checkpoint_dir, prefix=f".{path.name}.", delete=False
+            ) as tmp_file:
+                tmp_path = Path(tmp_file.name)
+                experiment_graph_serializer.dump(graph, tmp_file)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError) as exp:
+            self.log.warning("Unable to store checkpoint %s: %s", path, exp)
+            if tmp_path is not None:
+                tmp_path.unlink(missing_ok=True)
+            return
+        self.prune()
+
+    def prune(self):
+        """
+        Remove the least recently used checkpoints so that at most
+        ``max_checkpoints`` remain.
+        """
+        checkpoints = sorted(
+            self.checkpoint_dir.glob(f"*{CHECKPOINT_SUFFIX}"),
+            key=lambda path: path.stat().st_mtime_ns,
+        )
+        for path in checkpoints[: max(len(checkpoints) - self.max_checkpoints, 0)]:
+            path.unlink(missing_ok=True)
+
+    def clear(self):
+        """
+        Remove every checkpoint.
+        """
+        for path in self.checkpoint_dir.glob(f"*{CHECKPOINT_SUFFIX}"):
+            path.unlink(missing_ok=True)
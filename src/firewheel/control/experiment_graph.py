@@ -6,6 +6,9 @@ Attributes:
         each MC Object used and the methods/attributes (e.g., :py:func:`dir`) of those objects.
         By caching this, the performance is greatly increased due to fewer calls to
         :py:func:`dir`.
+    CACHED_DECORATION_PLANS (dict): This module-level dictionary caches the attributes
+        which a decorator merges into an object with a given decorator stack. Decorating
+        many objects which share the same stack only resolves those attributes once.
 """
 
 import types
@@ -13,7 +16,10 @@ import pprint
 import random
 import inspect
 import logging
-from multiprocessing import Queue, Process
+import traceback
+import collections.abc
+from array import array
+from multiprocessing import Queue, Process, shared_memory
 
 import networkx as nx
 
@@ -69,11 +75,225 @@ class IncorrectConflictHandlerError(Exception):
     """
 
 
+# A sentinel for an attribute which has not been set.
+_MISSING = object()
+
+# A sentinel for a decorated attribute which conflicts with the instance, and so
+# is resolved by the conflict handlers for each object.
+_CONFLICT = object()
+
+# How a decoration plan merges an attribute which is the same for every object:
+# functions (and other callables) are bound as methods, and other values are set.
+_BIND_METHOD = object()
+_SET_VALUE = object()
+
 # This module-level dictionary enables the caching of each MC Object used
 # and the methods/attributes (e.g. ``dir()`` of those objects. By cacheing
 # this, the performance is greatly increased due to fewer calls to ``dir()``.
 CACHED_DECORATOR_OBJECTS = {}
 
+# This module-level dictionary caches the attributes which a decorator merges
+# into an object of a given "shape" (see ``_get_decoration_plan``).
+CACHED_DECORATION_PLANS = {}
+
+# This module-level dictionary caches ``dir()`` of each decorable class.
+_CACHED_CLASS_DIRS = {}
+
+# This module-level dictionary interns the sets shared by decorable objects.
+_INTERNED_FROZENSETS = {}
+_EMPTY_FROZENSET = frozenset()
+
+
+def _intern_frozenset(items):
+    """
+    Get a shared, immutable set with the given items.
+
+    Thousands of :py:class:`Vertices <Vertex>` and :py:class:`Edges <Edge>`
+    typically have identical decorators and methods/attributes. Sharing a single
+    copy of these sets keeps their memory proportional to the number of distinct
+    decorator stacks rather than the size of the graph.
+
+    Args:
+        items (Iterable): The items of the set.
+
+    Returns:
+        frozenset: The shared set containing ``items``.
+    """
+    items = frozenset(items)
+    return _INTERNED_FROZENSETS.setdefault(items, items)
+
+
+class _SharedSet(collections.abc.MutableSet):
+    """
+    A mutable set of a graph object whose items are stored in a shared, immutable
+    set (see :py:func:`_intern_frozenset`). Modifying the set replaces the shared
+    set of the object, rather than the set shared with other objects. Other
+    :py:class:`set` methods (e.g., ``union``) are those of the shared set.
+    """
+
+    __slots__ = ("_attribute", "_owner")
+
+    def __init__(self, attribute, owner):
+        """
+        Initialize the set.
+
+        Args:
+            attribute (_SharedSetAttribute): The attribute which stores the set.
+            owner (ExperimentGraphDecorable): The object which the set belongs to.
+        """
+        self._attribute = attribute
+        self._owner = owner
+
+    @classmethod
+    def _from_iterable(cls, it):
+        return set(it)
+
+    def _items(self):
+        return self._attribute.get_shared(self._owner)
+
+    def __contains__(self, item):
+        return item in self._items()
+
+    def __iter__(self):
+        return iter(self._items())
+
+    def __len__(self):
+        return len(self._items())
+
+    def __repr__(self):
+        return repr(set(self._items()))
+
+    def __getattr__(self, name):
+        return getattr(self._items(), name)
+
+    def add(self, value):
+        """
+        Add an item to the set.
+
+        Args:
+            value (Any): The item.
+        """
+        items = self._items()
+        if value not in items:
+            self._attribute.__set__(self._owner, items | {value})
+
+    def discard(self, value):
+        """
+        Remove an item from the set, if it is present.
+
+        Args:
+            value (Any): The item.
+        """
+        items = self._items()
+        if value in items:
+            self._attribute.__set__(self._owner, items - {value})
+
+    def update(self, *others):
+        """
+        Add the items of other iterables to the set.
+
+        Args:
+            *others (Iterable): The items to add.
+        """
+        self._attribute.__set__(self._owner, self._items().union(*others))
+
+    def difference_update(self, *others):
+        """
+        Remove the items of other iterables from the set.
+
+        Args:
+            *others (Iterable): The items to remove.
+        """
+        self._attribute.__set__(self._owner, self._items().difference(*others))
+
+    def copy(self):
+        """
+        Returns:
+            set: A copy of the set which does not belong to the object.
+        """
+        return set(self._items())
+
+
+class _SharedSetAttribute:
+    """
+    An attribute of an :py:class:`ExperimentGraphDecorable` which is a set.
+    Thousands of graph objects typically have sets with the same items, so the
+    items are stored in the instance's ``__dict__`` as a shared, immutable set
+    (see :py:func:`_intern_frozenset`). Getting the attribute returns a
+    :py:class:`_SharedSet`, which can be modified like a :py:class:`set`.
+    """
+
+    def __init__(self, default=_MISSING):
+        """
+        Initialize the attribute.
+
+        Args:
+            default (Iterable): The items of the set if it has not been set for
+                an instance.
+        """
+        self.default = default if default is _MISSING else _intern_frozenset(default)
+
+    def __set_name__(self, owner, name):
+        """
+        Record the name of the attribute.
+
+        Args:
+            owner (type): The class which the attribute belongs to.
+            name (str): The name of the attribute.
+        """
+        self.name = name
+
+    def get_shared(self, instance):
+        """
+        Get the shared set of an instance.
+
+        Args:
+            instance (ExperimentGraphDecorable): The instance.
+
+        Returns:
+            frozenset: The items of the set.
+
+        Raises:
+            AttributeError: If the attribute has not been set.
+        """
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            if self.default is _MISSING:
+                raise AttributeError(
+                    f"'{type(instance).__name__}' object has no attribute '{self.name}'"
+                ) from None
+            return self.default
+
+    def __get__(self, instance, owner=None):
+        """
+        Get the set.
+
+        Args:
+            instance (ExperimentGraphDecorable): The instance, or :py:data:`None`
+                if the attribute is accessed on the class.
+            owner (type): The class of the instance.
+
+        Returns:
+            _SharedSet: The set of the instance, or the default set if the
+            attribute is accessed on the class.
+        """
+        if instance is None:
+            return self.default
+        # Check that the attribute has been set.
+        self.get_shared(instance)
+        return _SharedSet(self, instance)
+
+    def __set__(self, instance, value):
+        """
+        Set the items of the set.
+
+        Args:
+            instance (ExperimentGraphDecorable): The instance.
+            value (Iterable): The items of the set.
+        """
+        instance.__dict__[self.name] = _intern_frozenset(value)
+
 
 class ExperimentGraphDecorable:
     """
@@ -164,11 +384,53 @@ class ExperimentGraphDecorable:
                 raise IncorrectConflictHandlerError
     """
 
+    # We want to ignore most of the built-in methods for functionality reasons
+    # and performance reasons. This is shared by every instance.
+    skip_set = _SharedSetAttribute(
+        {
+            "__class__",
+            "__doc__",
+            "__delattr__",
+            "__dict__",
+            "__dir__",
+            "__eq__",
+            "__firstlineno__",  # New in 3.13
+            "__format__",
+            "__ge__",
+            "__getattribute__",
+            "__getstate__",
+            "__gt__",
+            "__hash__",
+            "__init__",
+            "__init_subclass__",
+            "__le__",
+            "__lt__",
+            "__module__",
+            "__ne__",
+            "__new__",
+            "__reduce__",
+            "__reduce_ex__",
+            "__setattr__",
+            "__sizeof__",
+            "__static_attributes__",  # New in 3.13
+            "__subclasshook__",
+            "__weakref__",
+        }
+    )
+    decorators = _SharedSetAttribute()
+    cached_self_dir = _SharedSetAttribute()
+
     def __init__(self):
         """
         Initialize an empty list of decorators and also a list of methods
         to skip.
 
+        Objects with the same items in ``decorators``, ``skip_set`` and
+        ``cached_self_dir`` share a single copy of each set (see
+        :py:class:`_SharedSetAttribute`), which greatly reduces the memory used by
+        large graphs. The sets can still be modified like any other :py:class:`set`,
+        which only affects the modified object.
+
         Attributes:
             decorators (set): A set of decorators (initially empty).
             skip_set (set): A set of methods to skip/ignore.
@@ -191,50 +453,34 @@ class ExperimentGraphDecorable:
                 are ``__str__`` and ``__repr__``.
                 Perhaps a starting document is:
                 https://docs.python.org/3/howto/descriptor.html
-            cached_self_dir (set): A set of methods/attributes for the current object.
-                by initializing this set in the ``__init__`` function and then adding
-                to it with each decoration, we can reduce the number of calls to
+            cached_self_dir (set): A set of methods/attributes for the current
+                object. By initializing this set in the ``__init__`` function and then
+                adding to it with each decoration, we can reduce the number of calls to
                 :py:func:`dir`, which is an expensive operation.
-
-
         """
-        self.decorators = set()
+        # The shared sets are stored directly, which is faster than setting them.
+        state = self.__dict__
+        state["decorators"] = _EMPTY_FROZENSET
         self.conflict_handlers = []
 
-        # We want to ignore most of the built-in methods for functionality reasons
-        # and performance reasons.
-        self.skip_set = {
-            "__class__",
-            "__doc__",
-            "__delattr__",
-            "__dict__",
-            "__dir__",
-            "__eq__",
-            "__firstlineno__",  # New in 3.13
-            "__format__",
-            "__ge__",
-            "__getattribute__",
-            "__getstate__",
-            "__gt__",
-            "__hash__",
-            "__init__",
-            "__init_subclass__",
-            "__le__",
-            "__lt__",
-            "__module__",
-            "__ne__",
-            "__new__",
-            "__reduce__",
-            "__reduce_ex__",
-            "__setattr__",
-            "__sizeof__",
-            "__static_attributes__",  # New in 3.13
-            "__subclasshook__",
-            "__weakref__",
-        }
-
         # Initialize the current object's methods/attributes
-        self.cached_self_dir = set(dir(self))
+        state["cached_self_dir"] = _intern_frozenset(self._get_self_dir())
+
+    def _get_self_dir(self):
+        """
+        Get the methods/attributes of the current object which a decorator
+        cannot define without a conflict handler.
+
+        Returns:
+            set: The names of the methods/attributes of the current object.
+        """
+        # ``dir()`` of an instance is the ``dir()`` of its class plus its
+        # instance attributes, so only the class-level part is cached.
+        try:
+            class_dir = _CACHED_CLASS_DIRS[type(self)]
+        except KeyError:
+            class_dir = _CACHED_CLASS_DIRS[type(self)] = frozenset(dir(type(self)))
+        return self.__dict__.keys() | class_dir
 
     # pylint: disable=unnecessary-dunder-call
     def decorate(
@@ -332,7 +578,9 @@ class ExperimentGraphDecorable:
         This is a performance improvement as :py:func:`dir()` is an expensive
         operation and will no longer need to be called for each instance of the same object.
         This will only have minor memory impacts as most experiments use only a handful
-        of different MC Objects types.
+        of different MC Objects types. Similarly, the attributes resolved for a
+        given decorator stack are cached by :py:meth:`_get_decoration_plan`, so
+        decorating many objects with the same stack only needs to bind them.
 
         Args:
             decorator_class (object): The model component object which will
@@ -362,118 +610,30 @@ class ExperimentGraphDecorable:
         if not inspect.isclass(decorator_class):
             raise TypeError("Decorator must be a class.")
 
-        # We keep a module-level dictionary of all the MC objects and their methods/attributes.
-        # This is a performance improvement as ``dir()`` is an expensive operation and will
-        # no longer need to be called for each instance of the same object.
-        # This will only have minor memory impacts as most experiments use less than
-        # 100 different MC Objects.
-        try:
-            decorator_entries = CACHED_DECORATOR_OBJECTS[decorator_class.__name__]
-        except KeyError:
-            CACHED_DECORATOR_OBJECTS[decorator_class.__name__] = set(
-                dir(decorator_class)
-            )
-            decorator_entries = CACHED_DECORATOR_OBJECTS[decorator_class.__name__]
-
-        decorator_entries -= self.skip_set
+        # Conflicts are resolved using the methods which are already bound.
+        self._bind_pending_methods()
 
         if conflict_handler is not None:
             # add to beginning of list so it gets used first
             self.conflict_handlers.insert(0, conflict_handler)
 
-        for entry in decorator_entries:
-            if entry in {"__str__"}:
-                # We want to ensure that these more common dunder methods have not been customized.
-                # If they have been, then we will need a conflict handler.
-                #
-                # It is important to note that we are using `getattr` rather than
-                # `inspect.getattr_static`. If an Object sets one of these methods
-                # using descriptor's that code will be executed and may differ.
-                # This decision was made because 1. The chances of using descriptor to set
-                # one of these methods is rare when creating a FIREWHEEL Model Component Object
-                # and 2. `getattr` is significantly faster than `inspect.getattr_static`.
-                # The performance hit from using inspect is dramatic when you consider each
-                # Vertex may be decorated numerous times and there may be thousands of
-                # Verticies/Edges in the graph.
-                #
-                # Here is a `timeit` comparison from Python 3.8:
-                # >>> import timeit
-                # >>> timeit.timeit("getattr(object, '__str__')")
-                # 0.10375281400047243
-                # >>> timeit.timeit(
-                # ... "inspect.getattr_static(object, '__str__')",
-                # ... setup="import inspect"
-                # ... )
-                # 1.9434310980141163
-                #
-                # Now that we use `getattr` to identify an object's attribute, we need to compare
-                # it to a "default" object. There are a few methods for doing this:
-                # `object.__getattribute__(object, entry)`, `getattr(object, entry)`, and
-                # `object.<entry>`. In Python 3.12, the return value of
-                # `object.__getattribute__(object, entry)` changed.
-                #
-                # Python 3.12
-                # >>> object.__getattribute__(object, "__str__")
-                # <method-wrapper '__str__' of type object at 0x107eb41c0>
-                #
-                # Python 3.11
-                # >>> object.__getattribute__(object, "__str__")
-                # <slot wrapper '__str__' of 'object' objects>
-                #
-                # Therefore, we need to use one of the second methods. In this case using
-                # `object.<entry>` is faster per `timeit`.
-                #
-                # Python 3.12
-                # >>> import timeit
-                # >>> timeit.timeit("getattr(object, '__str__')")
-                # 0.058882773970253766
-                # >>> timeit.timeit("object.__str__")
-                # 0.03296143497573212
-                #
-                if getattr(decorator_class, entry) == object.__str__:  # noqa: PLC2801
-                    continue
-                self.log.debug("Default method %s changed", entry)
-            elif entry in {"__repr__"}:
-                if getattr(decorator_class, entry) == object.__repr__:
-                    continue
-                self.log.debug("Default method %s changed", entry)
+        entries, names, self_dir = self._get_decoration_plan(decorator_class)
+        added_names = []
+        for entry, attr, merge in entries:
+            if merge is _BIND_METHOD:
+                setattr(self, entry, types.MethodType(attr, self))
+                continue
+            if merge is _SET_VALUE:
+                setattr(self, entry, attr)
+                continue
 
-            if entry == "_conflict_handlers":
+            if attr is _CONFLICT:
+                attr = self._resolve_conflict(decorator_class, entry)
+            elif entry == "_conflict_handlers":
                 attr = inspect.getattr_static(
                     decorator_class, entry, []
                 ) + inspect.getattr_static(self, entry, [])
 
-            elif entry in self.cached_self_dir:
-                handlers = (
-                    self.conflict_handlers
-                    + inspect.getattr_static(decorator_class, "_conflict_handlers", [])
-                    + inspect.getattr_static(self, "conflict_handlers", [])
-                )
-                for handler in handlers:
-                    try:
-                        attr = handler(
-                            entry,
-                            inspect.getattr_static(decorator_class, entry),
-                            inspect.getattr_static(self, entry),
-                        )
-                        if attr is None:
-                            continue
-                        break
-                    except IncorrectConflictHandlerError:
-                        pass
-
-                else:
-                    dec_names = {d.__name__ for d in self.decorators}
-                    raise DecoratorConflictError(
-                        f"Unable to merge '{entry}' because it occurs in one of: "
-                        f"{dec_names} and '{decorator_class.__name__}'. "
-                        "Please specify a conflict handler or rename the attribute."
-                        " This may also occur if the attribute value is intended "
-                        "to be :py:data:`None`."
-                    )
-            else:
-                attr = decorator_class.__getattribute__(decorator_class, entry)  # noqa: PLC2801
-
             # It turns out that in a class, what will be considered methods
             # when instantiated are still functions internally. We must bind
             # these functions as methods to our current instance.
@@ -549,18 +709,309 @@ class ExperimentGraphDecorable:
             # We need to catch an AttributeError because class attributes do not have
             # a ``__name__``, but methods do.
             try:
-                self.cached_self_dir.add(attr.__name__)
+                added_names.append(attr.__name__)
             except AttributeError:
-                self.cached_self_dir.add(entry)
+                added_names.append(entry)
+
+        if self_dir is None:
+            self_dir = _intern_frozenset(
+                self.__dict__["cached_self_dir"].union(names, added_names)
+            )
+        self.__dict__["cached_self_dir"] = self_dir
 
-        self.decorators.add(decorator_class)
+        self._add_decorator(decorator_class)
 
         # We need to make sure attributes initialized by the decorator's
         # __init__ method are correctly handled. The best way to do this is to
         # actually call the decorator's __init__. By giving it the decoratee's
         # self, it will deal with values on the correct instance.
         init = decorator_class.__getattribute__(decorator_class, "__init__")  # noqa: PLC2801
-        init(self, *init_args, **init_kwargs)
+        journal = self._get_journal()
+        if journal is None:
+            init(self, *init_args, **init_kwargs)
+        else:
+            journal.start_decoration(self)
+            try:
+                init(self, *init_args, **init_kwargs)
+            finally:
+                journal.finish_decoration()
+            journal.decorated(
+                self, decorator_class, init_args, init_kwargs, conflict_handler
+            )
+
+    def _get_decoration_plan(self, decorator_class):
+        """
+        Get the attributes which a decorator will merge into this object.
+
+        Resolving a decorator's attributes (apart from those which conflict with
+        this object) only depends on the "shape" of this object: its type, its
+        decorators, and its known methods/attributes. Thousands of
+        :py:class:`Vertices <Vertex>` typically share the same decorator stack, so
+        the resolved plan is cached in :py:data:`CACHED_DECORATION_PLANS
+        <firewheel.control.experiment_graph.CACHED_DECORATION_PLANS>`
+        and reused by later decorations of the same shape. The plan only records
+        which attributes conflict, as the conflict handlers are given the value of
+        each object (see :py:meth:`_resolve_conflict`).
+
+        Args:
+            decorator_class (object): The model component object which will
+                decorate the :py:class:`Vertex`/:py:class:`Edge`.
+
+        Returns:
+            tuple: The plan from :py:meth:`_build_decoration_plan`.
+        """
+        state = self.__dict__
+        key = (
+            type(self),
+            decorator_class,
+            state["decorators"],
+            state["cached_self_dir"],
+            state.get("skip_set"),
+        )
+        try:
+            return CACHED_DECORATION_PLANS[key]
+        except KeyError:
+            plan = CACHED_DECORATION_PLANS[key] = self._build_decoration_plan(
+                decorator_class
+            )
+        return plan
+
+    # pylint: disable=unnecessary-dunder-call
+    def _build_decoration_plan(self, decorator_class):
+        """
+        Resolve the attributes which a decorator will merge into this object.
+        See :py:meth:`decorate` for details on how attributes are merged.
+
+        Most attributes are merged in the same way into every object with this
+        "shape", so how to merge them (and the resulting
+        :py:attr:`cached_self_dir`) is worked out once, here. Only attributes
+        which conflict with the instance, descriptors and the conflict handlers
+        are merged by :py:meth:`decorate` for each object.
+
+        Args:
+            decorator_class (object): The model component object which will
+                decorate the :py:class:`Vertex`/:py:class:`Edge`.
+
+        Returns:
+            tuple: ``(entry, value, merge)`` triples for each attribute which
+            should be bound to this object (where ``merge`` is ``_BIND_METHOD``,
+            ``_SET_VALUE`` or :py:data:`None` if it depends on the object, and
+            ``value`` is ``_CONFLICT`` if the attribute conflicts with the object),
+            the names which the attributes add to :py:attr:`cached_self_dir`, and
+            the resulting :py:attr:`cached_self_dir` (or :py:data:`None` if it
+            depends on the object).
+        """
+        # We keep a module-level dictionary of all the MC objects and their methods/attributes.
+        # This is a performance improvement as ``dir()`` is an expensive operation and will
+        # no longer need to be called for each instance of the same object.
+        # This will only have minor memory impacts as most experiments use less than
+        # 100 different MC Objects.
+        try:
+            decorator_entries = CACHED_DECORATOR_OBJECTS[decorator_class]
+        except KeyError:
+            decorator_entries = CACHED_DECORATOR_OBJECTS[decorator_class] = set(
+                dir(decorator_class)
+            )
+
+        state = self.__dict__
+        self_dir = state["cached_self_dir"]
+        plan = []
+        for entry in decorator_entries - state.get("skip_set", type(self).skip_set):
+            if entry in {"__str__"}:
+                # We want to ensure that these more common dunder methods have not been customized.
+                # If they have been, then we will need a conflict handler.
+                #
+                # It is important to note that we are using `getattr` rather than
+                # `inspect.getattr_static`. If an Object sets one of these methods
+                # using descriptor's that code will be executed and may differ.
+                # This decision was made because 1. The chances of using descriptor to set
+                # one of these methods is rare when creating a FIREWHEEL Model Component Object
+                # and 2. `getattr` is significantly faster than `inspect.getattr_static`.
+                # The performance hit from using inspect is dramatic when you consider each
+                # Vertex may be decorated numerous times and there may be thousands of
+                # Verticies/Edges in the graph.
+                #
+                # Here is a `timeit` comparison from Python 3.8:
+                # >>> import timeit
+                # >>> timeit.timeit("getattr(object, '__str__')")
+                # 0.10375281400047243
+                # >>> timeit.timeit(
+                # ... "inspect.getattr_static(object, '__str__')",
+                # ... setup="import inspect"
+                # ... )
+                # 1.9434310980141163
+                #
+                # Now that we use `getattr` to identify an object's attribute, we need to compare
+                # it to a "default" object. There are a few methods for doing this:
+                # `object.__getattribute__(object, entry)`, `getattr(object, entry)`, and
+                # `object.<entry>`. In Python 3.12, the return value of
+                # `object.__getattribute__(object, entry)` changed.
+                #
+                # Python 3.12
+                # >>> object.__getattribute__(object, "__str__")
+                # <method-wrapper '__str__' of type object at 0x107eb41c0>
+                #
+                # Python 3.11
+                # >>> object.__getattribute__(object, "__str__")
+                # <slot wrapper '__str__' of 'object' objects>
+                #
+                # Therefore, we need to use one of the second methods. In this case using
+                # `object.<entry>` is faster per `timeit`.
+                #
+                # Python 3.12
+                # >>> import timeit
+                # >>> timeit.timeit("getattr(object, '__str__')")
+                # 0.058882773970253766
+                # >>> timeit.timeit("object.__str__")
+                # 0.03296143497573212
+                #
+                if getattr(decorator_class, entry) == object.__str__:  # noqa: PLC2801
+                    continue
+                self.log.debug("Default method %s changed", entry)
+            elif entry in {"__repr__"}:
+                if getattr(decorator_class, entry) == object.__repr__:
+                    continue
+                self.log.debug("Default method %s changed", entry)
+
+            if entry == "_conflict_handlers":
+                # The conflict handlers are merged for each object.
+                attr = None
+            elif entry in self_dir:
+                attr = _CONFLICT
+            else:
+                attr = decorator_class.__getattribute__(decorator_class, entry)  # noqa: PLC2801
+
+            plan.append((entry, attr))
+
+        entries = []
+        names = []
+        static = True
+        for entry, attr in plan:
+            if attr is _CONFLICT or entry == "_conflict_handlers":
+                merge = None
+            elif callable(attr):
+                merge = _BIND_METHOD
+            elif not hasattr(attr, "__get__"):
+                merge = _SET_VALUE
+            else:
+                # Descriptors are resolved for each object.
+                merge = None
+            if merge is None:
+                static = False
+            else:
+                names.append(getattr(attr, "__name__", entry))
+            entries.append((entry, attr, merge))
+
+        self_dir = _intern_frozenset(self_dir.union(names)) if static else None
+        return entries, names, self_dir
+
+    def _resolve_conflict(self, decorator_class, entry):
+        """
+        Resolve an attribute of a decorator which this object already has, using
+        the conflict handlers (see :py:class:`ExperimentGraphDecorable`). The
+        handlers are run for each object, as they are given its current value.
+
+        Args:
+            decorator_class (object): The model component object which is
+                decorating the :py:class:`Vertex`/:py:class:`Edge`.
+            entry (str): The name of the conflicting attribute.
+
+        Returns:
+            Any: The merged value of the attribute.
+
+        Raises:
+            DecoratorConflictError: If no conflict handler can merge the attribute.
+        """
+        handlers = (
+            self.conflict_handlers
+            + inspect.getattr_static(decorator_class, "_conflict_handlers", [])
+            + inspect.getattr_static(self, "conflict_handlers", [])
+        )
+        for handler in handlers:
+            try:
+                attr = handler(
+                    entry,
+                    inspect.getattr_static(decorator_class, entry),
+                    self._get_static_attribute(entry),
+                )
+                if attr is None:
+                    continue
+                return attr
+            except IncorrectConflictHandlerError:
+                pass
+
+        dec_names = {d.__name__ for d in self.decorators}
+        raise DecoratorConflictError(
+            f"Unable to merge '{entry}' because it occurs in one of: "
+            f"{dec_names} and '{decorator_class.__name__}'. "
+            "Please specify a conflict handler or rename the attribute."
+            " This may also occur if the attribute value is intended "
+            "to be :py:data:`None`."
+        )
+
+    @classmethod
+    def _create_many(cls, attributes):
+        """
+        Create many instances of the class without calling ``__init__``, for the
+        bulk constructors of :py:class:`ExperimentGraph`. Each instance starts with
+        the state set by :py:meth:`ExperimentGraphDecorable.__init__`, which is
+        only computed once, plus its own attributes.
+
+        Args:
+            attributes (Iterable): A dictionary of instance attributes for each
+                new instance.
+
+        Returns:
+            list: The new instances.
+        """
+        template = cls.__new__(cls)
+        ExperimentGraphDecorable.__init__(template)
+        instances = []
+        for instance_attributes in attributes:
+            instance = cls.__new__(cls)
+            state = instance.__dict__
+            state.update(template.__dict__)
+            # The conflict handlers are the only mutable part of the initial state.
+            state["conflict_handlers"] = []
+            state.update(instance_attributes)
+            instances.append(instance)
+        return instances
+
+    def _get_static_attribute(self, name):
+        """
+        Get the value of an attribute of this object without calling any
+        descriptors (see :py:func:`inspect.getattr_static`). This is the value
+        which a conflict handler is given for the current instance.
+
+        Args:
+            name (str): The name of the attribute.
+
+        Returns:
+            Any: The value of the attribute.
+        """
+        return inspect.getattr_static(self, name)
+
+    def _get_journal(self):
+        """
+        Get the journal which records the changes made to this object (see
+        :py:class:`ExperimentGraphJournal
+        <firewheel.control.experiment_graph_journal.ExperimentGraphJournal>`).
+
+        Returns:
+            ExperimentGraphJournal: The journal of the object's graph, or
+            :py:data:`None` if the changes are not recorded.
+        """
+        return None
+
+    def _add_decorator(self, decorator_class):
+        """
+        Record that this object has been decorated by a class.
+
+        Args:
+            decorator_class (Object): The model component object which was applied.
+        """
+        state = self.__dict__
+        state["decorators"] = _intern_frozenset(state["decorators"] | {decorator_class})
 
     def is_decorated_by(self, decorator_class):
         """
@@ -573,10 +1024,48 @@ class ExperimentGraphDecorable:
             bool: ``True`` if the :py:class:`Vertex`/:py:class:`Edge` was decorated
             by the passed in class, ``False`` otherwise.
         """
-        return decorator_class in self.decorators
+        return decorator_class in self.__dict__["decorators"]
+
+    def __getattr__(self, name):
+        """
+        Bind a decorator method the first time it is used. Objects loaded by
+        :py:mod:`firewheel.control.experiment_graph_serializer` record their
+        decorator methods as ``_pending_methods`` rather than binding them all
+        up front. This is only called if the normal attribute lookup fails.
+
+        Args:
+            name (str): The name of the attribute.
+
+        Returns:
+            types.MethodType: The newly bound decorator method.
+
+        Raises:
+            AttributeError: If the object has no such attribute.
+        """
+        try:
+            func = self.__dict__["_pending_methods"][name]
+        except KeyError:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            ) from None
+        method = self.__dict__[name] = types.MethodType(func, self)
+        return method
+
+    def _bind_pending_methods(self):
+        """
+        Bind every decorator method which has not been bound yet
+        (see :py:meth:`__getattr__`).
+        """
+        pending = self.__dict__.pop("_pending_methods", None)
+        if pending:
+            for name, func in pending.items():
+                if name not in self.__dict__:
+                    self.__dict__[name] = types.MethodType(func, self)
 
     def __getstate__(self):
         state = self.__dict__.copy()
+        # Unpickling re-binds all decorator methods.
+        state.pop("_pending_methods", None)
 
         to_delete = []
         for key in state:
@@ -591,11 +1080,19 @@ class ExperimentGraphDecorable:
         return state
 
     def __setstate__(self, state):
-        self.decorators = set()
-        self.skip_set = state["skip_set"]
-        self.cached_self_dir = set(dir(self))
+        attributes = self.__dict__
+        attributes["decorators"] = _EMPTY_FROZENSET
+        self.conflict_handlers = list(state.get("conflict_handlers", []))
+        # Older graphs stored a copy of the skip set in every instance.
+        default_skip_set = type(self).skip_set
+        skip_set = _intern_frozenset(state.pop("skip_set", default_skip_set))
+        if skip_set != default_skip_set:
+            attributes["skip_set"] = state["skip_set"] = skip_set
+        attributes["cached_self_dir"] = _intern_frozenset(self._get_self_dir())
         for decorator in state["decorators"]:
-            self.decorate(decorator)
+            # Decorators may have already applied their dependencies.
+            if not self.is_decorated_by(decorator):
+                self.decorate(decorator)
 
         if "log" in state:
             state["log"] = logging.getLogger(state["log"])
@@ -608,7 +1105,9 @@ class ExperimentGraphDecorable:
         for key in to_delete:
             del self.__dict__[key]
 
-        self.__dict__.update(state)
+        attributes.update(state)
+        attributes["decorators"] = _intern_frozenset(attributes["decorators"])
+        attributes["cached_self_dir"] = _intern_frozenset(attributes["cached_self_dir"])
 
 
 # pylint: disable=invalid-name
@@ -668,19 +1167,103 @@ class require_class:  # noqa: N801
                         f'decorating with "{graph_object.__name__}".'
                     ) from exc
 
-        def new_init(self, *args, **kwargs):
-            assure_decorated(self, req_dec, conflict_handler)
-            original_init(self, *args, **kwargs)
+        def new_init(self, *args, **kwargs):
+            assure_decorated(self, req_dec, conflict_handler)
+            original_init(self, *args, **kwargs)
+
+        if self.conflict_handler is not None:
+            if hasattr(graph_object, "_conflict_handlers"):
+                graph_object._conflict_handlers.append(self.conflict_handler)
+            else:
+                graph_object._conflict_handlers = [self.conflict_handler]
+
+        graph_object.__init__ = new_init
+
+        return graph_object
+
+
+class IndexedAttribute:
+    """
+    A :py:class:`Vertex` attribute whose values are indexed by the
+    :py:class:`ExperimentGraph`, so that vertices can be found by value without
+    scanning the graph. The value is stored in the instance's ``__dict__``, so the
+    attribute otherwise behaves (and pickles) like a normal instance attribute.
+    """
+
+    def __set_name__(self, owner, name):
+        """
+        Record the name of the attribute.
+
+        Args:
+            owner (type): The class which the attribute belongs to.
+            name (str): The name of the attribute.
+        """
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        """
+        Get the value of the attribute.
+
+        Args:
+            instance (Vertex): The :py:class:`Vertex`, or :py:data:`None` if the
+                attribute is accessed on the class.
+            owner (type): The class of the :py:class:`Vertex`.
 
-        if self.conflict_handler is not None:
-            if hasattr(graph_object, "_conflict_handlers"):
-                graph_object._conflict_handlers.append(self.conflict_handler)
-            else:
-                graph_object._conflict_handlers = [self.conflict_handler]
+        Returns:
+            Any: The value of the attribute.
 
-        graph_object.__init__ = new_init
+        Raises:
+            AttributeError: If the attribute has not been set.
+        """
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(
+                f"'{type(instance).__name__}' object has no attribute '{self.name}'"
+            ) from None
 
-        return graph_object
+    def __set__(self, instance, value):
+        """
+        Set the value of the attribute and update the index of the graph.
+
+        Args:
+            instance (Vertex): The :py:class:`Vertex`.
+            value (Any): The new value of the attribute.
+        """
+        graph = instance.__dict__.get("g")
+        if graph is not None and instance.__dict__.get("valid"):
+            graph._index_vertex(
+                self.name,
+                instance.graph_id,
+                instance.__dict__.get(self.name, _MISSING),
+                value,
+            )
+            if graph.journal is not None:
+                graph.journal.attribute_set(instance, self.name, value)
+        instance.__dict__[self.name] = value
+
+    def __delete__(self, instance):
+        """
+        Remove the attribute and its entry in the index of the graph.
+
+        Args:
+            instance (Vertex): The :py:class:`Vertex`.
+
+        Raises:
+            AttributeError: If the attribute has not been set.
+        """
+        if self.name not in instance.__dict__:
+            raise AttributeError(self.name)
+        graph = instance.__dict__.get("g")
+        if graph is not None and instance.__dict__.get("valid"):
+            graph._index_vertex(
+                self.name, instance.graph_id, instance.__dict__[self.name], _MISSING
+            )
+            if graph.journal is not None:
+                graph.journal.attribute_deleted(instance, self.name)
+        del instance.__dict__[self.name]
 
 
 class Vertex(ExperimentGraphDecorable):
@@ -692,6 +1275,11 @@ class Vertex(ExperimentGraphDecorable):
 
     vertex_log = Log(name="ExperimentGraphVertex").log
 
+    # Attributes which are indexed by the graph (see :py:class:`IndexedAttribute`).
+    name = IndexedAttribute()
+    type = IndexedAttribute()
+    indexed_attributes = ("name", "type")
+
     def __init__(self, graph, name=None, graph_id=None):
         """
         Initialize the :py:class:`Vertex`.
@@ -721,6 +1309,66 @@ class Vertex(ExperimentGraphDecorable):
         if name:
             self.name = name
 
+    def _get_self_dir(self):
+        """
+        Get the methods/attributes of the current object which a decorator
+        cannot define without a conflict handler. Indexed attributes are only
+        included once they have been set, just like other instance attributes.
+
+        Returns:
+            set: The names of the methods/attributes of the current object.
+        """
+        return (
+            super()
+            ._get_self_dir()
+            .difference(
+                attr for attr in self.indexed_attributes if attr not in self.__dict__
+            )
+        )
+
+    def _get_static_attribute(self, name):
+        """
+        Get the value of an attribute of this :py:class:`Vertex` without calling
+        any descriptors. The values of indexed attributes are stored in the
+        instance, so they are returned instead of their :py:class:`IndexedAttribute`.
+
+        Args:
+            name (str): The name of the attribute.
+
+        Returns:
+            Any: The value of the attribute.
+        """
+        if name in self.indexed_attributes and name in self.__dict__:
+            return self.__dict__[name]
+        return super()._get_static_attribute(name)
+
+    def _get_journal(self):
+        """
+        Get the journal of the graph which contains this :py:class:`Vertex`.
+
+        Returns:
+            ExperimentGraphJournal: The journal of the graph, or :py:data:`None`
+            if the changes are not recorded or the :py:class:`Vertex` is not
+            :py:attr:`Vertex.valid`.
+        """
+        graph = self.__dict__.get("g")
+        if graph is not None and self.__dict__.get("valid"):
+            return graph.journal
+        return None
+
+    def _add_decorator(self, decorator_class):
+        """
+        Record that this :py:class:`Vertex` has been decorated by a class and add
+        it to the graph's index of decorated vertices.
+
+        Args:
+            decorator_class (Object): The model component object which was applied.
+        """
+        super()._add_decorator(decorator_class)
+        graph = self.__dict__.get("g")
+        if graph is not None and self.__dict__.get("valid"):
+            graph._decorator_index.setdefault(decorator_class, {})[self.graph_id] = None
+
     def get_object(self):
         """
         Get the :py:class:`Vertex` object attribute (i.e. ``self``).
@@ -780,6 +1428,8 @@ class Vertex(ExperimentGraphDecorable):
         if not self.valid:
             raise RuntimeError("Attempted operation on invalid Vertex instance.")
         self.g.g.nodes[self.graph_id][key] = value
+        if self.g.journal is not None:
+            self.g.journal.item_set(self, key, value)
 
     def has(self, key):
         """
@@ -914,13 +1564,20 @@ class Vertex(ExperimentGraphDecorable):
         if not self.valid:
             raise RuntimeError("Attempted operation on invalid Vertex instance.")
         del self.g.g.nodes[self.graph_id][key]
+        if self.g.journal is not None:
+            self.g.journal.item_deleted(self, key)
 
     def delete(self):
         """
         Remove this :py:class:`Vertex` from the ExperimentGraph.
         This sets the :py:attr:`Vertex.valid` property to ``False``.
         """
+        self.g._structure_changed(vertex_removed=True)
         self.g.g.remove_node(self.graph_id)
+        if self.valid:
+            self.g._unindex_vertex(self)
+            if self.g.journal is not None:
+                self.g.journal.vertex_deleted(self.graph_id)
         self.valid = False
 
     def get_degree(self):
@@ -1092,6 +1749,20 @@ class Edge(ExperimentGraphDecorable):
 
         self.log = self.edge_log
 
+    def _get_journal(self):
+        """
+        Get the journal of the graph which contains this :py:class:`Edge`.
+
+        Returns:
+            ExperimentGraphJournal: The journal of the graph, or :py:data:`None`
+            if the changes are not recorded or the :py:class:`Edge` is not
+            :py:attr:`Edge.valid`.
+        """
+        source = self.__dict__.get("source")
+        if source is not None and self.__dict__.get("valid"):
+            return source.g.journal
+        return None
+
     def get_object(self):
         """
         Get the :py:class:`Edge` object attribute (i.e. self).
@@ -1140,6 +1811,8 @@ class Edge(ExperimentGraphDecorable):
             raise RuntimeError("Attempted operation on invalid Edge instance.")
         source_id, destination_id = self.source.graph_id, self.destination.graph_id
         self.source.g.g.adj[source_id][destination_id][key] = value
+        if self.source.g.journal is not None:
+            self.source.g.journal.item_set(self, key, value)
 
     def __delitem__(self, key):
         """
@@ -1154,6 +1827,8 @@ class Edge(ExperimentGraphDecorable):
         if not self.valid:
             raise RuntimeError("Attempted operation on invalid Edge instance.")
         del self.source.g.g.adj[self.source.graph_id][self.destination.graph_id][key]
+        if self.source.g.journal is not None:
+            self.source.g.journal.item_deleted(self, key)
 
     def has(self, key):
         """
@@ -1262,7 +1937,14 @@ class Edge(ExperimentGraphDecorable):
         Remove this :py:class:`Edge` from the :py:class:`ExperimentGraph`.
         This sets the :py:attr:`Edge.valid` property to ``False``.
         """
+        self.source.g._structure_changed(
+            edge=(self.source.graph_id, self.destination.graph_id)
+        )
         self.source.g.g.remove_edge(self.source.graph_id, self.destination.graph_id)
+        if self.source.g.journal is not None:
+            self.source.g.journal.edge_deleted(
+                self.source.graph_id, self.destination.graph_id
+            )
         self.valid = False
 
     def __iter__(self):
@@ -1408,6 +2090,254 @@ class EdgeIterator:
             ) from exc
 
 
+# The number of sources which each search worker handles per message.
+SHORTEST_PATH_BATCH_SIZE = 16
+
+# The maximum number of array elements kept by each graph's cache of search results.
+SEARCH_CACHE_LIMIT = 2**25
+
+
+def _breadth_first_search(indptr, indices, source):
+    """
+    Find the shortest paths from a vertex with a breadth-first search of a graph
+    stored in compressed sparse row (CSR) form.
+
+    Neighbors are visited in the order of the adjacency list, so the paths are the
+    same as those found by :py:func:`networkx.single_source_shortest_path`.
+
+    Args:
+        indptr (memoryview): The offset of each vertex's neighbors in ``indices``.
+        indices (memoryview): The position of each vertex's neighbors.
+        source (int): The position of the source vertex.
+
+    Returns:
+        tuple: The positions of the reached vertices (in the order they were
+        reached) and the predecessor of each vertex on its shortest path from the
+        source, as :py:class:`array.array` instances. Vertices which cannot be
+        reached have a predecessor of ``-1`` and the source is its own predecessor.
+    """
+    pred = array("i", [-1]) * (len(indptr) - 1)
+    pred[source] = source
+    order = array("i", [source])
+    for vertex in order:
+        for entry in range(indptr[vertex], indptr[vertex + 1]):
+            neighbor = indices[entry]
+            if pred[neighbor] < 0:
+                pred[neighbor] = vertex
+                order.append(neighbor)
+    return order, pred
+
+
+def _next_hop_search(indptr, indices, source):
+    """
+    Find the first hop on the shortest path from a vertex to every other vertex,
+    with the same breadth-first search as :py:func:`_breadth_first_search`.
+
+    Args:
+        indptr (memoryview): The offset of each vertex's neighbors in ``indices``.
+        indices (memoryview): The position of each vertex's neighbors.
+        source (int): The position of the source vertex.
+
+    Returns:
+        tuple: The positions of the reached vertices (in the order they were
+        reached) and the position of the next hop towards each vertex, as
+        :py:class:`array.array` instances. Vertices which cannot be reached have a
+        next hop of ``-1`` and the source is its own next hop.
+    """
+    hops = array("i", [-1]) * (len(indptr) - 1)
+    hops[source] = source
+    order = array("i", [source])
+    for vertex in order:
+        hop = hops[vertex]
+        for entry in range(indptr[vertex], indptr[vertex + 1]):
+            neighbor = indices[entry]
+            if hops[neighbor] < 0:
+                # The neighbors of the source are their own next hops.
+                hops[neighbor] = neighbor if vertex == source else hop
+                order.append(neighbor)
+    return order, hops
+
+
+# How each search's result for a new leaf is found from the result for its parent,
+# given the source, the search's result array, the parent and the leaf.
+_LEAF_RESULTS = {
+    _breadth_first_search: lambda _source, _values, parent, _leaf: parent,
+    _next_hop_search: lambda source, values, parent, leaf: (
+        leaf if parent == source else values[parent]
+    ),
+}
+
+
+def _search_worker(
+    search, shm_name, num_vertices, num_entries, source_queue, result_queue
+):
+    """
+    Search from batches of sources, using the graph stored in shared memory by
+    :py:meth:`ExperimentGraph._run_search`.
+
+    Each batch of sources is answered with a single message containing a
+    ``(source, order, result)`` tuple for each source, where ``order`` and
+    ``result`` are returned by ``search``. A final ``"STOP"`` message is sent
+    once the ``"STOP"`` sentinel is received. If a search fails, an
+    ``("ERROR", traceback)`` message is sent before the ``"STOP"`` message.
+
+    Args:
+        search (func): The search to run, such as :py:func:`_breadth_first_search`.
+        shm_name (str): The name of the shared memory with the CSR arrays.
+        num_vertices (int): The number of vertices in the graph.
+        num_entries (int): The number of entries in the adjacency lists.
+        source_queue (multiprocessing.Queue): The queue of batches of source positions.
+        result_queue (multiprocessing.Queue): The queue of results.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    indptr = shm.buf[: 8 * (num_vertices + 1)].cast("q")
+    indices = shm.buf[8 * (num_vertices + 1) : 8 * (num_vertices + 1 + num_entries)]
+    indices = indices.cast("q")
+    try:
+        for batch in iter(source_queue.get, "STOP"):
+            result_queue.put(
+                [(source, *search(indptr, indices, source)) for source in batch]
+            )
+    except Exception:
+        # The parent would otherwise stop waiting for results without knowing
+        # that some were lost.
+        result_queue.put(("ERROR", traceback.format_exc()))
+        raise
+    finally:
+        # The views must be released before the shared memory can be closed.
+        indptr.release()
+        indices.release()
+        shm.close()
+        result_queue.put("STOP")
+
+
+class _SearchCache:
+    """
+    The results of searching an :py:class:`ExperimentGraph` from each source, kept
+    until a change to the structure of the graph could affect them.
+
+    Vertices are identified by their position in the graph (see
+    :py:meth:`ExperimentGraph._csr_adjacency`). Adding a vertex does not move the
+    others, but removing one does, so that clears the cache.
+
+    Attributes:
+        csr (tuple): The graph's CSR adjacency, or :py:data:`None` if it must be
+            rebuilt.
+        results (dict): The results of each search function, keyed by the position
+            of the source.
+        size (int): The number of array elements in the cached results.
+        graph_size (tuple): The number of vertices and edges of the graph which
+            the cache describes, or :py:data:`None` if nothing is cached. This is
+            used to detect changes made directly to the :py:mod:`networkx` graph.
+    """
+
+    def __init__(self):
+        self.csr = None
+        self.results = {}
+        self.size = 0
+        self.graph_size = None
+
+    def get(self, search, source):
+        """
+        Get the cached result of a search.
+
+        Args:
+            search (func): The search function.
+            source (int): The position of the source.
+
+        Returns:
+            tuple: The result of the search, or :py:data:`None` if it is not cached.
+        """
+        return self.results.get(search, {}).get(source)
+
+    def add(self, search, source, result):
+        """
+        Cache the result of a search, unless the cache is full.
+
+        Args:
+            search (func): The search function.
+            source (int): The position of the source.
+            result (tuple): The arrays returned by the search.
+        """
+        size = sum(len(values) for values in result)
+        if self.size + size <= SEARCH_CACHE_LIMIT:
+            self.results.setdefault(search, {})[source] = result
+            self.size += size
+
+    def sources(self):
+        """
+        Get the sources with cached results.
+
+        Returns:
+            set: The positions of the sources.
+        """
+        return {source for results in self.results.values() for source in results}
+
+    def attach_leaf(self, parent, leaf, num_vertices, neighbors):
+        """
+        Update the cached results for a new :py:class:`Edge` from a vertex to a
+        vertex without any edges (a new leaf). The paths to the other vertices do not
+        change, so the leaf is added to the results of every source which reaches
+        its parent, rather than discarding them.
+
+        A new search would reach the leaf while visiting its parent, after the
+        parent's other undiscovered neighbors, so the leaf is inserted at that point
+        of each search's order. The vertices reached after the parent which were
+        discovered no later than it are those with a neighbor that was reached
+        before it. These come first, so the point is found with a binary search.
+
+        Args:
+            parent (int): The position of the vertex the leaf is connected to.
+            leaf (int): The position of the leaf.
+            num_vertices (int): The number of vertices in the graph.
+            neighbors (func): Called with the position of a vertex to get the
+                positions of its neighbors (before the leaf is connected).
+        """
+        for search, results in self.results.items():
+            leaf_result = _LEAF_RESULTS[search]
+            for source, (order, values) in list(results.items()):
+                if source == leaf:
+                    del results[source]
+                    self.size -= len(order) + len(values)
+                elif parent < len(values) and values[parent] >= 0:
+                    end = order.index(parent) + 1
+                    visited = set(order[:end])
+                    low, high = end, len(order)
+                    while low < high:
+                        middle = (low + high) // 2
+                        if visited.isdisjoint(neighbors(order[middle])):
+                            high = middle
+                        else:
+                            low = middle + 1
+                    padding = num_vertices - len(values)
+                    values.extend(array("i", [-1]) * padding)
+                    values[leaf] = leaf_result(source, values, parent, leaf)
+                    order.insert(low, leaf)
+                    self.size += padding + 1
+
+    def discard(self, sources):
+        """
+        Remove the cached results of some sources.
+
+        Args:
+            sources (Iterable): The positions of the sources.
+        """
+        for source in sources:
+            for results in self.results.values():
+                result = results.pop(source, None)
+                if result is not None:
+                    self.size -= sum(len(values) for values in result)
+
+    def clear(self):
+        """
+        Remove all cached results.
+        """
+        self.csr = None
+        self.results = {}
+        self.size = 0
+        self.graph_size = None
+
+
 class ExperimentGraph:
     """
     The graph describing a FIREWHEEL experiment.
@@ -1428,10 +2358,20 @@ class ExperimentGraph:
         Attributes:
             g (networkx.Graph): The NetworkX graph that underlies this FIREWHEEL graph.
             last_node_id (int): The ID of the last node in the graph.
+            structure_version (int): A counter which is incremented whenever a
+                :py:class:`Vertex` or :py:class:`Edge` is added or removed.
+            journal (ExperimentGraphJournal): The journal which records the changes
+                made to the graph, or :py:data:`None` if they are not recorded (see
+                :py:mod:`firewheel.control.experiment_graph_journal`).
         """
         self.g = nx.Graph()  # pylint: disable=invalid-name
         self._setup_logging()
         self.last_node_id = 0
+        self.structure_version = 0
+        self.journal = None
+        self._search_cache = _SearchCache()
+        self._vertex_indexes = {attr: {} for attr in Vertex.indexed_attributes}
+        self._decorator_index = {}
 
     def _setup_logging(self):
         """
@@ -1442,11 +2382,101 @@ class ExperimentGraph:
     def __getstate__(self):
         state = self.__dict__.copy()
         del state["log"]
+        state.pop("_search_cache", None)
+        state.pop("journal", None)
         return state
 
     def __setstate__(self, state):
+        self.structure_version = 0
         self.__dict__.update(state)
+        self._search_cache = _SearchCache()
+        self.journal = None
         self._setup_logging()
+        if "_vertex_indexes" not in state or "_decorator_index" not in state:
+            # Graphs pickled before the indexes existed.
+            self._rebuild_vertex_indexes()
+
+    def _rebuild_vertex_indexes(self):
+        """
+        Rebuild the indexes of :py:class:`Vertex` attribute values and decorators
+        from the vertices in the graph.
+        """
+        self._vertex_indexes = {attr: {} for attr in Vertex.indexed_attributes}
+        self._decorator_index = {}
+        for graph_id, data in self.g.nodes(data=True):
+            vertex = data.get("object")
+            if vertex is None:
+                continue
+            for attr in Vertex.indexed_attributes:
+                if attr in vertex.__dict__:
+                    self._index_vertex(attr, graph_id, _MISSING, vertex.__dict__[attr])
+            for decorator in vertex.__dict__["decorators"]:
+                self._decorator_index.setdefault(decorator, {})[graph_id] = None
+
+    def _unindex_vertex(self, vertex):
+        """
+        Remove a :py:class:`Vertex` from every index.
+
+        Args:
+            vertex (Vertex): The :py:class:`Vertex` being removed from the graph.
+        """
+        for attr in Vertex.indexed_attributes:
+            if attr in vertex.__dict__:
+                self._index_vertex(
+                    attr, vertex.graph_id, vertex.__dict__[attr], _MISSING
+                )
+        for decorator in vertex.__dict__["decorators"]:
+            graph_ids = self._decorator_index.get(decorator)
+            if graph_ids is not None:
+                graph_ids.pop(vertex.graph_id, None)
+                if not graph_ids:
+                    del self._decorator_index[decorator]
+
+    def _index_vertex(self, attribute, graph_id, old_value, new_value):
+        """
+        Update the index of an attribute when its value for a :py:class:`Vertex`
+        changes. Values which are not hashable are not indexed.
+
+        Args:
+            attribute (str): The name of the indexed attribute.
+            graph_id (int): The ID of the :py:class:`Vertex`.
+            old_value (Any): The previous value, or ``_MISSING`` if it was not set.
+            new_value (Any): The new value, or ``_MISSING`` if it was removed.
+        """
+        index = self._vertex_indexes[attribute]
+        if old_value is not _MISSING:
+            try:
+                graph_ids = index.get(old_value)
+            except TypeError:
+                graph_ids = None
+            if graph_ids is not None:
+                graph_ids.pop(graph_id, None)
+                if not graph_ids:
+                    del index[old_value]
+        if new_value is not _MISSING:
+            try:
+                index.setdefault(new_value, {})[graph_id] = None
+            except TypeError:
+                pass
+
+    def _find_vertex_ids(self, attribute, value):
+        """
+        Get the IDs of the vertices whose indexed attribute has the given value.
+
+        Args:
+            attribute (str): The name of the indexed attribute.
+            value (Any): The value to find.
+
+        Returns:
+            list: The IDs of the matching :py:class:`Vertex` instances, in the
+            order in which the attribute was set.
+
+        Raises:
+            TypeError: If the value is not hashable.
+        """
+        graph_ids = self._vertex_indexes[attribute].get(value, ())
+        # Guard against vertices removed directly from the networkx graph.
+        return [graph_id for graph_id in graph_ids if graph_id in self.g]
 
     def _add_vertex(self, new_id=None):
         """
@@ -1475,9 +2505,12 @@ class ExperimentGraph:
         if new_id in self.g:
             raise RuntimeError(f"The node ID {new_id} conflicts with an existing node!")
 
+        self._structure_changed(vertices_added=1)
         self.g.add_node(new_id)
         if isinstance(new_id, int):
             self.last_node_id = new_id
+        if self.journal is not None:
+            self.journal.vertex_added(new_id)
         return new_id
 
     def _add_edge(self, source_id, dest_id):
@@ -1496,7 +2529,185 @@ class ExperimentGraph:
             raise NoSuchVertexError(source_id)
         if dest_id not in self.g:
             raise NoSuchVertexError(dest_id)
+        if not self.g.has_edge(source_id, dest_id):
+            self._structure_changed(edge=(source_id, dest_id))
         self.g.add_edge(source_id, dest_id)
+        if self.journal is not None:
+            self.journal.edge_added(source_id, dest_id)
+
+    def _structure_changed(self, edge=None, vertex_removed=False, vertices_added=0):
+        """
+        Record a change to the structure of the graph, which must be made after
+        calling this method. The version of the structure is incremented and any
+        cached search results which the change could affect are discarded.
+
+        The shortest paths from a source are only affected by adding or removing an
+        :py:class:`Edge` if its ends are at different distances from the source, so
+        the results of other sources are kept. Connecting a :py:class:`Vertex` which
+        has no edges extends the cached results instead (see
+        :py:meth:`_SearchCache.attach_leaf`).
+
+        Args:
+            edge (tuple): The IDs of the ends of an :py:class:`Edge` which is being
+                added or removed.
+            vertex_removed (bool): Whether a :py:class:`Vertex` is being removed.
+            vertices_added (int): The number of vertices which are being added.
+        """
+        self.structure_version += 1
+        cache = self._search_cache
+        if vertex_removed or not cache.size or not self._search_cache_current():
+            cache.clear()
+            return
+        cache.csr = None
+        num_vertices, num_edges = cache.graph_size
+        if edge is not None and all(end in self.g for end in edge):
+            num_edges += -1 if self.g.has_edge(*edge) else 1
+        cache.graph_size = (num_vertices + vertices_added, num_edges)
+        if edge is None or not all(end in self.g for end in edge):
+            return
+
+        node_ids = list(self.g)
+        source_id, dest_id = edge
+        if source_id != dest_id and not (self.g.adj[source_id] and self.g.adj[dest_id]):
+            positions = {node_id: position for position, node_id in enumerate(node_ids)}
+
+            def neighbors(position):
+                return map(positions.__getitem__, self.g.adj[node_ids[position]])
+
+            if self.g.adj[source_id]:
+                cache.attach_leaf(
+                    positions[source_id], positions[dest_id], len(node_ids), neighbors
+                )
+            elif self.g.adj[dest_id]:
+                cache.attach_leaf(
+                    positions[dest_id], positions[source_id], len(node_ids), neighbors
+                )
+            else:
+                cache.discard([positions[source_id], positions[dest_id]])
+            return
+
+        source_distances, dest_distances = (
+            nx.single_source_shortest_path_length(self.g, end) for end in edge
+        )
+        cache.discard(
+            [
+                source
+                for source in cache.sources()
+                if source_distances.get(node_ids[source])
+                != dest_distances.get(node_ids[source])
+            ]
+        )
+
+    def add_vertices(self, count, name_fmt=None, decorators=None):
+        """
+        Add many :py:class:`Vertices <Vertex>` to the graph at once. This is
+        equivalent to creating each :py:class:`Vertex` and decorating it in turn,
+        but the IDs are allocated in one step and the vertices are inserted into
+        the :py:mod:`networkx` graph together. Every :py:class:`Vertex` has the
+        same decorators, so they share a decoration plan (see
+        :py:meth:`ExperimentGraphDecorable._get_decoration_plan`).
+
+        Args:
+            count (int): The number of vertices to add.
+            name_fmt (str): A format string for the name of each :py:class:`Vertex`,
+                which is formatted with its index in the new vertices (e.g.
+                ``"host{}.net"``). If :py:data:`None`, the vertices are not named.
+            decorators (list): The classes to decorate each :py:class:`Vertex` with,
+                in order.
+
+        Returns:
+            list: The new :py:class:`Vertices <Vertex>`.
+        """
+        start = self.last_node_id + 1
+        if any(graph_id in self.g for graph_id in range(start, start + count)):
+            # As with _add_vertex, use IDs after the largest one in the graph.
+            start = max(self.g) + 1
+        graph_ids = range(start, start + count)
+
+        log = Vertex.vertex_log
+        vertices = Vertex._create_many(
+            {"g": self, "graph_id": graph_id, "valid": True, "log": log}
+            for graph_id in graph_ids
+        )
+        self._structure_changed(vertices_added=count)
+        self.g.add_nodes_from(
+            (vertex.graph_id, {"object": vertex}) for vertex in vertices
+        )
+        if count:
+            self.last_node_id = graph_ids[-1]
+        if self.journal is not None:
+            for graph_id in graph_ids:
+                self.journal.vertex_added(graph_id)
+
+        if name_fmt is not None:
+            for index, vertex in enumerate(vertices):
+                vertex.name = name_fmt.format(index)
+        for decorator_class in decorators or ():
+            for vertex in vertices:
+                vertex.decorate(decorator_class)
+        return vertices
+
+    def add_edges(self, pairs, decorators=None):
+        """
+        Add many :py:class:`Edges <Edge>` to the graph at once. This is equivalent
+        to creating each :py:class:`Edge` and decorating it in turn, but the edges
+        are inserted into the :py:mod:`networkx` graph together. Every
+        :py:class:`Edge` has the same decorators, so they share a decoration plan
+        (see :py:meth:`ExperimentGraphDecorable._get_decoration_plan`).
+
+        Args:
+            pairs (Iterable): The source and destination :py:class:`Vertex` of each
+                :py:class:`Edge`.
+            decorators (list): The classes to decorate each :py:class:`Edge` with,
+                in order.
+
+        Returns:
+            list: The new :py:class:`Edges <Edge>`.
+
+        Raises:
+            TypeError: If an end of an :py:class:`Edge` is not a :py:class:`Vertex`.
+            ValueError: If an end of an :py:class:`Edge` is not in this graph or is
+                not :py:attr:`Vertex.valid`.
+        """
+        pairs = list(pairs)
+        for source, destination in pairs:
+            for end in (source, destination):
+                if not isinstance(end, Vertex):
+                    raise TypeError(f"{end!r} is not a Vertex.")
+                if end.g is not self:
+                    raise ValueError("Given vertices do not belong to this graph.")
+                if not end.valid:
+                    raise ValueError("Given Vertex is not valid.")
+
+        log = Edge.edge_log
+        edges = Edge._create_many(
+            {"source": source, "destination": destination, "valid": True, "log": log}
+            for source, destination in pairs
+        )
+        if self._search_cache.size:
+            # Add the edges one at a time to keep the cached searches they do not
+            # affect.
+            for edge in edges:
+                self._add_edge(edge.source.graph_id, edge.destination.graph_id)
+                self.g.adj[edge.source.graph_id][edge.destination.graph_id][
+                    "object"
+                ] = edge
+        else:
+            self._structure_changed()
+            self.g.add_edges_from(
+                (edge.source.graph_id, edge.destination.graph_id, {"object": edge})
+                for edge in edges
+            )
+            if self.journal is not None:
+                for edge in edges:
+                    self.journal.edge_added(
+                        edge.source.graph_id, edge.destination.graph_id
+                    )
+
+        for decorator_class in decorators or ():
+            for edge in edges:
+                edge.decorate(decorator_class)
+        return edges
 
     def get_vertices(self):
         """
@@ -1572,6 +2783,10 @@ class ExperimentGraph:
             This is a :py:mod:`networkx` specific method for finding the :py:class:`Vertex`.
 
 
+        The graph maintains an index of :py:class:`Vertex` names, so this does not
+        need to scan the graph. If several :py:class:`Vertices <Vertex>` share the
+        name, the one with the smallest ID is returned.
+
         Args:
             name (str): The name of the :py:class:`Vertex` we are trying to locate.
 
@@ -1579,13 +2794,105 @@ class ExperimentGraph:
             Vertex: The found :py:class:`Vertex`, or None if the :py:class:`Vertex`
             cannot be found.
         """
-        for vertex in self.get_vertices():
-            try:
-                if vertex.name == name:
+        try:
+            graph_ids = self._find_vertex_ids("name", name)
+        except TypeError:
+            # Names which are not hashable are not indexed.
+            for vertex in self.get_vertices():
+                if vertex.__dict__.get("name", _MISSING) == name:
                     return vertex
-            except AttributeError:
-                continue
-        return None
+            return None
+        if not graph_ids:
+            return None
+        return self.g.nodes[min(graph_ids)]["object"]
+
+    def find_vertices(self, names):
+        """
+        Find several :py:class:`Vertices <Vertex>` by name (see :py:meth:`find_vertex`).
+
+        Args:
+            names (Iterable): The names of the :py:class:`Vertices <Vertex>` to locate.
+
+        Returns:
+            list: The :py:class:`Vertex` for each name, in the same order as
+            ``names``. The entry is :py:data:`None` for each name which cannot
+            be found.
+        """
+        return [self.find_vertex(name) for name in names]
+
+    def vertices_decorated_by(self, decorator_class):
+        """
+        Get the :py:class:`Vertices <Vertex>` decorated by a particular class (see
+        :py:meth:`ExperimentGraphDecorable.is_decorated_by`).
+
+        The graph maintains an index of the decorators of each :py:class:`Vertex`,
+        so this does not need to check every :py:class:`Vertex` in the graph.
+
+        Args:
+            decorator_class (Object): The model component object to check against.
+
+        Returns:
+            list: The decorated :py:class:`Vertices <Vertex>`, in the order in
+            which they were decorated.
+        """
+        return self.select(decorated_by=decorator_class)
+
+    def select(self, decorated_by=None, **attributes):
+        """
+        Get the :py:class:`Vertices <Vertex>` which are decorated by a class and
+        whose attributes have the given values. For example::
+
+            switches = graph.select(type="switch")
+            routers = graph.select(decorated_by=VMEndpoint, type="router")
+
+        Criteria on indexed attributes (see :py:attr:`Vertex.indexed_attributes`)
+        and decorators are answered from the graph's indexes. Any other
+        attributes are then checked on each of the remaining
+        :py:class:`Vertices <Vertex>`.
+
+        Args:
+            decorated_by (Object): A model component object which the
+                :py:class:`Vertices <Vertex>` must be decorated by.
+            **attributes: The values which the attributes of the
+                :py:class:`Vertices <Vertex>` must equal.
+
+        Returns:
+            list: The matching :py:class:`Vertices <Vertex>`. If any criteria
+            are indexed, they are in the order in which they matched the most
+            selective one. Otherwise, they are in the order of the graph.
+        """
+        candidates = []
+        if decorated_by is not None:
+            candidates.append(self._decorator_index.get(decorated_by, {}))
+        unindexed = {}
+        for attr, value in attributes.items():
+            try:
+                candidates.append(self._vertex_indexes[attr].get(value, {}))
+            except (KeyError, TypeError):
+                unindexed[attr] = value
+
+        if candidates:
+            candidates.sort(key=len)
+            graph_ids = [
+                graph_id
+                for graph_id in candidates[0]
+                if graph_id in self.g
+                and all(graph_id in other for other in candidates[1:])
+            ]
+        else:
+            graph_ids = self.g
+
+        vertices = VertexIterator(self, graph_ids)
+        if not unindexed:
+            return list(vertices)
+        return [
+            vertex
+            for vertex in vertices
+            if all(
+                getattr(vertex, attr, _MISSING) == value
+                for attr, value in unindexed.items()
+            )
+        ]
 
     def _single_process_all_pairs_shortest_path(self, vertex_filter, path_action):
         """
@@ -1621,6 +2928,16 @@ class ExperimentGraph:
         shortest path among all pairs where each :py:class:`Vertex` matches vertex_filter,
         and calls path_action with the path between each pair.
 
+        When using workers, the graph's adjacency lists are placed in shared memory
+        and each worker runs a breadth-first search from batches of sources (see
+        :py:data:`SHORTEST_PATH_BATCH_SIZE`), returning a predecessor array for each
+        source. The paths are the same as those found without workers.
+
+        The search from each source is cached until the structure of the graph
+        changes in a way which could affect it (see :py:attr:`structure_version`),
+        so later calls only search from sources which were affected by the change.
+        The filter is applied to the cached results, so it may differ between calls.
+
         Args:
             vertex_filter (func): Callable taking a :py:class:`Vertex` and returning
                :py:data:`True` or :py:data:`False`.
@@ -1630,71 +2947,276 @@ class ExperimentGraph:
                 on the path. The return value for ``path_action`` is ignored.
             num_workers (int): Number of threads which will calculate the all-pairs shortest path.
             sample_pct (int): The percentage of nodes for which the all pairs will be preformed.
-                This speeds up the time it takes for the calculation to occur.
+                This speeds up the time it takes for the calculation to occur. Sources
+                are only sampled when using workers.
+
+        Raises:
+            RuntimeError: If a worker fails.
+        """
+        # The graph is shared with the workers as CSR arrays in shared memory, so
+        # that the workers do not need a copy of the graph. Each worker replies with
+        # a compact predecessor array for each source, which is turned into paths
+        # here. This avoids sending a message for every pair of vertices.
+        node_ids = self._csr_adjacency()[0]
+        positions = {node_id: position for position, node_id in enumerate(node_ids)}
+        objects = [self.g.nodes[node_id]["object"] for node_id in node_ids]
+        destinations = [
+            vertex_filter is None or vertex_filter(obj) is True for obj in objects
+        ]
+
+        self.log.debug("Handing out sources.")
+        if not num_workers:
+            sample_pct = 0
+        if sample_pct:
+            self.log.debug("Only sampling %s of sources.", sample_pct)
+        sources = []
+        for source in filter(vertex_filter, VertexIterator(self, self.g)):
+            if sample_pct and random.random() >= sample_pct:
+                continue
+            sources.append(positions[source.graph_id])
+
+        self.log.debug("Processing resulting paths.")
+        for source, order, pred in self._search_sources(
+            sources, _breadth_first_search, num_workers
+        ):
+            source_obj = objects[source]
+            for dest in order:
+                if not destinations[dest]:
+                    continue
+                # Follow the predecessors back to the source.
+                path_objs = []
+                vert = dest
+                while vert != source:
+                    path_objs.append(objects[vert])
+                    vert = pred[vert]
+                path_objs.append(source_obj)
+                path_objs.reverse()
+
+                # Do the path action.
+                path_action(source_obj, objects[dest], path_objs)
+
+    def compute_next_hops(self, vertex_filter=None, num_workers=0):
+        """
+        Compute the next hop from each :py:class:`Vertex` matching ``vertex_filter``
+        towards every other matching :py:class:`Vertex` which it can reach.
+
+        This finds the same shortest paths as
+        :py:meth:`filtered_all_pairs_shortest_path`, but only keeps the first hop of
+        each path, which is all that is needed to build routing tables. The search
+        tracks the next hop of each :py:class:`Vertex` as an integer array, so the
+        paths themselves are never built. Like the paths, the next hops from each
+        source are cached until a change to the graph affects them.
+
+        Args:
+            vertex_filter (func): Callable taking a :py:class:`Vertex` and returning
+               :py:data:`True` or :py:data:`False`. All vertices match if this is
+               :py:data:`None`.
+            num_workers (int): The number of worker processes to search with. If
+                this is ``0``, the search is done in the current process.
 
         Returns:
-            None: If there are no other workers, the method
-            :py:meth:`_single_process_all_pairs_shortest_path` is returned.
+            dict: A dictionary mapping each source :py:class:`Vertex` to a dictionary
+            mapping each destination :py:class:`Vertex` to the neighbor of the source
+            on the shortest path to it.
+
+        Raises:
+            RuntimeError: If a worker fails.
         """
-        if num_workers == 0:
-            return self._single_process_all_pairs_shortest_path(
-                vertex_filter, path_action
-            )
+        node_ids = self._csr_adjacency()[0]
+        positions = {node_id: position for position, node_id in enumerate(node_ids)}
+        objects = [self.g.nodes[node_id]["object"] for node_id in node_ids]
+        destinations = [
+            vertex_filter is None or vertex_filter(obj) is True for obj in objects
+        ]
+        sources = [
+            positions[source.graph_id]
+            for source in filter(vertex_filter, VertexIterator(self, self.g))
+        ]
 
-        def do_source(graph, vertex_filter, source_queue, path_queue):
-            for source_id in iter(source_queue.get, "STOP"):
-                paths = nx.single_source_shortest_path(graph, source_id)
-                for dest, value in paths.items():
-                    dest_obj = self.g.nodes[dest]["object"]
-                    if vertex_filter(dest_obj) is True:
-                        path_queue.put((source_id, dest, value))
-            path_queue.put("STOP")
+        next_hops = {}
+        for source, order, hops in self._search_sources(
+            sources, _next_hop_search, num_workers
+        ):
+            next_hops[objects[source]] = {
+                objects[dest]: objects[hops[dest]]
+                for dest in order[1:]
+                if destinations[dest]
+            }
+        return next_hops
 
-        vert_it = filter(vertex_filter, VertexIterator(self, self.g))
-        workers = []
-        source_queue = Queue()
-        path_queue = Queue()
+    def _graph_size(self):
+        """
+        Get the size of the :py:mod:`networkx` graph.
+
+        Returns:
+            tuple: The number of vertices and the number of edges.
+        """
+        return (self.g.number_of_nodes(), self.g.number_of_edges())
+
+    def _search_cache_current(self):
+        """
+        Check whether the cached searches describe the graph. Plugins may change
+        the :py:mod:`networkx` graph directly, which is not recorded by
+        :py:meth:`_structure_changed`, so the size of the graph is compared with
+        the size the cache expects.
+
+        Returns:
+            bool: :py:data:`False` if the graph has been changed directly.
+        """
+        graph_size = self._search_cache.graph_size
+        return graph_size is None or graph_size == self._graph_size()
+
+    def _csr_adjacency(self):
+        """
+        Get the adjacency lists of the graph in compressed sparse row (CSR) form,
+        where each :py:class:`Vertex` is identified by its position in the graph.
 
-        self.log.debug("Initializing %d worker processes.", num_workers)
-        for _ in range(num_workers):
-            proc = Process(
-                target=do_source, args=(self.g, vertex_filter, source_queue, path_queue)
+        Returns:
+            tuple: The ``graph_id`` of the :py:class:`Vertex` at each position, the
+            offset of each :py:class:`Vertex`'s neighbors in the neighbor array, and
+            the neighbor array (the positions of the neighbors of each
+            :py:class:`Vertex`, in adjacency order). These are cached until the
+            structure of the graph changes, so they must not be modified.
+        """
+        if not self._search_cache_current():
+            self.log.debug(
+                "The graph was changed directly. Discarding cached searches."
             )
-            proc.start()
-            workers.append(proc)
+            self._search_cache.clear()
+        if self._search_cache.csr is not None:
+            return self._search_cache.csr
+        node_ids = list(self.g)
+        positions = {node_id: position for position, node_id in enumerate(node_ids)}
+        indptr = array("q", [0])
+        indices = array("q")
+        for node_id in node_ids:
+            indices.extend(positions[neighbor] for neighbor in self.g.adj[node_id])
+            indptr.append(len(indices))
+        self._search_cache.csr = (node_ids, indptr, indices)
+        self._search_cache.graph_size = self._graph_size()
+        return self._search_cache.csr
+
+    def _search_sources(self, sources, search, num_workers):
+        """
+        Get the results of a search of the graph from each source, only running
+        the search for sources which do not have cached results. Without workers,
+        the results are in the order of the sources. With workers, the cached
+        results come first, followed by the others as they are received.
 
-        self.log.debug("Handing out sources.")
-        if sample_pct:
-            self.log.debug("Only sampling %s of sources.", sample_pct)
-        for source in vert_it:
-            if sample_pct:
-                if random.random() < sample_pct:
-                    source_queue.put(source.graph_id)
+        Args:
+            sources (list): The positions of the sources to search from.
+            search (func): The search to run, such as :py:func:`_breadth_first_search`.
+            num_workers (int): The number of worker processes. If this is ``0``,
+                the search is done in the current process.
+
+        Yields:
+            tuple: The position of a source and the two arrays returned by ``search``.
+            These may be cached, so they must not be modified.
+        """
+        _node_ids, indptr, indices = self._csr_adjacency()
+        cache = self._search_cache
+        if num_workers == 0:
+            # Keep the order of the sources, whether or not they are cached.
+            for source in sources:
+                result = cache.get(search, source)
+                if result is None:
+                    result = search(indptr, indices, source)
+                    cache.add(search, source, result)
+                yield (source, *result)
+            return
+
+        missing = []
+        for source in sources:
+            result = cache.get(search, source)
+            if result is None:
+                missing.append(source)
             else:
-                source_queue.put(source.graph_id)
+                yield (source, *result)
 
-        for _ in range(num_workers):
-            source_queue.put("STOP")
+        for source, *result in self._run_search(
+            indptr, indices, missing, search, num_workers
+        ):
+            cache.add(search, source, tuple(result))
+            yield (source, *result)
 
-        self.log.debug("Processing resulting paths.")
-        ends = 0
-        while ends < num_workers:
-            result = path_queue.get(block=True)
-            if result == "STOP":
-                ends += 1
-                continue
+    def _run_search(self, indptr, indices, sources, search, num_workers):
+        """
+        Run a search of the graph from each source, using worker processes which
+        share the graph's CSR arrays in shared memory.
 
-            # Get the objects.
-            source_obj = self.g.nodes[result[0]]["object"]
-            dest_obj = self.g.nodes[result[1]]["object"]
-            path_objs = []
-            for vert in result[2]:
-                path_objs.append(self.g.nodes[vert]["object"])
+        Sources are handed to the workers in batches of
+        :py:data:`SHORTEST_PATH_BATCH_SIZE`, and the results are yielded in the
+        order they are received.
 
-            # Do the path action.
-            path_action(source_obj, dest_obj, path_objs)
+        Args:
+            indptr (array.array): The CSR offsets from :py:meth:`_csr_adjacency`.
+            indices (array.array): The CSR neighbors from :py:meth:`_csr_adjacency`.
+            sources (list): The positions of the sources to search from.
+            search (func): The search to run, such as :py:func:`_breadth_first_search`.
+            num_workers (int): The number of worker processes. If this is ``0``,
+                the search is done in the current process.
 
-        self.log.debug("Waiting for workers to terminate.")
-        for worker in workers:
-            worker.join()
-        return None
+        Yields:
+            tuple: The position of a source and the two arrays returned by ``search``.
+
+        Raises:
+            RuntimeError: If a worker fails.
+        """
+        if num_workers == 0 or not sources:
+            for source in sources:
+                yield (source, *search(indptr, indices, source))
+            return
+
+        shm = shared_memory.SharedMemory(
+            create=True, size=max(8 * (len(indptr) + len(indices)), 1)
+        )
+        workers = []
+        try:
+            shm.buf[: 8 * len(indptr)] = indptr.tobytes()
+            shm.buf[8 * len(indptr) : 8 * (len(indptr) + len(indices))] = (
+                indices.tobytes()
+            )
+            source_queue = Queue()
+            result_queue = Queue()
+
+            self.log.debug("Initializing %d worker processes.", num_workers)
+            for _ in range(num_workers):
+                proc = Process(
+                    target=_search_worker,
+                    args=(
+                        search,
+                        shm.name,
+                        len(indptr) - 1,
+                        len(indices),
+                        source_queue,
+                        result_queue,
+                    ),
+                )
+                proc.start()
+                workers.append(proc)
+
+            for i in range(0, len(sources), SHORTEST_PATH_BATCH_SIZE):
+                source_queue.put(sources[i : i + SHORTEST_PATH_BATCH_SIZE])
+            for _ in range(num_workers):
+                source_queue.put("STOP")
+
+            ends = 0
+            while ends < num_workers:
+                results = result_queue.get(block=True)
+                if results == "STOP":
+                    ends += 1
+                    continue
+                if results[0] == "ERROR":
+                    raise RuntimeError(f"A search worker failed:\n{results[1]}")
+                yield from results
+
+            self.log.debug("Waiting for workers to terminate.")
+            for worker in workers:
+                worker.join()
+        finally:
+            # Stop any workers left behind if the results were not all consumed.
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+            shm.close()
+            shm.unlink()
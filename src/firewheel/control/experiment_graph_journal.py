@@ -0,0 +1,616 @@
+"""
+An append-only journal of the changes made to an :py:class:`ExperimentGraph
+<firewheel.control.experiment_graph.ExperimentGraph>`.
+
+Each model component plugin modifies the experiment graph in turn, but the graph
+itself only holds the final result. A journal records each change as it is made,
+so that it is possible to see what each plugin did to the graph, and to build
+features which only need to process the changes. A journal is attached to a graph
+when it is created and records changes until it is detached::
+
+    journal = ExperimentGraphJournal(graph)
+    ...
+    journal.detach()
+
+The following changes are recorded:
+
+* Adding and deleting a :py:class:`Vertex <firewheel.control.experiment_graph.Vertex>`
+  or :py:class:`Edge <firewheel.control.experiment_graph.Edge>`. The edges which are
+  removed when a vertex is deleted are not recorded separately.
+* Decorating a vertex or edge. The changes made by the decorator's ``__init__``
+  method (including any nested decorations) are not recorded, as replaying the
+  decoration makes them again. Instead, the decoration records whether its
+  ``__init__`` method changed any other object in the graph (e.g. by adding a
+  vertex), so that it is kept when the journal is compacted.
+* Setting or deleting an indexed attribute of a vertex (e.g. its ``name``, see
+  :py:class:`IndexedAttribute <firewheel.control.experiment_graph.IndexedAttribute>`)
+  or a dictionary-style attribute of a vertex or edge (e.g. ``vertex["key"]``).
+  Other instance attributes are not recorded, as doing so would slow down every
+  assignment to a graph object.
+
+Each change is recorded as a :py:class:`JournalEvent`, which is tagged with the
+model component which was running when it was made (see
+:py:meth:`ExperimentGraphJournal.attribute_to`). Values are recorded by reference,
+so changes made to a mutable value after it was set are not recorded.
+
+Attributes:
+    ADD_VERTEX (str): The kind of event recorded when a vertex is added.
+    DELETE_VERTEX (str): The kind of event recorded when a vertex is deleted.
+    ADD_EDGE (str): The kind of event recorded when an edge is added.
+    DELETE_EDGE (str): The kind of event recorded when an edge is deleted.
+    DECORATE (str): The kind of event recorded when a vertex or edge is decorated.
+    SET_ATTRIBUTE (str): The kind of event recorded when an indexed attribute is set.
+    DELETE_ATTRIBUTE (str): The kind of event recorded when an indexed attribute is
+        deleted.
+    SET_ITEM (str): The kind of event recorded when a dictionary-style attribute
+        is set.
+    DELETE_ITEM (str): The kind of event recorded when a dictionary-style attribute
+        is deleted.
+    VERTEX (str): The first element of the target of an event for a vertex.
+    EDGE (str): The first element of the target of an event for an edge.
+"""
+
+from types import MappingProxyType
+from contextlib import contextmanager
+from collections import Counter, namedtuple
+
+from firewheel.control.experiment_graph import Edge, Vertex, ExperimentGraph
+
+ADD_VERTEX = "add_vertex"
+DELETE_VERTEX = "delete_vertex"
+ADD_EDGE = "add_edge"
+DELETE_EDGE = "delete_edge"
+DECORATE = "decorate"
+SET_ATTRIBUTE = "set_attribute"
+DELETE_ATTRIBUTE = "delete_attribute"
+SET_ITEM = "set_item"
+DELETE_ITEM = "delete_item"
+
+VERTEX = "vertex"
+EDGE = "edge"
+
+JournalEvent = namedtuple(
+    "JournalEvent", ["kind", "model_component", "target", "details"]
+)
+JournalEvent.__doc__ = """
+A change which was made to an experiment graph.
+
+Attributes:
+    kind (str): The kind of change (e.g. :py:data:`ADD_VERTEX`).
+    model_component (str): The name of the model component which made the change,
+        or :py:data:`None` if no model component was running.
+    target (tuple): The object which was changed. This is ``(VERTEX, graph_id)``
+        for a vertex and ``(EDGE, source_id, destination_id)`` for an edge.
+    details (tuple): The details of the change. This is empty when adding or
+        deleting an object, ``(decorator_class, init_args, init_kwargs,
+        conflict_handler, last_node_id)`` for a decoration, ``(name, value)`` when
+        setting an attribute, and ``(name,)`` when deleting one. The
+        ``last_node_id`` of a decoration is the graph's ``last_node_id`` before
+        the decoration if the decorator's ``__init__`` method changed any other
+        object in the graph, and :py:data:`None` otherwise.
+"""
+
+# The events which set or delete the same attribute of an object. Only the last of
+# these events needs to be kept when compacting a journal.
+_ATTRIBUTE_SLOTS = {
+    SET_ATTRIBUTE: SET_ATTRIBUTE,
+    DELETE_ATTRIBUTE: SET_ATTRIBUTE,
+    SET_ITEM: SET_ITEM,
+    DELETE_ITEM: SET_ITEM,
+}
+
+
+# The keyword arguments recorded for a decoration which has none.
+_NO_KWARGS = MappingProxyType({})
+
+
+def _target(graph_object):
+    """
+    Get the flattened target of an event for a vertex or edge.
+
+    Args:
+        graph_object (ExperimentGraphDecorable): The vertex or edge.
+
+    Returns:
+        tuple: The target of the event.
+    """
+    if isinstance(graph_object, Vertex):
+        return (VERTEX, graph_object.graph_id)
+    return (EDGE, graph_object.source.graph_id, graph_object.destination.graph_id)
+
+
+def _event(record):
+    """
+    Convert a recorded event into a :py:class:`JournalEvent`. The events are
+    recorded as a single flat tuple, which is much faster to create than a
+    :py:class:`JournalEvent` and its nested tuples.
+
+    Args:
+        record (tuple): The recorded event.
+
+    Returns:
+        JournalEvent: The event.
+    """
+    end = 5 if record[2] == EDGE else 4
+    return JournalEvent(record[0], record[1], record[2:end], record[end:])
+
+
+def _entity(target):
+    """
+    Get a key which identifies the object targeted by an event. Edges are
+    undirected, so the order of their ends is ignored.
+
+    Args:
+        target (tuple): The target of a :py:class:`JournalEvent`.
+
+    Returns:
+        tuple: The key of the object.
+    """
+    if target[0] == EDGE:
+        return (EDGE, frozenset(target[1:]))
+    return target
+
+
+class ExperimentGraphJournal:
+    """
+    Record the changes made to an :py:class:`ExperimentGraph
+    <firewheel.control.experiment_graph.ExperimentGraph>`.
+
+    The journal is attached to the graph as its ``journal`` attribute, which the
+    graph and its objects notify whenever they change. Recording a change only
+    appends an event to a list, so a journal can be left attached while building
+    large experiments.
+
+    Attributes:
+        active_model_component (str): The name of the model component which is
+            currently running. This is shared by all journals.
+    """
+
+    active_model_component = None
+
+    def __init__(self, graph=None):
+        """
+        Create an empty journal.
+
+        Attributes:
+            graph (ExperimentGraph): The graph which the journal is attached to.
+
+        Args:
+            graph (ExperimentGraph): A graph to attach the journal to.
+        """
+        # The recorded events (see _event)
+        self._events = []
+        self.graph = None
+        # The number of decorations which are currently being made.
+        self._decorating = 0
+        # The key of the object whose outermost decoration is being made, the
+        # graph's last_node_id before it, and whether it changed another object.
+        self._decoration_entity = None
+        self._decoration_last_node_id = None
+        self._decoration_changed_graph = False
+        if graph is not None:
+            self.attach(graph)
+
+    @classmethod
+    @contextmanager
+    def attribute_to(cls, model_component):
+        """
+        Tag the events recorded by all journals with the name of a model
+        component while it runs.
+
+        Args:
+            model_component (str): The name of the model component.
+
+        Yields:
+            None: The events recorded in this context are tagged with the model
+            component.
+        """
+        previous = cls.active_model_component
+        cls.active_model_component = model_component
+        try:
+            yield
+        finally:
+            cls.active_model_component = previous
+
+    def attach(self, graph):
+        """
+        Start recording the changes made to a graph.
+
+        Args:
+            graph (ExperimentGraph): The graph to record.
+
+        Raises:
+            ValueError: If the graph already has a journal or this journal is
+                attached to another graph.
+        """
+        if graph.journal is not None and graph.journal is not self:
+            raise ValueError("The graph already has a journal.")
+        if self.graph is not None and self.graph is not graph:
+            raise ValueError("The journal is attached to another graph.")
+        graph.journal = self
+        self.graph = graph
+
+    def detach(self):
+        """
+        Stop recording the changes made to the graph. The recorded events are kept.
+        """
+        if self.graph is not None and self.graph.journal is self:
+            self.graph.journal = None
+        self.graph = None
+
+    @property
+    def events(self):
+        """
+        The recorded events.
+
+        Returns:
+            list: The :py:class:`JournalEvent` instances, in the order that the
+            changes were made.
+        """
+        return list(map(_event, self._events))
+
+    def __len__(self):
+        return len(self._events)
+
+    def __iter__(self):
+        return map(_event, self._events)
+
+    def vertex_added(self, graph_id):
+        """
+        Record that a :py:class:`Vertex <firewheel.control.experiment_graph.Vertex>`
+        was added to the graph.
+
+        Args:
+            graph_id (int): The ID of the new vertex.
+        """
+        if not self._decorating:
+            self._events.append(
+                (ADD_VERTEX, self.active_model_component, VERTEX, graph_id)
+            )
+        else:
+            self._nested_change((VERTEX, graph_id))
+
+    def vertex_deleted(self, graph_id):
+        """
+        Record that a :py:class:`Vertex <firewheel.control.experiment_graph.Vertex>`
+        was deleted from the graph.
+
+        Args:
+            graph_id (int): The ID of the deleted vertex.
+        """
+        if not self._decorating:
+            self._events.append(
+                (DELETE_VERTEX, self.active_model_component, VERTEX, graph_id)
+            )
+        else:
+            self._nested_change((VERTEX, graph_id))
+
+    def edge_added(self, source_id, destination_id):
+        """
+        Record that an :py:class:`Edge <firewheel.control.experiment_graph.Edge>`
+        was added to the graph.
+
+        Args:
+            source_id (int): The ID of the source vertex.
+            destination_id (int): The ID of the destination vertex.
+        """
+        if not self._decorating:
+            self._events.append(
+                (ADD_EDGE, self.active_model_component, EDGE, source_id, destination_id)
+            )
+        else:
+            self._nested_change(_entity((EDGE, source_id, destination_id)))
+
+    def edge_deleted(self, source_id, destination_id):
+        """
+        Record that an :py:class:`Edge <firewheel.control.experiment_graph.Edge>`
+        was deleted from the graph.
+
+        Args:
+            source_id (int): The ID of the source vertex.
+            destination_id (int): The ID of the destination vertex.
+        """
+        if not self._decorating:
+            self._events.append(
+                (
+                    DELETE_EDGE,
+                    self.active_model_component,
+                    EDGE,
+                    source_id,
+                    destination_id,
+                )
+            )
+        else:
+            self._nested_change(_entity((EDGE, source_id, destination_id)))
+
+    def _nested_change(self, entity):
+        """
+        Note a change made while a decorator's ``__init__`` method runs (see
+        :py:meth:`start_decoration`).
+
+        Args:
+            entity (tuple): The key of the changed object (see :py:func:`_entity`).
+        """
+        if entity != self._decoration_entity:
+            self._decoration_changed_graph = True
+
+    def start_decoration(self, graph_object):
+        """
+        Stop recording while a decorator's ``__init__`` method runs. The changes it
+        makes are repeated when the decoration is replayed, but whether it changed
+        any object other than ``graph_object`` is noted.
+
+        Args:
+            graph_object (ExperimentGraphDecorable): The vertex or edge which is
+                being decorated.
+        """
+        if not self._decorating:
+            self._decoration_entity = _entity(_target(graph_object))
+            self._decoration_last_node_id = getattr(self.graph, "last_node_id", None)
+            self._decoration_changed_graph = False
+        self._decorating += 1
+
+    def finish_decoration(self):
+        """
+        Resume recording once a decorator's ``__init__`` method has finished (see
+        :py:meth:`start_decoration`).
+        """
+        self._decorating -= 1
+
+    def decorated(self, graph_object, decorator_class, init_args, init_kwargs, handler):
+        """
+        Record that a vertex or edge was decorated.
+
+        Args:
+            graph_object (ExperimentGraphDecorable): The vertex or edge.
+            decorator_class (object): The model component object.
+            init_args (list): The arguments to the decorator's ``__init__`` method.
+            init_kwargs (dict): The keyword arguments to the decorator's
+                ``__init__`` method.
+            handler (func): The conflict handler given for the decoration.
+        """
+        target = _target(graph_object)
+        if self._decorating:
+            self._nested_change(_entity(target))
+            return
+        self._events.append(
+            (
+                DECORATE,
+                self.active_model_component,
+                *target,
+                decorator_class,
+                tuple(init_args) if init_args else (),
+                dict(init_kwargs) if init_kwargs else _NO_KWARGS,
+                handler,
+                (
+                    self._decoration_last_node_id
+                    if self._decoration_changed_graph
+                    else None
+                ),
+            )
+        )
+
+    def attribute_set(self, vertex, name, value):
+        """
+        Record that an indexed attribute of a vertex was set.
+
+        Args:
+            vertex (Vertex): The vertex.
+            name (str): The name of the attribute.
+            value (Any): The new value of the attribute.
+        """
+        if not self._decorating:
+            self._events.append(
+                (
+                    SET_ATTRIBUTE,
+                    self.active_model_component,
+                    VERTEX,
+                    vertex.graph_id,
+                    name,
+                    value,
+                )
+            )
+        else:
+            self._nested_change((VERTEX, vertex.graph_id))
+
+    def attribute_deleted(self, vertex, name):
+        """
+        Record that an indexed attribute of a vertex was deleted.
+
+        Args:
+            vertex (Vertex): The vertex.
+            name (str): The name of the attribute.
+        """
+        if not self._decorating:
+            self._events.append(
+                (
+                    DELETE_ATTRIBUTE,
+                    self.active_model_component,
+                    VERTEX,
+                    vertex.graph_id,
+                    name,
+                )
+            )
+        else:
+            self._nested_change((VERTEX, vertex.graph_id))
+
+    def item_set(self, graph_object, key, value):
+        """
+        Record that a dictionary-style attribute of a vertex or edge was set.
+
+        Args:
+            graph_object (ExperimentGraphDecorable): The vertex or edge.
+            key (Any): The key of the attribute.
+            value (Any): The new value of the attribute.
+        """
+        if not self._decorating:
+            self._events.append(
+                (
+                    SET_ITEM,
+                    self.active_model_component,
+                    *_target(graph_object),
+                    key,
+                    value,
+                )
+            )
+        else:
+            self._nested_change(_entity(_target(graph_object)))
+
+    def item_deleted(self, graph_object, key):
+        """
+        Record that a dictionary-style attribute of a vertex or edge was deleted.
+
+        Args:
+            graph_object (ExperimentGraphDecorable): The vertex or edge.
+            key (Any): The key of the attribute.
+        """
+        if not self._decorating:
+            self._events.append(
+                (DELETE_ITEM, self.active_model_component, *_target(graph_object), key)
+            )
+        else:
+            self._nested_change(_entity(_target(graph_object)))
+
+    def compact(self):
+        """
+        Remove the events which do not affect the final graph. This removes:
+
+        * Every event for an object which was both added and deleted within the
+          journal, including the edges removed when a vertex is deleted.
+        * The events which changed an object before it was deleted.
+        * The events which set an attribute that was set again before the object
+          was next decorated.
+
+        A decoration whose ``__init__`` method changed other objects in the graph
+        (e.g. by adding a vertex) cannot be removed, as those objects would be
+        lost. Such a decorator may also depend on any part of the graph, so none
+        of the events before it are removed either.
+
+        Replaying the compacted journal produces the same graph as replaying the
+        original journal, provided that decorators only read other objects in the
+        graph when they also change the graph.
+
+        Returns:
+            int: The number of events which were removed.
+        """
+        removed = set()
+        # The object's key -> [whether it was added in the journal, event indexes]
+        lifetimes = {}
+        # The object's key -> {attribute slot: index of the last event}
+        last_sets = {}
+        # A vertex's key -> the keys of the edges which the journal refers to
+        incident = {}
+        # The index of the last decoration which changed other objects. The events
+        # up to and including it are kept.
+        barrier = -1
+
+        def remove(indexes):
+            removed.update(index for index in indexes if index > barrier)
+
+        for index, (kind, _model_component, target, details) in enumerate(self):
+            entity = _entity(target)
+            if entity[0] == EDGE:
+                for graph_id in entity[1]:
+                    incident.setdefault((VERTEX, graph_id), set()).add(entity)
+
+            if kind in {ADD_VERTEX, ADD_EDGE}:
+                lifetimes.setdefault(entity, [True, []])[1].append(index)
+            elif kind in {DELETE_VERTEX, DELETE_EDGE}:
+                lifetime = lifetimes.pop(entity, None)
+                last_sets.pop(entity, None)
+                if lifetime is not None:
+                    remove(lifetime[1])
+                    # The deletion is only removed along with the addition.
+                    if lifetime[0] and lifetime[1][0] > barrier:
+                        removed.add(index)
+                for edge in incident.pop(entity, ()):
+                    edge_lifetime = lifetimes.pop(edge, None)
+                    last_sets.pop(edge, None)
+                    if edge_lifetime is not None:
+                        remove(edge_lifetime[1])
+            else:
+                lifetimes.setdefault(entity, [False, []])[1].append(index)
+                if kind == DECORATE:
+                    last_sets.pop(entity, None)
+                    if details[4] is not None:
+                        barrier = index
+                else:
+                    slots = last_sets.setdefault(entity, {})
+                    slot = (_ATTRIBUTE_SLOTS[kind], details[0])
+                    previous = slots.get(slot)
+                    if previous is not None:
+                        remove((previous,))
+                    slots[slot] = index
+
+        self._events = [
+            event for index, event in enumerate(self._events) if index not in removed
+        ]
+        return len(removed)
+
+    def replay(self, graph=None):
+        """
+        Make the recorded changes to a graph.
+
+        Args:
+            graph (ExperimentGraph): The graph to change. This should be equivalent
+                to the graph which the journal was attached to when it started
+                recording. If :py:data:`None`, a new empty graph is used.
+
+        Returns:
+            ExperimentGraph: The changed graph.
+        """
+        if graph is None:
+            graph = ExperimentGraph()
+
+        def find(target):
+            if target[0] == VERTEX:
+                return graph.g.nodes[target[1]]["object"]
+            return graph.g.adj[target[1]][target[2]]["object"]
+
+        for kind, _model_component, target, details in self:
+            if kind == ADD_VERTEX:
+                Vertex(graph, graph_id=target[1])
+            elif kind == ADD_EDGE:
+                Edge(find((VERTEX, target[1])), find((VERTEX, target[2])))
+            elif kind in {DELETE_VERTEX, DELETE_EDGE}:
+                find(target).delete()
+            elif kind == DECORATE:
+                decorator_class, init_args, init_kwargs, handler, last_node_id = details
+                if last_node_id is not None:
+                    # Give the objects added by the decorator the same IDs.
+                    graph.last_node_id = last_node_id
+                find(target).decorate(
+                    decorator_class, list(init_args), dict(init_kwargs), handler
+                )
+            elif kind == SET_ATTRIBUTE:
+                setattr(find(target), *details)
+            elif kind == DELETE_ATTRIBUTE:
+                delattr(find(target), *details)
+            elif kind == SET_ITEM:
+                find(target)[details[0]] = details[1]
+            elif kind == DELETE_ITEM:
+                del find(target)[details[0]]
+        return graph
+
+    def summary(self):
+        """
+        Count the recorded events.
+
+        Returns:
+            dict: The total number of ``events``, the number of each kind of event
+            (``kinds``), and the number of each kind of event recorded while each
+            model component was running (``model_components``).
+        """
+        kinds = Counter()
+        model_components = {}
+        for kind, model_component, *_rest in self._events:
+            kinds[kind] += 1
+            model_components.setdefault(model_component, Counter())[kind] += 1
+        return {
+            "events": len(self._events),
+            "kinds": dict(kinds),
+            "model_components": {
+                model_component: dict(counts)
+                for model_component, counts in model_components.items()
+            },
+        }
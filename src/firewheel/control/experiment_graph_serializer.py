@@ -0,0 +1,628 @@
+"""
+A compact binary serialization format for the :py:class:`ExperimentGraph
+<firewheel.control.experiment_graph.ExperimentGraph>`.
+
+Pickling an experiment graph recurses through every :py:mod:`networkx` dictionary
+and re-decorates each :py:class:`Vertex <firewheel.control.experiment_graph.Vertex>`
+and :py:class:`Edge <firewheel.control.experiment_graph.Edge>` when it is loaded,
+which takes a long time for large graphs. Instead, this format stores:
+
+* The graph structure as integer arrays. The neighbors of each vertex are stored
+  in a compressed sparse row (CSR) layout, which preserves their order.
+* Each distinct decorator stack once. A decorator stack is the type, decorators,
+  methods/attributes, and decorator methods shared by many vertices or edges.
+  Each vertex and edge refers to its decorator stack by index.
+* The instance attributes in columnar blocks, with one block per decorator stack.
+
+Loading restores the attributes of each object directly, without re-running any
+decorators. Decorator methods are only bound to an object once they are first
+used (see :py:meth:`ExperimentGraphDecorable.__getattr__
+<firewheel.control.experiment_graph.ExperimentGraphDecorable.__getattr__>`).
+
+The decorator stacks and attribute values are stored using :py:mod:`pickle`, so
+the same restrictions apply as when pickling the graph. Notably, the model
+component objects used by the graph must be importable when it is loaded.
+
+Warning:
+    Loading a serialized graph can execute arbitrary code, just like loading
+    :py:mod:`pickle` data. Only load graphs from trusted sources.
+
+Attributes:
+    FORMAT_VERSION (int): The version of the serialization format. Graphs
+        serialized with a different version cannot be loaded.
+"""
+
+import io
+import sys
+import types
+import pickle
+import struct
+import logging
+import itertools
+from array import array
+
+import networkx as nx
+
+from firewheel.control.experiment_graph import (
+    ExperimentGraph,
+    _SearchCache,
+    _intern_frozenset,
+)
+
+FORMAT_VERSION = 1
+
+_MAGIC = b"FWGRAPH\x00"
+
+# The magic bytes, format version, last node ID, and the number of nodes,
+# adjacency entries, and edges.
+_HEADER = struct.Struct("<8sIqqqq")
+_LENGTH = struct.Struct("<q")
+
+# Persistent IDs of the objects which are stored as part of the structure.
+_GRAPH_ID = -1
+_NX_GRAPH_ID = -2
+
+# The graph attributes which are stored as part of the structure, are rebuilt, or
+# are not stored.
+_GRAPH_STRUCTURE = {
+    "g",
+    "log",
+    "last_node_id",
+    "journal",
+    "_search_cache",
+    "_vertex_indexes",
+    "_decorator_index",
+}
+
+# The object attributes which are stored as part of their decorator stack.
+_STACK_ATTRIBUTES = {"decorators", "cached_self_dir", "_pending_methods"}
+
+
+class _Absent:
+    """
+    Marks that an object does not have an attribute in its columnar block.
+    """
+
+
+# The encodings of a column of attribute values.
+_VALUES = 0  # A list of the values.
+_CONSTANT = 1  # A single value which is shared by every object.
+_VERTICES = 2  # An array of the positions of the vertices which are the values.
+
+
+def _write_array(stream, values):
+    """
+    Write an array of 64-bit integers in little-endian byte order.
+
+    Args:
+        stream (io.BufferedIOBase): The stream to write to.
+        values (array.array): The integers, with the ``"q"`` type code.
+    """
+    if sys.byteorder != "little":
+        values = array("q", values)
+        values.byteswap()
+    stream.write(values.tobytes())
+
+
+def _read_array(stream, count):
+    """
+    Read an array of 64-bit integers written by :py:func:`_write_array`.
+
+    Args:
+        stream (io.BufferedIOBase): The stream to read from.
+        count (int): The number of integers to read.
+
+    Returns:
+        array.array: The integers.
+
+    Raises:
+        ValueError: If the stream ends before all the integers are read.
+    """
+    values = array("q")
+    data = stream.read(count * values.itemsize)
+    if len(data) != count * values.itemsize:
+        raise ValueError("The serialized experiment graph is truncated.")
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _write_section(stream, data):
+    """
+    Write a length-prefixed section of bytes.
+
+    Args:
+        stream (io.BufferedIOBase): The stream to write to.
+        data (bytes): The contents of the section.
+    """
+    stream.write(_LENGTH.pack(len(data)))
+    stream.write(data)
+
+
+def _read_section(stream):
+    """
+    Read a section written by :py:func:`_write_section`.
+
+    Args:
+        stream (io.BufferedIOBase): The stream to read from.
+
+    Returns:
+        bytes: The contents of the section.
+
+    Raises:
+        ValueError: If the stream ends before the section is read.
+    """
+    header = stream.read(_LENGTH.size)
+    if len(header) != _LENGTH.size:
+        raise ValueError("The serialized experiment graph is truncated.")
+    (length,) = _LENGTH.unpack(header)
+    data = stream.read(length)
+    if len(data) != length:
+        raise ValueError("The serialized experiment graph is truncated.")
+    return data
+
+
+class _GraphPickler(pickle.Pickler):
+    """
+    Pickles attribute values, storing references to the graph, its vertices,
+    and its edges by their position.
+    """
+
+    def __init__(self, file, references):
+        """
+        Initialize the pickler.
+
+        Args:
+            file (io.BufferedIOBase): The stream to write to.
+            references (dict): The persistent ID of each object stored as part of
+                the structure, keyed by the :py:func:`id` of the object.
+        """
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.references = references
+
+    def persistent_id(self, obj):
+        """
+        Get the persistent ID of an object.
+
+        Args:
+            obj (Any): The object being pickled.
+
+        Returns:
+            int: The persistent ID of the object, or :py:data:`None` if the object
+            should be pickled normally.
+        """
+        return self.references.get(id(obj))
+
+
+class _GraphUnpickler(pickle.Unpickler):
+    """
+    Unpickles attribute values pickled by :py:class:`_GraphPickler`.
+    """
+
+    def __init__(self, file, graph, vertices, edges):
+        """
+        Initialize the unpickler.
+
+        Args:
+            file (io.BufferedIOBase): The stream to read from.
+            graph (ExperimentGraph): The graph being loaded.
+            vertices (list): The vertices of the graph, by position.
+            edges (list): The edges of the graph, by position.
+        """
+        super().__init__(file)
+        self.graph = graph
+        self.vertices = vertices
+        self.edges = edges
+
+    def persistent_load(self, pid):
+        """
+        Get the object with a persistent ID.
+
+        Args:
+            pid (int): The persistent ID of the object.
+
+        Returns:
+            Any: The object with the given persistent ID.
+        """
+        if pid == _GRAPH_ID:
+            return self.graph
+        if pid == _NX_GRAPH_ID:
+            return self.graph.g
+        if pid % 2:
+            return self.edges[pid // 2]
+        return self.vertices[pid // 2]
+
+
+def _split_state(obj):
+    """
+    Split the state of a decorated object into its decorator stack and its
+    instance attributes. Like :py:meth:`ExperimentGraphDecorable.__getstate__
+    <firewheel.control.experiment_graph.ExperimentGraphDecorable.__getstate__>`,
+    bound methods are not part of the instance attributes and loggers are stored
+    by name.
+
+    Args:
+        obj (ExperimentGraphDecorable): A :py:class:`Vertex
+            <firewheel.control.experiment_graph.Vertex>` or :py:class:`Edge
+            <firewheel.control.experiment_graph.Edge>`.
+
+    Returns:
+        tuple: The decorator stack (the type of the object, its decorators, its
+        methods/attributes, and pairs of the names and functions of its decorator
+        methods) and a dictionary of the instance attributes.
+    """
+    attributes = obj.__dict__
+    methods = dict(attributes.get("_pending_methods", ()))
+    state = {}
+    for name, value in attributes.items():
+        if type(value) is types.MethodType:
+            if value.__self__ is obj:
+                methods[name] = value.__func__
+        elif name not in _STACK_ATTRIBUTES:
+            state[name] = value
+    if "log" in state:
+        state["log"] = state["log"].name
+    # Objects with the same decorator stack bind the same methods in the same
+    # order, so a tuple is sufficient (and faster to hash than a frozenset).
+    stack = (
+        type(obj),
+        attributes["decorators"],
+        attributes["cached_self_dir"],
+        tuple(methods.items()),
+    )
+    return stack, state
+
+
+def _encode_column(values, references):
+    """
+    Encode the values of an attribute for each object in a decorator stack.
+
+    Pickling vertices (e.g., the endpoints of each :py:class:`Edge
+    <firewheel.control.experiment_graph.Edge>`) and shared values (e.g., class
+    attributes of a decorator) one at a time is relatively slow, so these columns
+    are stored as an array of positions and a single value, respectively.
+
+    Args:
+        values (list): The value of the attribute for each object.
+        references (dict): The persistent ID of each object stored as part of
+            the structure, keyed by the :py:func:`id` of the object.
+
+    Returns:
+        tuple: The encoding of the column and its data.
+    """
+    first = values[0]
+    if all(value is first for value in values):
+        return _CONSTANT, first
+    positions = array("q")
+    for value in values:
+        pid = references.get(id(value))
+        if pid is None or pid < 0 or pid % 2:
+            return _VALUES, values
+        positions.append(pid // 2)
+    return _VERTICES, positions
+
+
+def _decode_column(column, vertices):
+    """
+    Decode a column encoded by :py:func:`_encode_column`.
+
+    Args:
+        column (tuple): The encoding of the column and its data.
+        vertices (list): The vertices of the graph, by position.
+
+    Returns:
+        Iterable: The value of the attribute for each object.
+    """
+    encoding, data = column
+    if encoding == _CONSTANT:
+        return itertools.repeat(data)
+    if encoding == _VERTICES:
+        return [vertices[position] for position in data]
+    return data
+
+
+def dump(graph, file):
+    """
+    Serialize an experiment graph to a binary file.
+
+    Args:
+        graph (ExperimentGraph): The experiment graph to serialize.
+        file (io.BufferedIOBase): A binary file opened for writing.
+
+    Raises:
+        TypeError: If a vertex ID is not an integer.
+    """
+    nx_graph = graph.g
+    node_ids = list(nx_graph)
+    positions = {node_id: position for position, node_id in enumerate(node_ids)}
+
+    # The structure, as a CSR adjacency list. Each undirected edge has an entry
+    # for both of its endpoints which refers to the position of the edge.
+    offsets = array("q", [0])
+    neighbors = array("q")
+    edge_refs = array("q")
+    edge_positions = {}
+    edge_data = []
+    for node_id in node_ids:
+        for neighbor_id, data in nx_graph.adj[node_id].items():
+            position = edge_positions.get(id(data))
+            if position is None:
+                position = edge_positions[id(data)] = len(edge_data)
+                edge_data.append(data)
+            neighbors.append(positions[neighbor_id])
+            edge_refs.append(position)
+        offsets.append(len(neighbors))
+
+    node_data = [nx_graph.nodes[node_id] for node_id in node_ids]
+    vertices = [data.get("object") for data in node_data]
+    edges = [data.get("object") for data in edge_data]
+
+    references = {id(graph): _GRAPH_ID, id(nx_graph): _NX_GRAPH_ID}
+    references.update(
+        (id(vertex), 2 * position)
+        for position, vertex in enumerate(vertices)
+        if vertex is not None
+    )
+    references.update(
+        (id(edge), 2 * position + 1)
+        for position, edge in enumerate(edges)
+        if edge is not None
+    )
+
+    # Group the objects by their decorator stack.
+    stacks = {}
+    blocks = []
+    object_stacks = []
+    for objects in (vertices, edges):
+        indexes = array("q")
+        for obj in objects:
+            if obj is None:
+                indexes.append(-1)
+                continue
+            stack, state = _split_state(obj)
+            index = stacks.get(stack)
+            if index is None:
+                index = stacks[stack] = len(blocks)
+                blocks.append([])
+            blocks[index].append(state)
+            indexes.append(index)
+        object_stacks.append(indexes)
+
+    # Store the attributes of each decorator stack as columns.
+    columns = []
+    for states in blocks:
+        names = {}
+        for state in states:
+            names.update(dict.fromkeys(state))
+        columns.append(
+            {
+                name: _encode_column(
+                    [state.get(name, _Absent) for state in states], references
+                )
+                for name in names
+            }
+        )
+
+    attributes = {
+        "graph": {
+            key: value
+            for key, value in graph.__dict__.items()
+            if key not in _GRAPH_STRUCTURE
+        },
+        "nx_graph": nx_graph.graph,
+        "node_extras": [
+            (position, {key: value for key, value in data.items() if key != "object"})
+            for position, data in enumerate(node_data)
+            if len(data) > ("object" in data)
+        ],
+        "edge_extras": [
+            (position, {key: value for key, value in data.items() if key != "object"})
+            for position, data in enumerate(edge_data)
+            if len(data) > ("object" in data)
+        ],
+        "columns": columns,
+    }
+    attribute_stream = io.BytesIO()
+    _GraphPickler(attribute_stream, references).dump(attributes)
+    stack_data = pickle.dumps(
+        [
+            (obj_type, tuple(decorators), tuple(self_dir), tuple(methods))
+            for obj_type, decorators, self_dir, methods in stacks
+        ],
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+
+    file.write(
+        _HEADER.pack(
+            _MAGIC,
+            FORMAT_VERSION,
+            graph.last_node_id,
+            len(node_ids),
+            len(neighbors),
+            len(edge_data),
+        )
+    )
+    _write_array(file, array("q", node_ids))
+    _write_array(file, offsets)
+    _write_array(file, neighbors)
+    _write_array(file, edge_refs)
+    _write_array(file, object_stacks[0])
+    _write_array(file, object_stacks[1])
+    _write_section(file, stack_data)
+    _write_section(file, attribute_stream.getbuffer())
+
+
+def dumps(graph):
+    """
+    Serialize an experiment graph to bytes.
+
+    Args:
+        graph (ExperimentGraph): The experiment graph to serialize.
+
+    Returns:
+        bytes: The serialized experiment graph.
+    """
+    stream = io.BytesIO()
+    dump(graph, stream)
+    return stream.getvalue()
+
+
+def _load_stacks(data):
+    """
+    Load the decorator stacks of a serialized graph.
+
+    Decorator methods which would be hidden by an attribute of the object's class
+    must be bound when the object is loaded, while the others are bound once
+    they are first used.
+
+    Args:
+        data (bytes): The serialized decorator stacks.
+
+    Returns:
+        list: The type, shared decorators, shared methods/attributes, methods to
+        bind when loading, and methods to bind lazily for each decorator stack.
+    """
+    stacks = []
+    for obj_type, decorators, self_dir, methods in pickle.loads(data):  # nosec
+        class_dir = set(dir(obj_type))
+        stacks.append(
+            (
+                obj_type,
+                _intern_frozenset(decorators),
+                _intern_frozenset(self_dir),
+                [(name, func) for name, func in methods if name in class_dir],
+                {name: func for name, func in methods if name not in class_dir},
+            )
+        )
+    return stacks
+
+
+def load(file):
+    """
+    Load an experiment graph serialized by :py:func:`dump`.
+
+    Args:
+        file (io.BufferedIOBase): A binary file opened for reading.
+
+    Returns:
+        ExperimentGraph: The experiment graph.
+
+    Raises:
+        ValueError: If the file is not a serialized experiment graph or was
+            serialized with an incompatible version of the format.
+    """
+    header = file.read(_HEADER.size)
+    if len(header) != _HEADER.size:
+        raise ValueError("The serialized experiment graph is truncated.")
+    magic, version, last_node_id, num_nodes, num_entries, num_edges = _HEADER.unpack(
+        header
+    )
+    if magic != _MAGIC:
+        raise ValueError("The data is not a serialized experiment graph.")
+    if version != FORMAT_VERSION:
+        raise ValueError(
+            f"Unable to load an experiment graph serialized with version {version} "
+            f"of the format; expected version {FORMAT_VERSION}."
+        )
+
+    node_ids = _read_array(file, num_nodes)
+    offsets = _read_array(file, num_nodes + 1)
+    neighbors = _read_array(file, num_entries)
+    edge_refs = _read_array(file, num_entries)
+    object_stacks = (_read_array(file, num_nodes), _read_array(file, num_edges))
+    stacks = _load_stacks(_read_section(file))
+
+    # Create empty objects, which can be referenced while loading the attributes.
+    graph = ExperimentGraph.__new__(ExperimentGraph)
+    graph.g = nx.Graph()
+    vertices, edges = (
+        [
+            stacks[index][0].__new__(stacks[index][0]) if index >= 0 else None
+            for index in indexes
+        ]
+        for indexes in object_stacks
+    )
+
+    attributes = _GraphUnpickler(
+        io.BytesIO(_read_section(file)), graph, vertices, edges
+    ).load()
+
+    # Restore the structure.
+    nx_graph = graph.g
+    nx_graph.graph.update(attributes["nx_graph"])
+    node_data = [
+        {"object": vertex} if vertex is not None else {} for vertex in vertices
+    ]
+    edge_data = [{"object": edge} if edge is not None else {} for edge in edges]
+    for position, extras in attributes["node_extras"]:
+        node_data[position].update(extras)
+    for position, extras in attributes["edge_extras"]:
+        edge_data[position].update(extras)
+    # The networkx graph is populated directly, as adding the edges one at a time
+    # would not preserve the order of each node's neighbors.
+    adjacency = nx_graph._adj
+    for position, node_id in enumerate(node_ids):
+        nx_graph._node[node_id] = node_data[position]
+        adjacency[node_id] = {
+            node_ids[neighbors[entry]]: edge_data[edge_refs[entry]]
+            for entry in range(offsets[position], offsets[position + 1])
+        }
+
+    graph.__dict__.update(attributes["graph"])
+    graph.last_node_id = last_node_id
+    graph._search_cache = _SearchCache()
+    graph.journal = None
+    graph._setup_logging()
+
+    # Restore the attributes of each object, one decorator stack at a time.
+    loggers = {}
+    members = [[] for _stack in stacks]
+    for objects, indexes in zip((vertices, edges), object_stacks):
+        for obj, index in zip(objects, indexes):
+            if obj is not None:
+                members[index].append(obj)
+    for stack, objects, columns in zip(stacks, members, attributes["columns"]):
+        _obj_type, decorators, self_dir, eager_methods, lazy_methods = stack
+        names = tuple(columns)
+        rows = (
+            zip(*(_decode_column(column, vertices) for column in columns.values()))
+            if columns
+            else itertools.repeat(())
+        )
+        for obj, values in zip(objects, rows):
+            state = obj.__dict__
+            state.update(
+                (name, value)
+                for name, value in zip(names, values)
+                if value is not _Absent
+            )
+            if "log" in state:
+                try:
+                    state["log"] = loggers[state["log"]]
+                except KeyError:
+                    state["log"] = loggers[state["log"]] = logging.getLogger(
+                        state["log"]
+                    )
+            state["decorators"] = decorators
+            state["cached_self_dir"] = self_dir
+            for name, func in eager_methods:
+                state[name] = types.MethodType(func, obj)
+            if lazy_methods:
+                state["_pending_methods"] = lazy_methods
+
+    graph._rebuild_vertex_indexes()
+    return graph
+
+
+def loads(data):
+    """
+    Load an experiment graph serialized by :py:func:`dumps`.
+
+    Args:
+        data (bytes): The serialized experiment graph.
+
+    Returns:
+        ExperimentGraph: The experiment graph.
+    """
+    return load(io.BytesIO(data))
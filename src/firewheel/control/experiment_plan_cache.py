@@ -0,0 +1,258 @@
+"""
+A persistent cache of resolved experiment plans.
+
+Resolving the dependency graph for an experiment requires loading every model
+component involved and repeatedly ordering the graph. Developers frequently run
+the same ``firewheel experiment`` command many times in a row, so this module
+stores the resolved plan (the ordered model components and their groupings) on
+disk and allows it to be reused when nothing has changed.
+
+Attributes:
+    PLAN_CACHE_VERSION (int): The version of the on-disk cache format. Caches
+        with a different version are discarded.
+    MAX_PLANS (int): The default maximum number of plans which are kept. The
+        least recently used plans are discarded first.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+
+from firewheel.config import config
+from firewheel.lib.log import Log
+from firewheel.lib.utilities import hash_file
+
+PLAN_CACHE_VERSION = 1
+MAX_PLANS = 32
+
+
+class ExperimentPlanCache:
+    """
+    An on-disk cache of resolved experiment plans.
+
+    Plans are keyed by a hash of the requested model components (including
+    their arguments), the install setting, the attribute defaults, and the
+    configured repositories (see :py:meth:`get_key`). Each plan also records the
+    content hash of the ``MANIFEST`` of every model component in the plan and
+    the providers of every attribute those model components depend on or
+    precede. A cached plan is only returned if all of these are unchanged.
+
+    The cache is stored as a JSON file with the form:
+
+    .. code-block:: json
+
+        {
+            "version": 1,
+            "plans": {
+                "<key>": {
+                    "plan": [
+                        {"name": "", "path": "", "grouping": 0, "initial": false}
+                    ],
+                    "manifests": {"<model component path>": "<hash>"},
+                    "providers": {"<attribute>": ["<model component path>"]}
+                }
+            }
+        }
+    """
+
+    def __init__(
+        self,
+        db_basepath=config["system"]["default_output_dir"],
+        db_filename="experiment_plans.json",
+        max_plans=MAX_PLANS,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            db_basepath (str): The base path where the cache file is stored. This
+                defaults to the same location as the repository database.
+            db_filename (str): The name of the cache file. Defaults to
+                "experiment_plans.json".
+            max_plans (int): The maximum number of plans to keep.
+        """
+        self.log = Log(name="ExperimentPlanCache").log
+        self.cache_file = Path(db_basepath) / db_filename
+        self.max_plans = max_plans
+
+    @staticmethod
+    def get_key(
+        initial_component_list,
+        install_mcs=None,
+        attribute_defaults=None,
+        repositories=None,
+    ):
+        """
+        Compute the cache key for a set of requested model components.
+
+        Args:
+            initial_component_list (list): The model components requested by the
+                user, in order.
+            install_mcs (bool): The install setting used to resolve the plan.
+            attribute_defaults (dict): The attribute defaults used to resolve
+                the plan.
+            repositories (list_iterator): The repositories used to resolve the plan.
+
+        Returns:
+            str: A hex digest which identifies the request.
+        """
+        request = {
+            "version": PLAN_CACHE_VERSION,
+            "model_components": [
+                [mc.name, mc.path, mc.arguments] for mc in initial_component_list
+            ],
+            "install": install_mcs,
+            "attribute_defaults": attribute_defaults or {},
+            "repositories": [repo["path"] for repo in repositories or []],
+        }
+        serialized = json.dumps(request, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf8")).hexdigest()
+
+    @staticmethod
+    def hash_manifest(path):
+        """
+        Hash the ``MANIFEST`` of the model component at the given path.
+
+        Args:
+            path (str): The path of the model component.
+
+        Returns:
+            str: The hash of the ``MANIFEST``, or :py:data:`None` if it could not
+            be read.
+        """
+        try:
+            return hash_file(os.path.join(path, "MANIFEST"))
+        except OSError:
+            return None
+
+    def _load(self):
+        """
+        Load the cache file.
+
+        Returns:
+            dict: The cached plans, keyed by request.
+        """
+        try:
+            with self.cache_file.open("r", encoding="utf8") as cache_file:
+                data = json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.decoder.JSONDecodeError):
+            self.log.warning("Experiment plan cache unable to be read. Discarding.")
+            return {}
+
+        if not isinstance(data, dict) or data.get("version") != PLAN_CACHE_VERSION:
+            return {}
+        return data.get("plans", {})
+
+    def _save(self, plans):
+        """
+        Atomically write the cached plans to disk. Failing to write the cache is
+        not fatal, as the plan will simply be resolved again.
+
+        Args:
+            plans (dict): The cached plans, keyed by request.
+        """
+        data = {"version": PLAN_CACHE_VERSION, "plans": plans}
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf8",
+                dir=self.cache_file.parent,
+                prefix=f".{self.cache_file.name}.",
+                delete=False,
+            ) as tmp_file:
+                json.dump(data, tmp_file)
+            os.replace(tmp_file.name, self.cache_file)
+        except OSError as exp:
+            self.log.warning("Unable to write experiment plan cache: %s", exp)
+
+    def get(self, key, attribute_providers):
+        """
+        Get the cached plan for a request, if it is still valid. A valid plan
+        becomes the most recently used.
+
+        Args:
+            key (str): The key for the request, as returned by :py:meth:`get_key`.
+            attribute_providers (dict): The current mapping of each attribute to
+                the paths of the model components which provide it.
+
+        Returns:
+            list: The ordered plan entries, each containing the ``name``,
+            ``path``, ``grouping``, and whether the model component was part of
+            the ``initial`` request. :py:data:`None` is returned if there is no
+            valid plan.
+        """
+        plans = self._load()
+        entry = plans.get(key)
+        if entry is None:
+            self.log.debug("No cached experiment plan for %s.", key)
+            return None
+
+        for attribute, providers in entry["providers"].items():
+            if sorted(attribute_providers.get(attribute, [])) != providers:
+                self.log.debug(
+                    "Providers of %s changed. Discarding cached plan.", attribute
+                )
+                return None
+
+        for path, manifest_hash in entry["manifests"].items():
+            if self.hash_manifest(path) != manifest_hash:
+                self.log.debug("MANIFEST at %s changed. Discarding cached plan.", path)
+                return None
+
+        if next(reversed(plans)) != key:
+            # Move the plan to the end, as it is the most recently used.
+            del plans[key]
+            plans[key] = entry
+            self._save(plans)
+        return entry["plan"]
+
+    def put(self, key, plan, attribute_providers):
+        """
+        Store a resolved plan.
+
+        Args:
+            key (str): The key for the request, as returned by :py:meth:`get_key`.
+            plan (list): A list of ``(model_component, grouping, initial)`` tuples
+                in the resolved order.
+            attribute_providers (dict): The mapping of each attribute to the
+                paths of the model components which provide it that was used to
+                resolve the plan.
+        """
+        entries = []
+        manifests = {}
+        providers = {}
+        for model_component, grouping, initial in plan:
+            entries.append(
+                {
+                    "name": model_component.name,
+                    "path": model_component.path,
+                    "grouping": grouping,
+                    "initial": initial,
+                }
+            )
+            manifests[model_component.path] = self.hash_manifest(model_component.path)
+            depends, _provides, precedes = model_component.get_attributes()
+            for attribute in [*depends, *precedes]:
+                providers[attribute] = sorted(attribute_providers.get(attribute, []))
+
+        plans = self._load()
+        # Re-insert the plan so that it is the most recently used.
+        plans.pop(key, None)
+        plans[key] = {"plan": entries, "manifests": manifests, "providers": providers}
+        while len(plans) > self.max_plans:
+            del plans[next(iter(plans))]
+        self._save(plans)
+
+    def clear(self):
+        """
+        Remove every cached plan.
+        """
+        try:
+            self.cache_file.unlink()
+        except FileNotFoundError:
+            pass
@@ -1,23 +1,36 @@
 import os
+import time
 import pprint
+import threading
 from pathlib import Path
 from datetime import datetime, timezone
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
 import yaml
-from rich.progress import Progress, TextColumn, SpinnerColumn, TimeElapsedColumn
+from rich.progress import (
+    Progress,
+    BarColumn,
+    TextColumn,
+    DownloadColumn,
+    TimeElapsedColumn,
+    TransferSpeedColumn,
+)
 
 from firewheel.lib.log import Log
-from firewheel.lib.utilities import hash_file
 from firewheel.control.image_store import ImageStore
 from firewheel.control.repository_db import RepositoryDb
+from firewheel.control.model_component_index import ModelComponentIndex
 from firewheel.control.model_component_install import ModelComponentInstall
 from firewheel.control.model_component_exceptions import (
     MissingImageError,
     MissingVmResourceError,
 )
-from firewheel.control.model_component_path_iterator import ModelComponentPathIterator
 from firewheel.vm_resource_manager.vm_resource_store import VmResourceStore
 
+# The default number of files uploaded concurrently for a model component.
+UPLOAD_WORKERS = 4
+
 
 class ModelComponent:
     """
@@ -212,16 +225,17 @@ class ModelComponent:
 
     def _resolve_path(self):
         """
-        Try to find the path for the current model component by iterating
-        through all model components searching for the one whose name matches.
+        Try to find the path for the current model component by looking up its
+        name in the :py:class:`ModelComponentIndex
+        <firewheel.control.model_component_index.ModelComponentIndex>`.
         Once a match is found the manifest and path attributes are set.
 
         Raises:
             ValueError: If it cannot find the model component.
         """
-        path_iter = ModelComponentPathIterator(self.repository_db.list_repositories())
+        mc_index = ModelComponentIndex(self.repository_db.list_repositories())
 
-        for path in path_iter:
+        for path in mc_index.find_model_component_paths(self.name):
             manifest = self._load_manifest(path)
             if self.name == manifest["name"]:
                 self.path = path
@@ -366,14 +380,164 @@ class ModelComponent:
 
         return self.manifest["model_components"]["depends"]
 
-    def upload_files(self):
+    def upload_files(self, workers=UPLOAD_WORKERS):
         """
         Upload any VM Resources and Images needed for the experiment to the cache.
+
+        Up to ``workers`` files are checked, hashed, and copied into the cache
+        at once. Rather than broadcasting each file to the mesh as it is
+        uploaded, all hosts are asked to fetch the model component's new files
+        together once they have all been uploaded.
+
+        Args:
+            workers (int): The maximum number of files to upload concurrently.
+                Defaults to ``UPLOAD_WORKERS``.
+
+        Returns:
+            dict: Statistics about the upload: the number of ``files`` checked,
+            how many were ``uploaded``, the number of ``bytes`` uploaded, the
+            ``time`` taken (in seconds), and the aggregate ``rate`` (in MB/s).
+        """
+        start = time.perf_counter()
+        stats = {"files": 0, "uploaded": 0, "bytes": 0}
+        with Progress(
+            TextColumn("[yellow]{task.description}"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TimeElapsedColumn(),
+            transient=True,
+            disable=not self._show_progress(),
+        ) as progress:
+            try:
+                self._upload_vm_resources(
+                    workers=workers, progress=progress, stats=stats
+                )
+                self._upload_images(workers=workers, progress=progress, stats=stats)
+            finally:
+                self._flush_hash_caches()
+        stats["time"] = time.perf_counter() - start
+        megabytes = stats["bytes"] / 1e6
+        stats["rate"] = megabytes / stats["time"] if stats["time"] else 0.0
+        if stats["files"]:
+            self.log.info(
+                "Uploaded %s of %s files (%.1f MB) for model component %s "
+                "in %.2f seconds (%.1f MB/s).",
+                stats["uploaded"],
+                stats["files"],
+                megabytes,
+                self.name,
+                stats["time"],
+                stats["rate"],
+            )
+        return stats
+
+    def _flush_hash_caches(self):
+        """
+        Write the file hashes recorded while uploading to disk, so that the
+        hash cache is only written once per model component.
+        """
+        for store in (
+            getattr(self, "_vm_resource_store", None),
+            getattr(self, "_image_store", None),
+        ):
+            if store is not None:
+                store.hash_cache.flush()
+
+    @staticmethod
+    def _show_progress():
+        """
+        Determine whether upload progress should be displayed. Only one live
+        display can be active at once, so progress is only shown when uploading
+        from the main thread (i.e. not in the background).
+
+        Returns:
+            bool: :py:data:`True` if progress should be displayed.
+        """
+        return threading.current_thread() is threading.main_thread()
+
+    @staticmethod
+    def _get_upload_size(path):
+        """
+        Get the size of a file to upload.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            int: The size of the file in bytes, or ``0`` if it does not exist. A
+            missing file is reported when it is uploaded.
+        """
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _run_uploads(self, uploads, description, workers=1, progress=None, stats=None):
         """
-        self._upload_vm_resources()
-        self._upload_images()
+        Run a list of file uploads, with up to ``workers`` running at once. The
+        uploads of files which share a name are run in order, as they share a
+        location in the cache.
+
+        Args:
+            uploads (list): A list of ``(path, upload)`` tuples, where ``upload``
+                is a callable which uploads the file at ``path`` and returns the
+                action which was taken (see :py:meth:`_upload_vm_resource`).
+            description (str): A description of the files for the progress display.
+            workers (int): The maximum number of files to upload concurrently.
+            progress (rich.progress.Progress): If given, the progress of each
+                file and of all the files is displayed.
+            stats (dict): If given, the number of ``files``, the number of files
+                ``uploaded``, and the ``bytes`` uploaded are added to it.
+
+        Returns:
+            list: The action taken for each upload, in order.
+        """
+        sizes = [self._get_upload_size(path) for path, _upload in uploads]
+        groups = {}
+        for index, (path, _upload) in enumerate(uploads):
+            groups.setdefault(os.path.basename(path), []).append(index)
+
+        overall = None
+        if progress is not None:
+            overall = progress.add_task(
+                f"{description} for {self.name}", total=sum(sizes)
+            )
+        results = [None] * len(uploads)
+
+        def run_group(indices):
+            for index in indices:
+                path, upload = uploads[index]
+                task = None
+                if progress is not None:
+                    task = progress.add_task(os.path.basename(path), total=sizes[index])
+                results[index] = upload()
+                if progress is not None:
+                    progress.remove_task(task)
+                    progress.advance(overall, sizes[index])
+
+        if workers > 1 and len(groups) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(run_group, indices) for indices in groups.values()
+                ]
+                for future in futures:
+                    future.result()
+        else:
+            for indices in groups.values():
+                run_group(indices)
+
+        if progress is not None:
+            progress.remove_task(overall)
+        if stats is not None:
+            stats["files"] += len(uploads)
+            for result, size in zip(results, sizes):
+                if result in ("no_date", "new_hash"):
+                    stats["uploaded"] += 1
+                    stats["bytes"] += size
+        return results
 
-    def _upload_vm_resource(self, resource):
+    def _upload_vm_resource(self, resource, broadcasts=None):
         """
         Upload a file to the VmResourceStore.
         It interrupts the path of the VM resources in the following way:
@@ -391,6 +555,9 @@ class ModelComponent:
         Args:
             resource (str): Path relative to this component's root to the file being
                             uploaded.
+            broadcasts (list): If given, the mesh is not asked to fetch the
+                uploaded file. Instead, its name is appended to this list so
+                that it can be broadcast later.
 
         Returns:
             str: Indication of what happened. This may be one of:
@@ -427,12 +594,14 @@ class ModelComponent:
             self.log.debug(
                 "Resource %s not found in store. Uploading.", os.path.basename(resource)
             )
-            self.vm_resource_store.add_file(path)
+            self._add_vm_resource(path, broadcasts)
             return "no_date"
 
         if last_modified_date != upload_date:
             self.log.debug("Resource on disk is different from store. Checksuming.")
-            resource_hash = hash_file(path)
+            resource_hash = self.vm_resource_store.hash_cache.hash_file(
+                path, self.vm_resource_store.hash_algorithm
+            )
             store_hash = self.vm_resource_store.get_file_hash(resource)
             self.log.debug(
                 "Resource %s//%s on disk has hash %s and in store has %s",
@@ -444,12 +613,27 @@ class ModelComponent:
 
             if resource_hash != store_hash:
                 self.log.debug("Newer resource checksum differs. Uploading.")
-                self.vm_resource_store.add_file(path)
+                self._add_vm_resource(path, broadcasts)
                 return "new_hash"
             return "same_hash"
         return False
 
-    def _upload_vm_resources(self):
+    def _add_vm_resource(self, path, broadcasts=None):
+        """
+        Add a file to the VmResourceStore.
+
+        Args:
+            path (str): The path of the file.
+            broadcasts (list): If given, the mesh is not asked to fetch the
+                file. Instead, its name is appended to this list.
+        """
+        if broadcasts is None:
+            self.vm_resource_store.add_file(path)
+            return
+        self.vm_resource_store.add_file(path, broadcast=False)
+        broadcasts.append(os.path.basename(path))
+
+    def _upload_vm_resources(self, workers=1, progress=None, stats=None):
         """
         Upload all VM resources from the manifest. It interrupts the path
         of the VM resources in the following way:
@@ -460,6 +644,14 @@ class ModelComponent:
         * Recursive all files: `path_to_dir/**`, `path_to_dir/**/`, or `path_to_dir/**/*`
         * Recursive  all files matching pattern: `path_to_dir/**/*.ext`
 
+        The mesh is asked to fetch all of the uploaded resources once they have
+        all been uploaded.
+
+        Args:
+            workers (int): The maximum number of files to upload concurrently.
+            progress (rich.progress.Progress): Used to display the upload progress.
+            stats (dict): Upload statistics (see :py:meth:`_run_uploads`).
+
         Returns:
             bool: True if any resource was uploaded, False otherwise.
 
@@ -477,13 +669,13 @@ class ModelComponent:
                 f'of type "{type(self.manifest["vm_resources"])}"'
             )
 
-        any_uploaded = False
-
         # Interpret path as follows:
         # Non-recursive, all dir's files, non-recursive: path_to_dir, path_to_dir/ -> path_to_dir/*
         # Non-recursive, all dir's files matching pattern path_to_dir/*.ext -> no change
         # Recursive - all files: path_to_dir/**, path_to_dir/**/ -> path_to_dir/**/*
         # Recursive - all files matching pattern: path_to_dir/**/*.ext -> no change
+        broadcasts = []
+        uploads = []
         for manifest_vm_resource in self.manifest["vm_resources"]:
             if Path(self.path).joinpath(manifest_vm_resource).is_dir():
                 manifest_vm_resource += "/*"
@@ -505,19 +697,99 @@ class ModelComponent:
                     resource,
                     self.manifest["name"],
                 )
-                result = self._upload_vm_resource(resource)
-                if result == "same_hash":
-                    result = False
-                any_uploaded = any_uploaded or bool(result)
-        return any_uploaded
+                uploads.append(
+                    (
+                        os.path.join(self.path, resource),
+                        partial(self._upload_vm_resource, resource, broadcasts),
+                    )
+                )
 
-    def _upload_images(self):
+        results = self._run_uploads(
+            uploads, "Uploading VM resources", workers, progress, stats
+        )
+        self.vm_resource_store.broadcast_get_files(broadcasts, wait=False)
+        return any(bool(result) for result in results if result != "same_hash")
+
+    def _upload_image(self, end_path, broadcasts=None):
         """
-        Upload all image files from the manifest.
+        Upload an image file to the ImageStore.
+
+        Args:
+            end_path (str): Path relative to this component's root to the image.
+            broadcasts (list): If given, the mesh is not asked to fetch the
+                uploaded image. Instead, its name is appended to this list so
+                that it can be broadcast later.
 
         Raises:
             MissingImageError: If the image is not found in the model component.
 
+        Returns:
+            str: The action taken (see :py:meth:`_upload_images`).
+        """
+        path = os.path.join(self.path, end_path)
+        try:
+            modified_time = os.path.getmtime(path)
+            last_modified_date = datetime.fromtimestamp(modified_time, timezone.utc)
+        except OSError as exp:
+            # The image does not exist. This is a problem...unless the
+            # image is already in the file store then it may or may not be an
+            # issue. Either way it is weird and the user should fix it.
+            raise MissingImageError(
+                f"The image {path} is not present in the model component."
+            ) from exp
+
+        # Check the upload date of the image in the FileStore. If the image
+        # does not exist, None will be returned.
+        if not self.image_store.check_path(os.path.basename(path)):
+            upload_date = None
+        else:
+            upload_date = self.image_store.get_file_upload_date(os.path.basename(path))
+
+        # If the image does not exist in the FileStore, then add it.
+        # If it does exist, then compare times. If the last modified
+        # time of the disk image is greater than the uploaded time of
+        # the image in the FileStore, then we should check the MD5 sums. If the
+        # MD5 sums differ, than we need to re-upload the image.
+        if upload_date is None:
+            self._add_image(path, broadcasts)
+            return "no_date"
+        if last_modified_date != upload_date:
+            # If date is different then hash it
+            disk_hash = self.image_store.hash_cache.hash_file(
+                path, self.image_store.hash_algorithm
+            )
+            store_hash = self.image_store.get_file_hash(os.path.basename(path))
+            # If hashes differ upload new image
+            if disk_hash != store_hash:
+                self._add_image(path, broadcasts)
+                return "new_hash"
+            return "same_hash"
+        return False
+
+    def _add_image(self, path, broadcasts=None):
+        """
+        Add an image file to the ImageStore.
+
+        Args:
+            path (str): The path of the image.
+            broadcasts (list): If given, the mesh is not asked to fetch the
+                image. Instead, its name is appended to this list.
+        """
+        if broadcasts is None:
+            self.image_store.add_image_file(path)
+            return
+        broadcasts.append(self.image_store.cache_image_file(path))
+
+    def _upload_images(self, workers=1, progress=None, stats=None):
+        """
+        Upload all image files from the manifest. The mesh is asked to fetch
+        all of the uploaded images once they have all been uploaded.
+
+        Args:
+            workers (int): The maximum number of files to upload concurrently.
+            progress (rich.progress.Progress): Used to display the upload progress.
+            stats (dict): Upload statistics (see :py:meth:`_run_uploads`).
+
         Returns:
             list: Actions for each specified file. Order is sequential,
             proceeding through images, for each image proceed through each
@@ -536,69 +808,23 @@ class ModelComponent:
         """
         if "images" not in self.manifest:
             return False
-        images = self.manifest["images"]
-        ret_val = []
-        for image in images:
-            for end_path in image["paths"]:
-                path = os.path.join(self.path, end_path)
-                try:
-                    modified_time = os.path.getmtime(path)
-                    last_modified_date = datetime.fromtimestamp(
-                        modified_time, timezone.utc
-                    )
-                except OSError as exp:
-                    # The image does not exist. This is a problem...unless the
-                    # image is already in the file store then it may or may not be an
-                    # issue. Either way it is weird and the user should fix it.
-                    raise MissingImageError(
-                        f"The image {path} is not present in the model component."
-                    ) from exp
-
-                # Check the upload date of the image in the FileStore. If the image
-                # does not exist, None will be returned.
-                if not self.image_store.check_path(os.path.basename(path)):
-                    upload_date = None
-                else:
-                    upload_date = self.image_store.get_file_upload_date(
-                        os.path.basename(path)
-                    )
-
-                # If the image does not exist in the FileStore, then add it.
-                # If it does exist, then compare times. If the last modified
-                # time of the disk image is greater than the uploaded time of
-                # the image in the FileStore, then we should check the MD5 sums. If the
-                # MD5 sums differ, than we need to re-upload the image.
-                if upload_date is None:
-                    with Progress(
-                        TextColumn(
-                            f"[yellow]Adding {end_path} to cache. This may take a while."
-                        ),
-                        SpinnerColumn(spinner_name="line"),
-                        TimeElapsedColumn(),
-                    ) as progress:
-                        progress.add_task(description="upload_image")
-                        self.image_store.add_image_file(path)
-                    ret_val.append("no_date")
-                elif last_modified_date != upload_date:
-                    # If date is different then hash it
-                    disk_hash = hash_file(path)
-                    store_hash = self.image_store.get_file_hash(os.path.basename(path))
-                    # If hashes differ upload new image
-                    if disk_hash != store_hash:
-                        with Progress(
-                            TextColumn(
-                                f"[yellow]Updating {end_path} in cache. This may take a while."
-                            ),
-                            SpinnerColumn(spinner_name="line"),
-                            TimeElapsedColumn(),
-                        ) as progress:
-                            progress.add_task(description="upload_image")
-                        self.image_store.add_image_file(path)
-                        ret_val.append("new_hash")
-                    else:
-                        ret_val.append("same_hash")
-                else:
-                    ret_val.append(False)
+        broadcasts = []
+        uploads = [
+            (
+                os.path.join(self.path, end_path),
+                partial(self._upload_image, end_path, broadcasts),
+            )
+            for image in self.manifest["images"]
+            for end_path in image["paths"]
+        ]
+        ret_val = self._run_uploads(
+            uploads, "Uploading images", workers, progress, stats
+        )
+        if not self.image_store.broadcast_get_files(broadcasts):
+            self.log.warning(
+                "Not every host has a consistent copy of the images for %s.",
+                self.name,
+            )
         return ret_val
 
     def set_dependency_graph_id(self, new_id):
@@ -27,9 +27,37 @@ class ModelComponentDependencyGraph(DependencyGraph):
 
         self.component_map = {}
         self.grouping_map = {}
+        # Position of the first occurrence of each model component name in the
+        # cached canonical order. This is None when the cache is invalid.
+        self._first_positions = None
 
         self.log = Log(name="ModelComponentDependencyGraph").log
 
+    def _invalidate_order(self):
+        """
+        Discard the cached canonical ordering, including the cached positions of
+        each model component name.
+        """
+        super()._invalidate_order()
+        self._first_positions = None
+
+    def _get_first_positions(self):
+        """
+        Get the position of the first occurrence of each model component name
+        in the canonical order, computing it if the order has changed.
+
+        Returns:
+            dict: A dictionary mapping model component names to their first
+            position in the ordered entity list.
+        """
+        entity_order = self._get_entity_order()
+        if self._first_positions is None:
+            first_positions = {}
+            for position, node_id in enumerate(entity_order):
+                first_positions.setdefault(self.component_map[node_id].name, position)
+            self._first_positions = first_positions
+        return self._first_positions
+
     def insert(self, model_component, grouping, duplicate=False):
         """
         Insert a ModelComponent into the graph.
@@ -157,11 +185,55 @@ class ModelComponentDependencyGraph(DependencyGraph):
             ModelComponent: The instance of the ModelComponent which matches
             model_component.name. This is None if none are found.
         """
-        ordered_list = self.get_ordered_entity_list()
-        for comp in ordered_list:
-            if comp.name == model_component.name:
-                return comp
-        return None
+        return self.get_first_by_name(model_component.name)
+
+    def get_first_by_name(self, name):
+        """
+        Get the first instance of a model component with the given name in the
+        ordered list of dependencies.
+
+        Args:
+            name (str): The name of the model component to find.
+
+        Returns:
+            ModelComponent: The first instance of the ModelComponent with the
+            given name. This is None if none are found.
+        """
+        try:
+            position = self._get_first_positions().get(name)
+        except nx.HasACycle:
+            self.dependency_cycle_handler()
+        if position is None:
+            return None
+        return self.component_map[self._entity_order[position]]
+
+    def check_ordering(self, parent, component):
+        """
+        Verify that the first occurrence of a model component comes before the
+        first occurrence of another in the canonical order.
+        This uses the cached order, so it does not require sorting the graph
+        unless it has changed.
+
+        Args:
+            parent (str): The name of the model component which should come first.
+            component (str): The name of the model component which should come second.
+
+        Returns:
+            bool: True if the ordering is correct, False if it is not.
+
+        Raises:
+            ValueError: If either ``parent`` or ``component`` are not in the graph.
+        """
+        try:
+            first_positions = self._get_first_positions()
+        except nx.HasACycle:
+            self.dependency_cycle_handler()
+        try:
+            return first_positions[parent] <= first_positions[component]
+        except KeyError as exp:
+            raise ValueError(
+                f"Unable to locate {exp!s} in the dependency graph."
+            ) from exp
 
     def dependency_cycle_handler(self):
         """
@@ -0,0 +1,450 @@
+"""
+A persistent index of the model components available in a set of repositories.
+
+Locating a model component by name normally requires walking every repository
+and loading every ``MANIFEST`` file. This module caches the results of that walk
+on disk (alongside the repository database) so that subsequent lookups only need
+to verify modification times rather than re-reading the repositories.
+
+Attributes:
+    INDEX_VERSION (int): The version of the on-disk index format. Indexes with a
+        different version are discarded and rebuilt.
+    RACY_WINDOW_NS (int): Entries whose directory or ``MANIFEST`` were modified
+        within this many nanoseconds of being indexed are considered "racy".
+        File system timestamps are coarse, so a change made in the same tick as
+        the indexing would be invisible to a modification time comparison.
+        Racy entries are always re-checked on the next refresh.
+"""
+
+import os
+import json
+import time
+import tempfile
+from pathlib import Path
+
+import yaml
+
+from firewheel.config import config
+from firewheel.lib.log import Log
+
+INDEX_VERSION = 1
+RACY_WINDOW_NS = 2 * 10**9
+
+# The index is shared by every ModelComponentIndex in this process. Each entry
+# maps the index file path to the file signature that was loaded and the
+# corresponding data, which avoids re-reading the file for every lookup.
+_LOADED_INDEXES = {}
+
+
+class ModelComponentIndex:
+    """
+    An on-disk index of model components, keyed by repository path.
+
+    For every repository, the index stores each directory that was searched
+    (with its modification time and subdirectories) and each model component
+    that was found (with its name, ``MANIFEST`` signature, and the parsed
+    ``depends``, ``provides``, and ``precedes`` lists). When the index is
+    refreshed, unchanged directories are not re-listed and unchanged
+    ``MANIFEST`` files are not re-parsed.
+
+    The index is stored as a JSON file with the form:
+
+    .. code-block:: json
+
+        {
+            "version": 1,
+            "repositories": {
+                "<repository path>": {
+                    "<directory path>": {
+                        "type": "dir",
+                        "mtime": 0,
+                        "racy": false,
+                        "subdirs": []
+                    },
+                    "<model component path>": {
+                        "type": "mc",
+                        "mtime": 0,
+                        "racy": false,
+                        "manifest_mtime": 0,
+                        "manifest_size": 0,
+                        "name": "",
+                        "depends": [],
+                        "provides": [],
+                        "precedes": [],
+                        "mc_depends": [],
+                        "mc_precedes": []
+                    }
+                }
+            }
+        }
+
+    """
+
+    def __init__(
+        self,
+        repositories,
+        db_basepath=config["system"]["default_output_dir"],
+        db_filename="mc_index.json",
+    ):
+        """
+        Load the index for the given repositories.
+
+        Args:
+            repositories (list_iterator): The list of repositories, as returned by
+                :py:meth:`RepositoryDb.list_repositories
+                <firewheel.control.repository_db.RepositoryDb.list_repositories>`.
+            db_basepath (str): The base path where the index file is stored. This
+                defaults to the same location as the repository database.
+            db_filename (str): The name of the index file. Defaults to "mc_index.json".
+        """
+        self.log = Log(name="ModelComponentIndex").log
+        self.index_file = Path(db_basepath) / db_filename
+
+        self.repositories = []
+        for repo in repositories:
+            repo_path = str(Path(repo["path"]).absolute())
+            if repo_path not in self.repositories:
+                self.repositories.append(repo_path)
+
+        self._index = self._load()
+        self._dirty = False
+        self._names = None
+
+    def _load(self):
+        """
+        Load the index file, reusing the copy already loaded by this process if
+        the file has not changed.
+
+        Returns:
+            dict: The index data.
+        """
+        empty = {"version": INDEX_VERSION, "repositories": {}}
+        try:
+            stat = self.index_file.stat()
+        except OSError:
+            return empty
+
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        cached = _LOADED_INDEXES.get(str(self.index_file))
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        try:
+            with self.index_file.open("r", encoding="utf8") as index_file:
+                data = json.load(index_file)
+        except (OSError, json.decoder.JSONDecodeError):
+            self.log.warning("Model component index unable to be read. Rebuilding.")
+            return empty
+
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return empty
+
+        _LOADED_INDEXES[str(self.index_file)] = (signature, data)
+        return data
+
+    def save(self):
+        """
+        Write the index to disk if it has changed.
+
+        The file is written atomically so that concurrent readers never see a
+        partially written index. Repositories which no longer exist are pruned.
+        Failing to write the index is not fatal, as it will simply be rebuilt
+        the next time it is used.
+        """
+        if not self._dirty:
+            return
+
+        repos = self._index["repositories"]
+        for repo_path in list(repos):
+            if not os.path.exists(repo_path):
+                del repos[repo_path]
+
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf8",
+                dir=self.index_file.parent,
+                prefix=f".{self.index_file.name}.",
+                delete=False,
+            ) as tmp_file:
+                json.dump(self._index, tmp_file)
+            os.replace(tmp_file.name, self.index_file)
+            stat = self.index_file.stat()
+        except OSError as exp:
+            self.log.warning("Unable to write model component index: %s", exp)
+            return
+
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        _LOADED_INDEXES[str(self.index_file)] = (signature, self._index)
+        self._dirty = False
+
+    def refresh(self):
+        """
+        Bring the index up to date with every repository and save it.
+
+        Only directories whose modification time changed are re-listed and only
+        ``MANIFEST`` files whose modification time or size changed are re-parsed.
+        """
+        for repo_path in self.repositories:
+            self._refresh_repository(repo_path)
+        self._names = None
+        self.save()
+
+    def _refresh_repository(self, repo_path):
+        """
+        Incrementally update the index entries for a single repository.
+
+        Args:
+            repo_path (str): The absolute path of the repository.
+        """
+        repos = self._index["repositories"]
+        old_entries = repos.get(repo_path, {})
+        new_entries = {}
+
+        if not os.path.exists(repo_path):
+            self.log.warning(
+                "Unable to locate repository at expected location: %s", repo_path
+            )
+        else:
+            self._scan(repo_path, old_entries, new_entries)
+
+        if repo_path not in repos or new_entries != old_entries:
+            repos[repo_path] = new_entries
+            self._dirty = True
+
+    def _scan(self, path, old_entries, new_entries):
+        """
+        Recursively index a directory, reusing the previous entries when possible.
+
+        Args:
+            path (str): The directory to index.
+            old_entries (dict): The previous entries for the repository.
+            new_entries (dict): The updated entries for the repository. This is
+                populated by this method.
+        """
+        try:
+            dir_mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+
+        cached = old_entries.get(path)
+        if cached is not None and cached["mtime"] == dir_mtime and not cached["racy"]:
+            if cached["type"] == "dir":
+                new_entries[path] = cached
+                for subdir in cached["subdirs"]:
+                    self._scan(subdir, old_entries, new_entries)
+            else:
+                new_entries[path] = self._check_model_component(path, cached)
+            return
+
+        # The directory has changed (or is new) so its contents must be listed.
+        try:
+            with os.scandir(path) as dir_iter:
+                dir_entries = list(dir_iter)
+        except OSError:
+            return
+
+        if any(entry.name == "MANIFEST" for entry in dir_entries):
+            new_entries[path] = self._index_model_component(path, dir_mtime)
+            return
+
+        subdirs = sorted(entry.path for entry in dir_entries if entry.is_dir())
+        new_entries[path] = {
+            "type": "dir",
+            "mtime": dir_mtime,
+            "racy": self._is_recent(dir_mtime),
+            "subdirs": subdirs,
+        }
+        for subdir in subdirs:
+            self._scan(subdir, old_entries, new_entries)
+
+    def _check_model_component(self, path, cached):
+        """
+        Return the cached entry for a model component if its ``MANIFEST`` is
+        unchanged, otherwise re-index the model component.
+
+        Args:
+            path (str): The path of the model component.
+            cached (dict): The previously indexed entry.
+
+        Returns:
+            dict: An up to date entry for the model component.
+        """
+        try:
+            stat = os.stat(os.path.join(path, "MANIFEST"))
+        except OSError:
+            return self._index_model_component(path, cached["mtime"])
+        if (
+            stat.st_mtime_ns == cached["manifest_mtime"]
+            and stat.st_size == cached["manifest_size"]
+        ):
+            return cached
+        return self._index_model_component(path, cached["mtime"])
+
+    def _index_model_component(self, path, dir_mtime):
+        """
+        Parse the ``MANIFEST`` of a model component and create its index entry.
+
+        Model components with a ``MANIFEST`` that cannot be parsed are indexed
+        without a name so that they are not returned by name lookups.
+
+        Args:
+            path (str): The path of the model component.
+            dir_mtime (int): The modification time (in nanoseconds) of the model
+                component directory.
+
+        Returns:
+            dict: The entry for the model component.
+        """
+        manifest_path = os.path.join(path, "MANIFEST")
+        manifest = None
+        manifest_mtime = None
+        manifest_size = None
+        try:
+            stat = os.stat(manifest_path)
+            manifest_mtime = stat.st_mtime_ns
+            manifest_size = stat.st_size
+            with open(manifest_path, "r", encoding="utf8") as fopened:
+                manifest = yaml.safe_load(fopened)
+        except (OSError, yaml.YAMLError):
+            self.log.warning("Unable to parse MANIFEST for model component at %s", path)
+
+        if not isinstance(manifest, dict):
+            manifest = {}
+
+        attributes = manifest.get("attributes") or {}
+        model_components = manifest.get("model_components") or {}
+        return {
+            "type": "mc",
+            "mtime": dir_mtime,
+            "racy": self._is_recent(dir_mtime) or self._is_recent(manifest_mtime),
+            "manifest_mtime": manifest_mtime,
+            "manifest_size": manifest_size,
+            "name": manifest.get("name"),
+            "depends": attributes.get("depends", []),
+            "provides": attributes.get("provides", []),
+            "precedes": attributes.get("precedes", []),
+            "mc_depends": model_components.get("depends", []),
+            "mc_precedes": model_components.get("precedes", []),
+        }
+
+    @staticmethod
+    def _is_recent(mtime):
+        """
+        Check if a modification time is too recent to be trusted for change detection.
+
+        Args:
+            mtime (int): A modification time in nanoseconds.
+
+        Returns:
+            bool: :py:data:`True` if the modification time is within
+            :py:data:`RACY_WINDOW_NS` of the current time.
+        """
+        if mtime is None:
+            return False
+        return time.time_ns() - mtime < RACY_WINDOW_NS
+
+    def get_model_components(self):
+        """
+        Get the index entries for every model component in the repositories.
+
+        The index is refreshed before the entries are returned. If the same model
+        component is reachable from multiple repositories, it is only included once.
+
+        Returns:
+            dict: A mapping of model component path to its index entry, ordered by
+            repository and then by path.
+        """
+        self.refresh()
+        model_components = {}
+        for repo_path in self.repositories:
+            entries = self._index["repositories"].get(repo_path, {})
+            for path in sorted(entries):
+                entry = entries[path]
+                if entry["type"] == "mc" and path not in model_components:
+                    model_components[path] = entry
+        return model_components
+
+    def get_model_component_paths(self):
+        """
+        Get the paths of every model component in the repositories.
+
+        Returns:
+            list: The absolute path of each model component.
+        """
+        return list(self.get_model_components())
+
+    def find_model_component_paths(self, name):
+        """
+        Find the paths of all model components with a given name.
+
+        The entries already in the index are verified directly, which only
+        requires checking the modification times of the matching model components.
+        A full refresh is only performed if no valid match is found or if a
+        repository has not yet been indexed.
+
+        Args:
+            name (str): The name of the model component.
+
+        Returns:
+            list: The absolute paths of the matching model components.
+        """
+        repos = self._index["repositories"]
+        if all(repo_path in repos for repo_path in self.repositories):
+            paths = [path for path in self._lookup(name) if self._is_valid(path, name)]
+            if paths:
+                return paths
+
+        self.refresh()
+        return self._lookup(name)
+
+    def _lookup(self, name):
+        """
+        Look up a model component name in the index without refreshing it.
+
+        Args:
+            name (str): The name of the model component.
+
+        Returns:
+            list: The absolute paths of the indexed model components with that name.
+        """
+        if self._names is None:
+            self._names = {}
+            for repo_path in self.repositories:
+                entries = self._index["repositories"].get(repo_path, {})
+                for path in sorted(entries):
+                    entry = entries[path]
+                    if entry["type"] != "mc" or entry["name"] is None:
+                        continue
+                    paths = self._names.setdefault(entry["name"], [])
+                    if path not in paths:
+                        paths.append(path)
+        return self._names.get(name, [])
+
+    def _is_valid(self, path, name):
+        """
+        Check that an indexed model component still exists with the given name.
+
+        Args:
+            path (str): The path of the model component.
+            name (str): The expected name of the model component.
+
+        Returns:
+            bool: :py:data:`True` if the model component at ``path`` is unchanged.
+        """
+        for repo_path in self.repositories:
+            entry = self._index["repositories"][repo_path].get(path)
+            if entry is not None:
+                break
+        else:
+            return False
+
+        if entry["racy"] or entry["name"] != name:
+            return False
+        try:
+            if os.stat(path).st_mtime_ns != entry["mtime"]:
+                return False
+        except OSError:
+            return False
+        return self._check_model_component(path, entry) is entry
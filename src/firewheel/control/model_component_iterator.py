@@ -1,5 +1,5 @@
 from firewheel.control.model_component import ModelComponent
-from firewheel.control.model_component_path_iterator import ModelComponentPathIterator
+from firewheel.control.model_component_index import ModelComponentIndex
 
 
 class ModelComponentIterator:
@@ -9,12 +9,13 @@ class ModelComponentIterator:
 
     def __init__(self, repositories):
         """
-        Initialize the path iterator.
+        Initialize the path iterator using the model component index.
 
         Args:
             repositories (list_iterator): The list of repositories.
         """
-        self.path_iter = ModelComponentPathIterator(repositories)
+        mc_index = ModelComponentIndex(repositories)
+        self.path_iter = iter(mc_index.get_model_component_paths())
 
     def __iter__(self):
         return self
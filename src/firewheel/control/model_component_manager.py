@@ -1,11 +1,19 @@
 import os
 import sys
+import time
 import inspect
 import textwrap
 import traceback
+import tracemalloc
 import importlib.util
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    wait,
+)
 
 from rich.console import Console
 
@@ -15,7 +23,8 @@ from firewheel.control.repository_db import RepositoryDb
 from firewheel.control.model_component import ModelComponent
 from firewheel.control.dependency_graph import UnsatisfiableDependenciesError
 from firewheel.control.experiment_graph import AbstractPlugin
-from firewheel.control.model_component_iterator import ModelComponentIterator
+from firewheel.control.model_component_index import ModelComponentIndex
+from firewheel.control.experiment_graph_journal import ExperimentGraphJournal
 from firewheel.control.model_component_exceptions import ModelComponentImportError
 from firewheel.control.model_component_dependency_graph import (
     ModelComponentDependencyGraph,
@@ -48,7 +57,11 @@ class ModelComponentManager:
     """
 
     def __init__(
-        self, repository_db=None, attribute_defaults_config=None, console=None
+        self,
+        repository_db=None,
+        attribute_defaults_config=None,
+        console=None,
+        dependency_graph_backend="networkx",
     ):
         """
         Initialize the model component manager.
@@ -60,8 +73,13 @@ class ModelComponentManager:
                 selecting model components.
             console (rich.console.Console): A console to use for displaying
                 information to the user.
+            dependency_graph_backend (str): The backend used to order the
+                dependency graph. See :py:class:`DependencyGraph
+                <firewheel.control.dependency_graph.DependencyGraph>`.
+                Defaults to ``"networkx"``.
         """
         self.dg = None
+        self.dependency_graph_backend = dependency_graph_backend
         self.repository_db = repository_db or RepositoryDb()
         self.attribute_defaults = (
             attribute_defaults_config or config["attribute_defaults"]
@@ -70,6 +88,19 @@ class ModelComponentManager:
         # Set the console for native FIREWHEEL output
         self.console = console or Console()
 
+        # Map each attribute to the paths of the model components which provide it.
+        # This is built from the model component index on first use.
+        self._attribute_providers = None
+        # Memoized results of ``get_default_component_for_attribute``.
+        self._default_components = {}
+        # Model components referenced by name during dependency resolution,
+        # keyed by (name, install_mcs), along with cache hit/miss counters.
+        self._model_components = {}
+        self.mc_cache_hits = 0
+        self.mc_cache_misses = 0
+        # Whether the last dependency graph was loaded from an experiment plan cache.
+        self.plan_cache_hit = False
+
     def get_ordered_model_component_list(self):
         """
         Get an ordered list of model components from the dependency graph.
@@ -84,12 +115,87 @@ class ModelComponentManager:
             raise InvalidStateError("Dependency graph not constructed yet.")
         return self.dg.get_ordered_entity_list()
 
+    def get_model_component(self, name, install_mcs=None):
+        """
+        Get the model component with the given name, reusing a previously
+        created instance if one exists.
+
+        Many model components may depend on (or precede) the same model
+        component. Sharing a single instance for each reference avoids resolving
+        the path and parsing the ``MANIFEST`` each time it is referenced.
+
+        Args:
+            name (str): The name of the model component.
+            install_mcs (bool): A flag indicating whether to install
+                model components automatically. By default, this method
+                will defer to the default defined by the model component
+                object's constructor. If set to :py:data:`False`, model
+                components will not be installed.
+
+        Returns:
+            ModelComponent: The model component with the given name.
+        """
+        key = (name, install_mcs)
+        try:
+            model_component = self._model_components[key]
+        except KeyError:
+            self.mc_cache_misses += 1
+            model_component = ModelComponent(
+                name=name,
+                repository_db=self.repository_db,
+                install=install_mcs,
+            )
+            self._model_components[key] = model_component
+        else:
+            self.mc_cache_hits += 1
+        return model_component
+
+    def get_model_component_cache_info(self):
+        """
+        Get statistics about the model component cache used by
+        :py:meth:`get_model_component`.
+
+        Returns:
+            dict: A dictionary containing the number of cache ``hits``,
+            ``misses``, and the current number of cached model components (``size``).
+        """
+        return {
+            "hits": self.mc_cache_hits,
+            "misses": self.mc_cache_misses,
+            "size": len(self._model_components),
+        }
+
+    def get_attribute_providers(self):
+        """
+        Get a mapping of each attribute to the model components that provide it.
+
+        The mapping is built once per manager from the
+        :py:class:`ModelComponentIndex
+        <firewheel.control.model_component_index.ModelComponentIndex>`, so
+        that looking up the providers of an attribute does not require
+        loading every installed model component.
+
+        Returns:
+            dict: A dictionary mapping each attribute name to a list of the
+            paths of the model components which provide it.
+        """
+        if self._attribute_providers is None:
+            mc_index = ModelComponentIndex(self.repository_db.list_repositories())
+            self._attribute_providers = {}
+            for path, entry in mc_index.get_model_components().items():
+                for attribute in entry["provides"]:
+                    self._attribute_providers.setdefault(attribute, []).append(path)
+        return self._attribute_providers
+
     def get_default_component_for_attribute(self, attribute, install_mcs=None):
         """
         Get the default model component which provides a given attribute. We
         first, check for a single model component installed that provides the
         attribute. If more than one is found, `attribute_defaults` is checked.
 
+        Providers are found using :py:meth:`get_attribute_providers` and the
+        result for each attribute is memoized for the lifetime of the manager.
+
         Args:
             attribute (str): The attribute which a model component needs to provide.
             install_mcs (bool): A flag indicating whether to install
@@ -107,27 +213,21 @@ class ModelComponentManager:
             NoDefaultProviderError: If no default provider was found but it
                 is necessary for there to be one.
         """
-        found_default_component = None
-        multiple = False
-        model_component_iter = ModelComponentIterator(
-            self.repository_db.list_repositories()
-        )
+        try:
+            return self._default_components[(attribute, install_mcs)]
+        except KeyError:
+            pass
 
-        for mc in model_component_iter:
-            _depends, provides, _precedes = mc.get_attributes()
-            if attribute in provides:
-                if found_default_component is None:
-                    found_default_component = mc
-                else:
-                    multiple = True
-                    break
+        found_default_component = None
+        providers = self.get_attribute_providers().get(attribute, [])
+        multiple = len(providers) > 1
+        if len(providers) == 1:
+            found_default_component = ModelComponent(path=providers[0])
 
         if found_default_component is None or multiple is True:
             try:
-                found_default_component = ModelComponent(
-                    name=self.attribute_defaults[attribute],
-                    repository_db=self.repository_db,
-                    install=install_mcs,
+                found_default_component = self.get_model_component(
+                    self.attribute_defaults[attribute], install_mcs=install_mcs
                 )
 
                 _depends, provides, _precedes = found_default_component.get_attributes()
@@ -162,12 +262,64 @@ class ModelComponentManager:
                     f'"{attribute}" was not found.'
                 ) from exp
 
+        self._default_components[(attribute, install_mcs)] = found_default_component
         return found_default_component
 
-    def build_dependency_graph(self, initial_component_list, install_mcs=None):
+    def _load_plan(self, plan, initial_component_list, install_mcs=None):
+        """
+        Rebuild the dependency graph from a cached experiment plan.
+
+        Each model component in the plan is inserted with its original grouping
+        and associated with the model component before it, so the graph
+        produces exactly the cached ordering.
+
+        Args:
+            plan (list): The ordered plan entries, as returned by
+                :py:meth:`ExperimentPlanCache.get
+                <firewheel.control.experiment_plan_cache.ExperimentPlanCache.get>`.
+            initial_component_list (list): The initial list of model components
+                which the plan was resolved for.
+            install_mcs (bool): A flag indicating whether to install
+                model components automatically.
+
+        Returns:
+            bool: True if the plan was loaded, False if it no longer matches the
+            available model components.
+        """
+        dg = ModelComponentDependencyGraph(backend=self.dependency_graph_backend)
+        prev_component = None
+        for entry in plan:
+            if entry["initial"]:
+                component = initial_component_list[entry["grouping"]]
+            else:
+                try:
+                    component = self.get_model_component(
+                        entry["name"], install_mcs=install_mcs
+                    )
+                except ValueError:
+                    return False
+            if component.path != entry["path"]:
+                return False
+
+            dg.insert(component, entry["grouping"], duplicate=True)
+            if prev_component is not None:
+                dg.associate_model_components(prev_component, component)
+            prev_component = component
+
+        self.dg = dg
+        return True
+
+    def build_dependency_graph(
+        self, initial_component_list, install_mcs=None, plan_cache=None
+    ):
         """
         This is the primary method which generates the dependency graph.
 
+        If a ``plan_cache`` is given and it contains a valid plan for the
+        initial model components, the graph is rebuilt from the cached plan
+        rather than resolving every dependency. Otherwise, the resolved plan is
+        stored in the cache once the graph is built.
+
         Args:
             initial_component_list (list): An initial list of model components
                 which need to be added to the graph.
@@ -176,11 +328,30 @@ class ModelComponentManager:
                 will defer to the default defined by the model component
                 object's constructor. If set to :py:data:`False`, model
                 components will not be installed.
+            plan_cache (ExperimentPlanCache): A cache of resolved experiment
+                plans to use. Defaults to :py:data:`None`, which always
+                resolves the dependency graph.
 
         Raises:
             RuntimeError: If there is an infinite loop building the graph.
         """
-        self.dg = ModelComponentDependencyGraph()
+        self.plan_cache_hit = False
+        if plan_cache is not None:
+            plan_key = plan_cache.get_key(
+                initial_component_list,
+                install_mcs=install_mcs,
+                attribute_defaults=self.attribute_defaults,
+                repositories=self.repository_db.list_repositories(),
+            )
+            plan = plan_cache.get(plan_key, self.get_attribute_providers())
+            if plan is not None and self._load_plan(
+                plan, initial_component_list, install_mcs=install_mcs
+            ):
+                self.log.debug("Using cached experiment plan %s.", plan_key)
+                self.plan_cache_hit = True
+                return
+
+        self.dg = ModelComponentDependencyGraph(backend=self.dependency_graph_backend)
         changed = True
 
         # Insert the initial model components into the graph.
@@ -190,11 +361,7 @@ class ModelComponentManager:
         for grouping, component in enumerate(initial_component_list):
             mc_depends = component.get_model_component_depends()
             for mcdep_name in mc_depends:
-                mcdep = ModelComponent(
-                    name=mcdep_name,
-                    repository_db=self.repository_db,
-                    install=install_mcs,
-                )
+                mcdep = self.get_model_component(mcdep_name, install_mcs=install_mcs)
                 mc_depends_components.append((mcdep, component, grouping))
 
             self.dg.insert(component, grouping, duplicate=True)
@@ -244,10 +411,8 @@ class ModelComponentManager:
                     else:
                         mc_depends = component.get_model_component_depends()
                         for mcdep_name in mc_depends:
-                            mcdep = ModelComponent(
-                                name=mcdep_name,
-                                repository_db=self.repository_db,
-                                install=install_mcs,
+                            mcdep = self.get_model_component(
+                                mcdep_name, install_mcs=install_mcs
                             )
                             next_mc_dep_comp.append((mcdep, component, grouping))
                     self.dg.associate_model_components(component, parent)
@@ -262,7 +427,7 @@ class ModelComponentManager:
                 # We should double check if the previously loaded component resolved
                 # any of our unsatified attributes. If the current attribute
                 # is no longer unstatified, we can continue.
-                if attr not in dict(self.dg.get_in_degree_zero_constraints()):
+                if not self.dg.is_unsatisfied_constraint(attr):
                     continue
                 changed = True
                 component = self.get_default_component_for_attribute(
@@ -272,10 +437,8 @@ class ModelComponentManager:
                 if did_insert:
                     mc_depends = component.get_model_component_depends()
                     for mcdep_name in mc_depends:
-                        mcdep = ModelComponent(
-                            name=mcdep_name,
-                            repository_db=self.repository_db,
-                            install=install_mcs,
+                        mcdep = self.get_model_component(
+                            mcdep_name, install_mcs=install_mcs
                         )
                         mc_depends_components.append((mcdep, component, grouping))
 
@@ -284,30 +447,21 @@ class ModelComponentManager:
                 # Get any preceded model components
                 mc_precedes = component.get_model_component_precedes()
                 for mcdef_name in mc_precedes:
-                    # Get a list of MCs currently in the graph by name
-                    # This is easier to verify than by Object
-                    mc_list = self.dg.get_ordered_entity_list()
-                    cur_mc_list = [mc.name for mc in mc_list]
-                    try:
-                        # If there is an instance of the preceded MC in the graph
-                        # Then we can locate that instance and check to see if
-                        # it is already correctly ordered.
-                        mc_index = cur_mc_list.index(mcdef_name)
-                        mc = mc_list[mc_index]
-
+                    # If there is an instance of the preceded MC in the graph
+                    # Then we can locate that instance and check to see if
+                    # it is already correctly ordered. The dependency graph caches
+                    # its ordering, so this does not require re-sorting the graph.
+                    mc = self.dg.get_first_by_name(mcdef_name)
+                    if mc is not None:
                         # If the ordering is NOT correct, then we need to build
                         # an association to ensure ordering correctness.
-                        if not self.check_list_ordering(
-                            mc_list, component.name, mc.name
-                        ):
+                        if not self.dg.check_ordering(component.name, mc.name):
                             self.dg.associate_model_components(component, mc)
-                    except ValueError:
+                    else:
                         # If there is not an existing instance of the model component in
                         # the graph. It should be added.
-                        mc = ModelComponent(
-                            name=mcdef_name,
-                            repository_db=self.repository_db,
-                            install=install_mcs,
+                        mc = self.get_model_component(
+                            mcdef_name, install_mcs=install_mcs
                         )
                         self.dg.insert(mc, grouping, duplicate=False)
 
@@ -316,10 +470,8 @@ class ModelComponentManager:
                         # mc_depends_components list.
                         mc_depends = mc.get_model_component_depends()
                         for mcdep_name in mc_depends:
-                            mcdep = ModelComponent(
-                                name=mcdep_name,
-                                repository_db=self.repository_db,
-                                install=install_mcs,
+                            mcdep = self.get_model_component(
+                                mcdep_name, install_mcs=install_mcs
                             )
                             mc_depends_components.append((mcdep, mc, grouping))
 
@@ -333,29 +485,24 @@ class ModelComponentManager:
 
                 # Iterate through all preceded attributes
                 for attr in attr_precedes:
-                    mc_list = self.dg.get_ordered_entity_list()
-                    cur_mc_list = [mc.name for mc in mc_list]
-
                     # Get the default MC for the given attribute
-                    mc = self.get_default_component_for_attribute(
+                    default_mc = self.get_default_component_for_attribute(
                         attr, install_mcs=install_mcs
                     )
-                    try:
-                        # If there is an instance of the preceded MC in the graph
-                        # Then we can locate that instance and check to see if
-                        # it is already correctly ordered.
-                        mc_index = cur_mc_list.index(mc.name)
-                        mc = mc_list[mc_index]
 
+                    # If there is an instance of the preceded MC in the graph
+                    # Then we can locate that instance and check to see if
+                    # it is already correctly ordered.
+                    mc = self.dg.get_first_by_name(default_mc.name)
+                    if mc is not None:
                         # If the ordering is NOT correct, then we need to build
                         # an association to ensure ordering correctness.
-                        if not self.check_list_ordering(
-                            mc_list, component.name, mc.name
-                        ):
+                        if not self.dg.check_ordering(component.name, mc.name):
                             self.dg.associate_model_components(component, mc)
-                    except ValueError:
+                    else:
                         # If there is not an existing instance of the model component in
                         # the graph. It should be added.
+                        mc = default_mc
                         self.dg.insert(mc, grouping, duplicate=False)
 
                         # Once the new MC is added to the graph, we need to identify
@@ -363,10 +510,8 @@ class ModelComponentManager:
                         # mc_depends_components list.
                         mc_depends = mc.get_model_component_depends()
                         for mcdep_name in mc_depends:
-                            mcdep = ModelComponent(
-                                name=mcdep_name,
-                                repository_db=self.repository_db,
-                                install=install_mcs,
+                            mcdep = self.get_model_component(
+                                mcdep_name, install_mcs=install_mcs
                             )
                             mc_depends_components.append((mcdep, component, grouping))
 
@@ -379,6 +524,25 @@ class ModelComponentManager:
             if self.dg.has_cycles():
                 self.dg.dependency_cycle_handler()
 
+        self.log.debug(
+            "Model component cache: %d hits, %d misses.",
+            self.mc_cache_hits,
+            self.mc_cache_misses,
+        )
+
+        if plan_cache is not None:
+            # Model components from the initial list are always placed in
+            # the grouping matching their position in that list.
+            plan = [
+                (
+                    component,
+                    grouping,
+                    component is initial_component_list[grouping],
+                )
+                for component, grouping in self.dg.get_ordered_entity_list_with_grouping()
+            ]
+            plan_cache.put(plan_key, plan, self.get_attribute_providers())
+
     def check_list_ordering(self, cur_mc_list, parent, component):
         """
         This method verifies that a given parent is before a given component
@@ -503,30 +667,16 @@ class ModelComponentManager:
 
         return found_plugin_class
 
-    def process_model_component(self, mc, experiment_graph, dry_run=False):
+    def _load_model_component_objects(self, mc):
         """
-        This method helps process model components for execution. It:
-        * Uploads/prepares any necessary files (images/vm_resources).
-        * Loads any model component objects, if they exist.
-        * Loads and runs the plugin, if it exists.
+        Load the model component objects for a model component, if they exist.
 
         Args:
-            mc (ModelComponent): The model component to process.
-            experiment_graph (ExperimentGraph): The experiment graph. This is passed
-                to the plugin and also returned by this method.
-            dry_run (bool): Indicates whether the model components should be run (:py:data:`False`)
-                or simply imported (i.e. checked for syntax errors). Defaults to :py:data:`False`.
+            mc (ModelComponent): The model component whose objects should be loaded.
 
         Returns:
-            tuple: Tuple containing a bool of whether errors occurred and the
-            experiment graph.
-
-        Raises:
-            TypeError: If the Plugin doesn't run due to issues with passed-in arguments.
+            bool: True if an error occurred, False otherwise.
         """
-        errors = False
-
-        # Load any model component objects, if they exist.
         self.log.debug(
             "Checking model component objects for model component %s", mc.name
         )
@@ -537,8 +687,7 @@ class ModelComponentManager:
                 "Unable to get model components objects path for model component %s.",
                 mc.name,
             )
-            errors = True
-            return (errors, experiment_graph)
+            return True
         if unqualified_mc_objs_path:
             mc_objs_path = Path(mc.path) / unqualified_mc_objs_path
             try:
@@ -550,9 +699,61 @@ class ModelComponentManager:
                     mc.name,
                     exp,
                 )
-                errors = True
-                # Return here so we don't attempt to use failed Objects
-                return (errors, experiment_graph)
+                return True
+        return False
+
+    def process_model_component(
+        self,
+        mc,
+        experiment_graph,
+        dry_run=False,
+        load_objects=True,
+        timings=None,
+        upload=True,
+    ):
+        """
+        This method helps process model components for execution. It:
+        * Uploads/prepares any necessary files (images/vm_resources).
+        * Loads any model component objects, if they exist.
+        * Loads and runs the plugin, if it exists.
+
+        Args:
+            mc (ModelComponent): The model component to process.
+            experiment_graph (ExperimentGraph): The experiment graph. This is passed
+                to the plugin and also returned by this method.
+            dry_run (bool): Indicates whether the model components should be run (:py:data:`False`)
+                or simply imported (i.e. checked for syntax errors). Defaults to :py:data:`False`.
+            load_objects (bool): Whether the model component objects need to be
+                loaded. This is :py:data:`False` if they were already loaded
+                (e.g. to restore a checkpoint). Defaults to :py:data:`True`.
+            timings (dict): If provided, the time (in seconds) spent importing
+                the model component objects and plugin (``import_time``),
+                running the plugin (``run_time``), and uploading files
+                (``upload_time``) is recorded in this dictionary.
+            upload (bool): Whether to upload the model component's files. This
+                is :py:data:`False` if the caller uploads them separately (e.g.
+                in the background). Defaults to :py:data:`True`.
+
+        Returns:
+            tuple: Tuple containing a bool of whether errors occurred and the
+            experiment graph.
+
+        Raises:
+            TypeError: If the Plugin doesn't run due to issues with passed-in arguments.
+        """
+        errors = False
+        if timings is None:
+            timings = {}
+        timings.update({"import_time": 0.0, "run_time": 0.0, "upload_time": 0.0})
+
+        # Load any model component objects, if they exist.
+        # Return if this fails so we don't attempt to use failed Objects.
+        start = time.perf_counter()
+        objects_error = load_objects and self._load_model_component_objects(mc)
+        timings["import_time"] += time.perf_counter() - start
+        if objects_error:
+            errors = True
+            return (errors, experiment_graph)
 
         # Load and run the plugin, if it exists.
         try:
@@ -571,6 +772,7 @@ class ModelComponentManager:
         if unqualified_plugin_path:
             plugin_path = os.path.join(mc.path, unqualified_plugin_path)
             self.log.debug("Loading plugin for entity %s", (mc.name,))
+            start = time.perf_counter()
             try:
                 plugin_class = self._import_plugin(plugin_path, mc.name)
             except ImportError as exp:
@@ -581,39 +783,106 @@ class ModelComponentManager:
                 # Return here so we don't attempt to run the plugin that just failed
                 # import.
                 return (errors, experiment_graph)
+            finally:
+                timings["import_time"] += time.perf_counter() - start
 
             # We want all errors from running the plugin (including any ImportError)
             # to propagate up, so don't run this in the try/except block.
+            start = time.perf_counter()
             plugin_log = Log(name=mc.name).log
-            plugin_instance = plugin_class(experiment_graph, plugin_log)
-            if not dry_run:
-                plugin_args = mc.arguments["plugin"].copy()
-                # Positional arguments should be formatted as a list
-                positional_args = plugin_args.pop("", [])
-                args = (
-                    positional_args
-                    if isinstance(positional_args, list)
-                    else [positional_args]
-                )
+            # Tag the changes made to the graph while the plugin runs (see
+            # firewheel.control.experiment_graph_journal).
+            with ExperimentGraphJournal.attribute_to(mc.name):
+                plugin_instance = plugin_class(experiment_graph, plugin_log)
+                if not dry_run:
+                    plugin_args = mc.arguments["plugin"].copy()
+                    # Positional arguments should be formatted as a list
+                    positional_args = plugin_args.pop("", [])
+                    args = (
+                        positional_args
+                        if isinstance(positional_args, list)
+                        else [positional_args]
+                    )
 
-                # Keyword arguments are all remaining plugin arguments
-                kwargs = plugin_args
+                    # Keyword arguments are all remaining plugin arguments
+                    kwargs = plugin_args
 
-                try:
-                    plugin_instance.run(*args, **kwargs)
-                except TypeError:
-                    self._print_plugin_initialization_help(
-                        mc.name, plugin_instance, args, kwargs
-                    )
-                    raise
+                    try:
+                        plugin_instance.run(*args, **kwargs)
+                    except TypeError:
+                        self._print_plugin_initialization_help(
+                            mc.name, plugin_instance, args, kwargs
+                        )
+                        raise
             experiment_graph = plugin_instance.get_experiment_graph()
+            timings["run_time"] = time.perf_counter() - start
 
         # Upload/prepare any necessary files.
-        if not dry_run:
-            mc.upload_files()
+        if not dry_run and upload:
+            timings["upload_time"] = self._upload_model_component_files(mc)
 
         return (errors, experiment_graph)
 
+    @staticmethod
+    def _upload_model_component_files(mc):
+        """
+        Upload the images and VM resources of a model component.
+
+        Args:
+            mc (ModelComponent): The model component whose files are uploaded.
+
+        Returns:
+            float: The time (in seconds) spent uploading the files.
+        """
+        start = time.perf_counter()
+        mc.upload_files()
+        return time.perf_counter() - start
+
+    def _wait_for_uploads(self, pending, return_when=FIRST_COMPLETED):
+        """
+        Wait for background uploads to complete and record their outcome in the
+        result of the model component which requested them. A failed upload
+        marks that model component's result as having errors.
+
+        Args:
+            pending (dict): The outstanding upload futures, mapped to the result
+                of their model component. Completed futures are removed.
+            return_when (str): When to return, as accepted by
+                :py:func:`concurrent.futures.wait`. Defaults to returning once
+                any upload completes.
+        """
+        if not pending:
+            return
+        done, _not_done = wait(pending, return_when=return_when)
+        for future in done:
+            result = pending.pop(future)
+            try:
+                future.result()
+            except Exception:  # noqa: BLE001
+                self.log.exception(
+                    "Unable to upload files for model component %s.",
+                    result["model_component"],
+                )
+                result["errors"] = True
+
+    def _upload_in_background(self, executor, pending, mc, result, max_pending):
+        """
+        Submit the upload of a model component's files to a worker pool. If
+        ``max_pending`` uploads are already outstanding, this waits until one of
+        them completes first.
+
+        Args:
+            executor (concurrent.futures.Executor): The upload worker pool.
+            pending (dict): The outstanding upload futures, mapped to the result
+                of their model component.
+            mc (ModelComponent): The model component whose files are uploaded.
+            result (dict): The result of the model component.
+            max_pending (int): The maximum number of outstanding uploads.
+        """
+        while len(pending) >= max_pending:
+            self._wait_for_uploads(pending)
+        pending[executor.submit(self._upload_model_component_files, mc)] = result
+
     def _print_plugin_initialization_help(
         self, mc_name, plugin_instance, call_args, call_kwargs
     ):
@@ -646,13 +915,151 @@ class ModelComponentManager:
             f"\n[cyan]{filled_sig}[/cyan]"
         )
 
-    def build_experiment_graph(self, dry_run=False):
+    def _restore_checkpoint(self, mc_list, keys, checkpoint_store):
+        """
+        Restore the experiment graph from the longest matching checkpoint.
+
+        The model component objects of every model component captured by the
+        checkpoint are loaded first, as the experiment graph's decorators refer
+        to them. Their plugins are not run. Their files are not uploaded here, as
+        :py:meth:`build_experiment_graph` uploads them afterwards.
+
+        Args:
+            mc_list (list): The ordered list of model components.
+            keys (list): The checkpoint key for each model component.
+            checkpoint_store (ExperimentCheckpointStore): The checkpoint store.
+
+        Returns:
+            tuple: The number of model components whose plugins can be skipped,
+            the experiment graph, a list of results for the skipped model
+            components, and the number of leading model components whose
+            objects were loaded. If the checkpoint cannot be restored, no model
+            components are skipped but their objects may have been loaded.
+        """
+        count = checkpoint_store.find_latest(keys)
+        if not count:
+            return (0, None, [], 0)
+
+        results = []
+        for index, mc in enumerate(mc_list[:count]):
+            start = datetime.now()
+            if self._load_model_component_objects(mc):
+                # The checkpoint can't be used without its objects.
+                return (0, None, [], index)
+            results.append(
+                {
+                    "model_component": mc.name,
+                    "errors": False,
+                    "time": (datetime.now() - start).total_seconds(),
+                    "checkpoint": True,
+                }
+            )
+
+        experiment_graph = checkpoint_store.load(keys[count - 1])
+        if experiment_graph is None:
+            return (0, None, [], count)
+
+        self.log.info(
+            "Resuming experiment graph construction after %s from checkpoint.",
+            mc_list[count - 1].name,
+        )
+        return (count, experiment_graph, results, count)
+
+    @staticmethod
+    def _get_graph_size(experiment_graph):
+        """
+        Get the number of vertices and edges in an experiment graph.
+
+        Args:
+            experiment_graph (ExperimentGraph): The experiment graph, which may
+                be :py:data:`None` if no plugin has created it yet.
+
+        Returns:
+            tuple: The number of vertices and the number of edges.
+        """
+        if experiment_graph is None:
+            return (0, 0)
+        return (
+            experiment_graph.g.number_of_nodes(),
+            experiment_graph.g.number_of_edges(),
+        )
+
+    @staticmethod
+    def _attach_journal(journal, experiment_graph):
+        """
+        Attach a journal to the experiment graph, if it exists. A plugin may
+        replace the experiment graph, in which case the journal is moved to the
+        new graph.
+
+        Args:
+            journal (ExperimentGraphJournal): The journal.
+            experiment_graph (ExperimentGraph): The experiment graph, or
+                :py:data:`None` if it has not been created yet.
+        """
+        if experiment_graph is None or journal.graph is experiment_graph:
+            return
+        journal.detach()
+        journal.attach(experiment_graph)
+
+    def build_experiment_graph(
+        self,
+        dry_run=False,
+        checkpoint_store=None,
+        profile=False,
+        upload_workers=0,
+        journal=None,
+    ):
         """
         Builds the experiment graph by processing all the model components.
 
+        By default, the files (images and VM resources) of each model component
+        are uploaded before the next model component is processed. If
+        ``upload_workers`` is given, the files are instead uploaded by a pool of
+        ``upload_workers`` background threads while the plugins of the following
+        model components run. At most ``upload_workers`` model components have
+        uploads outstanding at once. All uploads complete before the plugin of the
+        final model component is run (as it typically launches the experiment) and
+        before this method returns. If a background upload fails, the result of its
+        model component is marked as having errors. Background uploads are not used
+        while profiling, as they would be charged to whichever plugin is running.
+
+        If a ``checkpoint_store`` is given, the experiment graph is checkpointed
+        after each model component. If a checkpoint exists for some of the
+        leading model components (with identical arguments and sources), the
+        experiment graph is loaded from the longest such checkpoint and only the
+        plugins of the remaining model components are run.
+
         Args:
             dry_run (bool): Indicates whether the model components should be run (:py:data:`False`)
                 or simply imported (i.e. checked for syntax errors). Defaults to :py:data:`False`.
+            checkpoint_store (ExperimentCheckpointStore): The store used to save
+                and restore checkpoints. Defaults to :py:data:`None`, which
+                disables checkpointing. Checkpointing is never used for a dry run.
+            profile (bool): Whether to profile each model component. If
+                :py:data:`True`, each result includes a ``profile`` dictionary
+                containing the ``wall_time`` (in seconds), the CPU time used by
+                the thread importing and running the plugin (``cpu_time``), the
+                peak and net memory allocated while importing and running the
+                plugin according to :py:mod:`tracemalloc` (``memory_peak`` and
+                ``memory_net``, in bytes), the number of vertices and edges before
+                and after the model component (``vertices_before``,
+                ``vertices_after``, ``edges_before``, and ``edges_after``), the
+                time spent importing (``import_time``) and running the plugin
+                (``run_time``), and the time and process CPU time spent uploading
+                files (``upload_time`` and ``upload_cpu_time``), which are
+                measured separately from the plugin. Defaults to :py:data:`False`.
+            upload_workers (int): The number of threads used to upload files in
+                the background. If ``0`` (or if ``profile`` is :py:data:`True`),
+                the files of each model component are uploaded before the next
+                model component is processed. Defaults to ``0``.
+            journal (ExperimentGraphJournal): A journal which records the changes
+                made to the experiment graph by each model component (see
+                :py:mod:`firewheel.control.experiment_graph_journal`). It is
+                attached to the experiment graph before each model component is
+                processed, so the changes made by the plugin which creates the
+                graph (and those restored from a checkpoint) are not recorded. The
+                journal is detached once the graph is built. Defaults to
+                :py:data:`None`, which does not record the changes.
 
         Returns:
             list: A list of errors that were reported when trying to execute.
@@ -666,19 +1073,115 @@ class ModelComponentManager:
             raise InvalidStateError("No dependency graph generated yet.")
         experiment_graph = None
 
-        for mc in self.get_ordered_model_component_list():
-            self.log.debug("Processing model component %s", mc.name)
-            start = datetime.now()
-            error, experiment_graph = self.process_model_component(
-                mc, experiment_graph, dry_run
+        mc_list = self.get_ordered_model_component_list()
+        keys = None
+        start_index = 0
+        objects_loaded = 0
+        if checkpoint_store is not None and not dry_run:
+            keys = checkpoint_store.get_keys(mc_list)
+            start_index, experiment_graph, errors_list, objects_loaded = (
+                self._restore_checkpoint(mc_list, keys, checkpoint_store)
             )
-            end = datetime.now()
-            errors_list.append(
-                {
+
+        # Only stop tracing memory allocations if this method started it.
+        stop_tracing = profile and not tracemalloc.is_tracing()
+        if stop_tracing:
+            tracemalloc.start()
+
+        if profile and upload_workers:
+            self.log.info("Uploading files synchronously while profiling.")
+            upload_workers = 0
+
+        executor = None
+        pending = {}
+        if upload_workers and not dry_run:
+            executor = ThreadPoolExecutor(
+                max_workers=upload_workers, thread_name_prefix="firewheel-upload"
+            )
+            for mc, result in zip(mc_list[:start_index], errors_list):
+                self._upload_in_background(
+                    executor, pending, mc, result, upload_workers
+                )
+        elif not dry_run:
+            for mc in mc_list[:start_index]:
+                self._upload_model_component_files(mc)
+
+        # Once a model component fails, the experiment graph is no longer
+        # checkpointed. The graph is also not checkpointed after the final
+        # model component so that it is always run (e.g. to launch the experiment).
+        checkpointing = keys is not None
+        try:
+            for index, mc in enumerate(mc_list[start_index:], start_index):
+                self.log.debug("Processing model component %s", mc.name)
+                if index == len(mc_list) - 1:
+                    self._wait_for_uploads(pending, return_when=ALL_COMPLETED)
+                if journal is not None:
+                    self._attach_journal(journal, experiment_graph)
+                timings = {}
+                if profile:
+                    vertices_before, edges_before = self._get_graph_size(
+                        experiment_graph
+                    )
+                    tracemalloc.reset_peak()
+                    memory_before = tracemalloc.get_traced_memory()[0]
+                    cpu_start = time.thread_time()
+                start = datetime.now()
+                error, experiment_graph = self.process_model_component(
+                    mc,
+                    experiment_graph,
+                    dry_run,
+                    load_objects=index >= objects_loaded,
+                    timings=timings,
+                    upload=executor is None and not profile,
+                )
+                if profile:
+                    cpu_time = time.thread_time() - cpu_start
+                    memory_after, memory_peak = tracemalloc.get_traced_memory()
+                    # Upload the files after measuring the plugin, so that the
+                    # uploads (which may use several threads) are reported
+                    # separately.
+                    timings["upload_cpu_time"] = 0.0
+                    if not error and not dry_run:
+                        upload_cpu_start = time.process_time()
+                        timings["upload_time"] = self._upload_model_component_files(mc)
+                        timings["upload_cpu_time"] = (
+                            time.process_time() - upload_cpu_start
+                        )
+                end = datetime.now()
+                result = {
                     "model_component": mc.name,
                     "errors": error,
                     "time": (end - start).total_seconds(),
                 }
-            )
+                if profile:
+                    vertices_after, edges_after = self._get_graph_size(experiment_graph)
+                    result["profile"] = {
+                        "wall_time": result["time"],
+                        "cpu_time": cpu_time,
+                        "memory_peak": memory_peak - memory_before,
+                        "memory_net": memory_after - memory_before,
+                        "vertices_before": vertices_before,
+                        "vertices_after": vertices_after,
+                        "edges_before": edges_before,
+                        "edges_after": edges_after,
+                        **timings,
+                    }
+                errors_list.append(result)
+                if executor is not None and not error:
+                    self._upload_in_background(
+                        executor, pending, mc, result, upload_workers
+                    )
+                if error:
+                    checkpointing = False
+                if checkpointing and index < len(mc_list) - 1:
+                    checkpoint_store.save(keys[index], experiment_graph)
+        finally:
+            if executor is not None:
+                self._wait_for_uploads(pending, return_when=ALL_COMPLETED)
+                executor.shutdown()
+            if stop_tracing:
+                tracemalloc.stop()
+            if journal is not None:
+                journal.detach()
 
         return errors_list
@@ -0,0 +1,328 @@
+"""
+A persistent cache of file content hashes.
+
+Determining whether a file needs to be uploaded to a
+:py:class:`FileStore <firewheel.lib.minimega.file_store.FileStore>` requires
+comparing the hash of the local file with the hash of the cached copy. Images
+can be many gigabytes, so this module records the hash of each file along with
+its stat signature (size, modification time, and inode). The hash is reused
+until the signature changes, so unchanged files never need to be read again.
+
+Attributes:
+    DEFAULT_ALGORITHM (str): The algorithm used to hash files if the
+        ``system.hash_algorithm`` setting is missing.
+    HASH_CACHE_VERSION (int): The version of the on-disk cache format. Caches
+        with a different version are discarded.
+    MAX_ENTRIES (int): The default maximum number of hashes which are kept. The
+        least recently recorded hashes are discarded first.
+    RACY_INTERVAL_NS (int): Files modified within this many nanoseconds of
+        being hashed are not cached, as they could be modified again without
+        changing their modification time.
+"""
+
+import os
+import json
+import time
+import atexit
+import weakref
+import tempfile
+import threading
+from pathlib import Path
+
+from firewheel.config import config
+from firewheel.lib.log import Log
+from firewheel.lib.utilities import HASH_ALGORITHMS, hash_file, parse_digest
+
+DEFAULT_ALGORITHM = "blake2b"
+HASH_CACHE_VERSION = 1
+MAX_ENTRIES = 10000
+RACY_INTERVAL_NS = 2_000_000_000
+
+_default_hash_cache = None
+_default_hash_cache_lock = threading.Lock()
+
+
+def get_hash_cache():
+    """
+    Get the hash cache shared by the current process, creating it if needed.
+
+    Returns:
+        HashCache: The shared hash cache.
+    """
+    global _default_hash_cache  # noqa: PLW0603
+    with _default_hash_cache_lock:
+        if _default_hash_cache is None:
+            _default_hash_cache = HashCache()
+        return _default_hash_cache
+
+
+def _flush_at_exit(cache_ref):
+    """
+    Flush a hash cache when the process exits, if it still exists.
+
+    Args:
+        cache_ref (weakref.ref): A weak reference to the :py:class:`HashCache`.
+    """
+    cache = cache_ref()
+    if cache is not None:
+        cache.flush()
+
+
+class HashCache:
+    """
+    An on-disk cache mapping file paths to the hash of their contents.
+
+    Each entry is keyed by the absolute path of the file and stores the stat
+    signature of the file when it was hashed. A hash is only returned if the
+    file's current signature is identical. The cache is stored as a JSON file
+    with the form:
+
+    .. code-block:: json
+
+        {
+            "version": 1,
+            "hashes": {
+                "<path>": {"signature": [0, 0, 0], "hash": "<hash>"}
+            }
+        }
+
+    New hashes are kept in memory until :py:meth:`flush` is called, so that
+    recording many hashes only writes the cache file once. Any unwritten hashes
+    are flushed when the process exits.
+
+    The cache is safe to use from multiple threads. If several processes update
+    the cache at once, some entries may be lost, which only means that the
+    corresponding files are hashed again.
+    """
+
+    def __init__(
+        self,
+        db_basepath=config["system"]["default_output_dir"],
+        db_filename="file_hashes.json",
+        max_entries=MAX_ENTRIES,
+        algorithm=None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            db_basepath (str): The base path where the cache file is stored.
+                Defaults to FIREWHEEL's default output directory.
+            db_filename (str): The name of the cache file. Defaults to
+                "file_hashes.json".
+            max_entries (int): The maximum number of hashes to keep.
+            algorithm (str): The algorithm used to hash files, unless another
+                is requested. Defaults to the ``system.hash_algorithm`` setting.
+
+        Raises:
+            ValueError: If the algorithm is not supported.
+        """
+        if algorithm is None:
+            algorithm = config["system"].get("hash_algorithm", DEFAULT_ALGORITHM)
+        if algorithm not in HASH_ALGORITHMS:
+            raise ValueError(
+                f"Unknown hash algorithm {algorithm}. Must be one of {HASH_ALGORITHMS}."
+            )
+        self.algorithm = algorithm
+        self.log = Log(name="HashCache").log
+        self.cache_file = Path(db_basepath) / db_filename
+        self.max_entries = max_entries
+        self._hashes = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        atexit.register(_flush_at_exit, weakref.ref(self))
+
+    @staticmethod
+    def get_signature(path):
+        """
+        Get the stat signature of a file.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            list: The size, the modification time (in nanoseconds), and the
+            inode of the file, or :py:data:`None` if it does not exist.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+    def _load(self):
+        """
+        Load the cache file.
+
+        Returns:
+            dict: The cached hashes, keyed by path.
+        """
+        try:
+            with self.cache_file.open("r", encoding="utf8") as cache_file:
+                data = json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.decoder.JSONDecodeError):
+            self.log.warning("File hash cache unable to be read. Discarding.")
+            return {}
+
+        if not isinstance(data, dict) or data.get("version") != HASH_CACHE_VERSION:
+            return {}
+        return data.get("hashes", {})
+
+    def _save(self, hashes):
+        """
+        Atomically write the cached hashes to disk. Failing to write the cache is
+        not fatal, as the files will simply be hashed again.
+
+        Args:
+            hashes (dict): The cached hashes, keyed by path.
+        """
+        data = {"version": HASH_CACHE_VERSION, "hashes": hashes}
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf8",
+                dir=self.cache_file.parent,
+                prefix=f".{self.cache_file.name}.",
+                delete=False,
+            ) as tmp_file:
+                json.dump(data, tmp_file)
+            os.replace(tmp_file.name, self.cache_file)
+        except OSError as exp:
+            self.log.warning("Unable to write file hash cache: %s", exp)
+
+    def _merge_pending(self, hashes):
+        """
+        Add the hashes which have not yet been written to a set of hashes
+        loaded from disk. The caller must hold the lock.
+
+        Args:
+            hashes (dict): The hashes loaded from disk, keyed by path. This is
+                modified in place.
+
+        Returns:
+            dict: The merged hashes, with the oldest in excess of
+            ``max_entries`` discarded.
+        """
+        for path, entry in self._pending.items():
+            # Move the entry to the end, as it is the most recently recorded.
+            hashes.pop(path, None)
+            hashes[path] = entry
+        while len(hashes) > self.max_entries:
+            del hashes[next(iter(hashes))]
+        return hashes
+
+    def get(self, path, algorithm=None):
+        """
+        Get the cached hash of a file, if the file is unchanged.
+
+        Args:
+            path (str): The path of the file.
+            algorithm (str): The algorithm which must have produced the hash
+                (see :py:func:`firewheel.lib.utilities.hash_file`). Defaults to
+                :py:attr:`algorithm`.
+
+        Returns:
+            str: The hash of the file, or :py:data:`None` if it is not cached or
+            the file has changed since it was hashed.
+        """
+        path = os.path.abspath(path)
+        signature = self.get_signature(path)
+        if signature is None:
+            return None
+        with self._lock:
+            if self._hashes is None:
+                self._hashes = self._load()
+            entry = self._hashes.get(path)
+            if entry is None or entry["signature"] != signature:
+                # Another process may have hashed the file.
+                self._hashes = self._merge_pending(self._load())
+                entry = self._hashes.get(path)
+        if entry is None or entry["signature"] != signature:
+            return None
+        if parse_digest(entry["hash"])[0] != (algorithm or self.algorithm):
+            return None
+        return entry["hash"]
+
+    def put(self, path, file_hash, signature=None):
+        """
+        Record the hash of a file. The hash is written to disk by the next
+        :py:meth:`flush`.
+
+        Args:
+            path (str): The path of the file.
+            file_hash (str): The hash of the file's contents, as returned by
+                :py:func:`firewheel.lib.utilities.hash_file`.
+            signature (list): The signature of the file when it was hashed (see
+                :py:meth:`get_signature`). If the file's signature has since
+                changed, the hash is not recorded. Defaults to the file's
+                current signature.
+        """
+        path = os.path.abspath(path)
+        current = self.get_signature(path)
+        if current is None or (signature is not None and signature != current):
+            self.log.debug("%s changed while it was hashed. Not caching.", path)
+            return
+        if current[1] > time.time_ns() - RACY_INTERVAL_NS:
+            self.log.debug("%s was modified too recently to cache its hash.", path)
+            return
+        entry = {"signature": current, "hash": file_hash}
+        with self._lock:
+            if self._hashes is None:
+                self._hashes = self._load()
+            self._pending[path] = entry
+            self._hashes.pop(path, None)
+            self._hashes[path] = entry
+            while len(self._hashes) > self.max_entries:
+                del self._hashes[next(iter(self._hashes))]
+
+    def flush(self):
+        """
+        Write any hashes recorded by :py:meth:`put` to disk, merging them with
+        the hashes recorded by other processes.
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            hashes = self._merge_pending(self._load())
+            self._pending = {}
+            self._hashes = hashes
+            self._save(hashes)
+
+    def hash_file(self, path, algorithm=None, **kwargs):
+        """
+        Get the hash of a file, only reading the file if its hash is not
+        cached (see :py:func:`firewheel.lib.utilities.hash_file`).
+
+        Args:
+            path (str): The path of the file.
+            algorithm (str): The hashing algorithm. Defaults to
+                :py:attr:`algorithm`.
+            **kwargs: Additional options for
+                :py:func:`firewheel.lib.utilities.hash_file`.
+
+        Returns:
+            str: The hash of the file.
+        """
+        algorithm = algorithm or self.algorithm
+        file_hash = self.get(path, algorithm)
+        if file_hash is not None:
+            return file_hash
+        signature = self.get_signature(path)
+        file_hash = hash_file(path, algorithm, **kwargs)
+        self.put(path, file_hash, signature)
+        return file_hash
+
+    def clear(self):
+        """
+        Remove every cached hash.
+        """
+        with self._lock:
+            self._hashes = {}
+            self._pending = {}
+            try:
+                self.cache_file.unlink()
+            except FileNotFoundError:
+                pass
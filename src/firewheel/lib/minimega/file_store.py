@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import os
 import time
-import shutil
+import shlex
 import tarfile
 from io import BufferedReader
 from lzma import LZMAError, LZMADecompressor
@@ -16,9 +16,23 @@ from minimega import Error as MinimegaError  # type: ignore[import-untyped]
 
 from firewheel.config import config
 from firewheel.lib.log import Log
-from firewheel.lib.utilities import hash_file, get_safe_tarfile_members
+from firewheel.lib.utilities import (
+    parse_digest,
+    copy_and_hash_file,
+    get_safe_tarfile_members,
+)
+from firewheel.lib.hash_cache import HashCache, get_hash_cache
 from firewheel.lib.minimega.api import minimegaAPI
 
+# The directory, relative to the minimega files directory, which holds the
+# content-addressed blobs shared by every FileStore.
+BLOB_STORE = "blobs"
+
+# The algorithm used to hash files in a FileStore if the ``system.hash_algorithm``
+# setting is SHA1. Blobs are named by these hashes, so it must be collision
+# resistant.
+BLOB_HASH_ALGORITHM = "blake2b"
+
 
 class FileStoreFile:
     """
@@ -117,6 +131,8 @@ class FileStore:
         mm_base: str = config["minimega"]["base_dir"],
         decompress: bool = False,
         log: Optional[Logger] = None,
+        hash_cache: Optional[HashCache] = None,
+        content_addressed: Optional[bool] = None,
     ) -> None:
         """
         Initializes the object with a minimegaAPI connection.
@@ -126,6 +142,15 @@ class FileStore:
             mm_base (str): The root directory for minimega.
             decompress (bool): Whether to decompress files by default when using this FileStore.
             log (firewheel.lib.log.Log.log): Override the default FIREWHEEL log.
+            hash_cache (firewheel.lib.hash_cache.HashCache): The cache used to
+                avoid rehashing unchanged files. Files are hashed with its
+                algorithm, unless that is SHA1, which is not collision resistant
+                enough to name blobs. Defaults to the cache shared by the
+                current process.
+            content_addressed (bool): Whether to store each file as a hard link
+                to a blob named by the hash of its contents, so that identical
+                files are only stored and transferred across the mesh once.
+                Defaults to the ``minimega.content_addressed_files`` setting.
 
         Raises:
             PermissionError: If the FileStore was unable to create the cache due to
@@ -140,6 +165,17 @@ class FileStore:
         else:
             self.log = log
 
+        self.hash_cache = hash_cache if hash_cache is not None else get_hash_cache()
+
+        if content_addressed is None:
+            content_addressed = config["minimega"].get("content_addressed_files", False)
+        self.content_addressed = content_addressed
+        self.hash_algorithm = self.hash_cache.algorithm
+        if self.hash_algorithm == "sha1":
+            self.hash_algorithm = BLOB_HASH_ALGORITHM
+        # The blob backing each file added by this instance, keyed by filename.
+        self._blobs: Dict[str, str] = {}
+
         self.mm_api = minimegaAPI(mm_base=mm_base)
 
         self.cache_base = config["minimega"]["files_dir"]
@@ -586,7 +622,7 @@ class FileStore:
             config["minimega"]["files_dir"], self.store, basename
         )
         if os.path.exists(host_file_path):
-            return hash_file(host_file_path)
+            return self.hash_cache.hash_file(host_file_path, self.hash_algorithm)
         return ""
 
     def get_file_upload_date(self, filename: str) -> Optional[datetime]:
@@ -673,17 +709,18 @@ class FileStore:
             self.log.error("Exception getting running file_list on %s", self.store)
             raise exp
 
-    def add_image_file(self, path: str, force: bool = True) -> bool:
+    def cache_image_file(self, path: str, force: bool = True) -> str:
         """
-        Adds an image file to FileStore.
+        Adds an image file to FileStore and decompresses it, without asking the
+        other hosts in the mesh to fetch the decompressed image (see
+        :py:meth:`broadcast_get_files`).
 
         Args:
             path (str): The path of the file being transferred.
             force (bool): Whether to force adding the new image.
 
         Returns:
-            bool: Whether the broadcast was successful; i.e. Whether each host in the mesh
-            has a consistent version of the file in their cache.
+            str: The name of the (decompressed) image file in the FileStore.
         """
         # first add_file for the compressed image
         self.add_file(path, force=force)
@@ -692,7 +729,7 @@ class FileStore:
         basename = os.path.basename(filename)
         cached_path = os.path.join(self.cache, basename)
         self.log.debug(
-            "in add_image_file with path=%s, cached_path=%s", path, cached_path
+            "in cache_image_file with path=%s, cached_path=%s", path, cached_path
         )
 
         expected_basename = self._strip_extension(basename)
@@ -700,9 +737,28 @@ class FileStore:
             self.remove_file(expected_basename)
 
         local_path = self.get_path(cached_path)
-        self.log.debug("in add_image_file with local_path=%s", local_path)
-        mm_file_path = os.path.relpath(local_path, config["minimega"]["files_dir"])
-        ret = self.broadcast_get_file(mm_file_path)
+        self.log.debug("in cache_image_file with local_path=%s", local_path)
+        if self.content_addressed and local_path != cached_path:
+            # The decompressed image is a new file, so store it as a blob too.
+            self._store_blob(
+                local_path, self.hash_cache.hash_file(local_path, self.hash_algorithm)
+            )
+        return os.path.relpath(local_path, self.cache)
+
+    def add_image_file(self, path: str, force: bool = True) -> bool:
+        """
+        Adds an image file to FileStore.
+
+        Args:
+            path (str): The path of the file being transferred.
+            force (bool): Whether to force adding the new image.
+
+        Returns:
+            bool: Whether the broadcast was successful; i.e. Whether each host in the mesh
+            has a consistent version of the file in their cache.
+        """
+        filename = self.cache_image_file(path, force=force)
+        ret = self.broadcast_get_file(os.path.join(self.store, filename))
         self.log.debug("in add_image_file with ret=%s", ret)
         return ret
 
@@ -746,54 +802,67 @@ class FileStore:
         Returns:
             bool: Whether each host in the mesh has a consistent version of the file in their cache.
         """
+        return self._check_mesh_transfers([mm_file_path])
+
+    def _check_mesh_transfers(self, mm_file_paths: List[str]) -> bool:
+        """
+        Blocks until the transfers of all the given files are complete.
+
+        Args:
+            mm_file_paths (list): The paths of the files being transferred.
+
+        Returns:
+            bool: Whether each host in the mesh has a consistent version of every
+            file in their cache.
+        """
         sleep_interval = 0.25
+        remaining = set(mm_file_paths)
         file_transferring = True
         while file_transferring:
             time.sleep(sleep_interval)
             ret = self.mm_api.mm.mesh_send("all", "file status")
             mapped_ret = self.mm_api.mmr_map(ret)
-            file_transferring = False
-            for host_resp in mapped_ret.values():
-                for transferring_file in host_resp:
-                    if transferring_file["filename"] == mm_file_path:
-                        file_transferring = True
-                        break
-                if file_transferring:
-                    break
+            file_transferring = any(
+                transferring_file["filename"] in remaining
+                for host_resp in mapped_ret.values()
+                for transferring_file in host_resp
+            )
             self.log.debug("file_transferring=%s", file_transferring)
             if file_transferring:
                 continue
 
-            consistency_response = self._check_mesh_file_consistency(mm_file_path)
-            consistent = consistency_response["consistent"]
-            exists = consistency_response["exists"]
-            self.log.debug("consistent=%s, exists=%s", consistent, exists)
-            if consistent and exists:
-                return True
-            file_transferring = False
+            for mm_file_path in sorted(remaining):
+                consistency_response = self._check_mesh_file_consistency(mm_file_path)
+                consistent = consistency_response["consistent"]
+                exists = consistency_response["exists"]
+                self.log.debug(
+                    "mm_file_path=%s, consistent=%s, exists=%s",
+                    mm_file_path,
+                    consistent,
+                    exists,
+                )
+                if not (consistent and exists):
+                    return False
+                remaining.discard(mm_file_path)
+            return True
         return False
 
-    def broadcast_get_file(self, mm_file_path: str) -> bool:
+    def _send_file_get(self, mm_file_path: str) -> None:
         """
-        Add a file to the FileStore and ensure that all hosts download it into their cache.
+        Ask all hosts in the mesh to fetch a file into their cache.
 
         Args:
-            mm_file_path (str): The path of the file to be uploaded into the FileStore.
-
-        Returns:
-            bool: Whether the broadcast was successful; i.e. Whether each host in the mesh
-            has a consistent version of the file in their cache.
+            mm_file_path (str): The path of the file relative to the minimega
+                files directory.
 
         Raises:
             Exception: If an error occurs interacting with minimega.
         """
-        if self.mm_api.get_mesh_size() == 1:
-            return True
-
         max_attempts = 10
         for i in range(max_attempts):
             try:
                 self.mm_api.mm.mesh_send("all", f"file get {mm_file_path}")
+                return
             except Exception as exp:
                 self.log.debug(
                     "broadcast_get_file: attempt=%s, file=%s, exception=%s",
@@ -807,10 +876,214 @@ class FileStore:
 
                 raise exp
 
+    def broadcast_get_file(self, mm_file_path: str) -> bool:
+        """
+        Add a file to the FileStore and ensure that all hosts download it into their cache.
+
+        Args:
+            mm_file_path (str): The path of the file to be uploaded into the FileStore.
+
+        Returns:
+            bool: Whether the broadcast was successful; i.e. Whether each host in the mesh
+            has a consistent version of the file in their cache.
+        """
+        if self.content_addressed:
+            return self.broadcast_get_files([os.path.relpath(mm_file_path, self.store)])
+        if self.mm_api.get_mesh_size() == 1:
+            return True
+
+        self._send_file_get(mm_file_path)
         transfer_response = self._check_mesh_transfer(mm_file_path)
         self.log.debug("transfer_response=%s", transfer_response)
         return transfer_response
 
+    def broadcast_get_files(self, filenames: List[str], wait: bool = True) -> bool:
+        """
+        Ask all hosts in the mesh to download several files from the FileStore
+        into their cache. All of the requests are sent before waiting for any
+        transfer, so the files are transferred concurrently and the mesh is
+        only polled once for all of them.
+
+        When the FileStore is content-addressed, each distinct blob is only
+        requested once and the hosts then link the files to their blobs. As the
+        links can only be created once the blobs have arrived, the broadcast
+        always waits for the transfers of any blobs.
+
+        Args:
+            filenames (list): The names of the files in the FileStore.
+            wait (bool): Whether to block until every transfer is complete.
+
+        Returns:
+            bool: Whether the broadcast was successful; i.e. Whether each host in the mesh
+            has a consistent version of every file in their cache. This is always
+            :py:data:`True` if ``wait`` is :py:data:`False` and no blobs were
+            requested.
+        """
+        if not filenames or self.mm_api.get_mesh_size() == 1:
+            return True
+
+        links = {}
+        mm_file_paths = []
+        for filename in filenames:
+            blob_path = self._blobs.get(filename) if self.content_addressed else None
+            if blob_path is None:
+                mm_file_paths.append(os.path.join(self.store, filename))
+            else:
+                links[filename] = blob_path
+                if blob_path not in mm_file_paths:
+                    mm_file_paths.append(blob_path)
+        for mm_file_path in mm_file_paths:
+            self._send_file_get(mm_file_path)
+        if not (wait or links):
+            return True
+
+        transfer_response = self._check_mesh_transfers(mm_file_paths)
+        self.log.debug("transfer_response=%s", transfer_response)
+        if transfer_response and links:
+            transfer_response = self._broadcast_links(links)
+        return transfer_response
+
+    def _broadcast_links(self, links: Dict[str, str]) -> bool:
+        """
+        Have all hosts in the mesh link files in this FileStore to blobs which
+        they have already downloaded.
+
+        Args:
+            links (dict): The path of the blob for each filename, relative to the
+                minimega files directory.
+
+        Returns:
+            bool: Whether every host linked the files.
+        """
+        files_dir = config["minimega"]["files_dir"]
+        try:
+            self.mm_api.mm.mesh_send(
+                "all",
+                "shell "
+                + shlex.join(["mkdir", "-p", os.path.join(files_dir, self.store)]),
+            )
+            for filename, blob_path in links.items():
+                command = shlex.join(
+                    [
+                        "ln",
+                        "-f",
+                        os.path.join(files_dir, blob_path),
+                        os.path.join(files_dir, self.store, filename),
+                    ]
+                )
+                self.mm_api.mm.mesh_send("all", f"shell {command}")
+        # pylint: disable=broad-except
+        except Exception as exp:
+            self.log.error("Unable to link files in %s to their blobs", self.store)
+            self.log.exception(exp)
+            return False
+        return True
+
+    def get_blob_path(self, file_hash: str) -> str:
+        """
+        Get the path of the blob holding the contents with the given hash.
+
+        Args:
+            file_hash (str): The hash of the contents, as returned by
+                :py:func:`firewheel.lib.utilities.hash_file`.
+
+        Returns:
+            str: The path of the blob, relative to the minimega files directory.
+        """
+        algorithm, hexdigest = parse_digest(file_hash)
+        return os.path.join(BLOB_STORE, algorithm, hexdigest[:2], hexdigest)
+
+    def _link_file(self, source: str, destination: str) -> None:
+        """
+        Atomically replace a file with a hard link to another file.
+
+        Args:
+            source (str): The path of the existing file.
+            destination (str): The path of the link.
+        """
+        directory, basename = os.path.split(destination)
+        tmp_path = os.path.join(directory, f".{basename}.{os.getpid()}.link")
+        os.link(source, tmp_path)
+        try:
+            os.replace(tmp_path, destination)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+
+    def _copy_file(self, source: str, destination: str) -> str:
+        """
+        Atomically replace a file with a copy of another file, hashing the copy
+        as it is written. The destination may be a link to a blob, so it is
+        never written in place.
+
+        Args:
+            source (str): The path of the file to copy.
+            destination (str): The path of the copy.
+
+        Returns:
+            str: The hash of the file.
+        """
+        directory, basename = os.path.split(destination)
+        tmp_path = os.path.join(directory, f".{basename}.{os.getpid()}.copy")
+        try:
+            file_hash = copy_and_hash_file(source, tmp_path, self.hash_algorithm)
+            os.replace(tmp_path, destination)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return file_hash
+
+    def _store_blob(self, host_file_path: str, file_hash: str) -> None:
+        """
+        Deduplicate a file in this FileStore by content. If a blob with the same
+        contents exists, the file is replaced by a link to it. Otherwise, the file
+        becomes the blob for its contents.
+
+        Args:
+            host_file_path (str): The path of the file in the local cache.
+            file_hash (str): The hash of the file's contents.
+        """
+        blob_path = self.get_blob_path(file_hash)
+        host_blob_path = os.path.join(config["minimega"]["files_dir"], blob_path)
+        os.makedirs(os.path.dirname(host_blob_path), exist_ok=True)
+        try:
+            os.link(host_file_path, host_blob_path)
+        except FileExistsError:
+            if not os.path.samefile(host_file_path, host_blob_path):
+                try:
+                    self._link_file(host_blob_path, host_file_path)
+                except FileNotFoundError:
+                    # The blob was garbage collected, so keep the new copy.
+                    os.link(host_file_path, host_blob_path)
+        self._blobs[os.path.basename(host_file_path)] = blob_path
+
+    def _link_known_blob(self, path: str, host_file_path: str) -> bool:
+        """
+        Link a file to an existing blob without copying it, if the hash of the
+        file is already known.
+
+        Args:
+            path (str): The path of the file being added to the FileStore.
+            host_file_path (str): The path of the file in the local cache.
+
+        Returns:
+            bool: Whether the file was linked to an existing blob.
+        """
+        file_hash = self.hash_cache.get(path, self.hash_algorithm)
+        if file_hash is None:
+            return False
+        blob_path = self.get_blob_path(file_hash)
+        try:
+            self._link_file(
+                os.path.join(config["minimega"]["files_dir"], blob_path),
+                host_file_path,
+            )
+        except FileNotFoundError:
+            return False
+        self._blobs[os.path.basename(host_file_path)] = blob_path
+        return True
+
     def add_file_from_content(
         self, content: str, filename: str, force: bool = True, broadcast: bool = True
     ) -> None:
@@ -847,7 +1120,7 @@ class FileStore:
         if broadcast:
             self.broadcast_get_file(mm_file_path)
 
-    def add_file(self, path: str, force: bool = True) -> None:
+    def add_file(self, path: str, force: bool = True, broadcast: bool = True) -> None:
         """
         Add a file to the FileStore.
 
@@ -855,6 +1128,9 @@ class FileStore:
             path (str): The path of the file to be uploaded into the FileStore.
             force (bool): If True, then remove the existing file before adding
                 the new one.
+            broadcast (bool): Whether to have all mesh nodes attempt to put this
+                file in their cache. If :py:data:`False`, the caller is expected
+                to use :py:meth:`broadcast_get_files` later.
 
         Raises:
             OSError: If there is an issue adding the file.
@@ -881,12 +1157,29 @@ class FileStore:
 
         mm_file_path = os.path.join(self.store, basename)
         host_file_path = os.path.join(config["minimega"]["files_dir"], mm_file_path)
-        try:
-            shutil.copy2(path, host_file_path)
-        except OSError as exp:
-            self.log.error("Adding %s to %s at %s", filename, self.store, mm_file_path)
-            self.log.exception(exp)
-            raise exp
+        if self.content_addressed and self._link_known_blob(path, host_file_path):
+            self.log.debug("Linked %s to an existing blob", path)
+        else:
+            source_signature = self.hash_cache.get_signature(path)
+            try:
+                file_hash = self._copy_file(path, host_file_path)
+                if self.content_addressed:
+                    self._store_blob(host_file_path, file_hash)
+            except OSError as exp:
+                self.log.error(
+                    "Adding %s to %s at %s", filename, self.store, mm_file_path
+                )
+                self.log.exception(exp)
+                raise exp
+            # Record the hash of both copies so neither needs to be read to
+            # compare them.
+            self.hash_cache.put(path, file_hash, source_signature)
+            self.hash_cache.put(host_file_path, file_hash)
+        if not broadcast:
+            return
+        if self.content_addressed:
+            self.broadcast_get_file(mm_file_path)
+            return
         try:
             self.mm_api.mm.mesh_send("all", f"file get {mm_file_path}")
         # pylint: disable=broad-except
@@ -916,3 +1209,44 @@ class FileStore:
             self.log.error(msg)
             self.log.exception(exp)
             raise OSError(msg) from exp
+
+
+def collect_garbage(
+    files_dir: Optional[str] = None, dry_run: bool = False
+) -> Tuple[int, int]:
+    """
+    Remove the content-addressed blobs which are no longer linked to any file in a
+    FileStore. Each file in a content-addressed FileStore is a hard link to its
+    blob, so a blob is unreferenced once it has no other links. Only the local
+    minimega files directory is collected, so this should be run on every host.
+
+    Args:
+        files_dir (str): The minimega files directory. Defaults to the
+            ``minimega.files_dir`` setting.
+        dry_run (bool): Whether to only report the blobs which would be removed.
+
+    Returns:
+        tuple: The number of blobs removed and the number of bytes reclaimed.
+    """
+    log = Log(name="FileStore").log
+    if files_dir is None:
+        files_dir = config["minimega"]["files_dir"]
+
+    removed = 0
+    reclaimed = 0
+    for root, _dirs, files in os.walk(os.path.join(files_dir, BLOB_STORE)):
+        for name in files:
+            blob_path = os.path.join(root, name)
+            try:
+                stat = os.stat(blob_path)
+                if stat.st_nlink > 1:
+                    continue
+                if not dry_run:
+                    # A file linked to the blob after this point keeps its contents.
+                    os.remove(blob_path)
+            except FileNotFoundError:
+                continue
+            log.debug("Unreferenced blob: %s", blob_path)
+            removed += 1
+            reclaimed += stat.st_size
+    return removed, reclaimed
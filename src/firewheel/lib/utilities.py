@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import os
+import mmap
 import random
 import shutil
 import filecmp
@@ -10,6 +12,7 @@ from time import sleep
 from typing import Any, Tuple, Optional
 from pathlib import Path
 from functools import wraps as _wraps
+from concurrent.futures import ThreadPoolExecutor
 
 from rich.console import Console
 
@@ -346,27 +349,289 @@ def strtobool(val: str) -> int:
     raise ValueError(f"Invalid truth value {val}")
 
 
-def hash_file(fname: str) -> str:
+HASH_ALGORITHMS = ("sha1", "blake2b", "blake2b-tree")
+"""The algorithms supported by :py:func:`hash_file`."""
+
+DEFAULT_HASH_ALGORITHM = "sha1"
+"""The algorithm used by :py:func:`hash_file` by default."""
+
+HASH_CHUNK_SIZE = 1048576
+"""The size of the chunks read when hashing a file sequentially."""
+
+HASH_BLOCK_SIZE = 4 * 1048576
+"""The size of each leaf of a ``blake2b-tree`` hash."""
+
+
+class TreeHash:
+    """
+    An incremental BLAKE2b tree hash. The data is split into fixed-size blocks,
+    each block is hashed as a leaf of the tree, and the leaf digests are hashed
+    to produce the root digest. As each leaf is independent, the leaves of a
+    large file can be hashed concurrently (see :py:func:`hash_file`) while
+    producing the same digest as hashing it sequentially.
+    """
+
+    digest_size = 32
+
+    def __init__(self, block_size: int = HASH_BLOCK_SIZE) -> None:
+        """
+        Initialize the hash.
+
+        Args:
+            block_size (int): The size of each leaf block in bytes.
+        """
+        self.block_size = block_size
+        self.leaves: list = []
+        self._buffer = bytearray()
+
+    @classmethod
+    def hash_leaf(cls, block: bytes, index: int, last: bool, block_size: int) -> bytes:
+        """
+        Hash a single leaf of the tree.
+
+        Args:
+            block (bytes): The data of the leaf.
+            index (int): The index of the leaf.
+            last (bool): Whether this is the final leaf.
+            block_size (int): The size of each leaf block in bytes.
+
+        Returns:
+            bytes: The digest of the leaf.
+        """
+        return hashlib.blake2b(
+            block,
+            digest_size=cls.digest_size,
+            fanout=0,
+            depth=2,
+            leaf_size=block_size,
+            inner_size=cls.digest_size,
+            node_offset=index,
+            node_depth=0,
+            last_node=last,
+        ).digest()
+
+    @classmethod
+    def hash_root(cls, leaves: list, block_size: int) -> str:
+        """
+        Hash the digests of every leaf to produce the digest of the tree.
+
+        Args:
+            leaves (list): The digest of each leaf, in order.
+            block_size (int): The size of each leaf block in bytes.
+
+        Returns:
+            str: The hex digest of the tree.
+        """
+        root = hashlib.blake2b(
+            digest_size=cls.digest_size,
+            fanout=0,
+            depth=2,
+            leaf_size=block_size,
+            inner_size=cls.digest_size,
+            node_offset=0,
+            node_depth=1,
+            last_node=True,
+        )
+        for leaf in leaves:
+            root.update(leaf)
+        return root.hexdigest()
+
+    def update(self, data: bytes) -> None:
+        """
+        Add data to the hash.
+
+        Args:
+            data (bytes): The data to add.
+        """
+        self._buffer += data
+        # Always keep the final block buffered as it may be the last leaf.
+        count = (len(self._buffer) - 1) // self.block_size
+        if count <= 0:
+            return
+        with memoryview(self._buffer) as view:
+            for index in range(count):
+                with view[
+                    index * self.block_size : (index + 1) * self.block_size
+                ] as block:
+                    self.leaves.append(
+                        self.hash_leaf(block, len(self.leaves), False, self.block_size)
+                    )
+        del self._buffer[: count * self.block_size]
+
+    def hexdigest(self) -> str:
+        """
+        Get the digest of the data added so far.
+
+        Returns:
+            str: The hex digest of the tree.
+        """
+        last = self.hash_leaf(
+            bytes(self._buffer), len(self.leaves), True, self.block_size
+        )
+        return self.hash_root([*self.leaves, last], self.block_size)
+
+
+def new_hash(algorithm: str = DEFAULT_HASH_ALGORITHM):
+    """
+    Create an incremental hash object for one of the :py:data:`HASH_ALGORITHMS`.
+
+    Args:
+        algorithm (str): The name of the algorithm.
+
+    Returns:
+        An object with ``update`` and ``hexdigest`` methods.
+
+    Raises:
+        ValueError: If the algorithm is not supported.
+    """
+    if algorithm == "sha1":
+        # SHA1 is not collision resistant, so it must not be used where a
+        # collision would matter, such as naming content-addressed blobs.
+        return hashlib.sha1()  # noqa: S324
+    if algorithm == "blake2b":
+        return hashlib.blake2b()
+    if algorithm == "blake2b-tree":
+        return TreeHash()
+    raise ValueError(
+        f"Unknown hash algorithm {algorithm}. Must be one of {HASH_ALGORITHMS}."
+    )
+
+
+def format_digest(algorithm: str, hexdigest: str) -> str:
+    """
+    Record the algorithm used to produce a digest with the digest. SHA1 digests
+    are left unchanged so that they match digests recorded before the algorithm
+    was selectable.
+
+    Args:
+        algorithm (str): The name of the algorithm.
+        hexdigest (str): The hex digest.
+
+    Returns:
+        str: The digest, prefixed by ``<algorithm>:`` unless it is SHA1.
+    """
+    if algorithm == "sha1":
+        return hexdigest
+    return f"{algorithm}:{hexdigest}"
+
+
+def parse_digest(digest: str) -> Tuple[str, str]:
+    """
+    Split a digest returned by :py:func:`hash_file` into its algorithm and hex
+    digest.
+
+    Args:
+        digest (str): The digest.
+
+    Returns:
+        tuple: The name of the algorithm and the hex digest.
+    """
+    algorithm, _sep, hexdigest = digest.rpartition(":")
+    return (algorithm or "sha1", hexdigest)
+
+
+def hash_file(
+    fname: str,
+    algorithm: str = DEFAULT_HASH_ALGORITHM,
+    use_mmap: bool = False,
+    workers: int = 1,
+) -> str:
     """
     A relatively efficient way of hashing a file
     https://stackoverflow.com/a/3431838.
     Through various performance tests, we found that SHA1 is currently the fastest
-    hashlib function. We also found that SHA-1 performance improved by using a
-    chunk size of 1048576.
+    single-threaded hashlib function. We also found that SHA-1 performance improved
+    by using a chunk size of 1048576.
+
+    For large files, the ``blake2b-tree`` algorithm can hash blocks of the file
+    concurrently with ``workers`` threads, as :py:mod:`hashlib` releases the GIL
+    while hashing. Its digest does not depend on the number of workers.
 
     Args:
         fname (str): The name of the file to hash.
+        algorithm (str): One of :py:data:`HASH_ALGORITHMS`. Defaults to
+            :py:data:`DEFAULT_HASH_ALGORITHM`.
+        use_mmap (bool): Whether to memory-map the file rather than reading it
+            into intermediate buffers. This is always done if ``workers`` is
+            greater than one.
+        workers (int): The number of threads used to hash a ``blake2b-tree``.
 
     Returns:
-        str: The hash of the file.
+        str: The hash of the file. Unless the algorithm is SHA1, the digest is
+        prefixed with the algorithm (see :py:func:`format_digest`).
     """
-    # The following hash is not used in any security context and
-    # collisions are acceptable.
-    hash_func = hashlib.sha1()  # noqa: S324
+    if algorithm == "blake2b-tree" and workers > 1:
+        return format_digest(algorithm, _hash_file_tree(fname, workers))
+
+    hash_func = new_hash(algorithm)
     with open(fname, "rb") as fopened:
-        for chunk in iter(lambda: fopened.read(1048576), b""):
+        if use_mmap and os.fstat(fopened.fileno()).st_size:
+            with mmap.mmap(fopened.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                for offset in range(0, len(view), HASH_CHUNK_SIZE):
+                    hash_func.update(view[offset : offset + HASH_CHUNK_SIZE])
+                view.release()
+        else:
+            for chunk in iter(lambda: fopened.read(HASH_CHUNK_SIZE), b""):
+                hash_func.update(chunk)
+    return format_digest(algorithm, hash_func.hexdigest())
+
+
+def _hash_file_tree(fname: str, workers: int) -> str:
+    """
+    Compute the ``blake2b-tree`` hash of a memory-mapped file, hashing its
+    leaves concurrently.
+
+    Args:
+        fname (str): The name of the file to hash.
+        workers (int): The number of threads to use.
+
+    Returns:
+        str: The hex digest of the tree.
+    """
+    block_size = HASH_BLOCK_SIZE
+    with open(fname, "rb") as fopened:
+        size = os.fstat(fopened.fileno()).st_size
+        if not size:
+            return TreeHash(block_size).hexdigest()
+        with mmap.mmap(fopened.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            num_leaves = (size + block_size - 1) // block_size
+
+            def hash_leaf(index):
+                block = view[index * block_size : (index + 1) * block_size]
+                return TreeHash.hash_leaf(
+                    block, index, index == num_leaves - 1, block_size
+                )
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                leaves = list(executor.map(hash_leaf, range(num_leaves)))
+            view.release()
+    return TreeHash.hash_root(leaves, block_size)
+
+
+def copy_and_hash_file(
+    source: str, destination: str, algorithm: str = DEFAULT_HASH_ALGORITHM
+) -> str:
+    """
+    Copy a file (including its metadata, like :py:func:`shutil.copy2`) and
+    compute its hash while it is copied, so that the file is only read once.
+
+    Args:
+        source (str): The path of the file to copy.
+        destination (str): The path of the copy.
+        algorithm (str): One of :py:data:`HASH_ALGORITHMS`.
+
+    Returns:
+        str: The hash of the file, as returned by :py:func:`hash_file`.
+    """
+    hash_func = new_hash(algorithm)
+    with open(source, "rb") as fsource, open(destination, "wb") as fdestination:
+        for chunk in iter(lambda: fsource.read(HASH_CHUNK_SIZE), b""):
             hash_func.update(chunk)
-    return hash_func.hexdigest()
+            fdestination.write(chunk)
+    shutil.copystat(source, destination)
+    return format_digest(algorithm, hash_func.hexdigest())
 
 
 def retry(num_tries: int, exceptions: Optional[Tuple] = None, base_delay: int = 10, exp_factor: int = 2):
@@ -39,3 +39,49 @@ def pytest_configure(config: pytest.Config) -> None:
     ]
     for marker in markers:
         config.addinivalue_line("markers", marker)
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """
+    Add command line options for the test suite.
+
+    This is an `initialization hook
+    <https://docs.pytest.org/en/7.4.x/reference/reference.html#pytest.hookspec.pytest_addoption>`
+    provided by :py:mod:`pytest`. It adds options which control the
+    :py:class:`ExperimentGraph <firewheel.control.experiment_graph.ExperimentGraph>`
+    benchmarks: where to save their results as JSON, a saved set of results to
+    compare them against, and how much slower than that baseline a benchmark may
+    be before it is flagged as a regression.
+
+    The unit test conftest file (``firewheel/tests/unit/conftest.py``) shares
+    this hook so that the options are available when only the unit tests are
+    run. When both conftest files are loaded, the hook is called twice and
+    the options are only added the first time.
+
+    Args:
+        parser (pytest.Parser): The pytest command line parser.
+    """
+    group = parser.getgroup("graph-benchmarks", "ExperimentGraph benchmarks")
+    try:
+        group.addoption(
+            "--graph-benchmark-json",
+            default=None,
+            help="Save the results of the ExperimentGraph benchmarks to this JSON "
+            "file.",
+        )
+    except ValueError:
+        # The options were already added by the other conftest file.
+        return
+    group.addoption(
+        "--graph-benchmark-baseline",
+        default=None,
+        help="Compare the ExperimentGraph benchmarks with the results in this "
+        "JSON file.",
+    )
+    group.addoption(
+        "--graph-benchmark-tolerance",
+        type=float,
+        default=0.25,
+        help="The fraction by which a benchmark may be slower than the baseline "
+        "before it is flagged as a regression (default: 0.25).",
+    )
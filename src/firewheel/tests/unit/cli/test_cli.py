@@ -122,9 +122,9 @@ class CliTestCase(unittest.TestCase):
 
         helper_list = mock_stdout.getvalue().strip().split("\n")
         # This verifies that the number of CLI Helpers
-        # is exactly 45. This will need to be fixed if
+        # is exactly 46. This will need to be fixed if
         # Helpers are added/removed.
-        self.assertEqual(len(helper_list[1:]), 45)
+        self.assertEqual(len(helper_list[1:]), 46)
 
         heading = "FIREWHEEL Helper commands:"
         self.assertIn(heading, mock_stdout.getvalue())
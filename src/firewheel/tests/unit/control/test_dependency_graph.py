@@ -1,7 +1,9 @@
 # pylint: disable=invalid-name
 
 import json
+import random
 import unittest
+from unittest.mock import patch
 
 import networkx as nx
 
@@ -561,3 +563,138 @@ class DependencyGraphTestCase(unittest.TestCase):
             actual_list.append(x)
 
         self.assertEqual(expected_list, actual_list)
+
+    def test_cached_order_consistent_association(self):
+        id1 = self.dependencyGraph.insert_entity([], [], 0)
+        id2 = self.dependencyGraph.insert_entity([], [], 0)
+        id3 = self.dependencyGraph.insert_entity([], [], 0)
+        self.assertEqual(
+            [id1, id2, id3], self.dependencyGraph.get_ordered_entity_list()
+        )
+
+        # An association which the current order already satisfies should not
+        # require the order to be recomputed.
+        with patch.object(
+            nx.algorithms,
+            "lexicographical_topological_sort",
+            side_effect=AssertionError("Order was recomputed"),
+        ):
+            self.dependencyGraph.associate_entities(id1, id3)
+            self.assertEqual(
+                [id1, id2, id3], self.dependencyGraph.get_ordered_entity_list()
+            )
+            self.assertEqual(2, self.dependencyGraph.get_entity_position(id3))
+
+    def test_cached_order_inconsistent_association(self):
+        id1 = self.dependencyGraph.insert_entity([], [], 0)
+        id2 = self.dependencyGraph.insert_entity([], [], 0)
+        id3 = self.dependencyGraph.insert_entity([], [], 0)
+        self.assertEqual(
+            [id1, id2, id3], self.dependencyGraph.get_ordered_entity_list()
+        )
+
+        self.dependencyGraph.associate_entities(id3, id1)
+        self.assertEqual(
+            [id2, id3, id1], self.dependencyGraph.get_ordered_entity_list()
+        )
+        self.assertEqual(0, self.dependencyGraph.get_entity_position(id2))
+
+        with self.assertRaises(InvalidNodeError):
+            self.dependencyGraph.get_entity_position(42)
+
+    def test_cached_order_insert(self):
+        id1 = self.dependencyGraph.insert_entity([], ["c1"], 1)
+        self.assertEqual([id1], self.dependencyGraph.get_ordered_entity_list())
+
+        id2 = self.dependencyGraph.insert_entity([], [], 0)
+        self.assertEqual([id2, id1], self.dependencyGraph.get_ordered_entity_list())
+
+    def test_incremental_tracking_matches_graph(self):
+        rng = random.Random(1234)
+        constraints = [f"c{i}" for i in range(12)]
+        entities = []
+        for _ in range(40):
+            if entities and rng.random() < 0.4:
+                self.dependencyGraph.associate_entities(
+                    rng.choice(entities), rng.choice(entities)
+                )
+            else:
+                entities.append(
+                    self.dependencyGraph.insert_entity(
+                        rng.sample(constraints, rng.randint(0, 2)),
+                        rng.sample(constraints, rng.randint(0, 2)),
+                        rng.randint(0, 3),
+                    )
+                )
+            if rng.random() < 0.3 and not self.dependencyGraph.has_cycles():
+                # Populate the order cache so that later associations use it.
+                self.dependencyGraph.get_ordered_entity_list()
+
+            graph = self.dependencyGraph.dg
+            expected_zero = [
+                (node_id, graph.nodes[node_id]["grouping"])
+                for node_id, in_degree in graph.in_degree
+                if in_degree == 0 and graph.nodes[node_id]["type"] == "constraint"
+            ]
+            self.assertEqual(
+                expected_zero, self.dependencyGraph.get_in_degree_zero_constraints()
+            )
+            self.assertEqual(
+                not nx.is_directed_acyclic_graph(graph),
+                self.dependencyGraph.has_cycles(),
+            )
+
+    def test_is_unsatisfied_constraint(self):
+        self.dependencyGraph.insert_entity(["c1", "c2"], [], 0)
+        self.assertTrue(self.dependencyGraph.is_unsatisfied_constraint("c1"))
+        self.dependencyGraph.insert_entity([], ["c1"], 0)
+        self.assertFalse(self.dependencyGraph.is_unsatisfied_constraint("c1"))
+        self.assertTrue(self.dependencyGraph.is_unsatisfied_constraint("c2"))
+        self.assertFalse(self.dependencyGraph.is_unsatisfied_constraint("c3"))
+
+    def test_association_cycle(self):
+        id1 = self.dependencyGraph.insert_entity([], ["c1"], 0)
+        id2 = self.dependencyGraph.insert_entity(["c1"], [], 0)
+        self.dependencyGraph.get_ordered_entity_list()
+        self.dependencyGraph.associate_entities(id1, id2)
+        self.assertFalse(self.dependencyGraph.has_cycles())
+        self.dependencyGraph.associate_entities(id2, id1)
+        self.assertTrue(self.dependencyGraph.has_cycles())
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            DependencyGraph(backend="invalid")
+
+    def test_compact_backend_parity(self):
+        for seed in range(25):
+            rng = random.Random(seed)
+            graphs = [DependencyGraph(), DependencyGraph(backend="compact")]
+            # Mix integer and string constraints (including ones which compare
+            # equal as strings) to exercise tie-breaking.
+            constraints = [f"c{i}" for i in range(15)] + [100, "100", 200]
+            entities = []
+            for _ in range(60):
+                if len(entities) > 1 and rng.random() < 0.1:
+                    source, dest = sorted(rng.sample(entities, 2))
+                    for graph in graphs:
+                        graph.associate_entities(source, dest)
+                    continue
+                # Entities only provide constraints which come after the ones
+                # they depend on, so that not every graph has a cycle.
+                pivot = rng.randint(1, len(constraints) - 1)
+                depends = rng.sample(constraints[:pivot], min(pivot, 2))
+                provides = rng.sample(constraints[pivot:], 1)
+                grouping = rng.randint(0, 4)
+                ids = {
+                    graph.insert_entity(depends, provides, grouping) for graph in graphs
+                }
+                self.assertEqual(len(ids), 1)
+                entities.extend(ids)
+
+            expected, actual = [], []
+            for graph, result in zip(graphs, (expected, actual)):
+                try:
+                    result.extend(graph.get_ordered_entity_list())
+                except nx.HasACycle:
+                    result.append("cycle")
+            self.assertEqual(expected, actual)
@@ -0,0 +1,237 @@
+# pylint: disable=invalid-name
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import yaml
+
+from firewheel.lib.hash_cache import HashCache
+from firewheel.tests.unit.test_utils import cleanup_repo_db, initalize_repo_db
+from firewheel.control.model_component import ModelComponent
+from firewheel.control.experiment_checkpoint import ExperimentCheckpointStore
+from firewheel.control.model_component_manager import ModelComponentManager
+from firewheel.control.experiment_graph_journal import (
+    ADD_VERTEX,
+    SET_ATTRIBUTE,
+    ExperimentGraphJournal,
+)
+
+OBJECTS_TEMPLATE = """
+class Marker:
+    def __init__(self):
+        self.marked = True
+"""
+
+PLUGIN_TEMPLATE = """
+from firewheel.control.experiment_graph import AbstractPlugin, ExperimentGraph, Vertex
+
+class Plugin(AbstractPlugin):
+    def run(self):
+        with open({runs!r}, "a", encoding="utf8") as runs:
+            runs.write("{name}\\n")
+        if self.g is None:
+            self.g = ExperimentGraph()
+        vertex = Vertex(self.g, name="{name}")
+        {decorate}
+"""
+
+
+class ExperimentCheckpointTestCase(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.repo = os.path.join(self.base_dir, "repo")
+        self.runs = os.path.join(self.base_dir, "runs")
+        self.names = ["test.c11", "test.c12", "test.c13"]
+
+        for index, name in enumerate(self.names):
+            manifest = {
+                "name": name,
+                "attributes": {
+                    "depends": [f"a{index - 1}"] if index else [],
+                    "provides": [f"a{index}"],
+                },
+                "model_components": {},
+                "plugin": "plugin.py",
+            }
+            decorate = "pass"
+            if index == 0:
+                manifest["model_component_objects"] = "objects.py"
+                decorate = "from test.c11 import Marker; vertex.decorate(Marker)"
+            self.write_mc(name, manifest, decorate)
+
+        self.repository_db = initalize_repo_db()
+        self.repository_db.add_repository({"path": self.repo})
+        self.checkpoint_store = ExperimentCheckpointStore(
+            db_basepath=os.path.join(self.base_dir, "db"),
+            hash_cache=HashCache(db_basepath=os.path.join(self.base_dir, "db")),
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+        cleanup_repo_db(self.repository_db)
+        self.unload()
+
+    def unload(self):
+        for name in self.names:
+            sys.modules.pop(name, None)
+
+    def write_mc(self, name, manifest, decorate="pass"):
+        path = os.path.join(self.repo, name)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "MANIFEST"), "w", encoding="utf8") as f:
+            f.write(yaml.safe_dump(manifest))
+        with open(os.path.join(path, "objects.py"), "w", encoding="utf8") as f:
+            f.write(OBJECTS_TEMPLATE)
+        with open(os.path.join(path, "plugin.py"), "w", encoding="utf8") as f:
+            f.write(
+                PLUGIN_TEMPLATE.format(runs=self.runs, name=name, decorate=decorate)
+            )
+
+    def build(self, journal=None):
+        """
+        Build the experiment graph as a new ``firewheel experiment`` would.
+
+        Args:
+            journal (ExperimentGraphJournal): A journal to record the changes.
+
+        Returns:
+            tuple: The results, the plugins which were run, and the final graph.
+        """
+        self.unload()
+        if os.path.exists(self.runs):
+            os.remove(self.runs)
+
+        mcm = ModelComponentManager(repository_db=self.repository_db)
+        last = ModelComponent(name=self.names[-1], repository_db=self.repository_db)
+        mcm.build_dependency_graph([last], install_mcs=False)
+
+        graphs = []
+        process_model_component = mcm.process_model_component
+
+        def capture_graph(*args, **kwargs):
+            result = process_model_component(*args, **kwargs)
+            graphs.append(result[1])
+            return result
+
+        mcm.process_model_component = capture_graph
+        results = mcm.build_experiment_graph(
+            checkpoint_store=self.checkpoint_store, journal=journal
+        )
+
+        with open(self.runs, encoding="utf8") as f:
+            runs = f.read().split()
+        return results, runs, graphs[-1]
+
+    def test_resume(self):
+        results, runs, _graph = self.build()
+        self.assertEqual(self.names, runs)
+        self.assertFalse(any(result.get("checkpoint") for result in results))
+
+        results, runs, graph = self.build()
+        self.assertEqual(self.names[2:], runs)
+        self.assertEqual(self.names, [result["model_component"] for result in results])
+        self.assertEqual(
+            [True, True, False], [bool(result.get("checkpoint")) for result in results]
+        )
+        self.assertFalse(any(result["errors"] for result in results))
+
+        # The restored graph contains every vertex, including the decorators.
+        vertex = graph.find_vertex(self.names[0])
+        self.assertTrue(vertex.marked)
+        self.assertIsNotNone(graph.find_vertex(self.names[2]))
+
+    def test_source_change(self):
+        self.build()
+        path = os.path.join(self.repo, self.names[1], "plugin.py")
+        with open(path, "a", encoding="utf8") as f:
+            f.write("\n# Changed\n")
+
+        _results, runs, _graph = self.build()
+        self.assertEqual(self.names[1:], runs)
+
+    def test_corrupt_checkpoint(self):
+        self.build()
+        for checkpoint in os.listdir(self.checkpoint_store.checkpoint_dir):
+            path = os.path.join(self.checkpoint_store.checkpoint_dir, checkpoint)
+            with open(path, "wb") as f:
+                f.write(b"corrupt")
+
+        results, runs, graph = self.build()
+        self.assertEqual(self.names, runs)
+        self.assertFalse(any(result["errors"] for result in results))
+        self.assertTrue(graph.find_vertex(self.names[0]).marked)
+
+    def test_data_file_change(self):
+        mc_list = [
+            ModelComponent(name=name, repository_db=self.repository_db)
+            for name in self.names
+        ]
+        keys = self.checkpoint_store.get_keys(mc_list)
+
+        # Compiled Python files do not change the source.
+        cache = os.path.join(self.repo, self.names[1], "__pycache__")
+        os.makedirs(cache)
+        with open(os.path.join(cache, "plugin.pyc"), "wb") as f:
+            f.write(b"compiled")
+        self.assertEqual(keys, self.checkpoint_store.get_keys(mc_list))
+
+        # Any other file (e.g. one read by the plugin) does.
+        path = os.path.join(self.repo, self.names[1], "data", "topology.json")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "w", encoding="utf8") as f:
+            f.write("{}")
+        changed_keys = self.checkpoint_store.get_keys(mc_list)
+        self.assertEqual(keys[0], changed_keys[0])
+        self.assertNotEqual(keys[1], changed_keys[1])
+
+        with open(path, "w", encoding="utf8") as f:
+            f.write("[]")
+        self.assertNotEqual(changed_keys[1], self.checkpoint_store.get_keys(mc_list)[1])
+
+    def test_keys(self):
+        mc_list = [
+            ModelComponent(name=name, repository_db=self.repository_db)
+            for name in self.names
+        ]
+        keys = self.checkpoint_store.get_keys(mc_list)
+        self.assertEqual(len(set(keys)), len(self.names))
+
+        mc_list[1].arguments = {"plugin": {"size": "3"}}
+        changed_keys = self.checkpoint_store.get_keys(mc_list)
+        self.assertEqual(keys[0], changed_keys[0])
+        self.assertNotEqual(keys[1], changed_keys[1])
+        self.assertNotEqual(keys[2], changed_keys[2])
+
+    def test_max_checkpoints(self):
+        self.checkpoint_store.max_checkpoints = 1
+        self.build()
+        self.assertEqual(1, len(os.listdir(self.checkpoint_store.checkpoint_dir)))
+        _results, runs, _graph = self.build()
+        self.assertEqual(self.names[2:], runs)
+
+    def test_journal(self):
+        journal = ExperimentGraphJournal()
+        self.build(journal)
+        # The journal is attached once the first plugin has created the graph.
+        self.assertEqual(
+            [(event.kind, event.model_component) for event in journal],
+            [
+                (ADD_VERTEX, self.names[1]),
+                (SET_ATTRIBUTE, self.names[1]),
+                (ADD_VERTEX, self.names[2]),
+                (SET_ATTRIBUTE, self.names[2]),
+            ],
+        )
+        self.assertIsNone(journal.graph)
+
+        # Only the plugins which are run after restoring a checkpoint are recorded.
+        journal = ExperimentGraphJournal()
+        _results, _runs, graph = self.build(journal)
+        self.assertEqual(
+            [(event.kind, event.model_component) for event in journal],
+            [(ADD_VERTEX, self.names[2]), (SET_ATTRIBUTE, self.names[2])],
+        )
+        self.assertIsNone(graph.journal)
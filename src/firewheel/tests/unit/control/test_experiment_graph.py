@@ -1,16 +1,45 @@
 # pylint: disable=invalid-name
 
+import pickle
 import random
 import unittest
 
+from firewheel.control import experiment_graph
 from firewheel.control.experiment_graph import (
     Edge,
     Vertex,
     ExperimentGraph,
     NoSuchVertexError,
+    require_class,
 )
 
 
+class Switch:
+    type = "switch"
+
+
+class Host:
+    def __init__(self):
+        self.interfaces = []
+
+    def add_interface(self, address):
+        self.interfaces.append(address)
+
+
+@require_class(Host)
+class Server:
+    role = "server"
+
+
+class Link:
+    def get_ends(self):
+        return (self.source, self.destination)
+
+
+def failing_search(indptr, indices, source):
+    raise ValueError(f"Cannot search from {source}")
+
+
 # pylint: disable=protected-access,unused-variable
 class ExperimentGraphTestCase(unittest.TestCase):
     def setUp(self):
@@ -103,6 +132,157 @@ class ExperimentGraphTestCase(unittest.TestCase):
         v2.name = "v2"
         self.assertIsNone(self.g.find_vertex_by_id(50))
 
+    def test_find_vertex_renamed(self):
+        v1 = Vertex(self.g, name="old")
+        v1.name = "new"
+        self.assertIsNone(self.g.find_vertex("old"))
+        self.assertEqual(v1, self.g.find_vertex("new"))
+
+        del v1.name
+        self.assertIsNone(self.g.find_vertex("new"))
+        self.assertFalse(hasattr(v1, "name"))
+
+    def test_find_vertex_deleted(self):
+        v1 = Vertex(self.g, name="dup")
+        v2 = Vertex(self.g, name="dup")
+        self.assertEqual(v1, self.g.find_vertex("dup"))
+
+        v1.delete()
+        self.assertEqual(v2, self.g.find_vertex("dup"))
+        v2.delete()
+        self.assertIsNone(self.g.find_vertex("dup"))
+        self.assertEqual({}, self.g._vertex_indexes["name"])
+
+    def test_find_vertex_duplicate_renamed(self):
+        v1 = Vertex(self.g, name="v1")
+        v2 = Vertex(self.g, name="dup")
+        v1.name = "dup"
+        self.assertEqual(v1, self.g.find_vertex("dup"))
+        self.assertEqual([v1], self.g.find_vertices(["dup"]))
+
+        v1.delete()
+        self.assertEqual(v2, self.g.find_vertex("dup"))
+
+    def test_find_vertex_unhashable_name(self):
+        v1 = Vertex(self.g)
+        v1.name = ["list"]
+        self.assertEqual(v1, self.g.find_vertex(["list"]))
+
+    def test_find_vertex_named_by_decorator(self):
+        class Named:
+            name = "decorated"
+
+        v1 = Vertex(self.g)
+        v1.decorate(Named)
+        self.assertEqual(v1, self.g.find_vertex("decorated"))
+
+    def test_find_vertices(self):
+        v1 = Vertex(self.g, name="v1")
+        v2 = Vertex(self.g, name="v2")
+        self.assertEqual([v2, None, v1], self.g.find_vertices(["v2", "missing", "v1"]))
+
+    def test_find_vertex_after_pickle(self):
+        Vertex(self.g, name="v1")
+        graph = pickle.loads(pickle.dumps(self.g))
+        self.assertEqual(graph.find_vertex_by_id(1), graph.find_vertex("v1"))
+
+        # Graphs pickled before the name index existed are reindexed.
+        del self.g._vertex_indexes
+        graph = pickle.loads(pickle.dumps(self.g))
+        vertex = graph.find_vertex("v1")
+        self.assertEqual(graph.find_vertex_by_id(1), vertex)
+        vertex.name = "renamed"
+        self.assertEqual(vertex, graph.find_vertex("renamed"))
+
+    def test_vertices_decorated_by(self):
+        class Endpoint:
+            pass
+
+        @require_class(Endpoint)
+        class Router:
+            pass
+
+        v1 = Vertex(self.g, name="v1")
+        v2 = Vertex(self.g, name="v2")
+        v3 = Vertex(self.g, name="v3")
+        v2.decorate(Router)
+        v1.decorate(Endpoint)
+
+        self.assertEqual([v2, v1], self.g.vertices_decorated_by(Endpoint))
+        self.assertEqual([v2], self.g.vertices_decorated_by(Router))
+        self.assertEqual([], self.g.vertices_decorated_by(ExperimentGraph))
+
+        v2.delete()
+        self.assertEqual([v1], self.g.vertices_decorated_by(Endpoint))
+        self.assertEqual([], self.g.vertices_decorated_by(Router))
+        self.assertNotIn(Router, self.g._decorator_index)
+        self.assertEqual([v1, v3], self.g.select())
+
+    def test_select(self):
+        class Switch:
+            type = "switch"
+
+        class Endpoint:
+            def __init__(self):
+                self.type = "host"
+
+        v1 = Vertex(self.g, name="v1")
+        v2 = Vertex(self.g, name="v2")
+        v3 = Vertex(self.g, name="v3")
+        v1.decorate(Switch)
+        v2.decorate(Endpoint)
+        v3.decorate(Endpoint)
+        v3.role = "server"
+
+        self.assertEqual([v1], self.g.select(type="switch"))
+        self.assertEqual([v2, v3], self.g.select(type="host"))
+        self.assertEqual([v3], self.g.select(decorated_by=Endpoint, role="server"))
+        self.assertEqual([v2], self.g.select(decorated_by=Endpoint, name="v2"))
+        self.assertEqual([], self.g.select(decorated_by=Switch, type="host"))
+        self.assertEqual([], self.g.select(type=["unhashable"]))
+
+        v2.type = "switch"
+        self.assertEqual([v1, v2], self.g.select(type="switch"))
+        self.assertEqual([v3], self.g.select(type="host"))
+
+    def test_select_conflicting_type(self):
+        class Router:
+            type = "router"
+
+        def keep_type(entry, _decorator_value, instance_value):
+            if entry == "type":
+                return instance_value
+            raise experiment_graph.IncorrectConflictHandlerError
+
+        def append_type(entry, decorator_value, instance_value):
+            if entry == "type":
+                return f"{instance_value}-{decorator_value}"
+            raise experiment_graph.IncorrectConflictHandlerError
+
+        v1 = Vertex(self.g, name="v1")
+        v2 = Vertex(self.g, name="v2")
+        v1.decorate(Switch)
+        v2.decorate(Switch)
+        v1.decorate(Router, conflict_handler=keep_type)
+        v2.decorate(Router, conflict_handler=append_type)
+
+        # The handlers are given the value of the vertex, not its descriptor.
+        self.assertEqual("switch", v1.type)
+        self.assertEqual("switch-router", v2.type)
+        self.assertEqual([v1], self.g.select(type="switch"))
+        self.assertEqual([v2], self.g.select(type="switch-router"))
+
+    def test_select_after_pickle(self):
+        Vertex(self.g, name="v1").decorate(Switch)
+        graph = pickle.loads(pickle.dumps(self.g))
+        vertex = graph.find_vertex("v1")
+        self.assertEqual([vertex], graph.select(decorated_by=Switch, type="switch"))
+
+        del self.g._decorator_index
+        graph = pickle.loads(pickle.dumps(self.g))
+        vertex = graph.find_vertex("v1")
+        self.assertEqual([vertex], graph.vertices_decorated_by(Switch))
+
     def test_unique_graph_id_single(self):
         # Add several vertexs
         v1 = Vertex(self.g)
@@ -252,6 +432,360 @@ class ExperimentGraphTestCase(unittest.TestCase):
             vertex_filter=vfilter, path_action=action, num_workers=1
         )
 
+    def test_filtered_all_pairs_shortest_path_workers_match(self):
+        vertices = [Vertex(self.g, name=f"v{i}") for i in range(40)]
+        for i, vertex in enumerate(vertices):
+            Edge(vertex, vertices[(i + 1) % 30])
+            if i % 3 == 0:
+                Edge(vertex, vertices[(i * 7) % 40])
+        # Two vertices which cannot reach the rest of the graph
+        Edge(Vertex(self.g, name="island1"), Vertex(self.g, name="island2"))
+
+        def vfilter(vertex):
+            return not vertex.name.endswith("5")
+
+        def run(num_workers):
+            paths = []
+
+            def action(source, dest, path):
+                paths.append((source.name, dest.name, [v.name for v in path]))
+
+            self.g.filtered_all_pairs_shortest_path(
+                vertex_filter=vfilter, path_action=action, num_workers=num_workers
+            )
+            return paths
+
+        expected = run(0)
+        self.assertIn(("v0", "v0", ["v0"]), expected)
+        self.assertIn(("island1", "island2", ["island1", "island2"]), expected)
+        self.assertNotIn("v5", {dest for _source, dest, _path in expected})
+        for num_workers in (1, 3):
+            self.assertEqual(sorted(run(num_workers)), sorted(expected))
+
+    def test_filtered_all_pairs_shortest_path_workers_no_filter(self):
+        v1 = Vertex(self.g, name="v1")
+        v2 = Vertex(self.g, name="v2")
+        Edge(v1, v2)
+        paths = []
+
+        def action(source, dest, path):
+            paths.append((source.name, dest.name, [v.name for v in path]))
+
+        self.g.filtered_all_pairs_shortest_path(path_action=action, num_workers=2)
+        self.assertEqual(
+            sorted(paths),
+            [
+                ("v1", "v1", ["v1"]),
+                ("v1", "v2", ["v1", "v2"]),
+                ("v2", "v1", ["v2", "v1"]),
+                ("v2", "v2", ["v2"]),
+            ],
+        )
+
+    def test_filtered_all_pairs_shortest_path_sample_without_workers(self):
+        # Sources are only sampled when using workers.
+        Edge(Vertex(self.g, name="v1"), Vertex(self.g, name="v2"))
+        paths = []
+
+        def action(source, dest, path):
+            paths.append((source.name, dest.name))
+
+        self.g.filtered_all_pairs_shortest_path(
+            path_action=action, num_workers=0, sample_pct=1e-9
+        )
+        self.assertEqual(len(paths), 4)
+
+    def test_filtered_all_pairs_shortest_path_worker_failure(self):
+        Edge(Vertex(self.g, name="v1"), Vertex(self.g, name="v2"))
+        _node_ids, indptr, indices = self.g._csr_adjacency()
+        with self.assertRaisesRegex(RuntimeError, "Cannot search from 0"):
+            list(self.g._run_search(indptr, indices, [0, 1], failing_search, 2))
+
+    def test_compute_next_hops(self):
+        vertices = [Vertex(self.g, name=f"v{i}") for i in range(40)]
+        for i, vertex in enumerate(vertices):
+            Edge(vertex, vertices[(i + 1) % 30])
+            if i % 3 == 0:
+                Edge(vertex, vertices[(i * 7) % 40])
+        island1 = Vertex(self.g, name="island1")
+        island2 = Vertex(self.g, name="island2")
+        Edge(island1, island2)
+
+        def vfilter(vertex):
+            return not vertex.name.endswith("5")
+
+        expected = {}
+
+        def action(source, dest, path):
+            if source != dest:
+                expected.setdefault(source, {})[dest] = path[1]
+
+        self.g.filtered_all_pairs_shortest_path(
+            vertex_filter=vfilter, path_action=action
+        )
+        for num_workers in (0, 2):
+            next_hops = self.g.compute_next_hops(
+                vertex_filter=vfilter, num_workers=num_workers
+            )
+            self.assertEqual(next_hops, expected)
+            self.assertNotIn(vertices[5], next_hops)
+            self.assertEqual(next_hops[island1], {island2: island2})
+            self.assertNotIn(vertices[5], next_hops[vertices[4]])
+            # The hop towards v5's neighbor v6 goes through v5
+            self.assertIs(next_hops[vertices[4]][vertices[6]], vertices[5])
+
+    def test_compute_next_hops_no_filter(self):
+        v1 = Vertex(self.g, name="v1")
+        v2 = Vertex(self.g, name="v2")
+        v3 = Vertex(self.g, name="v3")
+        Edge(v1, v2)
+        Edge(v2, v3)
+        self.assertEqual(
+            self.g.compute_next_hops(),
+            {v1: {v2: v2, v3: v2}, v2: {v1: v1, v3: v3}, v3: {v2: v2, v1: v2}},
+        )
+        self.assertEqual(ExperimentGraph().compute_next_hops(num_workers=1), {})
+
+    def test_add_vertices(self):
+        first = Vertex(self.g, name="first")
+        vertices = self.g.add_vertices(3, name_fmt="host{}.net", decorators=[Server])
+        self.assertEqual([v.graph_id for v in vertices], [2, 3, 4])
+        self.assertEqual(self.g.last_node_id, 4)
+        for i, vertex in enumerate(vertices):
+            self.assertTrue(vertex.valid)
+            self.assertIs(vertex.g, self.g)
+            self.assertIs(self.g.g.nodes[vertex.graph_id]["object"], vertex)
+            self.assertIs(self.g.find_vertex(f"host{i}.net"), vertex)
+            self.assertEqual(vertex.decorators, {Host, Server})
+            self.assertEqual(vertex.role, "server")
+        vertices[0].add_interface("10.0.0.1")
+        self.assertEqual(vertices[0].interfaces, ["10.0.0.1"])
+        self.assertEqual(vertices[1].interfaces, [])
+        self.assertEqual(self.g.select(decorated_by=Server), vertices)
+
+        # The vertices are the same as those created one at a time
+        vertex = Vertex(self.g, name="host3.net")
+        vertex.decorate(Server)
+        self.assertEqual(vertex.__dict__.keys(), vertices[0].__dict__.keys())
+        self.assertIs(
+            vertex.__dict__["cached_self_dir"], vertices[0].__dict__["cached_self_dir"]
+        )
+        self.assertIs(vertex.__dict__["decorators"], vertices[0].__dict__["decorators"])
+        self.assertIsNot(vertices[0].conflict_handlers, vertices[1].conflict_handlers)
+
+        unnamed = self.g.add_vertices(2)
+        self.assertNotIn("name", unnamed[0].__dict__)
+        self.assertEqual(self.g.add_vertices(0), [])
+        self.assertEqual(len(self.g.g), 7)
+        self.assertEqual(first.graph_id, 1)
+
+    def test_add_vertices_id_conflict(self):
+        Vertex(self.g)
+        Vertex(self.g, graph_id=3)
+        self.g.last_node_id = 1
+        vertices = self.g.add_vertices(2)
+        self.assertEqual([v.graph_id for v in vertices], [4, 5])
+        self.assertEqual(Vertex(self.g).graph_id, 6)
+
+    def test_add_edges(self):
+        vertices = self.g.add_vertices(4, name_fmt="v{}")
+        version = self.g.structure_version
+        edges = self.g.add_edges(
+            [(vertices[i], vertices[i + 1]) for i in range(3)], decorators=[Link]
+        )
+        self.assertGreater(self.g.structure_version, version)
+        self.assertEqual(len(edges), 3)
+        for i, edge in enumerate(edges):
+            self.assertTrue(edge.valid)
+            self.assertIs(self.g.find_edge(vertices[i], vertices[i + 1]), edge)
+            self.assertEqual(edge.get_ends(), (vertices[i], vertices[i + 1]))
+            self.assertEqual(edge.decorators, {Link})
+        self.assertEqual(self.g.add_edges([]), [])
+
+        with self.assertRaises(TypeError):
+            self.g.add_edges([(vertices[0], "v1")])
+        with self.assertRaises(ValueError):
+            self.g.add_edges([(vertices[0], Vertex(ExperimentGraph()))])
+        vertices[3].delete()
+        with self.assertRaises(ValueError):
+            self.g.add_edges([(vertices[0], vertices[3])])
+        self.assertEqual(self.g.g.number_of_edges(), 2)
+
+    def test_add_edges_search_cache(self):
+        vertices = self.g.add_vertices(4, name_fmt="v{}")
+        self.g.add_edges([(vertices[0], vertices[1]), (vertices[1], vertices[2])])
+        self.assertEqual(self.cached_paths(), self.all_paths())
+        leaves = self.g.add_vertices(2, name_fmt="leaf{}")
+        self.g.add_edges(
+            [
+                (leaves[0], vertices[2]),
+                (vertices[3], vertices[0]),
+                (leaves[1], leaves[0]),
+            ]
+        )
+        self.assertEqual(self.cached_paths(), self.all_paths())
+
+    def test_structure_version(self):
+        version = self.g.structure_version
+        v1 = Vertex(self.g, name="v1")
+        v2 = Vertex(self.g, name="v2")
+        self.assertEqual(self.g.structure_version, version + 2)
+        edge = Edge(v1, v2)
+        self.assertEqual(self.g.structure_version, version + 3)
+        Edge(v2, v1)
+        v1.name = "renamed"
+        self.assertEqual(self.g.structure_version, version + 3)
+        edge.delete()
+        v2.delete()
+        self.assertEqual(self.g.structure_version, version + 5)
+
+        graph = pickle.loads(pickle.dumps(self.g))
+        self.assertEqual(graph.structure_version, version + 5)
+
+    def all_paths(self):
+        paths = []
+
+        def action(source, dest, path):
+            paths.append((source.name, dest.name, [v.name for v in path]))
+
+        self.g._single_process_all_pairs_shortest_path(lambda _v: True, action)
+        return paths
+
+    def cached_paths(self):
+        paths = []
+
+        def action(source, dest, path):
+            paths.append((source.name, dest.name, [v.name for v in path]))
+
+        self.g.filtered_all_pairs_shortest_path(lambda _v: True, action)
+        return paths
+
+    def test_shortest_paths_after_changes(self):
+        rng = random.Random(3)
+        vertices = [Vertex(self.g, name=f"v{i}") for i in range(30)]
+        edges = [Edge(vertices[i], vertices[rng.randrange(i)]) for i in range(1, 30)]
+        self.assertEqual(self.cached_paths(), self.all_paths())
+
+        for i in range(30):
+            change = i % 4
+            if change == 0:
+                edges.append(Edge(rng.choice(vertices), rng.choice(vertices)))
+            elif change == 1 and edges:
+                edge = edges.pop(rng.randrange(len(edges)))
+                if self.g.g.has_edge(edge.source.graph_id, edge.destination.graph_id):
+                    edge.delete()
+            elif change == 2:
+                vertices.append(Vertex(self.g, name=f"new{i}"))
+                Edge(vertices[-1], rng.choice(vertices[:-1]))
+            else:
+                vertices.pop(rng.randrange(len(vertices))).delete()
+            self.assertEqual(self.cached_paths(), self.all_paths())
+            expected = {}
+            for source, dest, path in self.all_paths():
+                if source != dest:
+                    expected.setdefault(source, {})[dest] = path[1]
+            next_hops = {
+                source.name: {dest.name: hop.name for dest, hop in hops.items()}
+                for source, hops in self.g.compute_next_hops().items()
+            }
+            self.assertEqual(
+                {source: hops for source, hops in next_hops.items() if hops}, expected
+            )
+
+    def test_shortest_paths_leaf_order(self):
+        # The leaf is reached after its parent's other children, not last.
+        root = Vertex(self.g, name="root")
+        children = [Vertex(self.g, name=f"child{i}") for i in range(2)]
+        for child in children:
+            Edge(root, child)
+        grandchildren = [Vertex(self.g, name=f"grandchild{i}") for i in range(2)]
+        for child, grandchild in zip(children, grandchildren):
+            Edge(child, grandchild)
+        self.cached_paths()
+        self.g.compute_next_hops()
+
+        Edge(Vertex(self.g, name="leaf"), children[0])
+        self.assertEqual(self.cached_paths(), self.all_paths())
+        paths = [
+            dest for source, dest, _path in self.cached_paths() if source == "root"
+        ]
+        self.assertEqual(
+            paths, ["root", "child0", "child1", "grandchild0", "leaf", "grandchild1"]
+        )
+        next_hops = self.g.compute_next_hops()
+        self.g._search_cache.clear()
+        self.assertEqual(
+            [list(hops.items()) for hops in next_hops.values()],
+            [list(hops.items()) for hops in self.g.compute_next_hops().values()],
+        )
+
+    def test_shortest_paths_direct_change(self):
+        v1 = Vertex(self.g, name="v1")
+        v2 = Vertex(self.g, name="v2")
+        v3 = Vertex(self.g, name="v3")
+        Edge(v1, v2)
+        self.cached_paths()
+        self.g.compute_next_hops()
+
+        # Plugins may change the networkx graph directly.
+        self.g.g.add_edge(v2.graph_id, v3.graph_id, object=None)
+        self.assertEqual(self.cached_paths(), self.all_paths())
+        self.assertEqual(self.g.compute_next_hops()[v1][v3], v2)
+        Edge(v1, Vertex(self.g, name="v4"))
+        self.g.g.remove_edge(v2.graph_id, v3.graph_id)
+        self.assertEqual(self.cached_paths(), self.all_paths())
+        self.assertNotIn(v3, self.g.compute_next_hops()[v1])
+
+    def test_shortest_paths_cache_reused(self):
+        v1 = Vertex(self.g, name="v1")
+        v2 = Vertex(self.g, name="v2")
+        v3 = Vertex(self.g, name="v3")
+        Edge(v1, v2)
+        Edge(v2, v3)
+        island1 = Vertex(self.g, name="island1")
+        island2 = Vertex(self.g, name="island2")
+        self.cached_paths()
+        cache = self.g._search_cache
+        results = {
+            v.name: cache.results[experiment_graph._breadth_first_search][position]
+            for position, v in enumerate(self.g.get_vertices())
+        }
+
+        # Only the sources which can reach the new edge are searched again
+        Edge(island1, island2)
+        self.assertEqual(self.cached_paths(), self.all_paths())
+        for position, vertex in enumerate(self.g.get_vertices()):
+            result = cache.results[experiment_graph._breadth_first_search][position]
+            if vertex.name.startswith("island"):
+                self.assertIsNot(result, results[vertex.name])
+            else:
+                self.assertIs(result, results[vertex.name])
+
+        # Adding an edge between vertices at the same distance from v2 keeps its paths
+        Edge(v1, v3)
+        self.assertIs(
+            cache.get(experiment_graph._breadth_first_search, 1), results["v2"]
+        )
+        self.assertIsNone(cache.get(experiment_graph._breadth_first_search, 0))
+        self.assertEqual(self.cached_paths(), self.all_paths())
+
+        # Connecting a new vertex extends the results instead of discarding them
+        self.cached_paths()
+        results = dict(cache.results[experiment_graph._breadth_first_search])
+        Edge(Vertex(self.g, name="leaf"), v2)
+        for position, result in results.items():
+            self.assertIs(
+                cache.get(experiment_graph._breadth_first_search, position), result
+            )
+        self.assertEqual(self.cached_paths(), self.all_paths())
+        self.assertEqual(self.g.compute_next_hops()[v3][self.g.find_vertex("leaf")], v2)
+
+        # Removing a vertex moves the others, so every result is discarded
+        island2.delete()
+        self.assertEqual(cache.results, {})
+        self.assertEqual(cache.size, 0)
+        self.assertEqual(self.cached_paths(), self.all_paths())
+
     # pylint: disable=unused-argument
     def test_sample_filtered_all_pairs_shortest_path_one_worker(self):
         """
@@ -0,0 +1,274 @@
+r"""
+Benchmarks of common :py:class:`ExperimentGraph
+<firewheel.control.experiment_graph.ExperimentGraph>` operations on synthetic
+topologies of 100 to 100,000 vertices.
+
+Each benchmark is timed several times and the best time is recorded. The results
+can be saved as JSON and later used as a baseline, so that benchmarks which have
+become slower are flagged as regressions::
+
+    pytest src/firewheel/tests/unit/control/test_experiment_graph_benchmarks.py \\
+        --graph-benchmark-json baseline.json
+    ...
+    pytest src/firewheel/tests/unit/control/test_experiment_graph_benchmarks.py \\
+        --graph-benchmark-baseline baseline.json --graph-benchmark-json current.json
+
+A benchmark fails if it is slower than its baseline by more than the
+``--graph-benchmark-tolerance``. Timings depend on the machine, so a baseline
+should only be compared with results from the same machine. The largest
+topologies are marked as ``long``.
+
+Finding, decorating, serializing, and searching the graph are benchmarked by
+``test_performance.py``, along with checks that the results are correct.
+"""
+
+import gc
+import json
+import timeit
+import platform
+
+import pytest
+
+from firewheel.control.experiment_graph import Edge, Vertex, ExperimentGraph
+
+# The number of vertices in each synthetic topology.
+SIZES = [100, 1000, 10000, pytest.param(100000, marks=pytest.mark.long)]
+
+# The version of the JSON results. Results with a different version are not compared.
+RESULTS_VERSION = 1
+
+# Each benchmark is repeated at least MIN_REPEATS times. Benchmarks which need to be
+# set up before each repeat also run for at least MIN_TIME seconds, unless they have
+# already run for MAX_TIME seconds.
+MIN_REPEATS = 3
+MIN_TIME = 0.2
+MAX_TIME = 5
+
+
+class BenchmarkResults:
+    """
+    Collect the results of the benchmarks and compare them with a baseline.
+    """
+
+    def __init__(self, baseline_path=None, tolerance=0.25):
+        """
+        Initialize the results.
+
+        Attributes:
+            results (dict): The best time in seconds of each benchmark, keyed by
+                the benchmark's name and then the size of the topology.
+            baseline (dict): The baseline results, in the same format.
+            tolerance (float): The fraction by which a benchmark may be slower
+                than the baseline.
+
+        Args:
+            baseline_path (str): A JSON file of baseline results. If :py:data:`None`,
+                the results are not compared.
+            tolerance (float): The fraction by which a benchmark may be slower
+                than the baseline.
+        """
+        self.results = {}
+        self.baseline = self.load(baseline_path) if baseline_path else {}
+        self.tolerance = tolerance
+
+    @staticmethod
+    def load(path):
+        """
+        Load saved results.
+
+        Args:
+            path (str): The JSON file.
+
+        Returns:
+            dict: The results.
+
+        Raises:
+            ValueError: If the results were saved with a different version.
+        """
+        with open(path, encoding="utf8") as f_hand:
+            data = json.load(f_hand)
+        if data.get("version") != RESULTS_VERSION:
+            raise ValueError(
+                f"The benchmark results in {path} have version {data.get('version')}, "
+                f"but version {RESULTS_VERSION} is required."
+            )
+        return data["results"]
+
+    def save(self, path):
+        """
+        Save the results, along with the platform they were measured on.
+
+        Args:
+            path (str): The JSON file.
+        """
+        data = {
+            "version": RESULTS_VERSION,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": self.results,
+        }
+        with open(path, "w", encoding="utf8") as f_hand:
+            json.dump(data, f_hand, indent=2, sort_keys=True)
+
+    def record(self, benchmark, size, seconds):
+        """
+        Record the time of a benchmark and compare it with the baseline.
+
+        Args:
+            benchmark (str): The name of the benchmark.
+            size (int): The number of vertices in the topology.
+            seconds (float): The best time of the benchmark.
+        """
+        self.results.setdefault(benchmark, {})[str(size)] = seconds
+        print(f"{benchmark} with {size} vertices: {seconds:.6f}s")
+
+        baseline = self.baseline.get(benchmark, {}).get(str(size))
+        if baseline is not None and seconds > baseline * (1 + self.tolerance):
+            pytest.fail(
+                f"The {benchmark} benchmark with {size} vertices regressed by more "
+                f"than {self.tolerance:.0%}.\n"
+                f"current: {seconds} seconds\n"
+                f"baseline: {baseline} seconds"
+            )
+
+
+@pytest.fixture(scope="module")
+def graph_benchmarks(request):
+    """
+    Provide the :py:class:`BenchmarkResults` shared by the benchmarks, and save
+    them once they have all run.
+
+    Args:
+        request (pytest.FixtureRequest): The pytest request.
+
+    Yields:
+        BenchmarkResults: The results of the benchmarks.
+    """
+    config = request.config
+    results = BenchmarkResults(
+        config.getoption("graph_benchmark_baseline", None),
+        config.getoption("graph_benchmark_tolerance", 0.25),
+    )
+    yield results
+    path = config.getoption("graph_benchmark_json", None)
+    if path:
+        results.save(path)
+
+
+def measure(run, setup=None):
+    """
+    Time a function, with garbage collection disabled.
+
+    A function without a setup function is called enough times in each repeat
+    for the total to take at least 0.2 seconds (see :py:meth:`timeit.Timer.autorange`).
+    Otherwise, it is called once per repeat, after calling the setup function.
+
+    Args:
+        run (func): The function to time. It is given the value returned by
+            ``setup``.
+        setup (func): A function which is called before each run, but is not timed.
+
+    Returns:
+        float: The best time of a single call in seconds.
+    """
+    gc.collect()
+    if setup is None:
+        timer = timeit.Timer(lambda: run(None))
+        number, _ = timer.autorange()
+        return min(timer.repeat(repeat=MIN_REPEATS, number=number)) / number
+
+    best = float("inf")
+    repeats = 0
+    started = timeit.default_timer()
+    while True:
+        state = setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = timeit.default_timer()
+            run(state)
+            best = min(best, timeit.default_timer() - start)
+        finally:
+            gc.enable()
+        repeats += 1
+        spent = timeit.default_timer() - started
+        if (repeats >= MIN_REPEATS and spent >= MIN_TIME) or spent >= MAX_TIME:
+            return best
+
+
+def build_topology(num_vertices):
+    """
+    Build a synthetic topology. There is one router for every thousand vertices
+    (and at least two), which are connected in a ring. There is one switch for
+    every twenty hosts, and each switch is connected to a router.
+
+    Args:
+        num_vertices (int): The number of vertices in the topology.
+
+    Returns:
+        ExperimentGraph: The topology.
+    """
+    num_routers = max(2, num_vertices // 1000)
+    num_switches = max(1, (num_vertices - num_routers) // 21)
+    num_hosts = num_vertices - num_routers - num_switches
+
+    graph = ExperimentGraph()
+    routers = []
+    for i in range(num_routers):
+        router = Vertex(graph, name=f"router{i}.net")
+        router.type = "router"
+        routers.append(router)
+    for i in range(num_routers if num_routers > 2 else 1):
+        Edge(routers[i], routers[(i + 1) % num_routers])
+
+    switches = []
+    for i in range(num_switches):
+        switch = Vertex(graph, name=f"switch{i}.net")
+        switch.type = "switch"
+        Edge(switch, routers[i % num_routers])
+        switches.append(switch)
+
+    for i in range(num_hosts):
+        host = Vertex(graph, name=f"host{i}.net")
+        Edge(host, switches[i % num_switches])
+    return graph
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_create(graph_benchmarks, size):
+    graph_benchmarks.record(
+        "create", size, measure(lambda _: build_topology(size), lambda: None)
+    )
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_get_vertices(graph_benchmarks, size):
+    graph = build_topology(size)
+
+    def iterate(_state):
+        for _vertex in graph.get_vertices():
+            pass
+
+    graph_benchmarks.record("get_vertices", size, measure(iterate))
+
+
+def test_baseline(tmp_path):
+    path = tmp_path / "baseline.json"
+    baseline = BenchmarkResults()
+    baseline.record("create", 100, 1.0)
+    baseline.save(path)
+
+    results = BenchmarkResults(path, tolerance=0.5)
+    assert results.baseline == {"create": {"100": 1.0}}
+    results.record("create", 100, 1.4)
+    results.record("create", 1000, 100)
+    with pytest.raises(pytest.fail.Exception, match="regressed by more than 50%"):
+        results.record("create", 100, 1.6)
+
+    with open(path, encoding="utf8") as f_hand:
+        data = json.load(f_hand)
+    data["version"] = RESULTS_VERSION + 1
+    with open(path, "w", encoding="utf8") as f_hand:
+        json.dump(data, f_hand)
+    with pytest.raises(ValueError, match="version"):
+        BenchmarkResults(path)
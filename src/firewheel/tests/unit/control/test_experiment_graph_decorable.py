@@ -14,6 +14,7 @@ class ExperimentGraphDecorableTestCase(unittest.TestCase):
 
         # Reset this
         firewheel.control.experiment_graph.CACHED_DECORATOR_OBJECTS = {}
+        firewheel.control.experiment_graph.CACHED_DECORATION_PLANS = {}
 
     def test_invalid_decorator(self):
         with self.assertRaises(TypeError):
@@ -172,9 +173,7 @@ class ExperimentGraphDecorableTestCase(unittest.TestCase):
         self.assertEqual(undec_inst2.foo, previous + 1)
 
         self.inst.decorate(Dec)
-        self.assertTrue(
-            isinstance(self.inst.foo, Dec.FooClass)
-        )  # pylint: disable=no-member
+        self.assertTrue(isinstance(self.inst.foo, Dec.FooClass))  # pylint: disable=no-member
         # This is actually a fail comparison--these should be class refs, not
         # the probably intended integers.
         self.assertEqual(self.inst.foo, self.inst.foo)  # pylint: disable=no-member
@@ -209,9 +208,7 @@ class ExperimentGraphDecorableTestCase(unittest.TestCase):
         # Now access to self.inst.foo will give a 'property' object.
         # This is the documented behavior
         self.assertEqual(self.inst.foo, self.inst.foo)  # pylint: disable=no-member
-        self.assertTrue(
-            isinstance(self.inst.foo, property)
-        )  # pylint: disable=no-member
+        self.assertTrue(isinstance(self.inst.foo, property))  # pylint: disable=no-member
 
     # This ends up testing both conflict resolution and class methods.
     # Class methods are unsupported (or more closely somewhat incorrectly
@@ -321,3 +318,159 @@ class ExperimentGraphDecorableTestCase(unittest.TestCase):
         e.decorate(Dec)
         result = e.foo()  # pylint: disable=no-member
         self.assertEqual(result, expected_return)
+
+    def test_decoration_plan_reused(self):
+        class Dec:
+            value = 42
+
+            def foo(self):
+                return self
+
+        inst2 = firewheel.control.experiment_graph.ExperimentGraphDecorable()
+        self.inst.decorate(Dec)
+        inst2.decorate(Dec)
+
+        # Both instances have the same shape, so they share a single plan
+        self.assertEqual(
+            len(firewheel.control.experiment_graph.CACHED_DECORATION_PLANS), 1
+        )
+        # pylint: disable=no-member
+        self.assertIs(self.inst.foo(), self.inst)
+        self.assertIs(inst2.foo(), inst2)
+        self.assertEqual(inst2.value, 42)
+        self.assertEqual(self.inst.cached_self_dir, inst2.cached_self_dir)
+
+    def test_decoration_plan_depends_on_decorators(self):
+        class Dec:
+            foo = 42
+
+        class Dec2:
+            foo = 43
+
+        class Dec3:
+            bar = 44
+
+        self.inst.decorate(Dec)
+        inst2 = firewheel.control.experiment_graph.ExperimentGraphDecorable()
+        inst2.decorate(Dec3)
+        inst2.decorate(Dec2)
+        self.assertEqual(inst2.foo, 43)  # pylint: disable=no-member
+
+        # The plan for Dec2 on a differently decorated instance must conflict
+        with self.assertRaises(
+            firewheel.control.experiment_graph.DecoratorConflictError
+        ):
+            self.inst.decorate(Dec2)
+
+    def test_decoration_plan_keeps_instance_value(self):
+        class Dec:
+            def foo(self):
+                return self
+
+        class Dec2:
+            def foo(self):
+                return None
+
+        def keep_handler(entry, _dec_val, orig_val):
+            if entry == "foo":
+                return orig_val
+            raise firewheel.control.experiment_graph.IncorrectConflictHandlerError
+
+        inst2 = firewheel.control.experiment_graph.ExperimentGraphDecorable()
+        for inst in (self.inst, inst2):
+            inst.conflict_handlers.append(keep_handler)
+            inst.decorate(Dec)
+            inst.decorate(Dec2)
+
+        # The kept value must be the instance's own method, not a cached one
+        self.assertIs(self.inst.foo.__self__, self.inst)  # pylint: disable=no-member
+        self.assertIs(inst2.foo.__self__, inst2)  # pylint: disable=no-member
+
+    def test_decorators_with_same_name(self):
+        def make_dec(value):
+            class Dec:
+                def foo(self):
+                    return value
+
+            return Dec
+
+        inst2 = firewheel.control.experiment_graph.ExperimentGraphDecorable()
+        self.inst.decorate(make_dec(1))
+        inst2.decorate(make_dec(2))
+        self.assertEqual(self.inst.foo(), 1)  # pylint: disable=no-member
+        self.assertEqual(inst2.foo(), 2)  # pylint: disable=no-member
+
+    def test_shared_state(self):
+        class Dec:
+            def foo(self):
+                return self
+
+        inst2 = firewheel.control.experiment_graph.ExperimentGraphDecorable()
+        state1 = self.inst.__dict__
+        state2 = inst2.__dict__
+        self.assertIs(state1["cached_self_dir"], state2["cached_self_dir"])
+        self.assertEqual(self.inst.skip_set, inst2.skip_set)
+        self.assertNotIn("skip_set", state1)
+
+        self.inst.decorate(Dec)
+        self.assertNotEqual(self.inst.cached_self_dir, inst2.cached_self_dir)
+        inst2.decorate(Dec)
+        self.assertIs(state1["decorators"], state2["decorators"])
+        self.assertIs(state1["cached_self_dir"], state2["cached_self_dir"])
+        self.assertIn("foo", inst2.cached_self_dir)
+
+    def test_modify_shared_state(self):
+        class Dec:
+            pass
+
+        class Dec2:
+            pass
+
+        inst2 = firewheel.control.experiment_graph.ExperimentGraphDecorable()
+        self.inst.decorate(Dec)
+        inst2.decorate(Dec)
+
+        # Modifying the sets of one instance does not affect the other
+        decorators = self.inst.decorators
+        decorators.add(Dec2)
+        self.assertIn(Dec2, decorators)
+        self.assertEqual(self.inst.decorators, {Dec, Dec2})
+        self.assertEqual(inst2.decorators, {Dec})
+        self.assertTrue(self.inst.is_decorated_by(Dec2))
+        self.assertFalse(inst2.is_decorated_by(Dec2))
+        self.inst.decorators.discard(Dec2)
+        self.assertIs(self.inst.__dict__["decorators"], inst2.__dict__["decorators"])
+
+        self.inst.skip_set.update(["foo", "bar"])
+        self.assertIn("foo", self.inst.skip_set)
+        self.assertNotIn("foo", inst2.skip_set)
+        self.inst.cached_self_dir.add("baz")
+        self.assertNotIn("baz", inst2.cached_self_dir)
+
+        # Sets can also be replaced, and behave like other sets
+        inst2.decorators = {Dec, Dec2}
+        self.assertTrue(inst2.is_decorated_by(Dec2))
+        self.assertEqual(inst2.decorators | {Dec}, {Dec, Dec2})
+        self.assertEqual(inst2.decorators.union([Dec]), {Dec, Dec2})
+        copy = inst2.decorators.copy()
+        copy.clear()
+        self.assertEqual(len(inst2.decorators), 2)
+
+    def test_setstate_legacy_skip_set(self):
+        class Dec:
+            value = 42
+
+        self.inst.decorate(Dec)
+        state = self.inst.__getstate__()
+        self.assertNotIn("skip_set", state)
+
+        # Older graphs stored a copy of the skip set in each instance
+        state["skip_set"] = set(self.inst.skip_set)
+        state["decorators"] = set(state["decorators"])
+        inst2 = firewheel.control.experiment_graph.ExperimentGraphDecorable.__new__(
+            firewheel.control.experiment_graph.ExperimentGraphDecorable
+        )
+        inst2.__setstate__(state)
+        self.assertNotIn("skip_set", inst2.__dict__)
+        self.assertIs(inst2.__dict__["decorators"], self.inst.__dict__["decorators"])
+        self.assertEqual(inst2.value, 42)  # pylint: disable=no-member
@@ -157,3 +157,27 @@ class ExperimentGraphDecoratorConflictHandlersTestCase(unittest.TestCase):
         self.inst.decorate(Base)
         self.inst.decorate(Sub, init_args=[1])
         self.assertEqual(self.inst.x, 1)
+
+    def test_handler_per_instance(self):
+        class Tagged:
+            tags = ["tagged"]
+
+        class Dec:
+            tags = ["dec"]
+
+        def merge_tags(entry, dec_val, orig_val):
+            if entry == "tags":
+                return orig_val + dec_val
+            raise IncorrectConflictHandlerError
+
+        inst2 = firewheel.control.experiment_graph.ExperimentGraphDecorable()
+        for inst, tag in ((self.inst, "a"), (inst2, "b")):
+            inst.decorate(Tagged)
+            inst.tags = [tag]
+
+        # Both instances share a decoration plan, but the handler is given the
+        # value of each instance.
+        self.inst.decorate(Dec, conflict_handler=merge_tags)
+        inst2.decorate(Dec, conflict_handler=merge_tags)
+        self.assertEqual(self.inst.tags, ["a", "dec"])
+        self.assertEqual(inst2.tags, ["b", "dec"])
@@ -0,0 +1,331 @@
+# pylint: disable=invalid-name
+
+import pickle
+import unittest
+
+from firewheel.control.experiment_graph import (
+    Edge,
+    Vertex,
+    ExperimentGraph,
+    require_class,
+)
+from firewheel.control.experiment_graph_journal import (
+    EDGE,
+    VERTEX,
+    ADD_EDGE,
+    DECORATE,
+    SET_ITEM,
+    ADD_VERTEX,
+    DELETE_EDGE,
+    DELETE_ITEM,
+    DELETE_VERTEX,
+    SET_ATTRIBUTE,
+    DELETE_ATTRIBUTE,
+    ExperimentGraphJournal,
+)
+from firewheel.control.experiment_graph_serializer import dumps, loads
+
+
+class Endpoint:
+    def __init__(self, image="endpoint.qcow2"):
+        self.image = image
+        self.roles = ["endpoint"]
+
+
+@require_class(Endpoint)
+class Router:
+    def __init__(self):
+        self.type = "router"
+        # A decorator which adds to the graph
+        self.loopback = Vertex(self.g, name=f"{self.name}.loopback")
+        Edge(self, self.loopback)
+
+
+class Link:
+    pass
+
+
+def describe(graph):
+    """Summarize a graph so that graphs can be compared."""
+    vertices = {}
+    for vertex in graph.get_vertices():
+        vertices[vertex.graph_id] = (
+            vertex.__dict__.get("name"),
+            vertex.__dict__.get("type"),
+            sorted(d.__name__ for d in vertex.decorators),
+            dict(graph.g.nodes[vertex.graph_id], object=None),
+        )
+    edges = {}
+    for edge in graph.get_edges():
+        ends = frozenset((edge.source.graph_id, edge.destination.graph_id))
+        edges[ends] = (
+            sorted(d.__name__ for d in edge.decorators),
+            dict(
+                graph.g.adj[edge.source.graph_id][edge.destination.graph_id],
+                object=None,
+            ),
+        )
+    return vertices, edges
+
+
+# pylint: disable=no-member,protected-access
+class ExperimentGraphJournalTestCase(unittest.TestCase):
+    def setUp(self):
+        self.g = ExperimentGraph()
+        self.journal = ExperimentGraphJournal(self.g)
+
+    def build(self):
+        router = Vertex(self.g, name="router.net")
+        router.decorate(Router)
+        hosts = []
+        for i in range(3):
+            host = Vertex(self.g, name=f"host{i}.net")
+            host.decorate(Endpoint, init_kwargs={"image": f"host{i}.qcow2"})
+            edge = Edge(host, router)
+            edge.decorate(Link)
+            edge["weight"] = i
+            hosts.append(host)
+        return router, hosts
+
+    def test_attach(self):
+        self.assertIs(self.g.journal, self.journal)
+        with self.assertRaises(ValueError):
+            ExperimentGraphJournal(self.g)
+        with self.assertRaises(ValueError):
+            self.journal.attach(ExperimentGraph())
+
+        Vertex(self.g)
+        self.journal.detach()
+        self.assertIsNone(self.g.journal)
+        Vertex(self.g)
+        self.assertEqual(len(self.journal), 1)
+        self.assertIsNone(ExperimentGraph().journal)
+
+    def test_events(self):
+        vertex = Vertex(self.g, name="a")
+        other = Vertex(self.g)
+        vertex["color"] = "red"
+        del vertex["color"]
+        vertex.type = "host"
+        del vertex.type
+        vertex.plain = "not recorded"
+        edge = Edge(vertex, other)
+        edge["weight"] = 2
+        del edge["weight"]
+        edge.decorate(Link)
+        edge.delete()
+        other.delete()
+
+        a, b = vertex.graph_id, other.graph_id
+        self.assertEqual(
+            [(event.kind, event.target, event.details) for event in self.journal],
+            [
+                (ADD_VERTEX, (VERTEX, a), ()),
+                (SET_ATTRIBUTE, (VERTEX, a), ("name", "a")),
+                (ADD_VERTEX, (VERTEX, b), ()),
+                (SET_ITEM, (VERTEX, a), ("color", "red")),
+                (DELETE_ITEM, (VERTEX, a), ("color",)),
+                (SET_ATTRIBUTE, (VERTEX, a), ("type", "host")),
+                (DELETE_ATTRIBUTE, (VERTEX, a), ("type",)),
+                (ADD_EDGE, (EDGE, a, b), ()),
+                (SET_ITEM, (EDGE, a, b), ("weight", 2)),
+                (DELETE_ITEM, (EDGE, a, b), ("weight",)),
+                (DECORATE, (EDGE, a, b), (Link, (), {}, None, None)),
+                (DELETE_EDGE, (EDGE, a, b), ()),
+                (DELETE_VERTEX, (VERTEX, b), ()),
+            ],
+        )
+
+    def test_nested_decoration(self):
+        router = Vertex(self.g, name="router.net")
+        router.decorate(Router)
+        # Only the outer decoration is recorded, as replaying it repeats the rest.
+        self.assertEqual(
+            [(event.kind, event.details[:1]) for event in self.journal.events],
+            [(ADD_VERTEX, ()), (SET_ATTRIBUTE, ("name",)), (DECORATE, (Router,))],
+        )
+        self.assertEqual(len(self.g.g), 2)
+        # The decoration records the last vertex ID before it, as Router adds a
+        # vertex, but Endpoint only changes the decorated vertex.
+        self.assertEqual(self.journal.events[-1].details[4], router.graph_id)
+        Vertex(self.g).decorate(Endpoint)
+        self.assertIsNone(self.journal.events[-1].details[4])
+
+    def test_failed_decoration(self):
+        class Broken:
+            def __init__(self):
+                raise RuntimeError("broken")
+
+        vertex = Vertex(self.g)
+        with self.assertRaises(RuntimeError):
+            vertex.decorate(Broken)
+        self.assertEqual([event.kind for event in self.journal], [ADD_VERTEX])
+        self.assertEqual(self.journal._decorating, 0)
+        vertex["key"] = "value"
+        self.assertEqual(len(self.journal), 2)
+
+    def test_bulk_construction(self):
+        vertices = self.g.add_vertices(3, name_fmt="host{}.net", decorators=[Endpoint])
+        self.g.add_edges(zip(vertices, vertices[1:]), decorators=[Link])
+        summary = self.journal.summary()
+        self.assertEqual(
+            summary["kinds"],
+            {ADD_VERTEX: 3, SET_ATTRIBUTE: 3, DECORATE: 5, ADD_EDGE: 2},
+        )
+        self.assertEqual(describe(self.journal.replay()), describe(self.g))
+
+    def test_model_components(self):
+        Vertex(self.g, name="a")
+        with ExperimentGraphJournal.attribute_to("mc.one"):
+            Vertex(self.g, name="b")
+            with ExperimentGraphJournal.attribute_to("mc.two"):
+                self.g.find_vertex("a").delete()
+            self.g.find_vertex("b")["key"] = "value"
+        self.assertIsNone(ExperimentGraphJournal.active_model_component)
+
+        self.assertEqual(
+            [event.model_component for event in self.journal],
+            [None, None, "mc.one", "mc.one", "mc.two", "mc.one"],
+        )
+        self.assertEqual(
+            self.journal.summary(),
+            {
+                "events": 6,
+                "kinds": {
+                    ADD_VERTEX: 2,
+                    SET_ATTRIBUTE: 2,
+                    DELETE_VERTEX: 1,
+                    SET_ITEM: 1,
+                },
+                "model_components": {
+                    None: {ADD_VERTEX: 1, SET_ATTRIBUTE: 1},
+                    "mc.one": {ADD_VERTEX: 1, SET_ATTRIBUTE: 1, SET_ITEM: 1},
+                    "mc.two": {DELETE_VERTEX: 1},
+                },
+            },
+        )
+
+    def test_replay(self):
+        router, hosts = self.build()
+        hosts[0]["color"] = "red"
+        hosts[1].name = "renamed.net"
+        Edge(hosts[0], hosts[1])
+        self.g.find_edge(hosts[2], router).delete()
+        hosts[2].delete()
+
+        graph = self.journal.replay()
+        self.assertEqual(describe(graph), describe(self.g))
+        self.assertEqual(graph.last_node_id, self.g.last_node_id)
+        replayed = graph.find_vertex("router.net")
+        self.assertTrue(replayed.is_decorated_by(Endpoint))
+        self.assertEqual(replayed.loopback.name, "router.net.loopback")
+        self.assertEqual(graph.find_vertex("host0.net").image, "host0.qcow2")
+        self.assertIsNone(graph.journal)
+
+    def test_replay_onto_graph(self):
+        vertex = Vertex(self.g, name="a")
+        self.journal.detach()
+        base = pickle.loads(pickle.dumps(self.g))
+
+        journal = ExperimentGraphJournal(self.g)
+        vertex.decorate(Endpoint)
+        Edge(vertex, Vertex(self.g, name="b"))
+        self.assertIs(journal.replay(base), base)
+        self.assertEqual(describe(base), describe(self.g))
+
+    def test_compact(self):
+        router, hosts = self.build()
+        for i in range(5):
+            hosts[0]["color"] = i
+        temporary = Vertex(self.g, name="temporary")
+        temporary.decorate(Endpoint)
+        Edge(temporary, router)["weight"] = 1
+        Edge(temporary, hosts[0])
+        temporary.delete()
+        edge = Edge(hosts[1], hosts[2])
+        edge["weight"] = 5
+        self.g.find_edge(hosts[2], hosts[1]).delete()
+        expected = describe(self.g)
+
+        events = len(self.journal)
+        removed = self.journal.compact()
+        self.assertEqual(len(self.journal), events - removed)
+        self.assertEqual(removed, 4 + 7 + 3)
+        self.assertNotIn(
+            "temporary",
+            [event.details[1] for event in self.journal if event.kind == SET_ATTRIBUTE],
+        )
+        self.assertEqual(describe(self.journal.replay()), expected)
+        # Compacting again does nothing.
+        self.assertEqual(self.journal.compact(), 0)
+
+    def test_compact_existing_objects(self):
+        a = Vertex(self.g, name="a")
+        b = Vertex(self.g, name="b")
+        edge = Edge(a, b)
+        self.journal.detach()
+        base = pickle.loads(pickle.dumps(self.g))
+
+        journal = ExperimentGraphJournal(self.g)
+        edge["weight"] = 1
+        a["color"] = "red"
+        a.decorate(Endpoint)
+        a["color"] = "blue"
+        a["color"] = "green"
+        b["color"] = "red"
+        b.delete()
+        self.assertEqual(journal.compact(), 3)
+        self.assertEqual(
+            [event.kind for event in journal],
+            [SET_ITEM, DECORATE, SET_ITEM, DELETE_VERTEX],
+        )
+        self.assertEqual(describe(journal.replay(base)), describe(self.g))
+
+    def test_compact_decorator_changes_graph(self):
+        temporary = Vertex(self.g, name="temporary")
+        temporary.decorate(Endpoint)
+        unused = Vertex(self.g, name="unused")
+        unused["color"] = "red"
+        unused.delete()
+        router = Vertex(self.g, name="router.net")
+        router.decorate(Router)
+        loopback = router.loopback
+        loopback["color"] = "blue"
+        # The loopback added by the decoration remains after the router is deleted.
+        router.delete()
+        expected = describe(self.g)
+
+        # Only the unused vertex, which was deleted before the decoration, is
+        # removed.
+        self.assertEqual(self.journal.compact(), 4)
+        self.assertIn(
+            (DECORATE, (VERTEX, router.graph_id)),
+            [(event.kind, event.target) for event in self.journal],
+        )
+        graph = self.journal.replay()
+        self.assertEqual(describe(graph), expected)
+        self.assertEqual(
+            graph.find_vertex("router.net.loopback").graph_id, loopback.graph_id
+        )
+
+    def test_compact_reused_id(self):
+        vertex = Vertex(self.g, name="a")
+        graph_id = vertex.graph_id
+        vertex.delete()
+        Vertex(self.g, name="b", graph_id=graph_id)
+        self.journal.compact()
+        self.assertEqual(
+            [(event.kind, event.details) for event in self.journal],
+            [(ADD_VERTEX, ()), (SET_ATTRIBUTE, ("name", "b"))],
+        )
+        self.assertEqual(describe(self.journal.replay()), describe(self.g))
+
+    def test_not_persisted(self):
+        vertex = Vertex(self.g, name="a")
+        vertex.decorate(Endpoint)
+        Edge(vertex, Vertex(self.g, name="b"))
+        self.assertIsNone(pickle.loads(pickle.dumps(self.g)).journal)
+        graph = loads(dumps(self.g))
+        self.assertIsNone(graph.journal)
+        Vertex(graph, name="new")
+        self.assertEqual(graph.find_vertex("new").name, "new")
@@ -0,0 +1,240 @@
+# pylint: disable=invalid-name
+
+import io
+import pickle
+import unittest
+
+from firewheel.control.experiment_graph import (
+    Edge,
+    Vertex,
+    ExperimentGraph,
+    require_class,
+)
+from firewheel.control.experiment_graph_serializer import (
+    FORMAT_VERSION,
+    dump,
+    load,
+    dumps,
+    loads,
+)
+
+
+class Endpoint:
+    image = "endpoint.qcow2"
+
+    def __init__(self):
+        self.interfaces = []
+
+    def add_interface(self, address):
+        self.interfaces.append(address)
+        return address
+
+
+def neighbor_handler(entry, _dec_val, _orig_val):
+    if entry == "get_neighbors":
+        return Router.get_neighbors
+    return None
+
+
+@require_class(Endpoint)
+class Router:
+    type = "router"
+    _conflict_handlers = [neighbor_handler]
+
+    def get_neighbors(self):
+        return "routed"
+
+    def route(self):
+        return self.name
+
+
+class Link:
+    def get_address(self):
+        return self.address
+
+
+# pylint: disable=no-member,protected-access
+class ExperimentGraphSerializerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.g = ExperimentGraph()
+        self.router = Vertex(self.g, name="router.net")
+        self.router.decorate(Router)
+        self.hosts = []
+        for i in range(5):
+            host = Vertex(self.g, name=f"host{i}.net")
+            host.decorate(Endpoint)
+            host.add_interface(f"10.0.0.{i}")
+            host.gateway = self.router
+            edge = Edge(host, self.router)
+            edge.decorate(Link)
+            edge.address = f"10.0.0.{i}"
+            self.hosts.append(host)
+        Edge(self.hosts[0], self.hosts[1])
+
+    def round_trip(self, graph):
+        return loads(dumps(graph))
+
+    def test_empty_graph(self):
+        graph = self.round_trip(ExperimentGraph())
+        self.assertEqual(graph.g.number_of_nodes(), 0)
+        self.assertEqual(graph.last_node_id, 0)
+        Vertex(graph, name="new")
+        self.assertIsNotNone(graph.find_vertex("new"))
+
+    def test_structure(self):
+        graph = self.round_trip(self.g)
+        self.assertEqual(list(graph.g.nodes), list(self.g.g.nodes))
+        self.assertEqual(graph.last_node_id, self.g.last_node_id)
+        # The order of each vertex's neighbors is preserved
+        for node in self.g.g:
+            self.assertEqual(list(graph.g.adj[node]), list(self.g.g.adj[node]))
+        # Both directions of an edge share the same data
+        host = graph.find_vertex("host0.net")
+        router = graph.find_vertex("router.net")
+        self.assertIs(
+            graph.g.adj[host.graph_id][router.graph_id],
+            graph.g.adj[router.graph_id][host.graph_id],
+        )
+
+    def test_vertices(self):
+        graph = self.round_trip(self.g)
+        router = graph.find_vertex("router.net")
+        self.assertIs(router.g, graph)
+        self.assertIs(router.get_object(), router)
+        self.assertEqual(router.decorators, {Router, Endpoint})
+        self.assertEqual(router.type, "router")
+        self.assertEqual(router.route(), "router.net")
+
+        for i in range(5):
+            host = graph.find_vertex(f"host{i}.net")
+            self.assertEqual(host.interfaces, [f"10.0.0.{i}"])
+            self.assertEqual(host.image, "endpoint.qcow2")
+            self.assertIs(host.gateway, router)
+            self.assertEqual(host.add_interface("10.1.0.1"), "10.1.0.1")
+            self.assertEqual(len(host.interfaces), 2)
+
+        self.assertEqual(
+            sorted(v.name for v in graph.vertices_decorated_by(Endpoint)),
+            sorted(v.name for v in self.g.vertices_decorated_by(Endpoint)),
+        )
+        self.assertEqual(graph.select(type="router"), [router])
+
+    def test_edges(self):
+        graph = self.round_trip(self.g)
+        edges = list(graph.get_edges())
+        self.assertEqual(len(edges), len(list(self.g.get_edges())))
+        for edge in edges:
+            self.assertIs(edge.get_object(), edge)
+            self.assertIs(edge.source.g, graph)
+            if edge.is_decorated_by(Link):
+                self.assertEqual(edge.get_address(), edge.address)
+                self.assertIn(edge.source.name, {f"host{i}.net" for i in range(5)})
+                self.assertEqual(edge.destination.name, "router.net")
+
+    def test_shared_values(self):
+        shared = {"key": "value"}
+        self.hosts[0].shared = shared
+        self.hosts[1].shared = shared
+        self.router.nx_graph = self.g.g
+        graph = self.round_trip(self.g)
+        host0 = graph.find_vertex("host0.net")
+        host1 = graph.find_vertex("host1.net")
+        self.assertEqual(host0.shared, shared)
+        self.assertIs(host0.shared, host1.shared)
+        self.assertIs(graph.find_vertex("router.net").nx_graph, graph.g)
+        # Mutable attributes are not shared between vertices
+        self.assertIsNot(host0.interfaces, host1.interfaces)
+        self.assertIs(host0.__dict__["decorators"], host1.__dict__["decorators"])
+        self.assertIs(
+            host0.__dict__["cached_self_dir"], host1.__dict__["cached_self_dir"]
+        )
+
+    def test_dictionary_attributes(self):
+        self.hosts[0]["color"] = "red"
+        edge = self.g.find_edge(self.hosts[0], self.router)
+        edge["weight"] = 2
+        self.g.g.graph["title"] = "test"
+        self.g.custom = [self.router]
+        graph = self.round_trip(self.g)
+        host = graph.find_vertex("host0.net")
+        self.assertEqual(host["color"], "red")
+        self.assertEqual(
+            graph.find_edge(host, graph.find_vertex("router.net"))["weight"], 2
+        )
+        self.assertEqual(graph.g.graph, {"title": "test"})
+        self.assertIs(graph.custom[0], graph.find_vertex("router.net"))
+
+    def test_methods_bound_lazily(self):
+        graph = self.round_trip(self.g)
+        host = graph.find_vertex("host0.net")
+        self.assertNotIn("add_interface", host.__dict__)
+        self.assertIs(host.add_interface.__self__, host)
+        self.assertIn("add_interface", host.__dict__)
+        with self.assertRaises(AttributeError):
+            host.missing  # noqa: B018
+
+        # Methods which replace one of the class's are bound when loading
+        router = graph.find_vertex("router.net")
+        self.assertIn("get_neighbors", router.__dict__)
+        self.assertEqual(router.get_neighbors(), "routed")
+
+    def test_modify_loaded_graph(self):
+        graph = self.round_trip(self.g)
+        host = graph.find_vertex("host0.net")
+        host.decorate(Router)
+        self.assertEqual(host.get_neighbors(), "routed")
+        self.assertIn(host, graph.vertices_decorated_by(Router))
+
+        host.name = "renamed.net"
+        self.assertIs(graph.find_vertex("renamed.net"), host)
+        self.assertIsNone(graph.find_vertex("host0.net"))
+
+        new = Vertex(graph, name="new.net")
+        self.assertGreater(new.graph_id, self.router.graph_id)
+        Edge(new, host)
+        graph.find_vertex("host1.net").delete()
+        self.assertIsNone(graph.find_vertex("host1.net"))
+
+    def test_reserialize(self):
+        graph = self.round_trip(self.round_trip(self.g))
+        host = graph.find_vertex("host2.net")
+        self.assertEqual(host.add_interface("10.1.0.1"), "10.1.0.1")
+        self.assertIs(host.gateway, graph.find_vertex("router.net"))
+
+    def test_pickle_loaded_graph(self):
+        graph = pickle.loads(pickle.dumps(self.round_trip(self.g)))
+        host = graph.find_vertex("host3.net")
+        self.assertNotIn("_pending_methods", host.__dict__)
+        self.assertEqual(host.add_interface("10.1.0.1"), "10.1.0.1")
+
+    def test_search_cache(self):
+        next_hops = self.g.compute_next_hops()
+        graph = self.round_trip(self.g)
+        self.assertEqual(graph.structure_version, self.g.structure_version)
+        self.assertEqual(graph._search_cache.size, 0)
+        self.assertEqual(
+            {
+                source.name: {dest.name: hop.name for dest, hop in hops.items()}
+                for source, hops in graph.compute_next_hops().items()
+            },
+            {
+                source.name: {dest.name: hop.name for dest, hop in hops.items()}
+                for source, hops in next_hops.items()
+            },
+        )
+
+    def test_file(self):
+        stream = io.BytesIO()
+        dump(self.g, stream)
+        stream.seek(0)
+        graph = load(stream)
+        self.assertEqual(len(graph.g), len(self.g.g))
+
+    def test_invalid_data(self):
+        data = dumps(self.g)
+        with self.assertRaises(ValueError):
+            loads(b"not a graph" + data)
+        with self.assertRaises(ValueError):
+            loads(data[:100])
+        with self.assertRaises(ValueError):
+            loads(data[:8] + (FORMAT_VERSION + 1).to_bytes(4, "little") + data[12:])
@@ -0,0 +1,167 @@
+# pylint: disable=invalid-name
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import yaml
+
+from firewheel.tests.unit.test_utils import cleanup_repo_db, initalize_repo_db
+from firewheel.control.model_component import ModelComponent
+from firewheel.control.experiment_plan_cache import ExperimentPlanCache
+from firewheel.control.model_component_manager import ModelComponentManager
+
+
+class ExperimentPlanCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.repo = os.path.join(self.base_dir, "repo")
+        self.test_manifests = []
+
+        self.c11 = os.path.join(self.repo, "c11")
+        self.c12 = os.path.join(self.repo, "c12")
+        self.c13 = os.path.join(self.repo, "c13")
+        self.write_manifest(
+            self.c11,
+            {
+                "name": "test.c11",
+                "attributes": {"depends": ["c1"]},
+                "model_components": {"depends": ["test.c13"]},
+            },
+        )
+        self.write_manifest(
+            self.c12,
+            {
+                "name": "test.c12",
+                "attributes": {"provides": ["c1"]},
+                "model_components": {},
+            },
+        )
+        self.write_manifest(self.c13, {"name": "test.c13", "model_components": {}})
+
+        self.repository_db = initalize_repo_db()
+        self.repository_db.add_repository({"path": self.repo})
+        self.plan_cache = ExperimentPlanCache(
+            db_basepath=os.path.join(self.base_dir, "db")
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+        cleanup_repo_db(self.repository_db)
+        for test_manifest in self.test_manifests:
+            if test_manifest["name"] in sys.modules:
+                del sys.modules[test_manifest["name"]]
+
+    def write_manifest(self, path, manifest):
+        self.test_manifests.append(manifest)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "MANIFEST"), "w", encoding="utf8") as f:
+            f.write(yaml.safe_dump(manifest))
+
+    def build(self, arguments=None):
+        mcm = ModelComponentManager(repository_db=self.repository_db)
+        m1 = ModelComponent(
+            path=self.c11, repository_db=self.repository_db, arguments=arguments
+        )
+        mcm.build_dependency_graph([m1], install_mcs=False, plan_cache=self.plan_cache)
+        return mcm, m1
+
+    def get_plan(self, mcm):
+        return [
+            (mc.name, grouping)
+            for mc, grouping in mcm.dg.get_ordered_entity_list_with_grouping()
+        ]
+
+    def test_plan_reused(self):
+        mcm, _m1 = self.build()
+        self.assertFalse(mcm.plan_cache_hit)
+        expected = [("test.c13", 0), ("test.c12", 0), ("test.c11", 0)]
+        self.assertEqual(expected, self.get_plan(mcm))
+
+        with patch.object(
+            ModelComponentManager,
+            "get_default_component_for_attribute",
+            side_effect=AssertionError("Dependencies were resolved"),
+        ):
+            mcm, m1 = self.build()
+        self.assertTrue(mcm.plan_cache_hit)
+        self.assertEqual(expected, self.get_plan(mcm))
+        self.assertIs(m1, mcm.get_ordered_model_component_list()[-1])
+
+    def test_arguments_change_key(self):
+        self.build()
+        mcm, m1 = self.build(arguments={"plugin": {"size": "3"}})
+        self.assertFalse(mcm.plan_cache_hit)
+
+        mcm, m1 = self.build(arguments={"plugin": {"size": "3"}})
+        self.assertTrue(mcm.plan_cache_hit)
+        self.assertEqual({"size": "3"}, m1.arguments["plugin"])
+
+    def test_manifest_change(self):
+        self.build()
+        self.write_manifest(
+            self.c13,
+            {
+                "name": "test.c13",
+                "attributes": {"provides": ["c1"]},
+                "model_components": {},
+            },
+        )
+        mcm, _m1 = self.build()
+        self.assertFalse(mcm.plan_cache_hit)
+        self.assertEqual(
+            [("test.c13", 0), ("test.c11", 0)],
+            self.get_plan(mcm),
+        )
+
+    def test_new_provider(self):
+        mcm, m1 = self.build()
+        key = ExperimentPlanCache.get_key(
+            [m1],
+            install_mcs=False,
+            attribute_defaults=mcm.attribute_defaults,
+            repositories=self.repository_db.list_repositories(),
+        )
+        self.assertIsNotNone(self.plan_cache.get(key, mcm.get_attribute_providers()))
+
+        # A second provider of "c1" would make the resolution ambiguous.
+        self.write_manifest(
+            os.path.join(self.repo, "c14"),
+            {
+                "name": "test.c14",
+                "attributes": {"provides": ["c1"]},
+                "model_components": {},
+            },
+        )
+        mcm = ModelComponentManager(repository_db=self.repository_db)
+        self.assertIsNone(self.plan_cache.get(key, mcm.get_attribute_providers()))
+
+    def test_max_plans(self):
+        self.plan_cache.max_plans = 1
+        self.build()
+        self.build(arguments={"plugin": {"size": "3"}})
+        mcm, _m1 = self.build()
+        self.assertFalse(mcm.plan_cache_hit)
+
+    def test_least_recently_used_discarded(self):
+        self.plan_cache.max_plans = 2
+        self.build()
+        self.build(arguments={"plugin": {"size": "3"}})
+        # Using the first plan again keeps it when a third plan is added.
+        mcm, _m1 = self.build()
+        self.assertTrue(mcm.plan_cache_hit)
+        self.build(arguments={"plugin": {"size": "4"}})
+
+        mcm, _m1 = self.build()
+        self.assertTrue(mcm.plan_cache_hit)
+        mcm, _m1 = self.build(arguments={"plugin": {"size": "3"}})
+        self.assertFalse(mcm.plan_cache_hit)
+
+    def test_clear(self):
+        self.build()
+        self.plan_cache.clear()
+        mcm, _m1 = self.build()
+        self.assertFalse(mcm.plan_cache_hit)
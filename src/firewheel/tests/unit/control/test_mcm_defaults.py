@@ -138,3 +138,23 @@ class ModelComponentManagerDefaultsTestCase(unittest.TestCase):
             NoDefaultProviderError, msg='No provider found for attribute "invalid".'
         ):
             mcm.get_default_component_for_attribute("invalid")
+
+    def test_attribute_providers(self):
+        mcm = ModelComponentManager(repository_db=self.repository_db)
+        providers = mcm.get_attribute_providers()
+        self.assertEqual(providers["p1"], [self.c11])
+        self.assertEqual(sorted(providers["p2"]), sorted([self.c11, self.c12]))
+        self.assertEqual(providers["p4"], [self.c12])
+        self.assertNotIn("c1", providers)
+        # The mapping is only built once per manager
+        self.assertIs(providers, mcm.get_attribute_providers())
+
+    def test_default_memoized(self):
+        mcm = ModelComponentManager(
+            attribute_defaults_config=self.attribute_defaults,
+            repository_db=self.repository_db,
+        )
+        first = mcm.get_default_component_for_attribute("p3")
+        second = mcm.get_default_component_for_attribute("p3")
+        self.assertIs(first, second)
+        self.assertIsNot(first, mcm.get_default_component_for_attribute("p1"))
@@ -5,10 +5,13 @@ import sys
 import shutil
 import tempfile
 import unittest
+import threading
+from unittest.mock import patch
 
 import yaml
 
 from firewheel.tests.unit.test_utils import cleanup_repo_db, initalize_repo_db
+from firewheel.control.model_component import ModelComponent
 from firewheel.control.model_component_manager import (
     InvalidStateError,
     ModelComponentManager,
@@ -155,3 +158,85 @@ class Grapher(AbstractPlugin):
         }
         expected_result = [c11_expected_result, c12_expected_result]
         self.assertEqual(expected_result, errors)
+
+    def test_profile(self):
+        mcm = ModelComponentManager(repository_db=self.repository_db)
+        comp = mcm.get_default_component_for_attribute(self.c12_provides[0])
+        mcm.build_dependency_graph([comp])
+        results = mcm.build_experiment_graph(profile=True)
+
+        expected_keys = {
+            "wall_time",
+            "cpu_time",
+            "memory_peak",
+            "memory_net",
+            "vertices_before",
+            "vertices_after",
+            "edges_before",
+            "edges_after",
+            "import_time",
+            "run_time",
+            "upload_time",
+            "upload_cpu_time",
+        }
+        for result in results:
+            self.assertEqual(expected_keys, set(result["profile"]))
+            self.assertEqual(result["time"], result["profile"]["wall_time"])
+            self.assertGreaterEqual(result["profile"]["memory_peak"], 0)
+            self.assertEqual(result["profile"]["vertices_after"], 0)
+
+        # The plugin of the first model component was imported and run.
+        self.assertGreater(results[0]["profile"]["import_time"], 0)
+        self.assertGreater(results[0]["profile"]["run_time"], 0)
+        # The second model component's objects failed to import.
+        self.assertTrue(results[1]["errors"])
+        self.assertEqual(results[1]["profile"]["run_time"], 0)
+        self.assertNotIn("profile", mcm.build_experiment_graph()[0])
+
+    def test_background_upload(self):
+        mcm = ModelComponentManager(repository_db=self.repository_db)
+        comp = mcm.get_default_component_for_attribute(self.c11_provides[0])
+        mcm.build_dependency_graph([comp])
+
+        threads = []
+
+        def upload_files():
+            threads.append(threading.current_thread())
+
+        with patch.object(ModelComponent, "upload_files", side_effect=upload_files):
+            results = mcm.build_experiment_graph(upload_workers=2)
+        self.assertFalse(results[0]["errors"])
+        self.assertEqual(1, len(threads))
+        self.assertIsNot(threading.main_thread(), threads[0])
+
+        # Files are uploaded synchronously while profiling, after the plugin is
+        # measured.
+        threads.clear()
+        del sys.modules[self.c11_manifest["name"]]
+        with patch.object(ModelComponent, "upload_files", side_effect=upload_files):
+            results = mcm.build_experiment_graph(profile=True, upload_workers=2)
+        self.assertEqual([threading.main_thread()], threads)
+        self.assertIn("upload_cpu_time", results[0]["profile"])
+
+        threads.clear()
+        del sys.modules[self.c11_manifest["name"]]
+        # Files are uploaded synchronously by default
+        with patch.object(ModelComponent, "upload_files", side_effect=upload_files):
+            mcm.build_experiment_graph()
+        self.assertEqual([threading.main_thread()], threads)
+
+    def test_background_upload_error(self):
+        mcm = ModelComponentManager(repository_db=self.repository_db)
+        comp = mcm.get_default_component_for_attribute(self.c11_provides[0])
+        mcm.build_dependency_graph([comp])
+
+        with patch.object(
+            ModelComponent, "upload_files", side_effect=RuntimeError("Upload failed")
+        ):
+            results = mcm.build_experiment_graph(upload_workers=2)
+            self.assertEqual(self.c11_manifest["name"], results[0]["model_component"])
+            self.assertTrue(results[0]["errors"])
+
+            del sys.modules[self.c11_manifest["name"]]
+            with self.assertRaises(RuntimeError):
+                mcm.build_experiment_graph()
@@ -92,3 +92,25 @@ class MCMRecursiveMCDependsTestCase(unittest.TestCase):
         actual_list = mcm.dg.get_ordered_entity_list()
         expected_list = [self.c13_name, self.c12_name, self.c11_name]
         self.assertEqual(expected_list, [comp.name for comp in actual_list])
+
+    def test_shared_mc_dependency_instances(self):
+        mcm = ModelComponentManager(repository_db=self.repository_db)
+
+        # Both instances of c11 depend on c12, so the second reference
+        # should be served from the cache.
+        m1 = ModelComponent(path=self.c11, repository_db=self.repository_db)
+        m2 = ModelComponent(path=self.c11, repository_db=self.repository_db)
+        mcm.build_dependency_graph([m1, m2], install_mcs=False)
+
+        actual_list = mcm.dg.get_ordered_entity_list()
+        expected_list = [self.c13_name, self.c12_name, self.c11_name, self.c11_name]
+        self.assertEqual(expected_list, [comp.name for comp in actual_list])
+
+        cache_info = mcm.get_model_component_cache_info()
+        self.assertEqual(cache_info["misses"], 2)
+        self.assertEqual(cache_info["size"], 2)
+        self.assertGreater(cache_info["hits"], 0)
+        self.assertIs(
+            mcm.get_model_component(self.c12_name, install_mcs=False),
+            actual_list[1],
+        )
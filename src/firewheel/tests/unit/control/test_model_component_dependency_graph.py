@@ -189,6 +189,23 @@ class ModelComponentDependencyGraphTestCase(unittest.TestCase):
 
         self.assertEqual([m1, m2], dg.get_ordered_entity_list())
 
+    def test_check_ordering(self):
+        dg = ModelComponentDependencyGraph()
+
+        m1 = ModelComponent(path=self.c11, repository_db=self.repository_db)
+        m2 = ModelComponent(path=self.c12, repository_db=self.repository_db)
+
+        dg.insert(m1, 0)
+        dg.insert(m2, 0)
+
+        self.assertIs(m1, dg.get_first_by_name(m1.name))
+        self.assertIs(m2, dg.get_first(m2))
+        self.assertIsNone(dg.get_first_by_name("test.missing"))
+        self.assertTrue(dg.check_ordering(m1.name, m2.name))
+        self.assertFalse(dg.check_ordering(m2.name, m1.name))
+        with self.assertRaises(ValueError):
+            dg.check_ordering(m1.name, "test.missing")
+
     def test_in_degree_zero_constraints(self):
         dg = ModelComponentDependencyGraph()
 
@@ -0,0 +1,124 @@
+# pylint: disable=invalid-name
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import yaml
+
+from firewheel.control import model_component_index
+from firewheel.control.model_component_index import ModelComponentIndex
+
+
+class ModelComponentIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.db_dir = os.path.join(self.base_dir, "db")
+        self.repo = os.path.join(self.base_dir, "repo")
+
+        self.c11 = os.path.join(self.repo, "c11")
+        self.c12 = os.path.join(self.repo, "nested", "c12")
+        self.write_manifest(
+            self.c11,
+            {
+                "name": "test.c11",
+                "attributes": {"depends": ["c1"], "provides": ["c2"]},
+                "model_components": {"depends": ["test.c12"]},
+            },
+        )
+        self.write_manifest(
+            self.c12,
+            {
+                "name": "test.c12",
+                "attributes": {"provides": ["c1"], "precedes": ["c3"]},
+                "model_components": {"precedes": ["test.c11"]},
+            },
+        )
+        self.repos = [{"path": self.repo}]
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def write_manifest(self, path, manifest):
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "MANIFEST"), "w", encoding="utf8") as f:
+            f.write(yaml.safe_dump(manifest))
+
+    def get_index(self):
+        return ModelComponentIndex(iter(self.repos), db_basepath=self.db_dir)
+
+    def test_find_paths(self):
+        mc_index = self.get_index()
+        self.assertEqual([self.c11], mc_index.find_model_component_paths("test.c11"))
+        self.assertEqual([self.c12], mc_index.find_model_component_paths("test.c12"))
+        self.assertEqual([], mc_index.find_model_component_paths("test.missing"))
+
+    def test_model_component_entries(self):
+        entries = self.get_index().get_model_components()
+        self.assertEqual([self.c11, self.c12], list(entries))
+        self.assertEqual(entries[self.c11]["depends"], ["c1"])
+        self.assertEqual(entries[self.c11]["provides"], ["c2"])
+        self.assertEqual(entries[self.c11]["mc_depends"], ["test.c12"])
+        self.assertEqual(entries[self.c12]["precedes"], ["c3"])
+        self.assertEqual(entries[self.c12]["mc_precedes"], ["test.c11"])
+
+    def test_index_persisted(self):
+        self.get_index().refresh()
+        with open(os.path.join(self.db_dir, "mc_index.json"), encoding="utf8") as f:
+            data = json.load(f)
+        self.assertEqual(data["version"], model_component_index.INDEX_VERSION)
+        self.assertIn(self.c11, data["repositories"][self.repo])
+
+    def test_new_model_component(self):
+        self.get_index().refresh()
+        c13 = os.path.join(self.repo, "nested", "c13")
+        self.write_manifest(c13, {"name": "test.c13"})
+        self.assertEqual([c13], self.get_index().find_model_component_paths("test.c13"))
+
+    def test_removed_model_component(self):
+        self.get_index().refresh()
+        shutil.rmtree(self.c12)
+        mc_index = self.get_index()
+        self.assertEqual([], mc_index.find_model_component_paths("test.c12"))
+        self.assertEqual([self.c11], mc_index.get_model_component_paths())
+
+    def test_renamed_model_component(self):
+        self.get_index().refresh()
+        self.write_manifest(self.c11, {"name": "test.renamed"})
+        mc_index = self.get_index()
+        self.assertEqual([], mc_index.find_model_component_paths("test.c11"))
+        self.assertEqual([self.c11], mc_index.find_model_component_paths("test.renamed"))
+
+    def test_malformed_manifest(self):
+        c13 = os.path.join(self.repo, "c13")
+        os.makedirs(c13)
+        with open(os.path.join(c13, "MANIFEST"), "w", encoding="utf8") as f:
+            f.write("name: [unclosed")
+        mc_index = self.get_index()
+        self.assertIn(c13, mc_index.get_model_component_paths())
+        self.assertEqual([self.c11], mc_index.find_model_component_paths("test.c11"))
+
+    def test_missing_repository(self):
+        self.repos.append({"path": os.path.join(self.base_dir, "omitted")})
+        self.assertEqual(
+            [self.c11, self.c12], self.get_index().get_model_component_paths()
+        )
+
+    @patch.object(model_component_index, "RACY_WINDOW_NS", 0)
+    def test_unchanged_manifests_not_reparsed(self):
+        self.get_index().refresh()
+        with patch.object(
+            ModelComponentIndex,
+            "_index_model_component",
+            side_effect=AssertionError("MANIFEST was re-parsed"),
+        ):
+            mc_index = self.get_index()
+            self.assertEqual(
+                [self.c11, self.c12], mc_index.get_model_component_paths()
+            )
+            self.assertEqual(
+                [self.c12], mc_index.find_model_component_paths("test.c12")
+            )
@@ -0,0 +1,147 @@
+import os
+import shutil
+import tempfile
+import unittest
+import threading
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import yaml
+
+from firewheel.tests.unit.test_utils import cleanup_repo_db, initalize_repo_db
+from firewheel.control.model_component import ModelComponent
+from firewheel.control.model_component_exceptions import MissingVmResourceError
+
+
+# pylint: disable=protected-access
+class ModelComponentParallelUploadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.repo_path = os.path.join(self.tmpdir, "repo")
+        self.mc_dir = os.path.join(self.repo_path, "mc")
+        os.makedirs(os.path.join(self.mc_dir, "resources"))
+        os.makedirs(os.path.join(self.mc_dir, "other"))
+
+        self.resources = [f"resource{i}.sh" for i in range(8)]
+        for resource in self.resources:
+            self.write_file(os.path.join("resources", resource), 100)
+        self.write_file(os.path.join("other", self.resources[0]), 50)
+        self.images = ["image1.qc2", "image2.qc2"]
+        for image in self.images:
+            self.write_file(image, 1000)
+
+        self.manifest = {
+            "name": "test.model_component",
+            "attributes": {"depends": [], "provides": []},
+            "model_components": {"depends": []},
+            "vm_resources": ["resources", os.path.join("other", self.resources[0])],
+            "images": [{"paths": self.images}],
+        }
+        with open(os.path.join(self.mc_dir, "MANIFEST"), "w", encoding="utf8") as f:
+            f.write(yaml.safe_dump(self.manifest))
+
+        self.repository_db = initalize_repo_db()
+        self.repository_db.add_repository({"path": self.repo_path})
+
+        self.vm_resource_store = MagicMock()
+        self.vm_resource_store.get_file_upload_date.return_value = None
+        self.image_store = MagicMock()
+        self.image_store.check_path.return_value = False
+        self.image_store.cache_image_file.side_effect = os.path.basename
+        self.image_store.broadcast_get_files.return_value = True
+
+        self.mc = ModelComponent(
+            path=self.mc_dir,
+            repository_db=self.repository_db,
+            vm_resource_store=self.vm_resource_store,
+            image_store=self.image_store,
+        )
+
+    def tearDown(self):
+        cleanup_repo_db(self.repository_db)
+        shutil.rmtree(self.tmpdir)
+
+    def write_file(self, name, size):
+        with open(os.path.join(self.mc_dir, name), "wb") as f:
+            f.write(b"x" * size)
+
+    def test_upload_files(self):
+        stats = self.mc.upload_files(workers=4)
+
+        self.assertEqual(11, stats["files"])
+        self.assertEqual(11, stats["uploaded"])
+        self.assertEqual(8 * 100 + 50 + 2 * 1000, stats["bytes"])
+        self.assertGreaterEqual(stats["rate"], 0)
+
+        # Each file is added without broadcasting it.
+        self.assertEqual(9, self.vm_resource_store.add_file.call_count)
+        for call in self.vm_resource_store.add_file.call_args_list:
+            self.assertEqual({"broadcast": False}, call.kwargs)
+        self.image_store.add_image_file.assert_not_called()
+
+        # The mesh is asked to fetch the files once per model component.
+        self.vm_resource_store.broadcast_get_files.assert_called_once()
+        broadcasts = self.vm_resource_store.broadcast_get_files.call_args.args[0]
+        self.assertEqual(
+            sorted([*self.resources, self.resources[0]]), sorted(broadcasts)
+        )
+        self.image_store.broadcast_get_files.assert_called_once()
+        broadcasts = self.image_store.broadcast_get_files.call_args.args[0]
+        self.assertEqual(sorted(self.images), sorted(broadcasts))
+
+        # The hash cache is written once, after all the files are uploaded.
+        self.vm_resource_store.hash_cache.flush.assert_called_once_with()
+        self.image_store.hash_cache.flush.assert_called_once_with()
+
+    def test_unchanged_files(self):
+        upload_date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for root, _dirs, files in os.walk(self.mc_dir):
+            for name in files:
+                timestamp = upload_date.timestamp()
+                os.utime(os.path.join(root, name), (timestamp, timestamp))
+        self.vm_resource_store.get_file_upload_date.return_value = upload_date
+        self.image_store.check_path.return_value = True
+        self.image_store.get_file_upload_date.return_value = upload_date
+
+        stats = self.mc.upload_files(workers=4)
+        self.assertEqual(11, stats["files"])
+        self.assertEqual(0, stats["uploaded"])
+        self.assertEqual(0, stats["bytes"])
+        self.vm_resource_store.add_file.assert_not_called()
+        self.image_store.cache_image_file.assert_not_called()
+        self.vm_resource_store.broadcast_get_files.assert_called_once_with(
+            [], wait=False
+        )
+
+    def test_concurrent(self):
+        barrier = threading.Barrier(2, timeout=10)
+        self.vm_resource_store.add_file.side_effect = lambda *_args, **_kwargs: (
+            barrier.wait()
+        )
+        self.mc.manifest["images"] = []
+        self.mc.manifest["vm_resources"] = self.mc.manifest["vm_resources"][:1]
+        stats = self.mc.upload_files(workers=2)
+        self.assertEqual(8, stats["uploaded"])
+
+    def test_same_name_in_order(self):
+        order = []
+        self.vm_resource_store.add_file.side_effect = lambda path, **_kwargs: (
+            order.append(path)
+        )
+        self.mc.manifest["images"] = []
+        self.mc._upload_vm_resources(workers=4)
+        duplicates = [path for path in order if path.endswith(self.resources[0])]
+        self.assertEqual(
+            [
+                os.path.join(self.mc_dir, "resources", self.resources[0]),
+                os.path.join(self.mc_dir, "other", self.resources[0]),
+            ],
+            duplicates,
+        )
+
+    def test_missing_resource(self):
+        self.mc.manifest["vm_resources"].append("invalid")
+        with self.assertRaises(MissingVmResourceError):
+            self.mc.upload_files(workers=4)
+        self.vm_resource_store.broadcast_get_files.assert_not_called()
+        self.vm_resource_store.hash_cache.flush.assert_called_once_with()
@@ -1,14 +1,29 @@
+import gc
 import io
+import os
+import pickle
 import pstats
+import random
 import timeit
 import cProfile
 import itertools
+import tracemalloc
 from unittest.mock import patch
 
 import pytest
 
+from firewheel.control import experiment_graph, experiment_graph_serializer
+from firewheel.lib.utilities import hash_file
 from firewheel.control.model_component import ModelComponent
+from firewheel.control.dependency_graph import DependencyGraph
+from firewheel.control.experiment_graph import (
+    Edge,
+    Vertex,
+    ExperimentGraph,
+    require_class,
+)
 from firewheel.control.model_component_manager import ModelComponentManager
+from firewheel.control.experiment_graph_journal import ExperimentGraphJournal
 
 
 def build_mc_list(initial_mc_list):
@@ -54,6 +69,111 @@ def mc_run(mc_list):
     mc_manager.build_dependency_graph(mc_list, install_mcs=False)
 
 
+def build_dependency_graph(backend, num_entities):
+    """
+    Build a large, synthetic dependency graph.
+
+    Each entity depends on a few attributes provided by earlier entities and
+    provides a new attribute, and a portion of the entities are associated
+    with one another.
+
+    Args:
+        backend (str): The dependency graph backend to use.
+        num_entities (int): The number of entities to insert.
+
+    Returns:
+        DependencyGraph: The populated dependency graph.
+    """
+    rng = random.Random(0)
+    graph = DependencyGraph(backend=backend)
+    entities = []
+    for i in range(num_entities):
+        depends = [f"attr{rng.randrange(i)}" for _ in range(min(i, 3))]
+        entities.append(graph.insert_entity(depends, [f"attr{i}"], i % 10))
+        if i > 1 and i % 4 == 0:
+            graph.associate_entities(entities[rng.randrange(i)], entities[-1])
+    return graph
+
+
+class BenchmarkEndpoint:
+    """A decorator applied to most vertices in the benchmark graphs."""
+
+
+class BenchmarkSwitch:
+    """A decorator applied to every tenth vertex in the benchmark graphs."""
+
+    type = "switch"
+
+
+def benchmark_host_conflicts(entry, _decorator_value, _instance_value):
+    """
+    Resolve the conflicts of :py:class:`BenchmarkHost` in its favor.
+
+    Args:
+        entry (str): The name of the conflicting attribute.
+
+    Returns:
+        object: The :py:class:`BenchmarkHost` value of the attribute.
+    """
+    return getattr(BenchmarkHost, entry)
+
+
+@require_class(BenchmarkEndpoint)
+class BenchmarkHost:
+    """A decorator stack applied in the decoration benchmark."""
+
+    _conflict_handlers = [benchmark_host_conflicts]
+    image = "benchmark.qcow2"
+    vm = {"vcpu": 1, "memory": 512}
+
+    def run_executable(self):
+        """Pretend to schedule an executable on the host."""
+
+    def drop_file(self):
+        """Pretend to drop a file onto the host."""
+
+    def set_hostname(self):
+        """Pretend to set the hostname of the host."""
+
+
+class BenchmarkLink:
+    """A decorator applied to the edges in the graph construction benchmark."""
+
+    bandwidth = 1000
+
+    def get_ends(self):
+        """
+        Get the ends of the edge.
+
+        Returns:
+            tuple: The source and destination of the edge.
+        """
+        return (self.source, self.destination)
+
+
+def build_experiment_graph(num_vertices):
+    """
+    Build a large, synthetic experiment graph of named vertices.
+
+    Each vertex is connected to a random earlier vertex, so the graph is a
+    random tree.
+
+    Args:
+        num_vertices (int): The number of vertices to create.
+
+    Returns:
+        ExperimentGraph: The populated experiment graph.
+    """
+    rng = random.Random(0)
+    graph = ExperimentGraph()
+    vertices = []
+    for i in range(num_vertices):
+        vertices.append(Vertex(graph, name=f"host{i}.net"))
+        if i:
+            Edge(vertices[rng.randrange(i)], vertices[-1])
+    return graph
+
+
 @pytest.fixture
 def model_component_objects():
     num_vms = 10
@@ -190,3 +310,690 @@ class TestPerformance:
                     "Here are the slowest processes:\n\n"
                     f"{mock_stdout.getvalue()}"
                 )
+
+    @pytest.mark.parametrize(
+        ("num_entities", "compare_times"),
+        [(2000, False), pytest.param(20000, True, marks=pytest.mark.long)],
+    )
+    def test_dependency_graph_backends(self, num_entities, compare_times):
+        """
+        Benchmark ordering a large dependency graph with each backend. The
+        compact backend must produce the same ordering as the networkx
+        backend, and should not be slower. The times are only compared by the
+        ``long`` benchmark, as they are unreliable on a busy machine.
+
+        Args:
+            num_entities (int): The number of entities in the dependency graph.
+            compare_times (bool): Whether to fail if the compact backend is not
+                faster than the networkx backend.
+        """
+        orders = {}
+        times = {}
+        for backend in ("networkx", "compact"):
+            graph = build_dependency_graph(backend, num_entities)
+            start = timeit.default_timer()
+            orders[backend] = graph.get_ordered_entity_list()
+            times[backend] = timeit.default_timer() - start
+
+        print(
+            f"Ordering {num_entities} entities: networkx {times['networkx']:.4f}s, "
+            f"compact {times['compact']:.4f}s"
+        )
+        if orders["networkx"] != orders["compact"]:
+            pytest.fail("The compact backend produced a different ordering.")
+        if compare_times and times["compact"] >= times["networkx"]:
+            pytest.fail(
+                "The compact backend was not faster than the networkx backend.\n"
+                f"networkx: {times['networkx']} seconds\n"
+                f"compact: {times['compact']} seconds"
+            )
+
+    @pytest.mark.parametrize(
+        "size",
+        [
+            10**6,
+            64 * 10**6,
+            pytest.param(10**9, marks=pytest.mark.long),
+            pytest.param(20 * 10**9, marks=pytest.mark.long),
+        ],
+    )
+    def test_hash_file_backends(self, tmp_path, size):
+        """
+        Benchmark each :py:func:`hash_file <firewheel.lib.utilities.hash_file>`
+        backend. Files larger than 64 MB are sparse beyond their first 64 MB
+        so the benchmark does not need that much disk space. Hashing
+        a ``blake2b-tree`` with multiple threads must produce the same digest as
+        a single thread, and should not be slower on a multi-core host.
+
+        Args:
+            tmp_path (pathlib.Path): A temporary directory for the input file.
+            size (int): The size of the file to hash in bytes.
+        """
+        path = tmp_path / "data.bin"
+        with open(path, "wb") as data:
+            data.write(random.Random(size).randbytes(min(size, 64 * 10**6)))
+            data.truncate(size)
+        workers = os.cpu_count() or 1
+        backends = {
+            "sha1": {},
+            "sha1 (mmap)": {"use_mmap": True},
+            "blake2b": {"algorithm": "blake2b"},
+            "blake2b-tree": {"algorithm": "blake2b-tree", "use_mmap": True},
+            f"blake2b-tree ({workers} threads)": {
+                "algorithm": "blake2b-tree",
+                "workers": workers,
+            },
+        }
+
+        # Read the file once so that small files are in the page cache.
+        hash_file(str(path))
+        digests = {}
+        times = {}
+        for backend, kwargs in backends.items():
+            start = timeit.default_timer()
+            digests[backend] = hash_file(str(path), **kwargs)
+            times[backend] = timeit.default_timer() - start
+            print(
+                f"{backend}: {size / 10**6:.0f} MB in {times[backend]:.4f}s "
+                f"({size / 10**6 / max(times[backend], 1e-9):.1f} MB/s)"
+            )
+
+        threaded = f"blake2b-tree ({workers} threads)"
+        if digests[threaded] != digests["blake2b-tree"]:
+            pytest.fail("Hashing with multiple threads produced a different digest.")
+        if workers > 1 and size >= 10**9 and times[threaded] > times["blake2b-tree"]:
+            pytest.fail(
+                "Hashing with multiple threads was slower than a single thread.\n"
+                f"single: {times['blake2b-tree']} seconds\n"
+                f"threaded: {times[threaded]} seconds"
+            )
+
+    @pytest.mark.parametrize(
+        ("num_vertices", "compare_times"),
+        [(10000, False), pytest.param(50000, True, marks=pytest.mark.long)],
+    )
+    def test_find_vertex(self, num_vertices, compare_times):
+        """
+        Benchmark finding every :py:class:`Vertex` in a large graph by name.
+        The indexed lookups are compared with a linear scan of the graph, which
+        is timed for a small sample of the names and extrapolated. The times are
+        only compared by the ``long`` benchmark, as they are unreliable on a busy
+        machine.
+
+        Args:
+            num_vertices (int): The number of vertices in the graph.
+            compare_times (bool): Whether to fail if the indexed lookups are not
+                at least 100 times faster than scanning the graph.
+        """
+        graph = build_experiment_graph(num_vertices)
+        names = [f"host{i}.net" for i in range(num_vertices)]
+        random.Random(1).shuffle(names)
+
+        start = timeit.default_timer()
+        vertices = graph.find_vertices(names)
+        indexed_time = timeit.default_timer() - start
+
+        sample = names[:20]
+        start = timeit.default_timer()
+        for name in sample:
+            next(v for v in graph.get_vertices() if v.name == name)
+        scan_time = (timeit.default_timer() - start) * num_vertices / len(sample)
+
+        print(
+            f"Finding {num_vertices} vertices: indexed {indexed_time:.4f}s, "
+            f"linear scan (estimated) {scan_time:.4f}s"
+        )
+        if [vertex.name for vertex in vertices] != names:
+            pytest.fail("find_vertices returned the wrong vertices.")
+        if compare_times and indexed_time * 100 > scan_time:
+            pytest.fail(
+                "Finding vertices by name was not at least 100 times faster than "
+                "scanning the graph.\n"
+                f"indexed: {indexed_time} seconds\n"
+                f"scan: {scan_time} seconds"
+            )
+
+    @pytest.mark.parametrize(
+        ("num_vertices", "compare_times"),
+        [(10000, False), pytest.param(50000, True, marks=pytest.mark.long)],
+    )
+    def test_select_vertices(self, num_vertices, compare_times):
+        """
+        Benchmark selecting vertices by decorator and by attribute value with
+        the graph's indexes, compared with scanning every :py:class:`Vertex`.
+        The times are only compared by the ``long`` benchmark, as they are
+        unreliable on a busy machine.
+
+        Args:
+            num_vertices (int): The number of vertices in the graph.
+            compare_times (bool): Whether to fail if the indexed selection is
+                slower than scanning the graph.
+        """
+        graph = build_experiment_graph(num_vertices)
+        for index, vertex in enumerate(graph.get_vertices()):
+            if index % 10:
+                vertex.decorate(BenchmarkEndpoint)
+            else:
+                vertex.decorate(BenchmarkSwitch)
+
+        queries = {
+            "decorated_by": (
+                lambda: graph.vertices_decorated_by(BenchmarkSwitch),
+                lambda: [
+                    v
+                    for v in graph.get_vertices()
+                    if v.is_decorated_by(BenchmarkSwitch)
+                ],
+            ),
+            "type": (
+                lambda: graph.select(type="switch"),
+                lambda: [
+                    v
+                    for v in graph.get_vertices()
+                    if getattr(v, "type", None) == "switch"
+                ],
+            ),
+        }
+        for query, (indexed, scan) in queries.items():
+            start = timeit.default_timer()
+            indexed_result = indexed()
+            indexed_time = timeit.default_timer() - start
+            start = timeit.default_timer()
+            scan_result = scan()
+            scan_time = timeit.default_timer() - start
+
+            print(
+                f"Selecting by {query} from {num_vertices} vertices: "
+                f"indexed {indexed_time:.4f}s, scan {scan_time:.4f}s"
+            )
+            if sorted(indexed_result) != sorted(scan_result):
+                pytest.fail(f"Selecting by {query} returned the wrong vertices.")
+            if compare_times and indexed_time > scan_time:
+                pytest.fail(
+                    f"Selecting by {query} was slower than scanning the graph.\n"
+                    f"indexed: {indexed_time} seconds\n"
+                    f"scan: {scan_time} seconds"
+                )
+
+    @pytest.mark.parametrize(
+        ("num_vertices", "compare_times"),
+        [(5000, False), pytest.param(50000, True, marks=pytest.mark.long)],
+    )
+    def test_decorate_vertices(self, num_vertices, compare_times):
+        """
+        Benchmark decorating many vertices with the same decorator stack,
+        compared with resolving the decoration plan for every :py:class:`Vertex`.
+        The times are only compared by the ``long`` benchmark, as they are
+        unreliable on a busy machine.
+
+        Args:
+            num_vertices (int): The number of vertices to decorate.
+            compare_times (bool): Whether to fail if decorating with a cached
+                plan is slower than resolving the plan every time.
+        """
+
+        def decorate(cached):
+            graph = ExperimentGraph()
+            vertices = [Vertex(graph, name=f"host{i}.net") for i in range(num_vertices)]
+            # Like ``timeit``, pause garbage collection so it does not skew the timing
+            gc.collect()
+            gc.disable()
+            try:
+                start = timeit.default_timer()
+                for vertex in vertices:
+                    if not cached:
+                        experiment_graph.CACHED_DECORATION_PLANS.clear()
+                    vertex.decorate(BenchmarkHost)
+                return timeit.default_timer() - start, vertices
+            finally:
+                gc.enable()
+
+        uncached_time = decorate(cached=False)[0]
+        cached_time, vertices = decorate(cached=True)
+
+        print(
+            f"Decorating {num_vertices} vertices: cached plan {cached_time:.4f}s, "
+            f"resolving every plan {uncached_time:.4f}s"
+        )
+        if not all(v.is_decorated_by(BenchmarkEndpoint) for v in vertices):
+            pytest.fail("Decorating with a cached plan skipped a decorator.")
+        if compare_times and cached_time > uncached_time:
+            pytest.fail(
+                "Decorating with a cached plan was slower than resolving it.\n"
+                f"cached: {cached_time} seconds\n"
+                f"uncached: {uncached_time} seconds"
+            )
+
+    @pytest.mark.parametrize(
+        "num_vertices",
+        [5000, pytest.param(50000, marks=pytest.mark.long)],
+    )
+    def test_graph_memory(self, num_vertices):
+        """
+        Benchmark the memory used per decorated :py:class:`Vertex` and per
+        :py:class:`Edge` with :py:mod:`tracemalloc`. Decorable objects share their
+        skip set, decorators, and methods/attributes; giving every object private
+        copies of them (as they used to have) measures the memory used before.
+
+        Args:
+            num_vertices (int): The number of vertices in the graph.
+        """
+
+        def measure(build):
+            gc.collect()
+            tracemalloc.start()
+            try:
+                start = tracemalloc.get_traced_memory()[0]
+                build()
+                return tracemalloc.get_traced_memory()[0] - start
+            finally:
+                tracemalloc.stop()
+
+        graph = ExperimentGraph()
+        vertices = []
+        edges = []
+
+        def build_vertices():
+            for i in range(num_vertices):
+                vertex = Vertex(graph, name=f"host{i}.net")
+                vertex.decorate(BenchmarkHost)
+                vertices.append(vertex)
+
+        def build_edges():
+            edges.extend(
+                Edge(vertices[i - 1], vertices[i]) for i in range(1, num_vertices)
+            )
+
+        def unshare(objects):
+            for obj in objects:
+                state = obj.__dict__
+                state["skip_set"] = set(obj.skip_set)
+                state["decorators"] = set(obj.decorators)
+                state["cached_self_dir"] = set(obj.cached_self_dir)
+
+        bytes_per = {
+            "vertex": measure(build_vertices) / len(vertices),
+            "edge": measure(build_edges) / len(edges),
+        }
+        private_bytes_per = {
+            "vertex": measure(lambda: unshare(vertices)) / len(vertices),
+            "edge": measure(lambda: unshare(edges)) / len(edges),
+        }
+
+        for kind, shared in bytes_per.items():
+            private = shared + private_bytes_per[kind]
+            print(
+                f"Memory per {kind} with {num_vertices} vertices: "
+                f"shared {shared:.0f} bytes, private {private:.0f} bytes"
+            )
+            if shared >= private:
+                pytest.fail(
+                    f"Sharing state did not reduce the memory used per {kind}.\n"
+                    f"shared: {shared} bytes\n"
+                    f"private: {private} bytes"
+                )
+
+    @pytest.mark.parametrize(
+        ("num_vertices", "compare_times"),
+        [(10000, False), pytest.param(50000, True, marks=pytest.mark.long)],
+    )
+    def test_serialize_experiment_graph(self, num_vertices, compare_times):
+        """
+        Benchmark saving and loading a decorated experiment graph with
+        :py:mod:`firewheel.control.experiment_graph_serializer`, compared with
+        :py:mod:`pickle`. The times are only compared by the ``long`` benchmark,
+        as they are unreliable on a busy machine.
+
+        Args:
+            num_vertices (int): The number of vertices in the graph.
+            compare_times (bool): Whether to fail if loading the serialized
+                graph is slower than unpickling it.
+        """
+        graph = build_experiment_graph(num_vertices)
+        for vertex in graph.get_vertices():
+            vertex.decorate(BenchmarkHost)
+
+        times = {}
+        sizes = {}
+        for label, dumps, loads in (
+            (
+                "serializer",
+                experiment_graph_serializer.dumps,
+                experiment_graph_serializer.loads,
+            ),
+            ("pickle", pickle.dumps, pickle.loads),
+        ):
+            start = timeit.default_timer()
+            data = dumps(graph)
+            dump_time = timeit.default_timer() - start
+            start = timeit.default_timer()
+            loaded = loads(data)
+            times[label] = timeit.default_timer() - start
+            sizes[label] = len(data)
+            print(
+                f"Serializing {num_vertices} vertices with {label}: "
+                f"dump {dump_time:.4f}s, load {times[label]:.4f}s, "
+                f"{len(data)} bytes"
+            )
+            if len(loaded.g) != num_vertices or not all(
+                v.is_decorated_by(BenchmarkHost) for v in loaded.get_vertices()
+            ):
+                pytest.fail(f"Loading the graph with {label} lost vertices.")
+
+        if compare_times and times["serializer"] > times["pickle"]:
+            pytest.fail(
+                "Loading the serialized graph was slower than unpickling it.\n"
+                f"serializer: {times['serializer']} seconds\n"
+                f"pickle: {times['pickle']} seconds"
+            )
+
+    @pytest.mark.parametrize(
+        ("num_vertices", "compare_times"),
+        [(1000, False), pytest.param(2000, True, marks=pytest.mark.long)],
+    )
+    def test_all_pairs_shortest_path(self, num_vertices, compare_times):
+        """
+        Benchmark :py:meth:`ExperimentGraph.filtered_all_pairs_shortest_path`
+        with workers sharing the graph in shared memory, compared with finding the
+        paths with :py:mod:`networkx` in a single process. The times are only
+        compared by the ``long`` benchmark, as they are unreliable on a busy
+        machine.
+
+        Args:
+            num_vertices (int): The number of vertices in the graph.
+            compare_times (bool): Whether to fail if the workers are slower than
+                a single process.
+        """
+        graph = build_experiment_graph(num_vertices)
+
+        times = {}
+        results = {}
+        for num_workers in (0, 2):
+            paths = [0, 0]
+
+            def path_action(_source, _dest, path, paths=paths):
+                paths[0] += 1
+                paths[1] += len(path)
+
+            start = timeit.default_timer()
+            if num_workers:
+                graph.filtered_all_pairs_shortest_path(
+                    vertex_filter=lambda _vertex: True,
+                    path_action=path_action,
+                    num_workers=num_workers,
+                )
+            else:
+                graph._single_process_all_pairs_shortest_path(
+                    lambda _vertex: True, path_action
+                )
+            times[num_workers] = timeit.default_timer() - start
+            results[num_workers] = paths
+            print(
+                f"All pairs shortest path of {num_vertices} vertices with "
+                f"{num_workers} workers: {times[num_workers]:.4f}s"
+            )
+
+        if results[2] != results[0] or results[0][0] != num_vertices**2:
+            pytest.fail("The workers found different paths than a single process.")
+        if compare_times and times[2] > times[0]:
+            pytest.fail(
+                "Finding all pairs shortest paths with workers was slower than with "
+                "a single process.\n"
+                f"workers: {times[2]} seconds\n"
+                f"single process: {times[0]} seconds"
+            )
+
+    @pytest.mark.parametrize(
+        ("num_vertices", "compare_times"),
+        [(1000, False), pytest.param(2000, True, marks=pytest.mark.long)],
+    )
+    def test_compute_next_hops(self, num_vertices, compare_times):
+        """
+        Benchmark :py:meth:`ExperimentGraph.compute_next_hops`, compared with
+        deriving the next hops from the paths found by
+        :py:meth:`ExperimentGraph.filtered_all_pairs_shortest_path`.
+        The times are only compared by the ``long`` benchmark, as they are
+        unreliable on a busy machine.
+
+        Args:
+            num_vertices (int): The number of vertices in the graph.
+            compare_times (bool): Whether to fail if computing the next hops is
+                slower than deriving them from the paths.
+        """
+        graph = build_experiment_graph(num_vertices)
+
+        def vertex_filter(_vertex):
+            return True
+
+        from_paths = {}
+
+        def path_action(source, dest, path):
+            if source != dest:
+                from_paths.setdefault(source, {})[dest] = path[1]
+
+        start = timeit.default_timer()
+        graph.filtered_all_pairs_shortest_path(
+            vertex_filter=vertex_filter, path_action=path_action, num_workers=2
+        )
+        paths_time = timeit.default_timer() - start
+
+        start = timeit.default_timer()
+        next_hops = graph.compute_next_hops(vertex_filter=vertex_filter, num_workers=2)
+        next_hops_time = timeit.default_timer() - start
+
+        print(
+            f"Next hops of {num_vertices} vertices: compute_next_hops "
+            f"{next_hops_time:.4f}s, from paths {paths_time:.4f}s"
+        )
+        if next_hops != from_paths:
+            pytest.fail("compute_next_hops found different next hops than the paths.")
+        if compare_times and next_hops_time > paths_time:
+            pytest.fail(
+                "Computing next hops was slower than deriving them from the paths.\n"
+                f"compute_next_hops: {next_hops_time} seconds\n"
+                f"from paths: {paths_time} seconds"
+            )
+
+    @pytest.mark.parametrize(
+        ("num_vertices", "compare_times"),
+        [(1000, False), pytest.param(3000, True, marks=pytest.mark.long)],
+    )
+    def test_memoized_next_hops(self, num_vertices, compare_times):
+        """
+        Benchmark repeating :py:meth:`ExperimentGraph.compute_next_hops` after
+        connecting new vertices to the graph, which reuses the cached searches,
+        compared with searching the whole graph again. The times are only
+        compared by the ``long`` benchmark, as they are unreliable on a busy
+        machine.
+
+        Args:
+            num_vertices (int): The number of vertices in the graph.
+            compare_times (bool): Whether to fail if reusing the cached searches
+                is not at least twice as fast as searching again.
+        """
+        graph = build_experiment_graph(num_vertices)
+        vertices = list(graph.get_vertices())
+        graph.compute_next_hops()
+
+        rng = random.Random(1)
+        for i in range(20):
+            Edge(Vertex(graph, name=f"leaf{i}.net"), rng.choice(vertices))
+        start = timeit.default_timer()
+        cached = graph.compute_next_hops()
+        cached_time = timeit.default_timer() - start
+
+        graph._search_cache.clear()
+        start = timeit.default_timer()
+        uncached = graph.compute_next_hops()
+        uncached_time = timeit.default_timer() - start
+
+        print(
+            f"Next hops of {num_vertices} vertices after adding 20 leaves: "
+            f"cached {cached_time:.4f}s, uncached {uncached_time:.4f}s"
+        )
+        if cached != uncached:
+            pytest.fail("The cached next hops differ from a new search.")
+        if compare_times and cached_time * 2 > uncached_time:
+            pytest.fail(
+                "Computing next hops with cached searches was not at least twice as "
+                "fast as searching again.\n"
+                f"cached: {cached_time} seconds\n"
+                f"uncached: {uncached_time} seconds"
+            )
+
+    @pytest.mark.parametrize(
+        ("num_vertices", "compare_times"),
+        [
+            (1000, False),
+            (10000, False),
+            pytest.param(100000, True, marks=pytest.mark.long),
+        ],
+    )
+    def test_bulk_construction(self, num_vertices, compare_times):
+        """
+        Benchmark generating a topology with :py:meth:`ExperimentGraph.add_vertices`
+        and :py:meth:`ExperimentGraph.add_edges`, compared with creating and
+        decorating each :py:class:`Vertex` and :py:class:`Edge` in turn. The times
+        are only compared by the ``long`` benchmark, as they are unreliable on a
+        busy machine.
+
+        Args:
+            num_vertices (int): The number of hosts in the topology. There is one
+                switch for every ten hosts.
+            compare_times (bool): Whether to fail if the bulk constructors are
+                slower than creating each vertex and edge in turn.
+        """
+        num_switches = num_vertices // 10
+
+        def one_at_a_time():
+            graph = ExperimentGraph()
+            switches = []
+            for i in range(num_switches):
+                switch = Vertex(graph, name=f"switch{i}.net")
+                switch.decorate(BenchmarkSwitch)
+                switches.append(switch)
+            for i in range(num_vertices):
+                host = Vertex(graph, name=f"host{i}.net")
+                host.decorate(BenchmarkHost)
+                Edge(host, switches[i % num_switches]).decorate(BenchmarkLink)
+            return graph
+
+        def bulk():
+            graph = ExperimentGraph()
+            switches = graph.add_vertices(
+                num_switches, name_fmt="switch{}.net", decorators=[BenchmarkSwitch]
+            )
+            hosts = graph.add_vertices(
+                num_vertices, name_fmt="host{}.net", decorators=[BenchmarkHost]
+            )
+            graph.add_edges(
+                ((host, switches[i % num_switches]) for i, host in enumerate(hosts)),
+                decorators=[BenchmarkLink],
+            )
+            return graph
+
+        times = {}
+        graphs = {}
+        for label, build in (("one at a time", one_at_a_time), ("bulk", bulk)):
+            gc.collect()
+            gc.disable()
+            try:
+                start = timeit.default_timer()
+                graphs[label] = build()
+                times[label] = timeit.default_timer() - start
+            finally:
+                gc.enable()
+            print(f"Generating {num_vertices} hosts {label}: {times[label]:.4f}s")
+
+        single, batched = graphs["one at a time"], graphs["bulk"]
+        if (
+            len(batched.g) != len(single.g)
+            or batched.g.number_of_edges() != single.g.number_of_edges()
+            or next(batched.find_vertex("host1.net").get_neighbors()).name
+            != next(single.find_vertex("host1.net").get_neighbors()).name
+        ):
+            pytest.fail("The bulk constructors built a different graph.")
+        if compare_times and times["bulk"] > times["one at a time"]:
+            pytest.fail(
+                "Generating the graph with the bulk constructors was slower than "
+                "creating each vertex and edge in turn.\n"
+                f"bulk: {times['bulk']} seconds\n"
+                f"one at a time: {times['one at a time']} seconds"
+            )
+
+    @pytest.mark.parametrize(
+        ("num_vertices", "compare_times"),
+        [
+            (1000, False),
+            (10000, False),
+            pytest.param(100000, True, marks=pytest.mark.long),
+        ],
+    )
+    def test_journal_overhead(self, num_vertices, compare_times):
+        """
+        Benchmark generating a topology while an
+        :py:class:`ExperimentGraphJournal
+        <firewheel.control.experiment_graph_journal.ExperimentGraphJournal>`
+        records the changes, compared with generating it without a journal.
+        The times are only compared by the ``long`` benchmark, as they are
+        unreliable on a busy machine.
+
+        Args:
+            num_vertices (int): The number of hosts in the topology. There is one
+                switch for every ten hosts.
+            compare_times (bool): Whether to fail if the journal slows down
+                generating the graph by more than 50%.
+        """
+        num_switches = num_vertices // 10
+
+        def build(journal):
+            graph = ExperimentGraph()
+            if journal:
+                ExperimentGraphJournal(graph)
+            with ExperimentGraphJournal.attribute_to("benchmark"):
+                switches = []
+                for i in range(num_switches):
+                    switch = Vertex(graph, name=f"switch{i}.net")
+                    switch.decorate(BenchmarkSwitch)
+                    switches.append(switch)
+                for i in range(num_vertices):
+                    host = Vertex(graph, name=f"host{i}.net")
+                    host.decorate(BenchmarkHost)
+                    host["ip"] = f"10.{i // 65536}.{i // 256 % 256}.{i % 256}"
+                    Edge(host, switches[i % num_switches]).decorate(BenchmarkLink)
+            return graph
+
+        # The difference is small, so take the best of several interleaved runs.
+        times = {"without a journal": float("inf"), "journaled": float("inf")}
+        summary = None
+        runs = [("without a journal", False), ("journaled", True)]
+        for _ in range(5):
+            runs.reverse()
+            for label, journal in runs:
+                gc.collect()
+                gc.disable()
+                try:
+                    start = timeit.default_timer()
+                    graph = build(journal)
+                    times[label] = min(times[label], timeit.default_timer() - start)
+                finally:
+                    gc.enable()
+                if journal:
+                    summary = graph.journal.summary()
+                # Do not slow down building the next graph
+                del graph
+        for label, seconds in times.items():
+            print(f"Generating {num_vertices} hosts {label}: {seconds:.4f}s")
+
+        if summary["model_components"]["benchmark"]["add_vertex"] != (
+            num_vertices + num_switches
+        ):
+            pytest.fail("The journal did not record every vertex.")
+        # Journaling should be cheap enough to leave on in production.
+        if compare_times and times["journaled"] > times["without a journal"] * 1.5:
+            pytest.fail(
+                "Generating the graph with a journal was more than 50% slower than "
+                "generating it without one.\n"
+                f"journaled: {times['journaled']} seconds\n"
+                f"without a journal: {times['without a journal']} seconds"
+            )
@@ -4,13 +4,21 @@
 from __future__ import annotations
 
 import os
+import shlex
 from pathlib import Path
 from datetime import datetime
 from unittest.mock import Mock, patch
 
 import pytest
 
-from firewheel.lib.minimega.file_store import FileStore, FileStoreFile
+from firewheel.lib.hash_cache import HashCache
+from firewheel.lib.minimega.file_store import (
+    BLOB_STORE,
+    BLOB_HASH_ALGORITHM,
+    FileStore,
+    FileStoreFile,
+    collect_garbage,
+)
 
 
 def _build_filestore(tmp_path: Path) -> FileStore:
@@ -22,6 +30,10 @@ def _build_filestore(tmp_path: Path) -> FileStore:
     store.mm_api = Mock()
     store.cache_base = str(tmp_path)
     store.cache = str(tmp_path / "saved")
+    store.hash_cache = HashCache(db_basepath=str(tmp_path / "db"))
+    store.content_addressed = False
+    store.hash_algorithm = BLOB_HASH_ALGORITHM
+    store._blobs = {}
     return store
 
 
@@ -221,6 +233,30 @@ def test_get_file_hash(tmp_path: Path, monkeypatch) -> None:
     assert value
 
 
+def test_add_file_records_hashes(tmp_path: Path, monkeypatch) -> None:
+    """Verify add_file records the hash of the source and the cached copy."""
+    from firewheel.config import config
+    from firewheel.lib.utilities import hash_file
+
+    monkeypatch.setitem(config["minimega"], "files_dir", str(tmp_path))
+    store = _build_filestore(tmp_path)
+    store.remove_file = Mock()
+    source = tmp_path / "source.txt"
+    source.write_text("payload", encoding="utf-8")
+    os.utime(source, (0, 0))
+    (tmp_path / "saved").mkdir(parents=True, exist_ok=True)
+
+    store.add_file(str(source), force=False)
+    expected = hash_file(str(source), BLOB_HASH_ALGORITHM)
+    assert store.hash_cache.get(str(source), BLOB_HASH_ALGORITHM) == expected
+    saved = str(tmp_path / "saved" / "source.txt")
+    assert store.hash_cache.get(saved, BLOB_HASH_ALGORITHM) == expected
+
+    with patch("firewheel.lib.hash_cache.hash_file") as mock_hash:
+        assert store.get_file_hash("source.txt") == expected
+    mock_hash.assert_not_called()
+
+
 def test_get_file_hash_missing(tmp_path: Path, monkeypatch) -> None:
     """Verify missing cached files produce an empty hash string."""
     from firewheel.config import config
@@ -337,6 +373,47 @@ def test_broadcast_get_file_success() -> None:
     store.mm_api.mm.mesh_send.assert_called()
 
 
+def test_broadcast_get_files() -> None:
+    """Verify every file is requested before waiting once for all transfers."""
+    store = _build_filestore(Path("/tmp"))
+    store.mm_api.get_mesh_size.return_value = 2
+    store._check_mesh_transfers = Mock(return_value=True)
+
+    assert store.broadcast_get_files(["a", "b"]) is True
+    store.mm_api.mm.mesh_send.assert_any_call("all", "file get saved/a")
+    store.mm_api.mm.mesh_send.assert_any_call("all", "file get saved/b")
+    store._check_mesh_transfers.assert_called_once_with(["saved/a", "saved/b"])
+
+
+def test_broadcast_get_files_without_waiting() -> None:
+    """Verify broadcasting without waiting never polls the mesh."""
+    store = _build_filestore(Path("/tmp"))
+    store.mm_api.get_mesh_size.return_value = 2
+    store._check_mesh_transfers = Mock()
+
+    assert store.broadcast_get_files(["a"], wait=False) is True
+    assert store.broadcast_get_files([]) is True
+    store.mm_api.mm.mesh_send.assert_called_once_with("all", "file get saved/a")
+    store._check_mesh_transfers.assert_not_called()
+
+
+def test_check_mesh_transfers_waits_for_every_file() -> None:
+    """Verify polling continues while any of the files is transferring."""
+    store = _build_filestore(Path("/tmp"))
+    store.mm_api.mmr_map.side_effect = [
+        {"host1": [{"filename": "saved/b"}]},
+        {"host1": []},
+    ]
+    store._check_mesh_file_consistency = Mock(
+        return_value={"consistent": True, "exists": True}
+    )
+
+    with patch("firewheel.lib.minimega.file_store.time.sleep"):
+        assert store._check_mesh_transfers(["saved/a", "saved/b"]) is True
+    assert store.mm_api.mmr_map.call_count == 2
+    assert store._check_mesh_file_consistency.call_count == 2
+
+
 def test_add_file_from_content(tmp_path: Path, monkeypatch) -> None:
     """Verify file content is written locally and optionally broadcast."""
     from firewheel.config import config
@@ -369,6 +446,173 @@ def test_add_file(tmp_path: Path, monkeypatch) -> None:
 
     store.add_file(str(source), force=True)
     assert (tmp_path / "saved" / "source.txt").read_text(encoding="utf-8") == "payload"
+    store.mm_api.mm.mesh_send.assert_called_once_with(
+        "all", "file get saved/source.txt"
+    )
+
+    store.mm_api.mm.mesh_send.reset_mock()
+    store.add_file(str(source), force=True, broadcast=False)
+    store.mm_api.mm.mesh_send.assert_not_called()
+
+
+def _build_content_addressed_filestore(tmp_path: Path, name: str) -> FileStore:
+    """Create a content-addressed FileStore for the given store name."""
+    store = _build_filestore(tmp_path)
+    store.store = name
+    store.cache = str(tmp_path / name)
+    store.content_addressed = True
+    store.remove_file = Mock()
+    store.mm_api.get_mesh_size.return_value = 1
+    (tmp_path / name).mkdir(parents=True, exist_ok=True)
+    return store
+
+
+def _write_source(path: Path, content: str) -> Path:
+    """Write a source file with a modification time well in the past."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, (1000000000, 1000000000))
+    return path
+
+
+def test_add_file_content_addressed(tmp_path: Path, monkeypatch) -> None:
+    """Verify identical files in any store share a single blob."""
+    from firewheel.config import config
+
+    monkeypatch.setitem(config["minimega"], "files_dir", str(tmp_path))
+    images = _build_content_addressed_filestore(tmp_path, "images")
+    resources = _build_content_addressed_filestore(tmp_path, "vm_resources")
+
+    images.add_file(str(_write_source(tmp_path / "a" / "agent", "payload")))
+    resources.add_file(str(_write_source(tmp_path / "b" / "agent", "payload")))
+    resources.add_file(str(_write_source(tmp_path / "c" / "other", "different")))
+
+    blob = tmp_path / images._blobs["agent"]
+    assert blob.read_text(encoding="utf-8") == "payload"
+    assert os.path.samefile(blob, tmp_path / "images" / "agent")
+    assert os.path.samefile(blob, tmp_path / "vm_resources" / "agent")
+    assert os.stat(blob).st_nlink == 3
+    assert resources._blobs["other"] != images._blobs["agent"]
+    assert (tmp_path / "vm_resources" / "other").read_text(
+        encoding="utf-8"
+    ) == "different"
+
+
+def test_add_file_content_addressed_skips_copy(tmp_path: Path, monkeypatch) -> None:
+    """Verify a file whose contents are already stored is not copied again."""
+    from firewheel.config import config
+
+    monkeypatch.setitem(config["minimega"], "files_dir", str(tmp_path))
+    store = _build_content_addressed_filestore(tmp_path, "images")
+    source = _write_source(tmp_path / "a" / "image", "payload")
+    store.add_file(str(source), broadcast=False)
+
+    with patch("firewheel.lib.minimega.file_store.copy_and_hash_file") as mock_copy:
+        store.add_file(str(source), broadcast=False)
+        mock_copy.assert_not_called()
+    assert os.path.samefile(
+        tmp_path / store._blobs["image"], tmp_path / "images" / "image"
+    )
+
+
+def test_broadcast_get_files_content_addressed(tmp_path: Path, monkeypatch) -> None:
+    """Verify each blob is transferred once and then linked on every host."""
+    from firewheel.config import config
+
+    monkeypatch.setitem(config["minimega"], "files_dir", str(tmp_path))
+    store = _build_content_addressed_filestore(tmp_path, "images")
+    store.mm_api.get_mesh_size.return_value = 2
+    store._check_mesh_transfers = Mock(return_value=True)
+    for name in ("a", "b"):
+        store.add_file(
+            str(_write_source(tmp_path / "src" / name, "payload")), broadcast=False
+        )
+    blob = store._blobs["a"]
+    assert store._blobs["b"] == blob
+
+    assert store.broadcast_get_files(["a", "b", "plain"], wait=False) is True
+    store._check_mesh_transfers.assert_called_once_with([blob, "images/plain"])
+    commands = [call.args[1] for call in store.mm_api.mm.mesh_send.call_args_list]
+    assert commands[:2] == [f"file get {blob}", "file get images/plain"]
+    assert commands[-2:] == [
+        f"shell ln -f {tmp_path / blob} {tmp_path / 'images' / 'a'}",
+        f"shell ln -f {tmp_path / blob} {tmp_path / 'images' / 'b'}",
+    ]
+
+    store.mm_api.mm.mesh_send.reset_mock()
+    store._check_mesh_transfers.return_value = False
+    assert store.broadcast_get_files(["a"]) is False
+    store.mm_api.mm.mesh_send.assert_called_once_with("all", f"file get {blob}")
+
+
+@pytest.mark.parametrize(
+    ("algorithm", "expected"),
+    [("blake2b-tree", "blake2b-tree"), ("sha1", BLOB_HASH_ALGORITHM)],
+)
+def test_hash_algorithm(tmp_path: Path, monkeypatch, algorithm, expected) -> None:
+    """Verify files are hashed with the hash cache's algorithm, except SHA1."""
+    from firewheel.config import config
+
+    monkeypatch.setitem(config["minimega"], "files_dir", str(tmp_path))
+    with patch("firewheel.lib.minimega.file_store.minimegaAPI"):
+        store = FileStore(
+            "images",
+            hash_cache=HashCache(db_basepath=str(tmp_path / "db"), algorithm=algorithm),
+        )
+    assert store.hash_algorithm == expected
+
+
+def test_add_file_content_addressed_keeps_blob(tmp_path: Path, monkeypatch) -> None:
+    """Verify replacing a file which is linked to a blob leaves the blob intact."""
+    from firewheel.config import config
+
+    monkeypatch.setitem(config["minimega"], "files_dir", str(tmp_path))
+    store = _build_content_addressed_filestore(tmp_path, "images")
+    store.add_file(str(_write_source(tmp_path / "a" / "image", "old")))
+    old_blob = tmp_path / store._blobs["image"]
+    assert old_blob.parent.parent == tmp_path / BLOB_STORE / BLOB_HASH_ALGORITHM
+
+    store.add_file(str(_write_source(tmp_path / "b" / "image", "new")), force=False)
+    assert old_blob.read_text(encoding="utf-8") == "old"
+    assert (tmp_path / "images" / "image").read_text(encoding="utf-8") == "new"
+    assert not os.path.samefile(old_blob, tmp_path / "images" / "image")
+    assert os.listdir(tmp_path / "images") == ["image"]
+
+
+def test_broadcast_links_quotes_paths(tmp_path: Path, monkeypatch) -> None:
+    """Verify filenames are quoted in the shell commands sent to the mesh."""
+    from firewheel.config import config
+
+    monkeypatch.setitem(config["minimega"], "files_dir", str(tmp_path))
+    store = _build_content_addressed_filestore(tmp_path, "images")
+    filename = 'a "b"; touch c'
+    assert store._broadcast_links({filename: "blobs/blob"}) is True
+    command = store.mm_api.mm.mesh_send.call_args.args[1]
+    assert command.startswith("shell ")
+    assert shlex.split(command[len("shell ") :]) == [
+        "ln",
+        "-f",
+        str(tmp_path / "blobs" / "blob"),
+        str(tmp_path / "images" / filename),
+    ]
+
+
+def test_collect_garbage(tmp_path: Path, monkeypatch) -> None:
+    """Verify only blobs without any remaining files are removed."""
+    from firewheel.config import config
+
+    monkeypatch.setitem(config["minimega"], "files_dir", str(tmp_path))
+    store = _build_content_addressed_filestore(tmp_path, "vm_resources")
+    for name in ("kept", "removed"):
+        store.add_file(str(_write_source(tmp_path / "src" / name, name)))
+    os.remove(tmp_path / "vm_resources" / "removed")
+
+    assert collect_garbage(dry_run=True) == (1, len("removed"))
+    assert (tmp_path / store._blobs["removed"]).exists()
+    assert collect_garbage(str(tmp_path)) == (1, len("removed"))
+    assert not (tmp_path / store._blobs["removed"]).exists()
+    assert (tmp_path / store._blobs["kept"]).exists()
+    assert collect_garbage() == (0, 0)
 
 
 def test_remove_file() -> None:
@@ -687,7 +931,7 @@ def test_add_file_raises_on_copy_failure(tmp_path: Path, monkeypatch) -> None:
     (tmp_path / "saved").mkdir(parents=True, exist_ok=True)
 
     with patch(
-        "firewheel.lib.minimega.file_store.shutil.copy2",
+        "firewheel.lib.minimega.file_store.copy_and_hash_file",
         side_effect=OSError("copy fail"),
     ):
         with pytest.raises(OSError):
@@ -0,0 +1,272 @@
+# test_lib_hash_cache.py
+"""Unit tests for :mod:`firewheel.lib.hash_cache`."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from firewheel.lib.utilities import hash_file
+from firewheel.lib.hash_cache import HashCache
+
+
+def _write_file(path: Path, content: bytes) -> None:
+    """Write a file with a modification time well in the past."""
+    path.write_bytes(content)
+    os.utime(path, (1000000000, 1000000000))
+
+
+def test_hash_file_is_cached(tmp_path: Path) -> None:
+    """Verify an unchanged file is only read once, even by a new cache."""
+    data = tmp_path / "data.bin"
+    _write_file(data, b"abcdef")
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+
+    assert cache.hash_file(str(data)) == hash_file(str(data), cache.algorithm)
+
+
+def test_algorithm_setting(tmp_path: Path, monkeypatch) -> None:
+    """Verify files are hashed with the configured algorithm by default."""
+    from firewheel.config import config
+
+    data = tmp_path / "data.bin"
+    _write_file(data, b"abcdef")
+    monkeypatch.setitem(config["system"], "hash_algorithm", "blake2b-tree")
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+    assert cache.algorithm == "blake2b-tree"
+    assert cache.hash_file(str(data)) == hash_file(str(data), "blake2b-tree")
+    assert cache.get(str(data)) == hash_file(str(data), "blake2b-tree")
+
+    sha1 = HashCache(db_basepath=str(tmp_path / "db"), algorithm="sha1")
+    assert sha1.hash_file(str(data)) == hash_file(str(data))
+
+    monkeypatch.setitem(config["system"], "hash_algorithm", "md5")
+    with pytest.raises(ValueError, match="md5"):
+        HashCache(db_basepath=str(tmp_path / "db"))
+    cache.flush()
+    with patch("firewheel.lib.hash_cache.hash_file") as mock_hash:
+        assert cache.hash_file(str(data)) == hash_file(str(data), cache.algorithm)
+
+
+def test_algorithm_setting(tmp_path: Path, monkeypatch) -> None:
+    """Verify files are hashed with the configured algorithm by default."""
+    from firewheel.config import config
+
+    data = tmp_path / "data.bin"
+    _write_file(data, b"abcdef")
+    monkeypatch.setitem(config["system"], "hash_algorithm", "blake2b-tree")
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+    assert cache.algorithm == "blake2b-tree"
+    assert cache.hash_file(str(data)) == hash_file(str(data), "blake2b-tree")
+    assert cache.get(str(data)) == hash_file(str(data), "blake2b-tree")
+
+    sha1 = HashCache(db_basepath=str(tmp_path / "db"), algorithm="sha1")
+    assert sha1.hash_file(str(data)) == hash_file(str(data))
+
+    monkeypatch.setitem(config["system"], "hash_algorithm", "md5")
+    with pytest.raises(ValueError, match="md5"):
+        HashCache(db_basepath=str(tmp_path / "db"))
+        reloaded = HashCache(db_basepath=str(tmp_path / "db"))
+        assert reloaded.hash_file(str(data)) == hash_file(str(data), cache.algorithm)
+    mock_hash.assert_not_called()
+
+
+def test_changed_file_is_rehashed(tmp_path: Path) -> None:
+    """Verify a change to the size or modification time invalidates the hash."""
+    data = tmp_path / "data.bin"
+    _write_file(data, b"abcdef")
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+    first = cache.hash_file(str(data))
+
+    _write_file(data, b"abcdefg")
+    assert cache.get(str(data)) is None
+    second = cache.hash_file(str(data))
+    assert second != first
+
+    os.utime(data, (1000000001, 1000000001))
+    assert cache.get(str(data)) is None
+
+
+def test_replaced_file_is_rehashed(tmp_path: Path) -> None:
+    """Verify a file replaced with identical size and mtime is rehashed."""
+    data = tmp_path / "data.bin"
+    _write_file(data, b"abcdef")
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+    cache.hash_file(str(data))
+
+    # Keep the original file so that its inode is not reused.
+    os.rename(data, tmp_path / "old.bin")
+    _write_file(data, b"ghijkl")
+    assert cache.get(str(data)) is None
+    assert cache.hash_file(str(data)) == hash_file(str(data), cache.algorithm)
+
+
+def test_algorithm_setting(tmp_path: Path, monkeypatch) -> None:
+    """Verify files are hashed with the configured algorithm by default."""
+    from firewheel.config import config
+
+    data = tmp_path / "data.bin"
+    _write_file(data, b"abcdef")
+    monkeypatch.setitem(config["system"], "hash_algorithm", "blake2b-tree")
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+    assert cache.algorithm == "blake2b-tree"
+    assert cache.hash_file(str(data)) == hash_file(str(data), "blake2b-tree")
+    assert cache.get(str(data)) == hash_file(str(data), "blake2b-tree")
+
+    sha1 = HashCache(db_basepath=str(tmp_path / "db"), algorithm="sha1")
+    assert sha1.hash_file(str(data)) == hash_file(str(data))
+
+    monkeypatch.setitem(config["system"], "hash_algorithm", "md5")
+    with pytest.raises(ValueError, match="md5"):
+        HashCache(db_basepath=str(tmp_path / "db"))
+
+
+def test_recently_modified_file_not_cached(tmp_path: Path) -> None:
+    """Verify hashes of files modified moments ago are not recorded."""
+    data = tmp_path / "data.bin"
+    data.write_bytes(b"abcdef")
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+
+    cache.hash_file(str(data))
+    assert cache.get(str(data)) is None
+
+
+def test_put_with_stale_signature(tmp_path: Path) -> None:
+    """Verify a hash is not recorded if the file changed while being hashed."""
+    data = tmp_path / "data.bin"
+    _write_file(data, b"abcdef")
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+    signature = cache.get_signature(str(data))
+
+    _write_file(data, b"abcdefg")
+    cache.put(str(data), "stale", signature)
+    assert cache.get(str(data)) is None
+
+
+def test_max_entries_and_clear(tmp_path: Path) -> None:
+    """Verify the oldest hashes are discarded and the cache can be cleared."""
+    cache = HashCache(db_basepath=str(tmp_path / "db"), max_entries=2)
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"data{index}.bin"
+        _write_file(path, bytes([index]))
+        cache.hash_file(str(path))
+        paths.append(str(path))
+
+    assert cache.get(paths[0]) is None
+    assert cache.get(paths[1]) is not None
+    assert cache.get(paths[2]) is not None
+
+    cache.clear()
+    assert not cache.cache_file.exists()
+    assert cache.get(paths[2]) is None
+
+
+def test_corrupt_cache_file(tmp_path: Path) -> None:
+    """Verify an unreadable cache file is discarded."""
+    data = tmp_path / "data.bin"
+    _write_file(data, b"abcdef")
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+    cache.cache_file.parent.mkdir(parents=True)
+    cache.cache_file.write_text("{corrupt", encoding="utf8")
+
+    assert cache.get(str(data)) is None
+    assert cache.hash_file(str(data)) == hash_file(str(data), cache.algorithm)
+
+
+def test_algorithm_setting(tmp_path: Path, monkeypatch) -> None:
+    """Verify files are hashed with the configured algorithm by default."""
+    from firewheel.config import config
+
+    data = tmp_path / "data.bin"
+    _write_file(data, b"abcdef")
+    monkeypatch.setitem(config["system"], "hash_algorithm", "blake2b-tree")
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+    assert cache.algorithm == "blake2b-tree"
+    assert cache.hash_file(str(data)) == hash_file(str(data), "blake2b-tree")
+    assert cache.get(str(data)) == hash_file(str(data), "blake2b-tree")
+
+    sha1 = HashCache(db_basepath=str(tmp_path / "db"), algorithm="sha1")
+    assert sha1.hash_file(str(data)) == hash_file(str(data))
+
+    monkeypatch.setitem(config["system"], "hash_algorithm", "md5")
+    with pytest.raises(ValueError, match="md5"):
+        HashCache(db_basepath=str(tmp_path / "db"))
+    cache.flush()
+    assert HashCache(db_basepath=str(tmp_path / "db")).get(str(data)) is not None
+
+
+def test_put_is_batched(tmp_path: Path) -> None:
+    """Verify recorded hashes are written to disk once, when flushed."""
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+    paths = []
+    for index in range(5):
+        path = tmp_path / f"data{index}.bin"
+        _write_file(path, bytes([index]))
+        paths.append(str(path))
+
+    with patch.object(cache, "_save", wraps=cache._save) as mock_save:
+        for path in paths:
+            cache.hash_file(path)
+        assert not cache.cache_file.exists()
+        assert all(cache.get(path) is not None for path in paths)
+        cache.flush()
+        cache.flush()
+    mock_save.assert_called_once()
+
+    reloaded = HashCache(db_basepath=str(tmp_path / "db"))
+    assert all(reloaded.get(path) is not None for path in paths)
+
+
+def test_flush_merges_other_processes(tmp_path: Path) -> None:
+    """Verify flushing keeps the hashes written by another cache."""
+    first, second = tmp_path / "first.bin", tmp_path / "second.bin"
+    _write_file(first, b"first")
+    _write_file(second, b"second")
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+    other = HashCache(db_basepath=str(tmp_path / "db"))
+
+    cache.hash_file(str(first))
+    other.hash_file(str(second))
+    other.flush()
+    cache.flush()
+
+    reloaded = HashCache(db_basepath=str(tmp_path / "db"))
+    assert reloaded.get(str(first)) is not None
+    assert reloaded.get(str(second)) is not None
+
+
+def test_algorithm_recorded(tmp_path: Path) -> None:
+    """Verify a hash is only reused for the algorithm which produced it."""
+    data = tmp_path / "data.bin"
+    _write_file(data, b"abcdef")
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+
+    tree = cache.hash_file(str(data), "blake2b-tree")
+    assert tree == hash_file(str(data), "blake2b-tree")
+    assert cache.get(str(data), "blake2b-tree") == tree
+    assert cache.get(str(data)) is None
+    assert cache.hash_file(str(data)) == hash_file(str(data), cache.algorithm)
+
+
+def test_algorithm_setting(tmp_path: Path, monkeypatch) -> None:
+    """Verify files are hashed with the configured algorithm by default."""
+    from firewheel.config import config
+
+    data = tmp_path / "data.bin"
+    _write_file(data, b"abcdef")
+    monkeypatch.setitem(config["system"], "hash_algorithm", "blake2b-tree")
+    cache = HashCache(db_basepath=str(tmp_path / "db"))
+    assert cache.algorithm == "blake2b-tree"
+    assert cache.hash_file(str(data)) == hash_file(str(data), "blake2b-tree")
+    assert cache.get(str(data)) == hash_file(str(data), "blake2b-tree")
+
+    sha1 = HashCache(db_basepath=str(tmp_path / "db"), algorithm="sha1")
+    assert sha1.hash_file(str(data)) == hash_file(str(data))
+
+    monkeypatch.setitem(config["system"], "hash_algorithm", "md5")
+    with pytest.raises(ValueError, match="md5"):
+        HashCache(db_basepath=str(tmp_path / "db"))
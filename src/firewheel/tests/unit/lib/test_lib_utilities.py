@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import io
+import random
 import tarfile
 import tempfile
 from pathlib import Path
@@ -13,15 +14,18 @@ import pytest
 from rich.console import Console
 
 from firewheel.lib.utilities import (
+    HASH_BLOCK_SIZE,
     retry,
     badlink,
     badpath,
     hash_file,
     strtobool,
     print_error,
+    parse_digest,
     print_reused,
     print_success,
     print_result_card,
+    copy_and_hash_file,
     copyfile_if_needed,
     copytree_if_needed,
     print_phase_header,
@@ -319,6 +323,68 @@ def test_hash_file(tmp_path: Path) -> None:
     assert first
 
 
+def test_copy_and_hash_file(tmp_path: Path) -> None:
+    """Verify copying a file returns its hash and preserves its metadata."""
+    source = tmp_path / "source.bin"
+    source.write_bytes(b"abcdef" * 500000)
+    destination = tmp_path / "destination.bin"
+
+    assert copy_and_hash_file(str(source), str(destination)) == hash_file(str(source))
+    assert destination.read_bytes() == source.read_bytes()
+    assert destination.stat().st_mtime_ns == source.stat().st_mtime_ns
+
+
+@pytest.mark.parametrize(
+    "size", [0, 1, HASH_BLOCK_SIZE, HASH_BLOCK_SIZE + 1, 2 * HASH_BLOCK_SIZE + 12345]
+)
+def test_hash_file_backends(tmp_path: Path, size: int) -> None:
+    """Verify each backend is consistent regardless of how the file is read."""
+    file_path = tmp_path / "data.bin"
+    file_path.write_bytes(random.Random(size).randbytes(size))
+
+    sha1 = hash_file(str(file_path))
+    assert hash_file(str(file_path), use_mmap=True) == sha1
+    assert parse_digest(sha1) == ("sha1", sha1)
+
+    blake2b = hash_file(str(file_path), "blake2b")
+    assert blake2b.startswith("blake2b:")
+    assert hash_file(str(file_path), "blake2b", use_mmap=True) == blake2b
+
+    tree = hash_file(str(file_path), "blake2b-tree")
+    algorithm, digest = parse_digest(tree)
+    assert algorithm == "blake2b-tree"
+    assert len(digest) == 64
+    assert hash_file(str(file_path), "blake2b-tree", use_mmap=True) == tree
+    assert hash_file(str(file_path), "blake2b-tree", workers=4) == tree
+
+    copy = tmp_path / "copy.bin"
+    assert copy_and_hash_file(str(file_path), str(copy), "blake2b-tree") == tree
+
+
+def test_hash_file_tree_detects_changes(tmp_path: Path) -> None:
+    """Verify changing any leaf or the length changes the tree hash."""
+    data = bytearray(2 * HASH_BLOCK_SIZE)
+    file_path = tmp_path / "data.bin"
+    file_path.write_bytes(data)
+    original = hash_file(str(file_path), "blake2b-tree", workers=2)
+
+    data[HASH_BLOCK_SIZE] = 1
+    file_path.write_bytes(data)
+    assert hash_file(str(file_path), "blake2b-tree", workers=2) != original
+
+    file_path.write_bytes(bytes(2 * HASH_BLOCK_SIZE + 1))
+    assert hash_file(str(file_path), "blake2b-tree", workers=2) != original
+
+
+def test_hash_file_unknown_algorithm(tmp_path: Path) -> None:
+    """Verify an unknown algorithm raises a ValueError."""
+    file_path = tmp_path / "data.bin"
+    file_path.write_bytes(b"abcdef")
+
+    with pytest.raises(ValueError):
+        hash_file(str(file_path), "md4")
+
+
 def test_retry_success_after_retries() -> None:
     """Verify retry decorator retries transient failures and succeeds."""
     calls = {"count": 0}